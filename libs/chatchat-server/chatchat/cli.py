@@ -62,6 +62,8 @@ def init(
 
     Settings.createl_all_templates()
     Settings.set_auto_reload(True)
+    # 重新加载刚写入的配置文件，使模型路由等按修改后的配置建立
+    Settings.reload()
 
     logger.success("生成默认配置文件：成功。")
     logger.success("请先检查确认 model_settings.yaml 里模型平台、LLM模型和Embed模型信息已经正确")
@@ -50,6 +50,10 @@ def worker(args: dict):
             folder2db(
                 kb_names=args.get("kb_name"), mode="increment", embed_model=args.get("embed_model")
             )
+        elif args.get("sync"):
+            folder2db(
+                kb_names=args.get("kb_name"), mode="sync", embed_model=args.get("embed_model")
+            )
         elif args.get("prune_db"):
             prune_db_docs(args.get("kb_name"))
         elif args.get("prune_folder"):
@@ -107,6 +111,17 @@ def worker(args: dict):
             """
         ),
 )
+@click.option(
+        "-s",
+        "--sync",
+        is_flag=True,
+        help=(
+            """
+            synchronize vector store with local folder incrementally.
+            only new or changed files (by mtime/size/content hash) are vectorized, vectors of files removed from local folder are deleted.
+            """
+        ),
+)
 @click.option(
         "--prune-db",
         is_flag=True,
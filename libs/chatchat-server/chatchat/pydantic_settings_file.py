@@ -2,11 +2,13 @@ from __future__ import annotations
 
 from functools import cached_property
 from io import StringIO
+import logging
 import os
 from pathlib import Path
+import threading
+import time
 import typing as t
 
-from memoization import cached, CachingAlgorithmFlag
 from pydantic import BaseModel, Field, ConfigDict, computed_field
 from pydantic_settings import BaseSettings, PydanticBaseSettingsSource, YamlConfigSettingsSource, SettingsConfigDict
 import ruamel.yaml
@@ -15,7 +17,10 @@ from ruamel.yaml.comments import CommentedBase, TaggedScalar
 
 __all__ = ["YamlTemplate", "MyBaseModel", "BaseFileSettings", "Field",
            "SubModelComment", "SettingsConfigDict",
-           "computed_field", "cached_property", "settings_property"]
+           "computed_field", "cached_property", "settings_property", "get_settings_watcher"]
+
+
+logger = logging.getLogger(__name__)
 
 
 def import_yaml() -> ruamel.yaml.YAML:
@@ -231,25 +236,112 @@ def _lazy_load_key(settings: BaseSettings):
     for n in ["env_file", "json_file", "yaml_file", "toml_file"]:
         key = None
         if file := settings.model_config.get(n):
-            if os.path.isfile(file) and os.path.getsize(file) > 0:
-                key = int(os.path.getmtime(file))
+            try:
+                stat = os.stat(file)
+            except OSError:
+                stat = None
+            if stat is not None and stat.st_size > 0:
+                key = (stat.st_mtime_ns, stat.st_size)
         keys.append(key)
     return tuple(keys)
 
 
 _T = t.TypeVar("_T", bound=BaseFileSettings)
 
-@cached(max_size=1, algorithm=CachingAlgorithmFlag.LRU, thread_safe=True, custom_key_maker=_lazy_load_key)
-def _cached_settings(settings: _T) -> _T:
+
+class SettingsSnapshot(t.Generic[_T]):
+    """某一配置类的当前实例。配置文件变化后整体替换为新解析的实例，已取得旧实例的代码不受影响"""
+
+    def __init__(self, settings: _T):
+        self.settings = settings
+        self.key = _lazy_load_key(settings)
+        self.pending_key = None
+        self.pending_since = 0.0
+
+
+class SettingsWatcher:
     """
-    the sesstings is cached, and refreshed when configuration files changed
+    在后台线程中轮询配置文件，文件变化并稳定 debounce 秒后重新解析，替换对应的配置实例。
+    读取配置时只返回内存中的实例，不访问文件系统。
     """
-    if settings.auto_reload:
-        settings.__init__()
-    return settings
+
+    def __init__(self, interval: float = 1.0, debounce: float = 0.5):
+        self.interval = interval
+        self.debounce = debounce
+        self._snapshots: t.List[SettingsSnapshot] = []
+        self._lock = threading.Lock()
+        self._thread: t.Optional[threading.Thread] = None
+        if hasattr(os, "register_at_fork"):
+            # 子进程中没有父进程的线程，首次读取配置时重新启动
+            os.register_at_fork(after_in_child=self._reset_after_fork)
+
+    def _reset_after_fork(self):
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def register(self, settings: _T) -> SettingsSnapshot[_T]:
+        snapshot = SettingsSnapshot(settings)
+        self._snapshots.append(snapshot)
+        return snapshot
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="settings-watcher", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.check()
+            except Exception:
+                logger.exception("failed to check configuration files")
+
+    def check(self, force: bool = False) -> t.List[SettingsSnapshot]:
+        """
+        检查一遍配置文件，返回重新加载的配置。force=True 时不等待文件稳定，立即重新加载。
+        auto_reload 为 False 的配置不重新加载，恢复后再加载期间的修改。
+        """
+        reloaded = []
+        now = time.monotonic()
+        for snapshot in self._snapshots:
+            key = _lazy_load_key(snapshot.settings)
+            if key == snapshot.key or not snapshot.settings.auto_reload:
+                snapshot.pending_key = None
+                continue
+            if key != snapshot.pending_key:
+                snapshot.pending_key, snapshot.pending_since = key, now
+            if not force and now - snapshot.pending_since < self.debounce:
+                continue  # 文件可能还在写入
+            self._reload(snapshot, key)
+            reloaded.append(snapshot)
+        return reloaded
+
+    def _reload(self, snapshot: SettingsSnapshot, key: t.Tuple):
+        old = snapshot.settings
+        snapshot.key, snapshot.pending_key = key, None  # 解析失败时等到文件再次修改才重试
+        try:
+            new = old.__class__()
+        except Exception:
+            logger.exception(f"failed to reload {old.__class__.__name__}, keep using the previous settings")
+            return
+        new.auto_reload = old.auto_reload
+        snapshot.settings = new
+
+
+_settings_watcher = SettingsWatcher()
+
+
+def get_settings_watcher() -> SettingsWatcher:
+    return _settings_watcher
 
 
 def settings_property(settings: _T):
+    snapshot = _settings_watcher.register(settings)
+
     def wrapper(self) -> _T:
-        return _cached_settings(settings)
+        if _settings_watcher._thread is None:
+            _settings_watcher.start()
+        return snapshot.settings
     return property(wrapper)
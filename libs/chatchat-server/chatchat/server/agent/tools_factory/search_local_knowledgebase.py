@@ -10,27 +10,39 @@ from langchain_chatchat.agent_toolkits.all_tools.tool import (
     BaseToolOutput,
 )
 from chatchat.server.knowledge_base.kb_api import list_kbs
-from chatchat.server.knowledge_base.kb_doc_api import search_docs
+from chatchat.server.knowledge_base.kb_doc_api import federated_search_docs, search_docs
 from chatchat.server.pydantic_v1 import Field
 from chatchat.server.utils import get_tool_config
 
 template = (
     "Use local knowledgebase from one or more of these:\n{KB_info}\n to get information，Only local data on "
-    "this knowledge use this tool. The 'database' should be one of the above [{key}]."
+    "this knowledge use this tool. The 'database' should be one of the above [{key}]. "
+    "To search several of them at once, join their names with commas."
 )
 KB_info_str = "\n".join([f"{key}: {value}" for key, value in Settings.kb_settings.KB_INFO.items()])
 template_knowledge = template.format(KB_info=KB_info_str, key="samples")
 
 
 def search_knowledgebase(query: str, database: str, config: dict):
-    docs = search_docs(
-        query=query,
-        knowledge_base_name=database,
-        top_k=config["top_k"],
-        score_threshold=config["score_threshold"],
-        file_name="",
-        metadata={},
-    )
+    databases = [x.strip() for x in database.split(",") if x.strip()]
+    if len(databases) > 1:
+        # 一次调用并发检索多个知识库，避免 Agent 逐个调用
+        docs = federated_search_docs(
+            query=query,
+            knowledge_base_names=databases,
+            top_k=config["top_k"],
+            score_threshold=config["score_threshold"],
+            timeout=Settings.kb_settings.KB_SEARCH_TIMEOUT,
+        )
+    else:
+        docs = search_docs(
+            query=query,
+            knowledge_base_name=database,
+            top_k=config["top_k"],
+            score_threshold=config["score_threshold"],
+            file_name="",
+            metadata={},
+        )
     return {"knowledge_base": database, "docs": docs}
 
 
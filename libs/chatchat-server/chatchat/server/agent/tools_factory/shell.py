@@ -9,7 +9,7 @@ from langchain_chatchat.agent_toolkits.all_tools.tool import (
     BaseToolOutput,
 )
 
-@regist_tool(title="系统命令")
+@regist_tool(title="系统命令", concurrent=False)
 def shell(query: str = Field(description="The command to execute")):
     """Use Shell to execute system shell commands"""
     tool = ShellTool()
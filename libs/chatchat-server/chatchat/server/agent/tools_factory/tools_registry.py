@@ -75,16 +75,20 @@ def regist_tool(
     return_direct: bool = False,
     args_schema: Optional[Type[BaseModel]] = None,
     infer_schema: bool = True,
+    concurrent: bool = True,
 ) -> Union[Callable, BaseTool]:
     """
     wrapper of langchain tool decorator
     add tool to regstiry automatically
+    concurrent=False: 有副作用的工具，不与同一步骤中的其它工具调用并发执行
     """
 
     def _parse_tool(t: BaseTool):
         nonlocal description, title
 
         _TOOLS_REGISTRY[t.name] = t
+        if not concurrent:
+            t.metadata = {**(t.metadata or {}), "concurrent": False}
 
         # change default description
         if not description:
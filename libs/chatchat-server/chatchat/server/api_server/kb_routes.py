@@ -12,6 +12,7 @@ from chatchat.server.knowledge_base.kb_api import create_kb, delete_kb, list_kbs
 from chatchat.server.knowledge_base.kb_doc_api import (
     delete_docs,
     download_doc,
+    federated_search_docs,
     list_files,
     recreate_vector_store,
     search_docs,
@@ -26,7 +27,14 @@ from chatchat.server.knowledge_base.kb_summary_api import (
     summary_file_to_vector_store,
 )
 from chatchat.server.utils import BaseResponse, ListResponse
-from chatchat.server.knowledge_base.kb_cache.faiss_cache import memo_faiss_pool
+from chatchat.server.embed_health import get_embed_health_monitor
+from chatchat.server.knowledge_base.kb_cache.embedding_cache import get_embedding_cache
+from chatchat.server.knowledge_base.kb_cache.query_embedding import query_embedding_stats as _query_embedding_stats
+from chatchat.server.knowledge_base.kb_cache.search_cache import get_search_cache
+from chatchat.server.knowledge_base.kb_cache.faiss_cache import (
+    kb_faiss_pool,
+    memo_faiss_pool,
+)
 
 
 kb_router = APIRouter(prefix="/knowledge_base", tags=["Knowledge Base Management"])
@@ -52,6 +60,7 @@ async def kb_chat_endpoint(
         query=body.messages[-1]["content"],
         mode=mode,
         kb_name=param,
+        kb_names=extra.get("kb_names", []),
         top_k=extra.get("top_k", Settings.kb_settings.VECTOR_SEARCH_TOP_K),
         score_threshold=extra.get("score_threshold", Settings.kb_settings.SCORE_THRESHOLD),
         history=body.messages[:-1],
@@ -86,6 +95,10 @@ kb_router.post("/search_docs", response_model=List[dict], summary="搜索知识
     search_docs
 )
 
+kb_router.post(
+    "/federated_search_docs", response_model=List[dict], summary="同时搜索多个知识库，合并排序结果"
+)(federated_search_docs)
+
 kb_router.post(
     "/upload_docs",
     response_model=BaseResponse,
@@ -123,6 +136,39 @@ kb_router.post("/search_temp_docs", summary="检索临时知识库")(
 #     return list(memo_faiss_pool.keys())
 
 
+@kb_router.get("/vs_cache_stats", response_model=BaseResponse, summary="获取 FAISS 向量库缓存池状态")
+def vs_cache_stats() -> BaseResponse:
+    kb_faiss_pool.expire_idle()  # 顺便释放已经超时的向量库
+    return BaseResponse(data={
+        "kb_faiss_pool": kb_faiss_pool.stats(),
+        "memo_faiss_pool": memo_faiss_pool.stats(),
+    })
+
+
+@kb_router.get("/embedding_cache_stats", response_model=BaseResponse, summary="获取文本向量缓存的命中情况")
+def embedding_cache_stats() -> BaseResponse:
+    if (cache := get_embedding_cache()) is None:
+        return BaseResponse(code=404, msg="未启用文本向量缓存")
+    return BaseResponse(data=cache.stats())
+
+
+@kb_router.get("/query_embedding_stats", response_model=BaseResponse, summary="获取各嵌入模型查询向量的缓存命中率及合并请求情况")
+def query_embedding_stats() -> BaseResponse:
+    return BaseResponse(data=_query_embedding_stats())
+
+
+@kb_router.get("/search_cache_stats", response_model=BaseResponse, summary="获取知识库检索结果缓存的命中率及节省的检索时间")
+def search_cache_stats() -> BaseResponse:
+    if (cache := get_search_cache()) is None:
+        return BaseResponse(code=404, msg="未启用检索结果缓存")
+    return BaseResponse(data=cache.stats())
+
+
+@kb_router.get("/embed_health", response_model=BaseResponse, summary="获取各嵌入模型最近一次可用性检查的结果")
+def embed_health() -> BaseResponse:
+    return BaseResponse(data=get_embed_health_monitor().stats())
+
+
 summary_router = APIRouter(prefix="/kb_summary_api")
 summary_router.post(
     "/summary_file_to_vector_store", summary="单个知识库根据文件名称摘要"
@@ -32,6 +32,8 @@ from chatchat.server.db.repository.mcp_connection_repository import (
     reset_mcp_profile,
     delete_mcp_profile,
 )
+from chatchat.server.mcp_sessions import get_mcp_session_manager
+from chatchat.server.types.server.response.base import BaseResponse
 from chatchat.utils import build_logger
 
 
@@ -227,6 +229,7 @@ async def create_mcp_connection(connection_data: MCPConnectionCreate):
             config=connection_data.config,
         )
         
+        get_mcp_session_manager().invalidate()
         connection = get_mcp_connection_by_id(connection_id)
         logger.info(f"成功创建 MCP 连接: {connection_data.server_name}, ID: {connection_id}")
         return MCPConnectionResponse(
@@ -360,6 +363,7 @@ async def update_mcp_connection_by_id(
         )
         
         if updated_id:
+            get_mcp_session_manager().invalidate()
             connection = get_mcp_connection_by_id(connection_id)
             logger.info(f"成功更新 MCP 连接: {connection_id}")
             return MCPConnectionStatusResponse(
@@ -404,6 +408,7 @@ async def delete_mcp_connection_by_id(connection_id: str):
         
         success = delete_mcp_connection(connection_id)
         if success:
+            get_mcp_session_manager().invalidate()
             logger.info(f"成功删除 MCP 连接: {connection_id}")
             return MCPConnectionStatusResponse(
                 success=True,
@@ -443,6 +448,7 @@ async def enable_mcp_connection_endpoint(connection_id: str):
         
         success = enable_mcp_connection(connection_id)
         if success:
+            get_mcp_session_manager().invalidate()
             logger.info(f"成功启用 MCP 连接: {connection_id}")
             return MCPConnectionStatusResponse(
                 success=True,
@@ -482,6 +488,7 @@ async def disable_mcp_connection_endpoint(connection_id: str):
         
         success = disable_mcp_connection(connection_id)
         if success:
+            get_mcp_session_manager().invalidate()
             logger.info(f"成功禁用 MCP 连接: {connection_id}")
             return MCPConnectionStatusResponse(
                 success=True,
@@ -614,4 +621,11 @@ async def list_enabled_mcp_connections():
 
 
 
-# MCP Profile 相关路由已移至文件开头以避免路由冲突
\ No newline at end of file
+# MCP Profile 相关路由已移至文件开头以避免路由冲突
+
+@mcp_router.get("/sessions/status", summary="获取 MCP 会话状态", response_model=BaseResponse)
+async def get_mcp_sessions_status():
+    """
+    获取各 MCP 服务器会话的连接状态及工具列表
+    """
+    return BaseResponse.success(get_mcp_session_manager().stats())
@@ -2,12 +2,13 @@ from __future__ import annotations
 
 import asyncio
 import base64
+import operator
 import os
 import shutil
 from contextlib import asynccontextmanager
 from datetime import datetime
 from pathlib import Path
-from typing import AsyncGenerator, Dict, Iterable, Tuple
+from typing import AsyncGenerator, Awaitable, Callable, Dict, Iterable
 
 from fastapi import APIRouter, Request, HTTPException
 from fastapi.responses import FileResponse
@@ -15,7 +16,8 @@ from openai import AsyncClient
 from sse_starlette.sse import EventSourceResponse, ServerSentEvent
 
 from chatchat.settings import Settings
-from chatchat.server.utils import get_config_platforms, get_model_info, get_OpenAIClient
+from chatchat.server.model_scheduler import get_model_scheduler
+from chatchat.server.utils import get_config_platforms, get_OpenAIClient
 from chatchat.utils import build_logger
 
 from .api_schemas import *
@@ -23,44 +25,36 @@ from .api_schemas import *
 logger = build_logger()
 
 
-DEFAULT_API_CONCURRENCIES = 5  # 默认单个模型最大并发数
-model_semaphores: Dict[
-    Tuple[str, str], asyncio.Semaphore
-] = {}  # key: (model_name, platform)
 openai_router = APIRouter(prefix="/v1", tags=["OpenAI 兼容平台整合接口"])
 
 
 @asynccontextmanager
 async def get_model_client(model_name: str) -> AsyncGenerator[AsyncClient]:
     """
-    对重名模型进行调度，依次选择：空闲的模型 -> 当前访问数最少的模型
+    对重名模型进行调度（见 model_scheduler），退出时释放所选平台的并发名额
     """
-    max_semaphore = 0
-    selected_platform = ""
-    model_infos = get_model_info(model_name=model_name, multiple=True)
-    assert model_infos, f"specified model '{model_name}' cannot be found in MODEL_PLATFORMS."
-
-    for m, c in model_infos.items():
-        key = (m, c["platform_name"])
-        api_concurrencies = c.get("api_concurrencies", DEFAULT_API_CONCURRENCIES)
-        if key not in model_semaphores:
-            model_semaphores[key] = asyncio.Semaphore(api_concurrencies)
-        semaphore = model_semaphores[key]
-        if semaphore._value >= api_concurrencies:
-            selected_platform = c["platform_name"]
-            break
-        elif semaphore._value > max_semaphore:
-            selected_platform = c["platform_name"]
-
-    key = (m, selected_platform)
-    semaphore = model_semaphores[key]
-    try:
-        await semaphore.acquire()
-        yield get_OpenAIClient(platform_name=selected_platform, is_async=True)
-    except Exception:
-        logger.exception(f"failed when request to {key}")
-    finally:
-        semaphore.release()
+    async with get_model_scheduler().lease(model_name) as replica:
+        yield get_OpenAIClient(platform_name=replica.platform_name, is_async=True)
+
+
+def model_method(model_name: str, path: str) -> Callable[..., Awaitable]:
+    """
+    返回经过调度的 openai 客户端方法，如 model_method("qwen", "chat.completions.create")。
+    每次调用时选择平台，失败时换用其它平台重试；stream=True 时在输出结束后才释放平台的并发名额。
+    """
+    get_method = operator.attrgetter(path)
+
+    async def method(**params):
+        async def call(replica):
+            client = get_OpenAIClient(platform_name=replica.platform_name, is_async=True)
+            return await get_method(client)(**params)
+
+        scheduler = get_model_scheduler()
+        if params.get("stream"):
+            return await scheduler.run_stream(model_name, call)
+        return await scheduler.run(model_name, call)
+
+    return method
 
 
 async def openai_request(
@@ -148,9 +142,7 @@ async def list_models() -> Dict:
 async def create_chat_completions(
     body: OpenAIChatInput,
 ):
-    async with get_model_client(body.model) as client:
-        result = await openai_request(client.chat.completions.create, body)
-        return result
+    return await openai_request(model_method(body.model, "chat.completions.create"), body)
 
 
 @openai_router.post("/completions")
@@ -158,8 +150,7 @@ async def create_completions(
     request: Request,
     body: OpenAIChatInput,
 ):
-    async with get_model_client(body.model) as client:
-        return await openai_request(client.completions.create, body)
+    return await openai_request(model_method(body.model, "completions.create"), body)
 
 
 @openai_router.post("/embeddings")
@@ -168,8 +159,7 @@ async def create_embeddings(
     body: OpenAIEmbeddingsInput,
 ):
     params = body.model_dump(exclude_unset=True)
-    client = get_OpenAIClient(model_name=body.model)
-    return (await client.embeddings.create(**params)).model_dump()
+    return (await model_method(body.model, "embeddings.create")(**params)).model_dump()
 
 
 @openai_router.post("/images/generations")
@@ -177,8 +167,7 @@ async def create_image_generations(
     request: Request,
     body: OpenAIImageGenerationsInput,
 ):
-    async with get_model_client(body.model) as client:
-        return await openai_request(client.images.generate, body)
+    return await openai_request(model_method(body.model, "images.generate"), body)
 
 
 @openai_router.post("/images/variations")
@@ -186,8 +175,7 @@ async def create_image_variations(
     request: Request,
     body: OpenAIImageVariationsInput,
 ):
-    async with get_model_client(body.model) as client:
-        return await openai_request(client.images.create_variation, body)
+    return await openai_request(model_method(body.model, "images.create_variation"), body)
 
 
 @openai_router.post("/images/edit")
@@ -195,8 +183,7 @@ async def create_image_edit(
     request: Request,
     body: OpenAIImageEditsInput,
 ):
-    async with get_model_client(body.model) as client:
-        return await openai_request(client.images.edit, body)
+    return await openai_request(model_method(body.model, "images.edit"), body)
 
 
 @openai_router.post("/audio/translations", deprecated="暂不支持")
@@ -204,8 +191,7 @@ async def create_audio_translations(
     request: Request,
     body: OpenAIAudioTranslationsInput,
 ):
-    async with get_model_client(body.model) as client:
-        return await openai_request(client.audio.translations.create, body)
+    return await openai_request(model_method(body.model, "audio.translations.create"), body)
 
 
 @openai_router.post("/audio/transcriptions", deprecated="暂不支持")
@@ -213,8 +199,7 @@ async def create_audio_transcriptions(
     request: Request,
     body: OpenAIAudioTranscriptionsInput,
 ):
-    async with get_model_client(body.model) as client:
-        return await openai_request(client.audio.transcriptions.create, body)
+    return await openai_request(model_method(body.model, "audio.transcriptions.create"), body)
 
 
 @openai_router.post("/audio/speech", deprecated="暂不支持")
@@ -222,8 +207,7 @@ async def create_audio_speech(
     request: Request,
     body: OpenAIAudioSpeechInput,
 ):
-    async with get_model_client(body.model) as client:
-        return await openai_request(client.audio.speech.create, body)
+    return await openai_request(model_method(body.model, "audio.speech.create"), body)
 
 
 def _get_file_id(
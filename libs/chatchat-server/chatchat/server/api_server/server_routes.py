@@ -4,6 +4,7 @@ from fastapi import APIRouter, Body
 
 from chatchat.server.types.server.response.base import BaseResponse
 from chatchat.settings import Settings
+from chatchat.server.model_scheduler import get_model_scheduler
 from chatchat.server.utils import get_prompt_template, get_server_configs
 
 server_router = APIRouter(prefix="/server", tags=["Server State"])
@@ -28,3 +29,8 @@ def get_server_prompt_template(
     if prompt_template is None:
         return BaseResponse.error("Prompt template not found")
     return BaseResponse.success(prompt_template)
+
+
+@server_router.get("/model_scheduler_stats", summary="获取 /v1 接口各模型在各平台的排队数、并发数及耗时", response_model=BaseResponse)
+def model_scheduler_stats():
+    return BaseResponse.success(get_model_scheduler().stats())
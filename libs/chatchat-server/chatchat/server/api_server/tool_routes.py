@@ -5,7 +5,7 @@ from typing import List
 
 from fastapi import APIRouter, Body, Request
 
-from chatchat.server.utils import BaseResponse, get_tool, get_tool_config
+from chatchat.server.utils import BaseResponse, get_tool, get_tool_config, reload_tools
 from chatchat.utils import build_logger
 
 
@@ -45,3 +45,15 @@ async def call_tool(
             return {"code": 500, "msg": msg}
     else:
         return {"code": 500, "msg": f"no tool named '{name}'"}
+
+
+@tool_router.post("/reload", response_model=BaseResponse)
+def reload_all_tools():
+    """重新导入全部工具，修改工具代码或配置后无需重启服务器"""
+    try:
+        tools = reload_tools()
+        return {"data": list(tools)}
+    except Exception:
+        msg = "failed to reload tools"
+        logger.exception(msg)
+        return {"code": 500, "msg": msg}
@@ -1,9 +1,10 @@
 import asyncio
 import json
+import time
 import uuid
 import os
 from chatchat.server.db.repository.message_repository import filter_message
-from typing import AsyncIterable, List, Union, Tuple
+from typing import AsyncIterable, Dict, List, Union, Tuple
 from langchain_core.load import dumpd, dumps, load, loads
 
 from fastapi import Body
@@ -13,7 +14,7 @@ from langchain.prompts.chat import ChatPromptTemplate
 from chatchat.server.agents_registry.agents_registry import agents_registry
 from sse_starlette.sse import EventSourceResponse
 
-from chatchat.server.db.repository.mcp_connection_repository import get_enabled_mcp_connections
+from chatchat.server.mcp_sessions import get_mcp_session_manager
 from chatchat.settings import Settings
 from chatchat.server.api_server.api_schemas import OpenAIChatOutput
 from langchain_chatchat.callbacks.agent_callback_handler import (
@@ -34,6 +35,7 @@ from chatchat.server.utils import (
     wrap_done,
     get_default_llm,
     build_logger,
+    dump_json,
     get_ChatPlatformAIParams
 )
 
@@ -74,10 +76,10 @@ def create_models_from_config(configs, callbacks, stream, max_tokens):
 
 
 def create_models_chains(
-    history_len, prompts, models, tools, callbacks, conversation_id, metadata,  use_mcp: bool = False
+    history_len, prompts, models, tools, callbacks, conversation_id, metadata, mcp_tools: List = None
 ):
 
-    # 从数据库获取conversation_id对应的 intermediate_steps 、 mcp_connections
+    # 从数据库获取conversation_id对应的 intermediate_steps
     messages = filter_message(
         conversation_id=conversation_id, limit=history_len
     )
@@ -91,31 +93,6 @@ def create_models_chains(
     intermediate_steps = loads(messages[-1].get("metadata", {}).get("intermediate_steps"), valid_namespaces=["langchain_chatchat", "agent_toolkits", "all_tools", "tool"] )  if len(messages)>0 and messages[-1].get("metadata") is not None else []
     llm = models["action_model"]
     llm.callbacks = callbacks
-    connections = get_enabled_mcp_connections()
-    
-    # 转换为MCP连接格式，支持StdioConnection和SSEConnection类型
-    mcp_connections = {}
-    for conn in connections:
-        if conn["transport"] == "stdio":
-            # StdioConnection类型
-            mcp_connections[conn["server_name"]] = {
-                "transport": "stdio",
-                "command": conn["config"].get("command", conn["args"][0] if conn["args"] else ""),
-                "args": conn["args"][1:] if len(conn["args"]) > 1 else [],
-                "env": conn["env"],
-                "encoding": "utf-8",
-                "encoding_error_handler": "strict"
-            }
-        elif conn["transport"] == "sse":
-            # SSEConnection类型
-            mcp_connections[conn["server_name"]] = {
-                "transport": "sse",
-                "url": conn["config"].get("url", ""),
-                "headers": conn["config"].get("headers", {}),
-                "timeout": conn.get("timeout", 30.0),
-                "sse_read_timeout": conn.get("sse_read_timeout", 60.0)
-            }
-    
     agent_executor = PlatformToolsRunnable.create_agent_executor(
         agent_type="platform-knowledge-mode",
         agents_registry=agents_registry,
@@ -123,7 +100,8 @@ def create_models_chains(
         tools=tools,
         history=history,
         intermediate_steps=intermediate_steps,
-        mcp_connections=mcp_connections if use_mcp else {}
+        mcp_tools=mcp_tools,
+        token_window=Settings.basic_settings.AGENT_TOKEN_WINDOW,
     )
 
     full_chain = {"chat_input": lambda x: x["input"]} | agent_executor
@@ -145,7 +123,7 @@ async def chat(
 ):
     """Agent 对话"""
 
-    async def chat_iterator_event() -> AsyncIterable[OpenAIChatOutput]:
+    async def chat_iterator_event() -> AsyncIterable[Dict]:
         try:
             callbacks = []
 
@@ -168,6 +146,8 @@ async def chat(
             all_tools = get_tool().values()
             tools = [tool for tool in all_tools if tool.name in tool_config]
             tools = [t.copy(update={"callbacks": callbacks}) for t in tools]
+            # 使用各请求共用的 MCP 会话，不再为每次对话启动 MCP 服务器
+            mcp_tools = await get_mcp_session_manager().get_tools() if use_mcp else []
             full_chain, agent_executor = create_models_chains(
                 prompts=prompts,
                 models=models,
@@ -176,7 +156,7 @@ async def chat(
                 callbacks=callbacks,
                 history_len=history_len,
                 metadata=metadata,
-                use_mcp = use_mcp
+                mcp_tools=mcp_tools,
             )
             message_id = add_message_to_db(
                     chat_type="llm_chat",
@@ -260,19 +240,28 @@ async def chat(
 
                     data["text"] = item.text
 
-                ret = OpenAIChatOutput(
-                    id=f"chat{uuid.uuid4()}",
-                    object="chat.completion.chunk",
-                    content=data.get("text", ""),
-                    role="assistant",
-                    tool_calls=data["tool_calls"],
-                    model=models["llm_model"].model_name,
-                    status=data["status"],
-                    message_type=data["message_type"],
-                    message_id=message_id,
-                    class_name=item.class_name()
-                )
-                yield ret.model_dump_json()
+                # 与 OpenAIChatOutput(object="chat.completion.chunk").model_dump() 格式相同，
+                # 直接构建字典，只在发送时序列化一次
+                yield {
+                    "id": f"chat{uuid.uuid4()}",
+                    "object": "chat.completion.chunk",
+                    "model": models["llm_model"].model_name,
+                    "created": int(time.time()),
+                    "status": data["status"],
+                    "message_type": data["message_type"],
+                    "message_id": message_id,
+                    "is_ref": False,
+                    "class_name": item.class_name(),
+                    "choices": [
+                        {
+                            "delta": {
+                                "content": data.get("text", ""),
+                                "tool_calls": data["tool_calls"],
+                            },
+                            "role": "assistant",
+                        }
+                    ],
+                }
 
             string_intermediate_steps = dumps(agent_executor.intermediate_steps, pretty=True)
 
@@ -289,11 +278,15 @@ async def chat(
             return
         except Exception as e:
             logger.error(f"error in chat: {e}")
-            yield {"data": json.dumps({"error": str(e)})}
+            yield {"error": str(e)}
             return
 
+    async def chat_iterator_sse() -> AsyncIterable[str]:
+        async for frame in chat_iterator_event():
+            yield dump_json(frame)
+
     if stream:
-        return EventSourceResponse(chat_iterator_event())
+        return EventSourceResponse(chat_iterator_sse())
     else:
         ret = OpenAIChatOutput(
             id=f"chat{uuid.uuid4()}",
@@ -307,8 +300,9 @@ async def chat(
             message_id=message_id,
         )
 
-        async for chunk in chat_iterator_event():
-            data = json.loads(chunk)
+        async for data in chat_iterator_event():
+            if "error" in data:
+                return data
             if text := data["choices"][0]["delta"]["content"]:
                 ret.content += text
             if data["status"] == AgentStatus.tool_end:
@@ -14,6 +14,7 @@ from sse_starlette.sse import EventSourceResponse
 from chatchat.settings import Settings
 from chatchat.server.chat.utils import History
 from chatchat.server.knowledge_base.kb_cache.faiss_cache import memo_faiss_pool
+from chatchat.server.knowledge_base.kb_cache.search_cache import bump_search_version
 from chatchat.server.knowledge_base.utils import KnowledgeFile
 from chatchat.server.utils import (
     BaseResponse,
@@ -106,6 +107,8 @@ def upload_temp_docs(
             vs.add_documents(documents)
     except Exception as e:
         logger.error(f"Failed to add documents to faiss: {e}")
+    # 复用 prev_id 时临时知识库的内容已变化，使其缓存的检索结果失效
+    bump_search_version(f"temp:{id}")
 
     return BaseResponse(data={"id": id, "failed_files": failed_files})
 
@@ -180,7 +183,7 @@ async def file_chat(
             )
             embed_func = get_Embeddings()
             embeddings = await embed_func.aembed_query(query)
-            with memo_faiss_pool.acquire(knowledge_id) as vs:
+            with memo_faiss_pool.acquire(knowledge_id, shared=True) as vs:
                 docs = vs.similarity_search_with_score_by_vector(
                     embeddings, k=top_k, score_threshold=score_threshold
                 )
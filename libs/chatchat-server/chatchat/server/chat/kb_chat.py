@@ -16,7 +16,7 @@ from chatchat.server.agent.tools_factory.search_internet import search_engine
 from chatchat.server.api_server.api_schemas import OpenAIChatOutput
 from chatchat.server.chat.utils import History
 from chatchat.server.knowledge_base.kb_service.base import KBServiceFactory
-from chatchat.server.knowledge_base.kb_doc_api import search_docs, search_temp_docs
+from chatchat.server.knowledge_base.kb_doc_api import federated_search_docs, search_docs, search_temp_docs
 from chatchat.server.knowledge_base.utils import format_reference
 from chatchat.server.utils import (wrap_done, get_ChatOpenAI, get_default_llm,
                                    BaseResponse, get_prompt_template, build_logger,
@@ -30,6 +30,7 @@ logger = build_logger()
 async def kb_chat(query: str = Body(..., description="用户输入", examples=["你好"]),
                 mode: Literal["local_kb", "temp_kb", "search_engine"] = Body("local_kb", description="知识来源"),
                 kb_name: str = Body("", description="mode=local_kb时为知识库名称；temp_kb时为临时知识库ID，search_engine时为搜索引擎名称", examples=["samples"]),
+                kb_names: List[str] = Body([], description="mode=local_kb时同时检索多个知识库并合并结果，指定时忽略 kb_name", examples=[["samples"]]),
                 top_k: int = Body(Settings.kb_settings.VECTOR_SEARCH_TOP_K, description="匹配向量数"),
                 score_threshold: float = Body(
                     Settings.kb_settings.SCORE_THRESHOLD,
@@ -61,9 +62,10 @@ async def kb_chat(query: str = Body(..., description="用户输入", examples=["
                 request: Request = None,
                 ):
     if mode == "local_kb":
-        kb = KBServiceFactory.get_service_by_name(kb_name)
-        if kb is None:
-            return BaseResponse(code=404, msg=f"未找到知识库 {kb_name}")
+        kb_names = kb_names or [kb_name]
+        for name in kb_names:
+            if KBServiceFactory.get_service_by_name(name) is None:
+                return BaseResponse(code=404, msg=f"未找到知识库 {name}")
     
     async def knowledge_base_chat_iterator() -> AsyncIterable[str]:
         try:
@@ -72,18 +74,28 @@ async def kb_chat(query: str = Body(..., description="用户输入", examples=["
             history = [History.from_data(h) for h in history]
 
             if mode == "local_kb":
-                kb = KBServiceFactory.get_service_by_name(kb_name)
-                ok, msg = kb.check_embed_model()
-                if not ok:
-                    raise ValueError(msg)
-                docs = await run_in_threadpool(search_docs,
-                                                query=query,
-                                                knowledge_base_name=kb_name,
-                                                top_k=top_k,
-                                                score_threshold=score_threshold,
-                                                file_name="",
-                                                metadata={})
-                source_documents = format_reference(kb_name, docs, api_address(is_public=True))
+                for name in kb_names:
+                    kb = KBServiceFactory.get_service_by_name(name)
+                    ok, msg = kb.check_embed_model()
+                    if not ok:
+                        raise ValueError(msg)
+                if len(kb_names) == 1:
+                    docs = await run_in_threadpool(search_docs,
+                                                    query=query,
+                                                    knowledge_base_name=kb_names[0],
+                                                    top_k=top_k,
+                                                    score_threshold=score_threshold,
+                                                    file_name="",
+                                                    metadata={})
+                else:
+                    # 多个知识库并发检索，合并排序
+                    docs = await run_in_threadpool(federated_search_docs,
+                                                    query=query,
+                                                    knowledge_base_names=kb_names,
+                                                    top_k=top_k,
+                                                    score_threshold=score_threshold,
+                                                    timeout=Settings.kb_settings.KB_SEARCH_TIMEOUT)
+                source_documents = format_reference(kb_names[0], docs, api_address(is_public=True))
             elif mode == "temp_kb":
                 ok, msg = check_embed_model()
                 if not ok:
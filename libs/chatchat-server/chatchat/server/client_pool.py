@@ -0,0 +1,154 @@
+"""
+按平台复用 httpx / openai 客户端，避免每次请求模型都重新建立 TCP/TLS 连接。
+
+异步客户端的连接只能在创建它的事件循环中使用，因此按事件循环分别缓存：
+在没有运行事件循环的线程中（如 run_in_threadpool）获取的异步客户端属于 API 服务器的主事件循环（见 bind_loop）。
+"""
+import asyncio
+import threading
+import weakref
+from typing import Any, Dict, Optional, Tuple, Union
+
+import httpx
+import openai
+
+from chatchat.settings import Settings
+from chatchat.utils import build_logger
+
+
+logger = build_logger()
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+
+        return True
+    except ImportError:
+        return False
+
+
+class ClientPool:
+    def __init__(self):
+        self._lock = threading.RLock()  # 创建 openai 客户端时会获取 httpx 客户端
+        self._main_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._sync: Dict[Tuple, Any] = {}
+        # {loop: {key: client}}，没有事件循环时使用 _async_no_loop
+        self._async: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+        self._async_no_loop: Dict[Tuple, Any] = {}
+
+    def bind_loop(self, loop: Optional[asyncio.AbstractEventLoop]):
+        """设置主事件循环，在其它线程中获取的异步客户端在该循环中使用"""
+        self._main_loop = loop
+
+    def _async_clients(self) -> Dict[Tuple, Any]:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = self._main_loop
+        if loop is None:
+            return self._async_no_loop
+        return self._async.setdefault(loop, {})
+
+    def _get(self, key: Tuple, is_async: bool, factory):
+        with self._lock:
+            clients = self._async_clients() if is_async else self._sync
+            if (client := clients.get(key)) is None:
+                client = clients[key] = factory()
+            return client
+
+    def get_httpx_client(
+        self, proxy: Union[str, Dict, None] = None, is_async: bool = False
+    ) -> Union[httpx.Client, httpx.AsyncClient]:
+        """相同代理设置共用一个 httpx 客户端（即共用一个连接池）"""
+        basic_settings = Settings.basic_settings
+
+        def factory():
+            limits = httpx.Limits(
+                max_connections=basic_settings.HTTPX_MAX_CONNECTIONS,
+                max_keepalive_connections=basic_settings.HTTPX_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=basic_settings.HTTPX_KEEPALIVE_EXPIRY,
+            )
+            http2 = basic_settings.HTTPX_HTTP2 and _http2_available()
+            params = dict(timeout=basic_settings.HTTPX_DEFAULT_TIMEOUT, follow_redirects=True)
+            if proxy:
+                transport_cls = httpx.AsyncHTTPTransport if is_async else httpx.HTTPTransport
+                params.update(
+                    proxies=proxy,
+                    transport=transport_cls(local_address="0.0.0.0", limits=limits, http2=http2),
+                )
+            else:
+                params.update(limits=limits, http2=http2)
+            return httpx.AsyncClient(**params) if is_async else httpx.Client(**params)
+
+        key = ("httpx", str(proxy or ""))
+        return self._get(key, is_async, factory)
+
+    def get_openai_client(
+        self,
+        base_url: str,
+        api_key: str,
+        proxy: Union[str, Dict, None] = None,
+        is_async: bool = True,
+        **kwargs: Any,
+    ) -> Union[openai.Client, openai.AsyncClient]:
+        """
+        相同平台（base_url + api_key + 代理）及参数共用一个 openai 客户端。
+        kwargs 为 openai 客户端的其它参数，如 timeout、max_retries。
+        """
+        kwargs = {k: v for k, v in kwargs.items() if v is not None}
+
+        def factory():
+            http_client = self.get_httpx_client(proxy=proxy, is_async=is_async)
+            client_cls = openai.AsyncClient if is_async else openai.Client
+            return client_cls(base_url=base_url, api_key=api_key, http_client=http_client, **kwargs)
+
+        key = ("openai", base_url, api_key, str(proxy or ""), tuple(sorted(kwargs.items(), key=str)))
+        return self._get(key, is_async, factory)
+
+    async def aclose(self, timeout: float = 5):
+        """
+        关闭所有客户端，在 API 服务器退出时调用。
+        其它事件循环中的异步客户端提交到各自的循环中关闭，该循环已停止时无法关闭，只记录日志。
+        """
+        with self._lock:
+            sync_clients = list(self._sync.values())
+            loop_clients = [(loop, list(clients.values())) for loop, clients in self._async.items()]
+            loop_clients.append((None, list(self._async_no_loop.values())))
+            self._sync.clear()
+            self._async.clear()
+            self._async_no_loop.clear()
+        # openai 客户端与 httpx 客户端共用连接，只需关闭 httpx 客户端
+        for client in sync_clients:
+            if isinstance(client, httpx.Client):
+                client.close()
+        current = asyncio.get_running_loop()
+        for loop, clients in loop_clients:
+            clients = [c for c in clients if isinstance(c, httpx.AsyncClient)]
+            if not clients:
+                continue
+            if loop is None or loop is current:
+                await self._aclose_async(clients)
+            elif loop.is_running() and not loop.is_closed():
+                future = asyncio.run_coroutine_threadsafe(self._aclose_async(clients), loop)
+                try:
+                    await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+                except Exception as e:
+                    logger.warning(f"在其它事件循环中关闭 {len(clients)} 个 httpx 客户端时出错：{e}")
+            else:
+                logger.warning(f"事件循环已停止，无法关闭其中的 {len(clients)} 个 httpx 客户端")
+
+    @staticmethod
+    async def _aclose_async(clients):
+        for client in clients:
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.warning(f"关闭 httpx 客户端时出错：{e}")
+
+
+_client_pool = ClientPool()
+
+
+def get_client_pool() -> ClientPool:
+    return _client_pool
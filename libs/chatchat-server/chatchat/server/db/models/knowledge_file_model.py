@@ -18,6 +18,7 @@ class KnowledgeFileModel(Base):
     file_version = Column(Integer, default=1, comment="文件版本")
     file_mtime = Column(Float, default=0.0, comment="文件修改时间")
     file_size = Column(Integer, default=0, comment="文件大小")
+    file_hash = Column(String(64), default="", comment="文件内容哈希(sha256)")
     custom_docs = Column(Boolean, default=False, comment="是否自定义docs")
     docs_count = Column(Integer, default=0, comment="切分文档数量")
     create_time = Column(DateTime, default=func.now(), comment="创建时间")
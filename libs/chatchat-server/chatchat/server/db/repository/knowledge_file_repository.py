@@ -1,4 +1,6 @@
-from typing import Dict, List
+from typing import Dict, List, Tuple
+
+from sqlalchemy import func
 
 from chatchat.server.db.models.knowledge_base_model import KnowledgeBaseModel
 from chatchat.server.db.models.knowledge_file_model import (
@@ -66,6 +68,34 @@ def delete_docs_from_db(
     return docs
 
 
+@with_session
+def list_doc_hashes_from_db(session, kb_name: str, file_name: str) -> Dict[str, str]:
+    """
+    列出某文件所有Document的id及其文本块哈希（metadata["chunk_hash"]），旧数据没有哈希时为空字符串。
+    返回形式：{doc_id: chunk_hash, ...}
+    """
+    docs = (
+        session.query(FileDocModel.doc_id, FileDocModel.meta_data)
+        .filter(FileDocModel.kb_name.ilike(kb_name), FileDocModel.file_name.ilike(file_name))
+        .all()
+    )
+    return {x.doc_id: (x.meta_data or {}).get("chunk_hash", "") for x in docs}
+
+
+@with_session
+def delete_docs_from_db_by_ids(session, kb_name: str, file_name: str, ids: List[str]):
+    """
+    删除某文件中指定id的Document记录
+    """
+    if ids:
+        session.query(FileDocModel).filter(
+            FileDocModel.kb_name.ilike(kb_name),
+            FileDocModel.file_name.ilike(file_name),
+            FileDocModel.doc_id.in_(ids),
+        ).delete(synchronize_session=False)
+    return True
+
+
 @with_session
 def add_docs_to_db(session, kb_name: str, file_name: str, doc_infos: List[Dict]):
     """
@@ -89,6 +119,37 @@ def add_docs_to_db(session, kb_name: str, file_name: str, doc_infos: List[Dict])
     return True
 
 
+@with_session
+def update_docs_in_db(session, kb_name: str, doc_infos: List[Dict], deleted_ids: List[str] = []):
+    """
+    按id更新某知识库中Document记录的元数据，删除deleted_ids对应的记录，并同步所属文件的文本块数量。
+    doc_infos形式：[{"id": str, "metadata": dict}, ...]
+    """
+    for d in doc_infos or []:
+        session.query(FileDocModel).filter(
+            FileDocModel.kb_name.ilike(kb_name), FileDocModel.doc_id == d["id"]
+        ).update({FileDocModel.meta_data: d["metadata"]}, synchronize_session=False)
+    if deleted_ids:
+        counts = (
+            session.query(FileDocModel.file_name, func.count(FileDocModel.id))
+            .filter(FileDocModel.kb_name.ilike(kb_name), FileDocModel.doc_id.in_(deleted_ids))
+            .group_by(FileDocModel.file_name)
+            .all()
+        )
+        session.query(FileDocModel).filter(
+            FileDocModel.kb_name.ilike(kb_name), FileDocModel.doc_id.in_(deleted_ids)
+        ).delete(synchronize_session=False)
+        for file_name, count in counts:
+            session.query(KnowledgeFileModel).filter(
+                KnowledgeFileModel.kb_name.ilike(kb_name),
+                KnowledgeFileModel.file_name.ilike(file_name),
+            ).update(
+                {KnowledgeFileModel.docs_count: KnowledgeFileModel.docs_count - count},
+                synchronize_session=False,
+            )
+    return True
+
+
 @with_session
 def count_files_from_db(session, kb_name: str) -> int:
     return (
@@ -109,6 +170,74 @@ def list_files_from_db(session, kb_name):
     return docs
 
 
+@with_session
+def list_file_details_from_db(session, kb_name: str) -> Dict[str, Dict]:
+    """
+    列出知识库中所有文件的修改时间、大小与内容哈希，用于增量同步。
+    返回形式：{file_name: {"file_mtime": float, "file_size": int, "file_hash": str, "custom_docs": bool}, ...}
+    """
+    files = (
+        session.query(
+            KnowledgeFileModel.file_name,
+            KnowledgeFileModel.file_mtime,
+            KnowledgeFileModel.file_size,
+            KnowledgeFileModel.file_hash,
+            KnowledgeFileModel.custom_docs,
+        )
+        .filter(KnowledgeFileModel.kb_name.ilike(kb_name))
+        .all()
+    )
+    return {
+        f.file_name: {
+            "file_mtime": f.file_mtime,
+            "file_size": f.file_size,
+            "file_hash": f.file_hash or "",
+            "custom_docs": f.custom_docs,
+        }
+        for f in files
+    }
+
+
+@with_session
+def get_kb_files_signature(session, kb_name: str) -> Tuple:
+    """
+    知识库文件列表的摘要：文件数、版本号之和、文本块总数、最大 id 与最近创建时间。
+    任一文件新增、删除或更新后都会变化，用于在多个进程间判断知识库内容是否变化
+    """
+    row = (
+        session.query(
+            func.count(KnowledgeFileModel.id),
+            func.sum(KnowledgeFileModel.file_version),
+            func.sum(KnowledgeFileModel.docs_count),
+            func.max(KnowledgeFileModel.id),
+            func.max(KnowledgeFileModel.create_time),
+        )
+        .filter(KnowledgeFileModel.kb_name.ilike(kb_name))
+        .one()
+    )
+    return tuple(row)
+
+
+@with_session
+def update_file_stat_in_db(session, kb_file: KnowledgeFile):
+    """
+    文件内容未变化（仅修改时间变化）时，只更新数据库中的修改时间与大小，不增加版本号。
+    """
+    existing_file: KnowledgeFileModel = (
+        session.query(KnowledgeFileModel)
+        .filter(
+            KnowledgeFileModel.kb_name.ilike(kb_file.kb_name),
+            KnowledgeFileModel.file_name.ilike(kb_file.filename),
+        )
+        .first()
+    )
+    if existing_file:
+        existing_file.file_mtime = kb_file.get_mtime()
+        existing_file.file_size = kb_file.get_size()
+        return True
+    return False
+
+
 @with_session
 def add_file_to_db(
     session,
@@ -130,10 +259,12 @@ def add_file_to_db(
         )
         mtime = kb_file.get_mtime()
         size = kb_file.get_size()
+        file_hash = kb_file.get_hash()
 
         if existing_file:
             existing_file.file_mtime = mtime
             existing_file.file_size = size
+            existing_file.file_hash = file_hash
             existing_file.docs_count = docs_count
             existing_file.custom_docs = custom_docs
             existing_file.file_version += 1
@@ -147,6 +278,7 @@ def add_file_to_db(
                 text_splitter_name=kb_file.text_splitter_name or "SpacyTextSplitter",
                 file_mtime=mtime,
                 file_size=size,
+                file_hash=file_hash,
                 docs_count=docs_count,
                 custom_docs=custom_docs,
             )
@@ -238,6 +370,7 @@ def get_file_detail(session, kb_name: str, filename: str) -> dict:
             "create_time": file.create_time,
             "file_mtime": file.file_mtime,
             "file_size": file.file_size,
+            "file_hash": file.file_hash,
             "custom_docs": file.custom_docs,
             "docs_count": file.docs_count,
         }
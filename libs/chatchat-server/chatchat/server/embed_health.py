@@ -0,0 +1,216 @@
+"""
+嵌入模型健康检查：在后台定期探测各嵌入模型是否可用，并缓存结果。
+检索、入库等调用方只读取缓存的状态，不再每次请求都调用一次 embed_query。
+"""
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Tuple
+
+from langchain_core.embeddings import Embeddings
+
+from chatchat.settings import Settings
+from chatchat.utils import build_logger
+
+
+logger = build_logger()
+
+
+@dataclass
+class EmbedHealth:
+    ok: bool = False
+    msg: str = ""
+    checked_at: float = 0  # 最近一次探测完成的时间，0 表示从未探测
+    failures: int = 0  # 连续失败次数
+    open_until: float = 0  # 熔断打开期间不再发起探测
+    probing: bool = False
+
+
+def _probe_embed_model(embed_model: str):
+    from chatchat.server.utils import get_Embeddings
+
+    get_Embeddings(embed_model=embed_model, use_cache=False, report_health=False).embed_query("this is a test")
+
+
+class EmbedHealthMonitor:
+    """
+    状态过期（超过 interval 秒）后仍先返回缓存的结果，同时在后台重新探测。
+    连续失败 failure_threshold 次后熔断：interval 秒内不再探测该模型，包括调用失败触发的探测。
+    """
+
+    def __init__(
+        self,
+        interval: float = None,
+        failure_threshold: int = None,
+        probe_func: Callable[[str], None] = _probe_embed_model,
+    ):
+        self.interval = interval or Settings.kb_settings.EMBED_HEALTH_CHECK_INTERVAL
+        self.failure_threshold = max(
+            failure_threshold or Settings.kb_settings.EMBED_HEALTH_FAILURE_THRESHOLD, 1
+        )
+        self.probe_func = probe_func
+        self._health: Dict[str, EmbedHealth] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._thread: threading.Thread = None
+        self._stop = threading.Event()
+
+    def _get(self, embed_model: str) -> Tuple[EmbedHealth, threading.Lock]:
+        with self._lock:
+            if embed_model not in self._health:
+                self._health[embed_model] = EmbedHealth()
+                self._locks[embed_model] = threading.Lock()
+            return self._health[embed_model], self._locks[embed_model]
+
+    def _run_probe(self, embed_model: str, health: EmbedHealth):
+        try:
+            self.probe_func(embed_model)
+            ok, msg = True, ""
+        except Exception as e:
+            ok, msg = False, f"failed to access embed model '{embed_model}': {e}"
+            logger.error(msg)
+        now = time.time()
+        with self._lock:
+            health.ok, health.msg, health.checked_at = ok, msg, now
+            if ok:
+                health.failures = 0
+                health.open_until = 0
+            else:
+                health.failures += 1
+                if health.failures >= self.failure_threshold:
+                    health.open_until = now + self.interval
+            health.probing = False
+
+    def probe(self, embed_model: str) -> EmbedHealth:
+        """立即探测一次（同一模型同时只进行一次探测）"""
+        health, lock = self._get(embed_model)
+        with lock:
+            self._run_probe(embed_model, health)
+        return health
+
+    def _probe_in_background(self, embed_model: str, force: bool = False):
+        health, _ = self._get(embed_model)
+        now = time.time()
+        with self._lock:
+            if health.probing or now < health.open_until:
+                return
+            if not force and now - health.checked_at < self.interval:
+                return
+            health.probing = True
+        threading.Thread(target=self.probe, args=(embed_model,), daemon=True).start()
+
+    def check(self, embed_model: str) -> Tuple[bool, str]:
+        health, lock = self._get(embed_model)
+        if health.checked_at == 0:
+            # 首次使用该模型时同步探测，之后只读取缓存
+            with lock:
+                if health.checked_at == 0:
+                    self._run_probe(embed_model, health)
+            return health.ok, health.msg
+        result = health.ok, health.msg
+        self._probe_in_background(embed_model)
+        return result
+
+    def report_failure(self, embed_model: str, error: Exception = None):
+        """实际的向量化调用失败时，立即在后台重新探测"""
+        if error is not None:
+            logger.warning(f"embed model '{embed_model}' call failed: {error}")
+        self._probe_in_background(embed_model, force=True)
+
+    def stats(self) -> Dict[str, Dict]:
+        with self._lock:
+            return {
+                name: {
+                    "ok": h.ok,
+                    "msg": h.msg,
+                    "checked_at": h.checked_at,
+                    "failures": h.failures,
+                    "circuit_open": time.time() < h.open_until,
+                }
+                for name, h in self._health.items()
+            }
+
+    def start(self, embed_models: List[str] = None):
+        """启动后台线程，每隔 interval 秒探测一次配置的全部嵌入模型"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        def run():
+            while not self._stop.is_set():
+                models = embed_models
+                try:
+                    if models is None:
+                        from chatchat.server.utils import get_config_models
+
+                        models = list(get_config_models(model_type="embed"))
+                    for model in models:
+                        self._probe_in_background(model)
+                except Exception as e:
+                    logger.error(f"error in embed model health check: {e}")
+                self._stop.wait(self.interval)
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=run, name="embed_health", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+
+_monitor: EmbedHealthMonitor = None
+_monitor_lock = threading.Lock()
+
+
+def get_embed_health_monitor() -> EmbedHealthMonitor:
+    global _monitor
+    with _monitor_lock:
+        if _monitor is None:
+            _monitor = EmbedHealthMonitor()
+        return _monitor
+
+
+class HealthReportingEmbeddings(Embeddings):
+    """
+    嵌入模型调用失败时通知健康检查立即重新探测。
+    只包装向量化调用本身，向量库检索、写入等其它环节的异常不会被当作嵌入模型故障。
+    """
+
+    def __init__(self, embeddings: Embeddings, model: str):
+        self.embeddings = embeddings
+        self.model = model
+
+    def __getattr__(self, name):
+        if name == "embeddings":
+            raise AttributeError(name)
+        return getattr(self.embeddings, name)
+
+    def _report(self, e: Exception):
+        get_embed_health_monitor().report_failure(self.model, e)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        try:
+            return self.embeddings.embed_documents(texts)
+        except Exception as e:
+            self._report(e)
+            raise
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        try:
+            return await self.embeddings.aembed_documents(texts)
+        except Exception as e:
+            self._report(e)
+            raise
+
+    def embed_query(self, text: str) -> List[float]:
+        try:
+            return self.embeddings.embed_query(text)
+        except Exception as e:
+            self._report(e)
+            raise
+
+    async def aembed_query(self, text: str) -> List[float]:
+        try:
+            return await self.embeddings.aembed_query(text)
+        except Exception as e:
+            self._report(e)
+            raise
@@ -1,4 +1,6 @@
 from chatchat.server.file_rag.retrievers.base import BaseRetrieverService
+from chatchat.server.file_rag.retrievers.bm25 import BM25Index, BM25IndexRetriever
 from chatchat.server.file_rag.retrievers.ensemble import EnsembleRetrieverService
+from chatchat.server.file_rag.retrievers.hybrid import HybridRetrieverService
 from chatchat.server.file_rag.retrievers.vectorstore import VectorstoreRetrieverService
-from chatchat.server.file_rag.retrievers.milvus_vectorstore import MilvusVectorstoreRetrieverService
\ No newline at end of file
+from chatchat.server.file_rag.retrievers.milvus_vectorstore import MilvusVectorstoreRetrieverService
@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import heapq
+import math
+import os
+import pickle
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from langchain.docstore.document import Document
+from langchain.vectorstores import VectorStore
+from langchain_core.callbacks.manager import CallbackManagerForRetrieverRun
+from langchain_core.retrievers import BaseRetriever
+
+
+def default_preprocess_func(text: str) -> List[str]:
+    import jieba
+
+    return jieba.lcut_for_search(text)
+
+
+class BM25Index:
+    """
+    可增量维护的 BM25 稀疏倒排索引，与 index.faiss 一起保存在 vs_path 下。
+    postings: {term: {doc_id: tf}}，doc_terms 记录每个文档包含的词，用于删除时定位倒排表。
+    查询时只遍历查询词对应的倒排表，耗时与知识库总大小无关。
+    """
+
+    INDEX_FILE = "index.bm25"
+
+    def __init__(
+        self,
+        k1: float = 1.5,
+        b: float = 0.75,
+        preprocess_func: Callable[[str], List[str]] = default_preprocess_func,
+    ):
+        self.k1 = k1
+        self.b = b
+        self.preprocess_func = preprocess_func
+        self.postings: Dict[str, Dict[str, int]] = {}
+        self.doc_len: Dict[str, int] = {}
+        self.doc_terms: Dict[str, Tuple[str, ...]] = {}
+        self.total_len = 0
+
+    def __len__(self) -> int:
+        return len(self.doc_len)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self.doc_len
+
+    def __getstate__(self):
+        # 分词函数不参与序列化，加载时使用默认分词
+        state = self.__dict__.copy()
+        state.pop("preprocess_func", None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.preprocess_func = default_preprocess_func
+
+    @property
+    def avgdl(self) -> float:
+        return self.total_len / len(self.doc_len) if self.doc_len else 0.0
+
+    def idf(self, term: str) -> float:
+        n = len(self.postings.get(term, {}))
+        N = len(self.doc_len)
+        return math.log(1 + (N - n + 0.5) / (n + 0.5))
+
+    def tokenize(self, texts: Iterable[str]) -> List[List[str]]:
+        """分词，可以在加锁前预先完成，再通过 add_tokens 写入索引"""
+        return [self.preprocess_func(text) for text in texts]
+
+    def add(self, ids: Iterable[str], texts: Iterable[str]):
+        self.add_tokens(ids, self.tokenize(texts))
+
+    def add_tokens(self, ids: Iterable[str], tokens_list: Iterable[List[str]]):
+        for doc_id, tokens in zip(ids, tokens_list):
+            if doc_id in self.doc_len:
+                self.delete([doc_id])
+            tf = Counter(tokens)
+            for term, freq in tf.items():
+                self.postings.setdefault(term, {})[doc_id] = freq
+            self.doc_terms[doc_id] = tuple(tf)
+            self.doc_len[doc_id] = len(tokens)
+            self.total_len += len(tokens)
+
+    def delete(self, ids: Iterable[str]):
+        for doc_id in ids:
+            if doc_id not in self.doc_len:
+                continue
+            for term in self.doc_terms.pop(doc_id, ()):
+                posting = self.postings.get(term)
+                if posting is not None:
+                    posting.pop(doc_id, None)
+                    if not posting:
+                        del self.postings[term]
+            self.total_len -= self.doc_len.pop(doc_id)
+
+    def clear(self):
+        self.postings.clear()
+        self.doc_len.clear()
+        self.doc_terms.clear()
+        self.total_len = 0
+
+    def search(self, query: str, k: int = 4) -> List[Tuple[str, float]]:
+        if not self.doc_len:
+            return []
+        scores: Dict[str, float] = {}
+        avgdl = self.avgdl or 1.0
+        for term, qf in Counter(self.preprocess_func(query)).items():
+            posting = self.postings.get(term)
+            if not posting:
+                continue
+            idf = self.idf(term)
+            for doc_id, freq in posting.items():
+                norm = self.k1 * (1 - self.b + self.b * self.doc_len[doc_id] / avgdl)
+                score = idf * freq * (self.k1 + 1) / (freq + norm)
+                scores[doc_id] = scores.get(doc_id, 0.0) + score * qf
+        return heapq.nlargest(k, scores.items(), key=lambda x: x[1])
+
+    @classmethod
+    def from_documents(
+        cls, docs: Dict[str, Document], **kwargs
+    ) -> "BM25Index":
+        index = cls(**kwargs)
+        index.add(docs.keys(), [doc.page_content for doc in docs.values()])
+        return index
+
+    def save(self, path: str):
+        if not os.path.isdir(path):
+            os.makedirs(path)
+        file = os.path.join(path, self.INDEX_FILE)
+        tmp_file = file + ".tmp"
+        with open(tmp_file, "wb") as fp:
+            pickle.dump(self, fp, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_file, file)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["BM25Index"]:
+        file = os.path.join(path, cls.INDEX_FILE)
+        if not os.path.isfile(file):
+            return None
+        with open(file, "rb") as fp:
+            return pickle.load(fp)
+
+
+class BM25IndexRetriever(BaseRetriever):
+    """从持久化的 BM25Index 中检索，文档内容从向量库的 docstore 中读取"""
+
+    index: BM25Index
+    vectorstore: VectorStore
+    k: int = 4
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        docs = []
+        for doc_id, _ in self.index.search(query, k=self.k):
+            doc = self.vectorstore.docstore.search(doc_id)
+            if isinstance(doc, Document):
+                docs.append(doc)
+        return docs
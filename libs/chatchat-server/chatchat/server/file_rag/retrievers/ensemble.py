@@ -6,6 +6,7 @@ from langchain_community.retrievers import BM25Retriever
 from langchain_core.retrievers import BaseRetriever
 
 from chatchat.server.file_rag.retrievers.base import BaseRetrieverService
+from chatchat.server.file_rag.retrievers.bm25 import BM25Index, BM25IndexRetriever
 
 
 class EnsembleRetrieverService(BaseRetrieverService):
@@ -23,22 +24,29 @@ class EnsembleRetrieverService(BaseRetrieverService):
         vectorstore: VectorStore,
         top_k: int,
         score_threshold: int | float,
+        bm25_index: BM25Index = None,
     ):
         faiss_retriever = vectorstore.as_retriever(
             search_type="similarity_score_threshold",
             search_kwargs={"score_threshold": score_threshold, "k": top_k},
         )
-        # TODO: 换个不用torch的实现方式
-        # from cutword.cutword import Cutter
-        import jieba
+        if bm25_index is not None:
+            # 使用预先构建的倒排索引，避免每次查询都对全部文档分词
+            bm25_retriever = BM25IndexRetriever(
+                index=bm25_index, vectorstore=vectorstore, k=top_k
+            )
+        else:
+            # TODO: 换个不用torch的实现方式
+            # from cutword.cutword import Cutter
+            import jieba
 
-        # cutter = Cutter()
-        docs = list(vectorstore.docstore._dict.values())
-        bm25_retriever = BM25Retriever.from_documents(
-            docs,
-            preprocess_func=jieba.lcut_for_search,
-        )
-        bm25_retriever.k = top_k
+            # cutter = Cutter()
+            docs = list(vectorstore.docstore._dict.values())
+            bm25_retriever = BM25Retriever.from_documents(
+                docs,
+                preprocess_func=jieba.lcut_for_search,
+            )
+            bm25_retriever.k = top_k
         ensemble_retriever = EnsembleRetriever(
             retrievers=[bm25_retriever, faiss_retriever], weights=[0.5, 0.5]
         )
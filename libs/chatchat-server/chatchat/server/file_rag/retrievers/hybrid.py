@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+from typing import Callable, Dict, List, Literal, Optional, Sequence, Tuple
+
+from langchain.docstore.document import Document
+from langchain.vectorstores import VectorStore
+
+from chatchat.settings import Settings
+from chatchat.server.file_rag.retrievers.base import BaseRetrieverService
+
+
+ScoredDocs = List[Tuple[Document, float]]
+# (query, k) -> [(doc, score), ...]，按得分从高到低排列
+SearchFunc = Callable[[str, int], ScoredDocs]
+
+
+def doc_key(doc: Document) -> Tuple:
+    """稠密检索与稀疏检索返回的是不同的 Document 对象，按来源和内容判断是否为同一文本块"""
+    return doc.metadata.get("source"), doc.page_content
+
+
+def reciprocal_rank_fusion(
+    results: Sequence[ScoredDocs],
+    weights: Sequence[float],
+    k: int = 60,
+) -> ScoredDocs:
+    """倒数排名融合（RRF）：只使用各路结果的排名，不受各路得分尺度不同的影响"""
+    scores: Dict[Tuple, float] = {}
+    docs: Dict[Tuple, Document] = {}
+    for result, weight in zip(results, weights):
+        for rank, (doc, _) in enumerate(result):
+            key = doc_key(doc)
+            docs.setdefault(key, doc)
+            scores[key] = scores.get(key, 0.0) + weight / (k + rank + 1)
+    return sorted(((docs[key], s) for key, s in scores.items()), key=lambda x: -x[1])
+
+
+def score_fusion(
+    results: Sequence[ScoredDocs],
+    weights: Sequence[float],
+) -> ScoredDocs:
+    """得分归一化融合：各路得分分别按 min-max 归一化到 [0, 1] 后加权求和"""
+    scores: Dict[Tuple, float] = {}
+    docs: Dict[Tuple, Document] = {}
+    for result, weight in zip(results, weights):
+        if not result:
+            continue
+        values = [s for _, s in result]
+        low, high = min(values), max(values)
+        for doc, s in result:
+            key = doc_key(doc)
+            docs.setdefault(key, doc)
+            norm = (s - low) / (high - low) if high > low else 1.0
+            scores[key] = scores.get(key, 0.0) + weight * norm
+    return sorted(((docs[key], s) for key, s in scores.items()), key=lambda x: -x[1])
+
+
+def relevance_search(
+    vectorstore: VectorStore, score_threshold: int | float
+) -> SearchFunc:
+    """默认的稠密检索：与 similarity_score_threshold 检索方式相同，使用 0~1 的相关度得分"""
+
+    def search(query: str, k: int) -> ScoredDocs:
+        return vectorstore.similarity_search_with_relevance_scores(
+            query, k=k, score_threshold=score_threshold
+        )
+
+    return search
+
+
+class HybridRetrieverService(BaseRetrieverService):
+    """
+    混合检索：分别从稠密向量检索和稀疏（BM25 等关键词）检索中取 candidate_k 个候选，融合后返回 top_k 个。
+    fusion="rrf" 按排名融合，fusion="score" 按归一化得分融合；weights 依次为稠密、稀疏检索的权重。
+    sparse_within_dense=True 时只保留同时出现在稠密检索结果中的稀疏检索结果，稠密检索的阈值对两路结果都生效。
+    未提供稀疏检索时等同于稠密检索。
+    """
+
+    def do_init(
+        self,
+        dense_search: SearchFunc = None,
+        sparse_search: Optional[SearchFunc] = None,
+        top_k: int = 5,
+        candidate_k: int = None,
+        fusion: Literal["rrf", "score"] = None,
+        weights: Sequence[float] = None,
+        sparse_within_dense: bool = False,
+    ):
+        self.vs = None
+        self.dense_search = dense_search
+        self.sparse_search = sparse_search
+        self.sparse_within_dense = sparse_within_dense
+        self.top_k = top_k
+        self.candidate_k = max(
+            candidate_k or Settings.kb_settings.HYBRID_CANDIDATE_K, top_k
+        )
+        self.fusion = fusion or Settings.kb_settings.HYBRID_FUSION
+        self.weights = list(weights or Settings.kb_settings.HYBRID_WEIGHTS)
+
+    @staticmethod
+    def from_vectorstore(
+        vectorstore: VectorStore,
+        top_k: int,
+        score_threshold: int | float,
+        sparse_search: Optional[SearchFunc] = None,
+        dense_search: Optional[SearchFunc] = None,
+        candidate_k: int = None,
+        fusion: Literal["rrf", "score"] = None,
+        weights: Sequence[float] = None,
+        sparse_within_dense: bool = False,
+    ):
+        return HybridRetrieverService(
+            dense_search=dense_search or relevance_search(vectorstore, score_threshold),
+            sparse_search=sparse_search,
+            top_k=top_k,
+            candidate_k=candidate_k,
+            fusion=fusion,
+            weights=weights,
+            sparse_within_dense=sparse_within_dense,
+        )
+
+    def get_relevant_documents_with_scores(self, query: str) -> ScoredDocs:
+        dense = self.dense_search(query, self.candidate_k)
+        results = [dense]
+        if self.sparse_search is not None:
+            sparse = self.sparse_search(query, self.candidate_k)
+            if self.sparse_within_dense:
+                passed = {doc_key(doc) for doc, _ in dense}
+                sparse = [(doc, score) for doc, score in sparse if doc_key(doc) in passed]
+            results.append(sparse)
+        if len(results) == 1:
+            return results[0][: self.top_k]
+        if self.fusion == "score":
+            fused = score_fusion(results, self.weights)
+        else:
+            fused = reciprocal_rank_fusion(results, self.weights)
+        return fused[: self.top_k]
+
+    def get_relevant_documents(self, query: str) -> List[Document]:
+        return [doc for doc, _ in self.get_relevant_documents_with_scores(query)]
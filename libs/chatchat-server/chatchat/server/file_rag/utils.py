@@ -1,6 +1,7 @@
 from chatchat.server.file_rag.retrievers import (
     BaseRetrieverService,
     EnsembleRetrieverService,
+    HybridRetrieverService,
     VectorstoreRetrieverService,
     MilvusVectorstoreRetrieverService,
 )
@@ -9,6 +10,7 @@ Retrivals = {
     "milvusvectorstore": MilvusVectorstoreRetrieverService,
     "vectorstore": VectorstoreRetrieverService,
     "ensemble": EnsembleRetrieverService,
+    "hybrid": HybridRetrieverService,
 }
 
 
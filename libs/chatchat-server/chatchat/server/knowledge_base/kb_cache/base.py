@@ -1,7 +1,8 @@
 import threading
+import time
 from collections import OrderedDict
 from contextlib import contextmanager
-from typing import Any, List, Tuple, Union, Generator
+from typing import Any, Dict, List, Tuple, Union, Generator
 
 from langchain.embeddings.base import Embeddings
 from langchain.vectorstores.faiss import FAISS
@@ -12,6 +13,65 @@ from chatchat.utils import build_logger
 logger = build_logger()
 
 
+class ReadWriteLock:
+    """
+    可重入的读写锁：读锁（shared）可以被多个线程同时持有，写锁（exclusive）独占。
+    有写线程等待时，新的读请求会排在其后，避免写线程饥饿。
+    持有写锁的线程可以再次获取读锁或写锁；持有读锁的线程不能升级为写锁。
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers: Dict[int, int] = {}
+        self._writer: int = None
+        self._writer_count = 0
+        self._writers_waiting = 0
+
+    def acquire_read(self):
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer == me or me in self._readers:
+                self._readers[me] = self._readers.get(me, 0) + 1
+                return
+            while self._writer is not None or self._writers_waiting:
+                self._cond.wait()
+            self._readers[me] = 1
+
+    def release_read(self):
+        me = threading.get_ident()
+        with self._cond:
+            count = self._readers[me] - 1
+            if count:
+                self._readers[me] = count
+            else:
+                del self._readers[me]
+                self._cond.notify_all()
+
+    def acquire_write(self):
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer == me:
+                self._writer_count += 1
+                return
+            if me in self._readers:
+                raise RuntimeError("cannot upgrade a read lock to a write lock")
+            self._writers_waiting += 1
+            try:
+                while self._writer is not None or self._readers:
+                    self._cond.wait()
+            finally:
+                self._writers_waiting -= 1
+            self._writer = me
+            self._writer_count = 1
+
+    def release_write(self):
+        with self._cond:
+            self._writer_count -= 1
+            if self._writer_count == 0:
+                self._writer = None
+                self._cond.notify_all()
+
+
 class ThreadSafeObject:
     def __init__(
         self, key: Union[str, Tuple], obj: Any = None, pool: "CachePool" = None
@@ -19,8 +79,12 @@ class ThreadSafeObject:
         self._obj = obj
         self._key = key
         self._pool = pool
-        self._lock = threading.RLock()
+        self._lock = ReadWriteLock()
         self._loaded = threading.Event()
+        self._holders = 0
+        self._holders_lock = threading.Lock()
+        self.last_access = time.time()
+        self.dirty = False
 
     def __repr__(self) -> str:
         cls = type(self).__name__
@@ -31,17 +95,49 @@ class ThreadSafeObject:
         return self._key
 
     @contextmanager
-    def acquire(self, owner: str = "", msg: str = "") -> Generator[None, None, FAISS]:
+    def acquire(
+        self, owner: str = "", msg: str = "", shared: bool = False
+    ) -> Generator[None, None, FAISS]:
+        """
+        shared=True 时获取读锁，可与其它读操作并发执行（如向量检索）；
+        否则获取写锁，独占对象（如添加、删除、保存向量）。
+        """
         owner = owner or f"thread {threading.get_native_id()}"
+        with self._holders_lock:
+            self._holders += 1
+        if shared:
+            acquire_lock, release_lock = self._lock.acquire_read, self._lock.release_read
+        else:
+            acquire_lock, release_lock = self._lock.acquire_write, self._lock.release_write
+        locked = False
         try:
-            self._lock.acquire()
-            if self._pool is not None:
+            acquire_lock()
+            locked = True
+            self.last_access = time.time()
+            if self._pool is not None and self.key in self._pool._cache:
                 self._pool._cache.move_to_end(self.key)
             logger.debug(f"{owner} 开始操作：{self.key}。{msg}")
             yield self._obj
         finally:
             logger.debug(f"{owner} 结束操作：{self.key}。{msg}")
-            self._lock.release()
+            self.last_access = time.time()
+            if locked:
+                release_lock()
+            with self._holders_lock:
+                self._holders -= 1
+
+    @property
+    def in_use(self) -> bool:
+        """正在被使用（持有或等待锁）或尚未加载完成的对象不能被释放"""
+        return self._holders > 0 or not self._loaded.is_set()
+
+    def size(self) -> int:
+        """对象占用的内存字节数，子类按需实现"""
+        return 0
+
+    def flush(self):
+        """释放前将未保存的修改写入磁盘，子类按需实现"""
+        self.dirty = False
 
     def start_loading(self):
         self._loaded.clear()
@@ -62,20 +158,143 @@ class ThreadSafeObject:
 
 
 class CachePool:
-    def __init__(self, cache_num: int = -1):
+    def __init__(
+        self,
+        cache_num: int = -1,
+        memory_limit: int = 0,
+        idle_ttl: float = 0,
+    ):
+        """
+        cache_num: 最大缓存数量，<=0 表示不限制
+        memory_limit: 最大内存占用（字节），<=0 表示不限制
+        idle_ttl: 空闲超过该时长（秒）的对象将被释放，<=0 表示不释放
+        """
         self._cache_num = cache_num
+        self._memory_limit = memory_limit
+        self._idle_ttl = idle_ttl
         self._cache = OrderedDict()
+        self._evicting: Dict[Union[str, Tuple], ThreadSafeObject] = {}
         self.atomic = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
 
     def keys(self) -> List[str]:
         return list(self._cache.keys())
 
-    def _check_count(self):
+    def total_size(self) -> int:
+        return sum(cache.size() for cache in list(self._cache.values()))
+
+    def _candidates(self) -> List[Tuple[Union[str, Tuple], Any]]:
+        """按最近最少使用的顺序排列的可释放对象，正在使用的对象不会被释放"""
+        return [(k, v) for k, v in list(self._cache.items())
+                if not (isinstance(v, ThreadSafeObject) and v.in_use)]
+
+    def _pop_item(self, key: Union[str, Tuple], cache: Any):
+        """从缓存中移除，有未保存修改的对象放入 _evicting，等待在锁外写入磁盘"""
+        self._cache.pop(key, None)
+        if isinstance(cache, ThreadSafeObject) and cache.dirty:
+            self._evicting[key] = cache
+        self.evictions += 1
+
+    def _pop_idle(self) -> List[Tuple[Union[str, Tuple], Any]]:
+        if not (self._idle_ttl and self._idle_ttl > 0):
+            return []
+        now = time.time()
+        expired = [(k, v) for k, v in self._candidates()
+                   if isinstance(v, ThreadSafeObject) and now - v.last_access > self._idle_ttl]
+        for key, cache in expired:
+            self._pop_item(key, cache)
+        return expired
+
+    def _pop_over_limit(self) -> List[Tuple[Union[str, Tuple], Any]]:
+        candidates = self._candidates()
+        popped = []
         if isinstance(self._cache_num, int) and self._cache_num > 0:
-            while len(self._cache) > self._cache_num:
-                self._cache.popitem(last=False)
+            while len(self._cache) > self._cache_num and candidates:
+                popped.append(candidates.pop(0))
+                self._pop_item(*popped[-1])
+
+        if self._memory_limit and self._memory_limit > 0:
+            total = self.total_size()
+            while total > self._memory_limit and candidates:
+                popped.append(candidates.pop(0))
+                total -= popped[-1][1].size()
+                self._pop_item(*popped[-1])
+        return popped
+
+    def _flush_evicted(self, items: List[Tuple[Union[str, Tuple], Any]]):
+        """
+        在 atomic 锁外保存被释放对象的修改，避免保存向量库时阻塞整个缓存池。
+        保存期间再次请求该对象会直接取回（见 get），保存失败的对象放回缓存池。
+        """
+        for key, cache in items:
+            if key not in self._evicting:
+                logger.info(f"已从缓存中释放：{key}")
+                continue
+            try:
+                cache.flush()
+                logger.info(f"已从缓存中释放：{key}")
+            except Exception as e:
+                logger.exception(f"释放缓存 {key} 前保存失败，放回缓存池：{e}")
+                with self.atomic:
+                    if self._evicting.get(key) is cache and key not in self._cache:
+                        self._cache[key] = cache
+                        self._cache.move_to_end(key, last=False)
+                        self.evictions -= 1
+            finally:
+                with self.atomic:
+                    if self._evicting.get(key) is cache:
+                        del self._evicting[key]
+
+    def _check_count(self):
+        """
+        按空闲时间、数量和内存占用释放缓存，按最近最少使用的顺序依次释放。
+        正在使用的对象不会被释放，未保存的修改会在释放后于锁外写入磁盘。
+        """
+        with self.atomic:
+            items = self._pop_idle() + self._pop_over_limit()
+        self._flush_evicted(items)
+
+    def expire_idle(self):
+        """释放空闲超时的对象，可由监控接口或定时任务调用"""
+        with self.atomic:
+            items = self._pop_idle()
+        self._flush_evicted(items)
+
+    def stats(self) -> Dict:
+        """缓存池当前状态，用于监控和评估内存占用"""
+        items = []
+        now = time.time()
+        for key, cache in list(self._cache.items()):
+            if isinstance(cache, ThreadSafeObject):
+                items.append({
+                    "key": key,
+                    "size": cache.size(),
+                    "idle_seconds": round(now - cache.last_access, 3),
+                    "in_use": cache.in_use,
+                    "dirty": cache.dirty,
+                })
+            else:
+                items.append({"key": key})
+        return {
+            "cache_num": self._cache_num,
+            "memory_limit": self._memory_limit,
+            "idle_ttl": self._idle_ttl,
+            "total_size": sum(x.get("size", 0) for x in items),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "items": items,
+        }
 
     def get(self, key: str) -> ThreadSafeObject:
+        if key not in self._cache and key in self._evicting:
+            # 正在释放的对象还没写入磁盘，取回它而不是从磁盘加载旧数据
+            with self.atomic:
+                if (cache := self._evicting.get(key)) is not None and key not in self._cache:
+                    self._cache[key] = cache
+                    self.evictions -= 1
         if cache := self._cache.get(key):
             cache.wait_for_loading()
             return cache
@@ -91,12 +310,20 @@ class CachePool:
         else:
             return self._cache.pop(key, None)
 
-    def acquire(self, key: Union[str, Tuple], owner: str = "", msg: str = ""):
+    def acquire(
+        self,
+        key: Union[str, Tuple],
+        owner: str = "",
+        msg: str = "",
+        shared: bool = False,
+    ):
         cache = self.get(key)
         if cache is None:
+            self.misses += 1
             raise RuntimeError(f"请求的资源 {key} 不存在")
-        elif isinstance(cache, ThreadSafeObject):
+        self.hits += 1
+        if isinstance(cache, ThreadSafeObject):
             self._cache.move_to_end(key)
-            return cache.acquire(owner=owner, msg=msg)
+            return cache.acquire(owner=owner, msg=msg, shared=shared)
         else:
             return cache
@@ -0,0 +1,224 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from array import array
+from typing import Dict, List, Optional
+
+from langchain_core.embeddings import Embeddings
+
+from chatchat.settings import Settings
+from chatchat.utils import build_logger
+
+
+logger = build_logger()
+
+
+def _batches(items: List, size: int = 500):
+    # SQLite 对单条语句的参数个数有限制
+    for i in range(0, len(items), size):
+        yield items[i : i + size]
+
+
+def embedding_cache_key(model: str, text: str) -> str:
+    """缓存键：嵌入模型名称 + 规范化后文本的 sha256"""
+    text = unicodedata.normalize("NFC", text).strip()
+    return hashlib.sha256(f"{model}\0{text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    基于 SQLite 的文本向量缓存，按内容寻址，与知识库和向量库类型无关。
+    向量以 float32 存储（与各向量库的存储精度一致），超过 max_size 时按最近最少访问的顺序淘汰。
+    """
+
+    # 每条记录除向量外的大致开销（键、索引等），用于估算占用空间
+    ROW_OVERHEAD = 128
+
+    def __init__(self, path: str, max_size: int):
+        self.path = path
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        if dirname := os.path.dirname(path):
+            os.makedirs(dirname, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embedding_cache ("
+            "key TEXT PRIMARY KEY, vector BLOB NOT NULL, size INTEGER NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS embedding_cache_last_access ON embedding_cache (last_access)"
+        )
+        self._conn.commit()
+        self._size, self._count = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0), COUNT(*) FROM embedding_cache"
+        ).fetchone()
+
+    def get_many(self, keys: List[str]) -> List[Optional[List[float]]]:
+        if not keys:
+            return []
+        found: Dict[str, List[float]] = {}
+        with self._lock:
+            for batch in _batches(list(dict.fromkeys(keys))):
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embedding_cache WHERE key IN ({','.join('?' * len(batch))})",
+                    batch,
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = array("f", blob).tolist()
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embedding_cache SET last_access = ? WHERE key = ?",
+                    [(now, key) for key in found],
+                )
+                self._conn.commit()
+            result = [found.get(key) for key in keys]
+            hits = sum(1 for x in result if x is not None)
+            self.hits += hits
+            self.misses += len(keys) - hits
+        return result
+
+    def set_many(self, keys: List[str], vectors: List[List[float]]):
+        if not keys:
+            return
+        now = time.time()
+        rows = {}
+        for key, vector in zip(keys, vectors):
+            blob = array("f", vector).tobytes()
+            rows[key] = (key, blob, len(blob) + self.ROW_OVERHEAD, now)
+        with self._lock:
+            old_size = old_count = 0
+            for batch in _batches(list(rows)):
+                size, count = self._conn.execute(
+                    "SELECT COALESCE(SUM(size), 0), COUNT(*) FROM embedding_cache "
+                    f"WHERE key IN ({','.join('?' * len(batch))})",
+                    batch,
+                ).fetchone()
+                old_size += size
+                old_count += count
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embedding_cache (key, vector, size, last_access) VALUES (?, ?, ?, ?)",
+                rows.values(),
+            )
+            self._size += sum(row[2] for row in rows.values()) - old_size
+            self._count += len(rows) - old_count
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        if self.max_size <= 0 or self._size <= self.max_size:
+            return
+        # 一次淘汰到上限的 90%，避免每次写入都触发淘汰
+        target = self.max_size * 0.9
+        while self._size > target and self._count > 0:
+            rows = self._conn.execute(
+                "SELECT key, size FROM embedding_cache ORDER BY last_access LIMIT 1000"
+            ).fetchall()
+            if not rows:
+                break
+            keys = []
+            for key, size in rows:
+                keys.append((key,))
+                self._size -= size
+                self._count -= 1
+                if self._size <= target:
+                    break
+            self._conn.executemany("DELETE FROM embedding_cache WHERE key = ?", keys)
+            self.evictions += len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM embedding_cache")
+            self._conn.commit()
+            self._size = self._count = 0
+
+    def stats(self) -> Dict:
+        total = self.hits + self.misses
+        return {
+            "path": self.path,
+            "entries": self._count,
+            "size": self._size,
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "evictions": self.evictions,
+        }
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    为 Embeddings 增加向量缓存：embed_documents 只对缓存中不存在的文本调用嵌入模型。
+    查询向量（embed_query）不做缓存。
+    """
+
+    def __init__(self, embeddings: Embeddings, model: str, cache: EmbeddingCache):
+        self.embeddings = embeddings
+        self.model = model
+        self.cache = cache
+
+    def __getattr__(self, name):
+        # 其它属性（如 model、chunk_size）直接使用被包装的 Embeddings
+        if name == "embeddings":
+            raise AttributeError(name)
+        return getattr(self.embeddings, name)
+
+    def _lookup(self, texts: List[str]):
+        keys = [embedding_cache_key(self.model, text) for text in texts]
+        vectors = self.cache.get_many(keys)
+        missing: Dict[str, str] = {}  # key -> text，相同文本只向量化一次
+        for key, text, vector in zip(keys, texts, vectors):
+            if vector is None:
+                missing.setdefault(key, text)
+        return keys, vectors, missing
+
+    def _merge(self, keys, vectors, missing, new_vectors) -> List[List[float]]:
+        self.cache.set_many(list(missing), new_vectors)
+        computed = dict(zip(missing, new_vectors))
+        return [v if v is not None else computed[k] for k, v in zip(keys, vectors)]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys, vectors, missing = self._lookup(texts)
+        new_vectors = self.embeddings.embed_documents(list(missing.values())) if missing else []
+        return self._merge(keys, vectors, missing, new_vectors)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys, vectors, missing = self._lookup(texts)
+        new_vectors = await self.embeddings.aembed_documents(list(missing.values())) if missing else []
+        return self._merge(keys, vectors, missing, new_vectors)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embeddings.embed_query(text)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return await self.embeddings.aembed_query(text)
+
+
+_embedding_cache: Optional[EmbeddingCache] = None
+_embedding_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> Optional[EmbeddingCache]:
+    """返回全局共用的向量缓存，EMBEDDING_CACHE_SIZE 为 0 时返回 None"""
+    global _embedding_cache
+    if Settings.kb_settings.EMBEDDING_CACHE_SIZE <= 0:
+        return None
+    with _embedding_cache_lock:
+        if _embedding_cache is None:
+            try:
+                _embedding_cache = EmbeddingCache(
+                    path=str(Settings.basic_settings.DATA_PATH / "embedding_cache.db"),
+                    max_size=Settings.kb_settings.EMBEDDING_CACHE_SIZE * 1024 * 1024,
+                )
+            except Exception as e:
+                logger.warning(f"无法打开文本向量缓存，将不使用缓存：{e}")
+                return None
+        return _embedding_cache
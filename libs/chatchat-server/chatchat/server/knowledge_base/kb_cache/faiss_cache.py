@@ -1,10 +1,19 @@
+import copy
 import os
+import pickle
+import re
+import shutil
+import threading
+import uuid
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Generator, Iterable, List, Optional, Set, Tuple, Union
 
 from langchain.docstore.in_memory import InMemoryDocstore
 from langchain.schema import Document
 from langchain.vectorstores.faiss import FAISS
 
 from chatchat.settings import Settings
+from chatchat.server.file_rag.retrievers.bm25 import BM25Index
 from chatchat.server.knowledge_base.kb_cache.base import *
 from chatchat.server.knowledge_base.utils import get_vs_path
 from chatchat.server.utils import get_Embeddings, get_default_embedding
@@ -24,7 +33,349 @@ def _new_ds_search(self, search: str) -> Union[str, Document]:
 InMemoryDocstore.search = _new_ds_search
 
 
+CURRENT_VS_VERSION_FILE = "CURRENT"
+
+
+def _list_vs_versions(vs_path: str) -> List[int]:
+    versions = []
+    if os.path.isdir(vs_path):
+        for name in os.listdir(vs_path):
+            if re.fullmatch(r"v\d+", name) and os.path.isdir(os.path.join(vs_path, name)):
+                versions.append(int(name[1:]))
+    return sorted(versions)
+
+
+def get_current_vs_version_path(vs_path: str) -> Optional[str]:
+    """
+    返回向量库当前发布版本所在的目录，没有可用版本时返回 None。
+    兼容旧版本直接保存在 vs_path 下的向量库。
+    """
+    current_file = os.path.join(vs_path, CURRENT_VS_VERSION_FILE)
+    if os.path.isfile(current_file):
+        with open(current_file, encoding="utf-8") as fp:
+            version_path = os.path.join(vs_path, fp.read().strip())
+        if os.path.isfile(os.path.join(version_path, "index.faiss")):
+            return version_path
+    if os.path.isfile(os.path.join(vs_path, "index.faiss")):
+        return vs_path
+    return None
+
+
+def publish_vs_version(vs_path: str, save_func: Callable[[str], Any]) -> str:
+    """
+    将向量库保存到 vs_path 下新的版本目录（v1, v2, ...），全部写入磁盘后再原子地更新 CURRENT 指向新版本，
+    然后清理旧版本。保存过程中崩溃时 CURRENT 仍指向上一个完整的版本。
+    """
+    versions = _list_vs_versions(vs_path)
+    version = f"v{max(versions, default=0) + 1}"
+    version_path = os.path.join(vs_path, version)
+    os.makedirs(version_path)
+    save_func(version_path)
+    for name in os.listdir(version_path):
+        with open(os.path.join(version_path, name), "rb") as fp:
+            os.fsync(fp.fileno())
+
+    current_file = os.path.join(vs_path, CURRENT_VS_VERSION_FILE)
+    tmp_file = current_file + ".tmp"
+    with open(tmp_file, "w", encoding="utf-8") as fp:
+        fp.write(version)
+        fp.flush()
+        os.fsync(fp.fileno())
+    os.replace(tmp_file, current_file)
+
+    for v in versions:
+        shutil.rmtree(os.path.join(vs_path, f"v{v}"), ignore_errors=True)
+    for name in ["index.faiss", "index.pkl", BM25Index.INDEX_FILE]:  # 旧版本的目录结构
+        if os.path.isfile(file := os.path.join(vs_path, name)):
+            os.remove(file)
+    return version_path
+
+
+VS_DELTA_FILE = re.compile(r"delta-(\d+)\.pkl")
+# 增量文件数超过 MAX_VS_DELTA_FILES，或增量修改的文本块数超过向量数的 MAX_VS_DELTA_RATIO 时，保存为完整的新版本
+MAX_VS_DELTA_FILES = 32
+MAX_VS_DELTA_RATIO = 0.25
+# 墓碑数超过向量数的该比例时，提交后立即整理索引
+MAX_TOMBSTONE_RATIO = 0.25
+
+
+def list_vs_deltas(version_path: str) -> List[str]:
+    """版本目录下的增量文件，按写入顺序排列"""
+    deltas = []
+    for name in os.listdir(version_path):
+        if m := VS_DELTA_FILE.fullmatch(name):
+            deltas.append((int(m.group(1)), name))
+    return [os.path.join(version_path, name) for _, name in sorted(deltas)]
+
+
+def append_vs_delta(version_path: str, ops: List[Tuple]) -> str:
+    """
+    将一组修改写入版本目录下新的增量文件。先写临时文件再原子地改名，崩溃时只会丢失未完成的增量文件，
+    加载时按顺序应用全部增量文件即可恢复最后保存的状态。
+    """
+    deltas = list_vs_deltas(version_path)
+    seq = int(VS_DELTA_FILE.fullmatch(os.path.basename(deltas[-1])).group(1)) + 1 if deltas else 1
+    file = os.path.join(version_path, f"delta-{seq:06d}.pkl")
+    tmp_file = file + ".tmp"
+    with open(tmp_file, "wb") as fp:
+        pickle.dump(ops, fp, protocol=pickle.HIGHEST_PROTOCOL)
+        fp.flush()
+        os.fsync(fp.fileno())
+    os.replace(tmp_file, file)
+    return file
+
+
+def load_vs_deltas(version_path: str) -> Generator[List[Tuple], None, None]:
+    for file in list_vs_deltas(version_path):
+        with open(file, "rb") as fp:
+            yield pickle.load(fp)
+
+
+class DocSourceIndex:
+    """
+    文档来源（metadata["source"]，不区分大小写）到 doc id 的映射，删除或列出某个文件的文档时无需遍历整个 docstore。
+    不单独保存到磁盘，加载向量库时从 docstore 重建。
+    """
+
+    def __init__(self):
+        self._ids: Dict[str, Dict[str, None]] = {}  # 用 dict 保持插入顺序
+
+    @staticmethod
+    def normalize(source: Any) -> str:
+        return str(source or "").lower()
+
+    def __len__(self) -> int:
+        return sum(len(ids) for ids in self._ids.values())
+
+    def get(self, source: str) -> List[str]:
+        return list(self._ids.get(self.normalize(source), ()))
+
+    def add(self, ids: Iterable[str], metadatas: Iterable[Dict]):
+        for doc_id, metadata in zip(ids, metadatas):
+            self._ids.setdefault(self.normalize((metadata or {}).get("source")), {})[doc_id] = None
+
+    def delete(self, ids: Iterable[str], metadatas: Iterable[Dict]):
+        for doc_id, metadata in zip(ids, metadatas):
+            source = self.normalize((metadata or {}).get("source"))
+            if (doc_ids := self._ids.get(source)) is not None:
+                doc_ids.pop(doc_id, None)
+                if not doc_ids:
+                    del self._ids[source]
+
+    def clear(self):
+        self._ids.clear()
+
+    def copy(self) -> "DocSourceIndex":
+        index = DocSourceIndex()
+        index._ids = {source: dict(ids) for source, ids in self._ids.items()}
+        return index
+
+    @classmethod
+    def from_docstore(cls, docs: Dict[str, Document]) -> "DocSourceIndex":
+        index = cls()
+        index.add(docs.keys(), [doc.metadata for doc in docs.values()])
+        return index
+
+
+class _LiveIndex:
+    """检索时跳过墓碑位置的 faiss 索引视图，其它属性和方法直接使用原索引"""
+
+    def __init__(self, index, tombstones: Set[int]):
+        self._index = index
+        self._tombstones = tombstones
+
+    def __getattr__(self, name: str):
+        return getattr(self._index, name)
+
+    def search(self, x, k: int, *args, **kwargs):
+        import numpy as np
+
+        fetch = min(k + len(self._tombstones), max(k, self._index.ntotal))
+        scores, indices = self._index.search(x, fetch, *args, **kwargs)
+        live_scores = np.zeros((len(indices), k), dtype=scores.dtype)
+        live_indices = np.full((len(indices), k), -1, dtype=indices.dtype)
+        for row in range(len(indices)):
+            keep = [j for j, i in enumerate(indices[row]) if i not in self._tombstones][:k]
+            live_scores[row, : len(keep)] = scores[row, keep]
+            live_indices[row, : len(keep)] = indices[row, keep]
+        return live_scores, live_indices
+
+
+class IncrementalFAISS(FAISS):
+    """
+    支持增量修改的 FAISS 向量库：新增的向量追加到索引末尾；删除时只从 docstore 中移除，并将其在索引中的位置记为墓碑，
+    检索时跳过墓碑，之后由 compact() 一次性从索引中移除。增删的耗时只与修改的文本块数有关，与知识库大小无关。
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.tombstones: Set[int] = set()
+        self._positions: Optional[Dict[str, int]] = None  # doc id -> 索引中的位置，首次删除时构建
+
+    def _position_map(self) -> Dict[str, int]:
+        if self._positions is None:
+            self._positions = {
+                id_: i for i, id_ in self.index_to_docstore_id.items() if i not in self.tombstones
+            }
+        return self._positions
+
+    def append(self, texts: List[str], embeddings, metadatas: List[Dict], ids: List[str]):
+        # 墓碑位置仍保留在 index_to_docstore_id 中，新向量的位置与 FAISS.add_embeddings 的计算一致
+        start = self.index.ntotal
+        self.add_embeddings(zip(texts, embeddings), metadatas=metadatas, ids=ids)
+        if self._positions is not None:
+            self._positions.update({id_: start + j for j, id_ in enumerate(ids)})
+
+    def tombstone(self, ids: Iterable[str]) -> List[Tuple[str, Document]]:
+        """删除文档，返回实际删除的 [(id, doc), ...]，不存在的 id 被忽略"""
+        positions = self._position_map()
+        removed = []
+        for id_ in ids:
+            if (pos := positions.pop(id_, None)) is None:
+                continue
+            self.tombstones.add(pos)
+            removed.append((id_, self.docstore._dict.pop(id_)))
+        return removed
+
+    def compact(self):
+        """从索引中移除墓碑位置的向量，耗时与知识库大小成正比"""
+        import numpy as np
+
+        if not self.tombstones:
+            return
+        self.index.remove_ids(np.array(sorted(self.tombstones), dtype=np.int64))
+        live_ids = [
+            id_ for i, id_ in sorted(self.index_to_docstore_id.items()) if i not in self.tombstones
+        ]
+        self.index_to_docstore_id = dict(enumerate(live_ids))
+        self.tombstones = set()
+        self._positions = None
+
+    def reset(self):
+        self.index.reset()
+        self.docstore._dict.clear()
+        self.index_to_docstore_id = {}
+        self.tombstones = set()
+        self._positions = None
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        self.compact()
+        self._positions = None
+        return super().delete(ids, **kwargs)
+
+    def _live_view(self) -> "IncrementalFAISS":
+        view = copy.copy(self)
+        view.index = _LiveIndex(self.index, self.tombstones)
+        view.tombstones = set()
+        return view
+
+    def similarity_search_with_score_by_vector(self, *args, **kwargs) -> List[Tuple[Document, float]]:
+        if self.tombstones:
+            return self._live_view().similarity_search_with_score_by_vector(*args, **kwargs)
+        return super().similarity_search_with_score_by_vector(*args, **kwargs)
+
+    def max_marginal_relevance_search_with_score_by_vector(self, *args, **kwargs) -> List[Tuple[Document, float]]:
+        if self.tombstones:
+            return self._live_view().max_marginal_relevance_search_with_score_by_vector(*args, **kwargs)
+        return super().max_marginal_relevance_search_with_score_by_vector(*args, **kwargs)
+
+
+def _op_rows(op: Tuple) -> int:
+    return len(op[1])
+
+
+class FaissWriteBatch:
+    """
+    一个写入请求暂存的修改，按顺序记录为操作列表，不复制向量库：
+    ("add", ids, texts, embeddings, metadatas, tokens) 或 ("delete", ids)。
+    ThreadSafeFaiss.commit() 时一次性应用，提交前对检索和其它批次都不可见。
+    """
+
+    def __init__(self, faiss: "ThreadSafeFaiss"):
+        self.faiss = faiss
+        self.ops: List[Tuple] = []
+        self._added: Dict[str, str] = {}  # 本批次新增的 doc id -> 来源
+        self._deleted: Set[str] = set()  # 本批次删除的已提交 doc id
+
+    def __len__(self) -> int:
+        return sum(_op_rows(op) for op in self.ops)
+
+    def _exists(self, doc_id: str) -> bool:
+        if doc_id in self._added:
+            return True
+        return doc_id not in self._deleted and doc_id in self.faiss.obj.docstore._dict
+
+    def add_embeddings(
+        self,
+        texts: List[str],
+        embeddings: List[List[float]],
+        metadatas: List[Dict],
+        ids: List[str] = None,
+    ) -> List[str]:
+        import numpy as np
+
+        if not texts:
+            return []
+        ids = list(ids) if ids else [str(uuid.uuid4()) for _ in texts]
+        with self.faiss.acquire(shared=True):
+            if existing := [id_ for id_ in ids if self._exists(id_)]:
+                raise ValueError(f"Tried to add ids that already exist: {existing}")
+        # 分词也在加锁前完成
+        tokens = (self.faiss.bm25 or BM25Index()).tokenize(texts)
+        self.ops.append(
+            ("add", ids, list(texts), np.asarray(embeddings, dtype=np.float32), list(metadatas), tokens)
+        )
+        for id_, metadata in zip(ids, metadatas):
+            self._added[id_] = DocSourceIndex.normalize((metadata or {}).get("source"))
+        return ids
+
+    def add_documents(self, docs: List[Document]) -> List[str]:
+        texts = [doc.page_content for doc in docs]
+        embeddings = self.faiss.obj.embeddings.embed_documents(texts)
+        return self.add_embeddings(texts, embeddings, [doc.metadata for doc in docs])
+
+    def delete(self, ids: List[str]):
+        ids = list(ids)
+        with self.faiss.acquire(shared=True):
+            if missing := [id_ for id_ in ids if not self._exists(id_)]:
+                raise ValueError(f"Some specified ids do not exist in the current store. Ids not found: {missing}")
+        for id_ in ids:
+            if id_ in self._added:
+                del self._added[id_]
+            else:
+                self._deleted.add(id_)
+        self.ops.append(("delete", ids))
+
+    def source_ids(self, source: str) -> List[str]:
+        """某个文件当前的 doc id：已提交的减去本批次删除的，加上本批次新增的"""
+        source = DocSourceIndex.normalize(source)
+        with self.faiss.acquire(shared=True):
+            ids = [id_ for id_ in self.faiss.sources.get(source) if id_ not in self._deleted]
+        return ids + [id_ for id_, s in self._added.items() if s == source]
+
+
 class ThreadSafeFaiss(ThreadSafeObject):
+    """
+    知识库向量库。每个写入请求通过 batch() 获取自己的 FaissWriteBatch 暂存修改，向量化、分词等耗时操作在暂存时完成；
+    commit() 时获取写锁，按顺序将修改应用到向量库、BM25 索引和来源索引，耗时只与本批次的修改量有关。
+    检索获取读锁，只会看到完整提交的批次。
+    save() 将已提交但未保存的修改追加为当前版本目录下的增量文件，增量过多时才保存完整的新版本。
+    临时向量库（MemoFaissPool）仍然通过 acquire() 直接修改。
+    """
+
+    def __init__(
+        self, key: Union[str, Tuple], obj: Any = None, pool: "CachePool" = None
+    ):
+        super().__init__(key, obj=obj, pool=pool)
+        self.bm25: BM25Index = None
+        self.sources = DocSourceIndex()
+        self.vs_path: str = None
+        self._write_lock = threading.RLock()  # 串行化提交与保存
+        self._unsaved: List[Tuple] = []  # 已提交但尚未保存的操作
+        self._delta_rows = 0  # 当前版本目录下增量文件涉及的文本块数
+        self._full_save = False  # 下次保存时写入完整的新版本，如清空向量库后
+        self._size: Tuple[int, int] = (-1, 0)  # (ntotal, bytes)
+
     def __repr__(self) -> str:
         cls = type(self).__name__
         return f"<{cls}: key: {self.key}, obj: {self._obj}, docs_count: {self.docs_count()}>"
@@ -32,24 +383,129 @@ class ThreadSafeFaiss(ThreadSafeObject):
     def docs_count(self) -> int:
         return len(self._obj.docstore._dict)
 
+    def mark_dirty(self):
+        """向量库内容被修改但尚未保存"""
+        self.dirty = True
+
+    def size(self) -> int:
+        """
+        估算向量库常驻内存：向量（float32）+ docstore 中的文本
+        结果会被缓存，直到向量数量发生变化
+        """
+        if self._obj is None:
+            return 0
+        index = self._obj.index
+        if self._size[0] != index.ntotal:
+            size = index.ntotal * index.d * 4
+            for doc in list(self._obj.docstore._dict.values()):
+                size += len(doc.page_content.encode("utf-8"))
+                size += sum(len(str(k)) + len(str(v)) for k, v in doc.metadata.items())
+            self._size = (index.ntotal, size)
+        return self._size[1]
+
+    @contextmanager
+    def batch(self) -> Generator[FaissWriteBatch, None, None]:
+        """
+        获取新的写入批次，退出时提交。发生异常时同样提交已暂存的修改，与已写入数据库的记录保持一致。
+        批次存在期间向量库不会被缓存池释放。
+        """
+        with self._holders_lock:
+            self._holders += 1
+        batch = FaissWriteBatch(self)
+        try:
+            yield batch
+        finally:
+            try:
+                self.commit(batch)
+            finally:
+                with self._holders_lock:
+                    self._holders -= 1
+
+    def commit(self, batch: FaissWriteBatch) -> bool:
+        if not batch.ops:
+            return False
+        with self._write_lock:
+            with self.acquire(msg="提交修改"):
+                self._apply(batch.ops)
+                if len(self._obj.tombstones) > MAX_TOMBSTONE_RATIO * max(self._obj.index.ntotal, 1):
+                    self._obj.compact()
+            self._unsaved.extend(batch.ops)
+            self.mark_dirty()
+        batch.ops = []
+        return True
+
+    def _apply(self, ops: List[Tuple]):
+        """调用方需持有写锁"""
+        docs = self._obj.docstore._dict
+        for op in ops:
+            if op[0] == "add":
+                _, ids, texts, embeddings, metadatas, tokens = op
+                if existing := [id_ for id_ in ids if id_ in docs]:
+                    self._remove(existing)
+                self._obj.append(texts, embeddings, metadatas, ids)
+                self.bm25.add_tokens(ids, tokens)
+                self.sources.add(ids, metadatas)
+            else:
+                self._remove(op[1])
+
+    def _remove(self, ids: List[str]):
+        removed = self._obj.tombstone(ids)
+        self.bm25.delete([id_ for id_, _ in removed])
+        self.sources.delete([id_ for id_, _ in removed], [doc.metadata for _, doc in removed])
+
+    def replay_deltas(self, version_path: str):
+        """加载向量库时应用版本目录下的增量文件，调用方需持有写锁"""
+        for ops in load_vs_deltas(version_path):
+            self._apply(ops)
+            self._delta_rows += sum(_op_rows(op) for op in ops)
+
+    def flush(self):
+        if self.dirty and self.vs_path:
+            self.save(self.vs_path)
+        self.dirty = False
+
     def save(self, path: str, create_path: bool = True):
-        with self.acquire():
+        with self._write_lock:
             if not os.path.isdir(path) and create_path:
                 os.makedirs(path)
-            ret = self._obj.save_local(path)
-            logger.info(f"已将向量库 {self.key} 保存到磁盘")
-        return ret
+            version_path = get_current_vs_version_path(path)
+            delta_rows = self._delta_rows + sum(_op_rows(op) for op in self._unsaved)
+            if (
+                self._full_save
+                or version_path in (None, path)  # 尚未保存过或旧版本的目录结构
+                or len(list_vs_deltas(version_path)) >= MAX_VS_DELTA_FILES
+                or delta_rows > MAX_VS_DELTA_RATIO * max(self._obj.index.ntotal, 1)
+            ):
+                with self.acquire(msg="整理索引"):
+                    self._obj.compact()
+                vector_store, bm25 = self._obj, self.bm25
 
-    def clear(self):
-        ret = []
-        with self.acquire():
-            ids = list(self._obj.docstore._dict.keys())
-            if ids:
-                ret = self._obj.delete(ids)
-                assert len(self._obj.docstore._dict) == 0
-            logger.info(f"已将向量库 {self.key} 清空")
-        return ret
+                def save_func(version_path: str):
+                    vector_store.save_local(version_path)
+                    if bm25 is not None:
+                        bm25.save(version_path)
+
+                publish_vs_version(path, save_func)
+                self._delta_rows = 0
+                self._full_save = False
+                logger.info(f"已将向量库 {self.key} 保存到磁盘")
+            elif self._unsaved:
+                append_vs_delta(version_path, self._unsaved)
+                self._delta_rows = delta_rows
+                logger.info(f"已将向量库 {self.key} 的 {len(self._unsaved)} 项修改追加保存到磁盘")
+            self._unsaved = []
+            self.dirty = False
 
+    def clear(self):
+        with self._write_lock:
+            with self.acquire(msg="清空"):
+                self._obj.reset()
+                self.bm25.clear()
+                self.sources.clear()
+            self._unsaved = []
+            self._full_save = True
+            self.mark_dirty()
+        logger.info(f"已将向量库 {self.key} 清空")
 
 class _FaissPool(CachePool):
     def new_vector_store(
@@ -60,7 +516,7 @@ class _FaissPool(CachePool):
         # create an empty vector store
         embeddings = get_Embeddings(embed_model=embed_model)
         doc = Document(page_content="init", metadata={})
-        vector_store = FAISS.from_documents([doc], embeddings, normalize_L2=True)
+        vector_store = IncrementalFAISS.from_documents([doc], embeddings, normalize_L2=True)
         ids = list(vector_store.docstore._dict.keys())
         vector_store.delete(ids)
         return vector_store
@@ -101,8 +557,10 @@ class KBFaissPool(_FaissPool):
         cache = self.get((kb_name, vector_name))  # 用元组比拼接字符串好一些
         try:
             if cache is None:
+                self.misses += 1
                 item = ThreadSafeFaiss((kb_name, vector_name), pool=self)
-                self.set((kb_name, vector_name), item)
+                # 只在锁内放入占位对象，释放其它向量库（可能需要写入磁盘）在加载完成后于锁外进行
+                self._cache[(kb_name, vector_name)] = item
                 with item.acquire(msg="初始化"):
                     self.atomic.release()
                     locked = False
@@ -111,14 +569,20 @@ class KBFaissPool(_FaissPool):
                     )
                     vs_path = get_vs_path(kb_name, vector_name)
 
-                    if os.path.isfile(os.path.join(vs_path, "index.faiss")):
+                    if version_path := get_current_vs_version_path(vs_path):
                         embeddings = get_Embeddings(embed_model=embed_model)
-                        vector_store = FAISS.load_local(
-                            vs_path,
+                        vector_store = IncrementalFAISS.load_local(
+                            version_path,
                             embeddings,
                             normalize_L2=True,
                             allow_dangerous_deserialization=True,
                         )
+                        bm25_index = BM25Index.load(version_path)
+                        if bm25_index is None:
+                            # 旧版本知识库没有 BM25 索引，首次加载时构建并保存
+                            logger.info(f"building bm25 index for '{kb_name}/vector_store/{vector_name}'.")
+                            bm25_index = BM25Index.from_documents(vector_store.docstore._dict)
+                            bm25_index.save(version_path)
                     elif create:
                         # create an empty vector store
                         if not os.path.exists(vs_path):
@@ -126,12 +590,22 @@ class KBFaissPool(_FaissPool):
                         vector_store = self.new_vector_store(
                             kb_name=kb_name, embed_model=embed_model
                         )
-                        vector_store.save_local(vs_path)
+                        bm25_index = BM25Index()
                     else:
                         raise RuntimeError(f"knowledge base {kb_name} not exist.")
                     item.obj = vector_store
+                    item.bm25 = bm25_index
+                    item.sources = DocSourceIndex.from_docstore(vector_store.docstore._dict)
+                    item.vs_path = vs_path
+                    if version_path is not None:
+                        item.replay_deltas(version_path)
+                    else:
+                        item.save(vs_path)
                     item.finish_loading()
+                    # 加载完成后才能知道实际占用的内存，此时再检查一次是否需要释放其它向量库
+                    self._check_count()
             else:
+                self.hits += 1
                 self.atomic.release()
                 locked = False
         except Exception as e:
@@ -155,8 +629,9 @@ class MemoFaissPool(_FaissPool):
         self.atomic.acquire()
         cache = self.get(kb_name)
         if cache is None:
+            self.misses += 1
             item = ThreadSafeFaiss(kb_name, pool=self)
-            self.set(kb_name, item)
+            self._cache[kb_name] = item
             with item.acquire(msg="初始化"):
                 self.atomic.release()
                 logger.info(f"loading vector store in '{kb_name}' to memory.")
@@ -164,12 +639,18 @@ class MemoFaissPool(_FaissPool):
                 vector_store = self.new_temp_vector_store(embed_model=embed_model)
                 item.obj = vector_store
                 item.finish_loading()
+                self._check_count()
         else:
+            self.hits += 1
             self.atomic.release()
         return self.get(kb_name)
 
 
-kb_faiss_pool = KBFaissPool(cache_num=Settings.kb_settings.CACHED_VS_NUM)
+kb_faiss_pool = KBFaissPool(
+    cache_num=Settings.kb_settings.CACHED_VS_NUM,
+    memory_limit=Settings.kb_settings.CACHED_VS_MEMORY_LIMIT * 1024 * 1024,
+    idle_ttl=Settings.kb_settings.CACHED_VS_IDLE_TTL,
+)
 memo_faiss_pool = MemoFaissPool(cache_num=Settings.kb_settings.CACHED_MEMO_VS_NUM)
 #
 #
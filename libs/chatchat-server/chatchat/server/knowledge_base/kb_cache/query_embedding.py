@@ -0,0 +1,221 @@
+"""
+查询向量服务：缓存最近的查询向量，并把同一时间窗口内并发的未命中查询合并成一次嵌入请求。
+知识库检索、文件对话等每次查询都要向量化一条很短的文本，并发较高时这些小请求会占满嵌入模型服务。
+"""
+import asyncio
+import threading
+from array import array
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from langchain_core.embeddings import Embeddings
+
+from chatchat.settings import Settings
+from chatchat.server.knowledge_base.kb_cache.embedding_cache import embedding_cache_key
+
+
+# 批次凑满时在这里发送请求，避免阻塞调用方（可能是事件循环）
+_flush_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="query_embedding")
+
+
+class QueryEmbeddingBatcher:
+    """
+    单个嵌入模型的查询向量缓存与合并请求。
+    - 查询向量按 模型 + 文本 缓存，超过 cache_size 时按最近最少使用的顺序淘汰
+    - 未命中的查询先等待 window 秒，期间到达的其它查询与之合并为一次 embed_documents 请求，
+      凑满 batch_size 条时立即发送；相同文本正在请求时直接等待该请求的结果
+    - batch=False 时（embed_query 与 embed_documents 的结果不同的模型，如带查询前缀的 Ollama）只缓存、不合并
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        model: str,
+        cache_size: int = 1000,
+        batch_size: int = 32,
+        window: float = 0.005,
+        batch: bool = True,
+    ):
+        self.embeddings = embeddings
+        self.model = model
+        self.cache_size = cache_size
+        self.batch_size = max(batch_size, 1)
+        self.window = window
+        self.batch = batch and window > 0
+        self.hits = 0
+        self.misses = 0
+        self.requests = 0  # 实际发送给嵌入模型的请求数
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[str, array]" = OrderedDict()
+        self._inflight: Dict[str, Future] = {}
+        self._pending: List[Tuple[str, str]] = []  # [(key, text), ...]
+        self._timer: Optional[threading.Timer] = None
+
+    def _lookup(self, key: str) -> Optional[List[float]]:
+        # 调用方持有 self._lock
+        vector = self._cache.get(key)
+        if vector is None:
+            return None
+        self._cache.move_to_end(key)
+        self.hits += 1
+        return vector.tolist()
+
+    def _remember(self, key: str, vector: List[float]):
+        if self.cache_size <= 0:
+            return
+        with self._lock:
+            self._cache[key] = array("f", vector)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _submit(self, key: str, text: str) -> Future:
+        with self._lock:
+            if (vector := self._lookup(key)) is not None:
+                future = Future()
+                future.set_result(vector)
+                return future
+            if (future := self._inflight.get(key)) is not None:
+                self.hits += 1
+                return future
+            self.misses += 1
+            future = self._inflight[key] = Future()
+            self._pending.append((key, text))
+            if len(self._pending) >= self.batch_size:
+                batch, self._pending = self._pending, []
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+                _flush_pool.submit(self._run, batch)
+            elif self._timer is None:
+                self._timer = threading.Timer(self.window, self._flush)
+                self._timer.daemon = True
+                self._timer.start()
+        return future
+
+    def _flush(self):
+        with self._lock:
+            batch, self._pending, self._timer = self._pending, [], None
+        if batch:
+            self._run(batch)
+
+    def _run(self, batch: List[Tuple[str, str]]):
+        keys = [key for key, _ in batch]
+        self.requests += 1
+        try:
+            vectors = self.embeddings.embed_documents([text for _, text in batch])
+            if len(vectors) != len(batch):
+                raise ValueError(f"嵌入模型返回了 {len(vectors)} 个向量，应为 {len(batch)} 个")
+        except Exception as e:
+            with self._lock:
+                futures = [self._inflight.pop(key) for key in keys]
+            for future in futures:
+                future.set_exception(e)
+            return
+        for key, vector in zip(keys, vectors):
+            self._remember(key, vector)
+        with self._lock:
+            futures = [self._inflight.pop(key) for key in keys]
+        for future, vector in zip(futures, vectors):
+            future.set_result(vector)
+
+    def embed_query(self, text: str) -> List[float]:
+        key = embedding_cache_key(self.model, text)
+        if self.batch:
+            return self._submit(key, text).result()
+        with self._lock:
+            vector = self._lookup(key)
+            if vector is None:
+                self.misses += 1
+        if vector is None:
+            self.requests += 1
+            vector = self.embeddings.embed_query(text)
+            self._remember(key, vector)
+        return vector
+
+    async def aembed_query(self, text: str) -> List[float]:
+        key = embedding_cache_key(self.model, text)
+        if self.batch:
+            return await asyncio.wrap_future(self._submit(key, text))
+        with self._lock:
+            vector = self._lookup(key)
+            if vector is None:
+                self.misses += 1
+        if vector is None:
+            self.requests += 1
+            vector = await self.embeddings.aembed_query(text)
+            self._remember(key, vector)
+        return vector
+
+    def stats(self) -> Dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._cache),
+            "cache_size": self.cache_size,
+            "batch": self.batch,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "requests": self.requests,
+            "avg_batch_size": self.misses / self.requests if self.requests else 0.0,
+        }
+
+
+class QueryEmbeddings(Embeddings):
+    """
+    查询向量（embed_query / aembed_query）交给 QueryEmbeddingBatcher 处理，
+    文档向量（embed_documents）仍由被包装的 Embeddings 计算。
+    """
+
+    def __init__(self, embeddings: Embeddings, batcher: QueryEmbeddingBatcher):
+        self.embeddings = embeddings
+        self.batcher = batcher
+
+    def __getattr__(self, name):
+        if name == "embeddings":
+            raise AttributeError(name)
+        return getattr(self.embeddings, name)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await self.embeddings.aembed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.batcher.embed_query(text)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return await self.batcher.aembed_query(text)
+
+
+_batchers: Dict[str, QueryEmbeddingBatcher] = {}
+_batchers_lock = threading.Lock()
+
+
+def get_query_batcher(model: str, embeddings: Embeddings, batch: bool = True) -> QueryEmbeddingBatcher:
+    """
+    返回嵌入模型共用的 QueryEmbeddingBatcher，同一模型的所有 Embeddings 实例共享缓存与批次。
+    embeddings 为不带缓存的原始 Embeddings，每次调用都会替换为最新的实例，以使用最新的模型配置。
+    """
+    kb_settings = Settings.kb_settings
+    with _batchers_lock:
+        batcher = _batchers.get(model)
+        if batcher is None:
+            batcher = _batchers[model] = QueryEmbeddingBatcher(
+                embeddings,
+                model=model,
+                cache_size=kb_settings.QUERY_EMBEDDING_CACHE_SIZE,
+                batch_size=kb_settings.QUERY_EMBEDDING_BATCH_SIZE,
+                window=kb_settings.QUERY_EMBEDDING_BATCH_WINDOW / 1000,
+                batch=batch,
+            )
+        else:
+            batcher.embeddings = embeddings
+        return batcher
+
+
+def query_embedding_stats() -> Dict[str, Dict]:
+    with _batchers_lock:
+        return {model: batcher.stats() for model, batcher in _batchers.items()}
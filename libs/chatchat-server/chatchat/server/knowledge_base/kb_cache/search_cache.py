@@ -0,0 +1,260 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from chatchat.settings import Settings
+from chatchat.utils import build_logger
+
+
+logger = build_logger()
+
+
+def normalize_query(query: str) -> str:
+    """规范化查询文本：Unicode NFC，去掉首尾空白并合并连续空白"""
+    return " ".join(unicodedata.normalize("NFC", query).split())
+
+
+class SearchResultCache:
+    """
+    知识库检索结果缓存，按 LRU 淘汰，超过 ttl 秒的结果视为过期。
+    缓存键包含知识库的版本号：知识库内容每次变化时版本号递增（见 bump），旧版本的结果不会再被命中，等待淘汰即可。
+    结果以 JSON 保存，每次命中都返回新的对象，调用方可以随意修改。
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.saved_time = 0.0  # 命中的结果当初检索所用的时间之和（秒）
+        self._lock = threading.Lock()
+        self._versions: Dict[str, int] = {}
+        self._entries: "OrderedDict[str, Tuple[str, float, float]]" = OrderedDict()  # key -> (value, cost, created)
+
+    def version(self, namespace: str) -> int:
+        return self._versions.get(namespace, 0)
+
+    def bump(self, namespace: str):
+        """知识库内容发生变化后调用"""
+        with self._lock:
+            self._versions[namespace] = self._versions.get(namespace, 0) + 1
+
+    def make_key(self, namespace: str, query: str, params: Dict) -> str:
+        raw = json.dumps(
+            [namespace, self.version(namespace), normalize_query(query), params],
+            ensure_ascii=False,
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _load(self, key: str) -> Optional[Tuple[str, float]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, cost, created = entry
+            if time.time() - created > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value, cost
+
+    def _store(self, key: str, value: str, cost: float):
+        with self._lock:
+            self._entries[key] = (value, cost, time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get(self, key: str) -> Optional[List[Dict]]:
+        entry = self._load(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.saved_time += entry[1]
+        return json.loads(entry[0])
+
+    def set(self, key: str, docs: List[Dict], cost: float = 0.0):
+        self._store(key, json.dumps(docs, ensure_ascii=False, default=str), cost)
+
+    def get_or_search(
+        self,
+        namespace: str,
+        query: str,
+        params: Dict,
+        search: Callable[[], List[Dict]],
+    ) -> List[Dict]:
+        """
+        返回缓存的检索结果，未命中时调用 search() 并缓存。
+        版本号在检索前读取，检索期间知识库发生变化时，结果保存在旧版本下，不会被后续查询命中。
+        """
+        key = self.make_key(namespace, query, params)
+        docs = self.get(key)
+        if docs is None:
+            start = time.perf_counter()
+            docs = search()
+            self.set(key, docs, time.perf_counter() - start)
+        return docs
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self),
+            "max_size": self.max_size,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "saved_time": self.saved_time,
+            "evictions": self.evictions,
+        }
+
+
+class SharedSearchResultCache(SearchResultCache):
+    """
+    保存在 SQLite 文件中的检索结果缓存，结果和知识库版本号由同一台机器上的多个 worker 进程共享，
+    任一进程修改知识库后，其它进程也不会再命中旧的结果。命中率等统计数据仍按进程分别计算。
+    """
+
+    def __init__(self, path: str, max_size: int, ttl: float):
+        super().__init__(max_size=max_size, ttl=ttl)
+        self.path = path
+        if dirname := os.path.dirname(path):
+            os.makedirs(dirname, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS search_cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, cost REAL NOT NULL, "
+            "created REAL NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS search_cache_last_access ON search_cache (last_access)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS search_cache_version ("
+            "namespace TEXT PRIMARY KEY, version INTEGER NOT NULL)"
+        )
+        self._conn.commit()
+
+    def version(self, namespace: str) -> int:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT version FROM search_cache_version WHERE namespace = ?", (namespace,)
+            ).fetchone()
+        return row[0] if row else 0
+
+    def bump(self, namespace: str):
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO search_cache_version (namespace, version) VALUES (?, 1) "
+                "ON CONFLICT (namespace) DO UPDATE SET version = version + 1",
+                (namespace,),
+            )
+            self._conn.commit()
+
+    def _load(self, key: str) -> Optional[Tuple[str, float]]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, cost, created FROM search_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if now - row[2] > self.ttl:
+                self._conn.execute("DELETE FROM search_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE search_cache SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+        return row[0], row[1]
+
+    def _store(self, key: str, value: str, cost: float):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO search_cache (key, value, cost, created, last_access) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, value, cost, now, now),
+            )
+            count = self._conn.execute("SELECT COUNT(*) FROM search_cache").fetchone()[0]
+            if count > self.max_size:
+                # 先删除过期的结果，仍然超出时一次淘汰到上限的 90%，避免每次写入都触发淘汰
+                deleted = self._conn.execute(
+                    "DELETE FROM search_cache WHERE created < ?", (now - self.ttl,)
+                ).rowcount
+                excess = count - deleted - int(self.max_size * 0.9)
+                if excess > 0:
+                    self._conn.execute(
+                        "DELETE FROM search_cache WHERE key IN "
+                        "(SELECT key FROM search_cache ORDER BY last_access LIMIT ?)",
+                        (excess,),
+                    )
+                    self.evictions += excess
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM search_cache")
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM search_cache").fetchone()[0]
+
+    def stats(self) -> Dict:
+        return {"path": self.path, **super().stats()}
+
+
+_search_cache: Optional[SearchResultCache] = None
+_search_cache_lock = threading.Lock()
+
+
+def get_search_cache() -> Optional[SearchResultCache]:
+    """返回全局共用的检索结果缓存，SEARCH_CACHE_SIZE 为 0 时返回 None"""
+    global _search_cache
+    kb_settings = Settings.kb_settings
+    if kb_settings.SEARCH_CACHE_SIZE <= 0:
+        return None
+    with _search_cache_lock:
+        if _search_cache is None:
+            if kb_settings.SEARCH_CACHE_SHARED:
+                try:
+                    _search_cache = SharedSearchResultCache(
+                        path=str(Settings.basic_settings.DATA_PATH / "search_cache.db"),
+                        max_size=kb_settings.SEARCH_CACHE_SIZE,
+                        ttl=kb_settings.SEARCH_CACHE_TTL,
+                    )
+                except Exception as e:
+                    logger.warning(f"无法打开共享的检索结果缓存，将不使用缓存：{e}")
+                    return None
+            else:
+                _search_cache = SearchResultCache(
+                    max_size=kb_settings.SEARCH_CACHE_SIZE,
+                    ttl=kb_settings.SEARCH_CACHE_TTL,
+                )
+        return _search_cache
+
+
+def bump_search_version(namespace: str):
+    """知识库内容变化后调用，使其缓存的检索结果失效"""
+    if (cache := get_search_cache()) is not None:
+        cache.bump(namespace)
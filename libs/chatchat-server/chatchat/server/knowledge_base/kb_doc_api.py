@@ -2,7 +2,8 @@ import asyncio
 import json
 import os
 import urllib
-from typing import Dict, List
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Dict, List, Tuple, Union
 
 from fastapi import Body, File, Form, Query, UploadFile
 from fastapi.responses import FileResponse
@@ -11,19 +12,21 @@ from sse_starlette import EventSourceResponse
 
 from chatchat.settings import Settings
 from chatchat.server.db.repository.knowledge_file_repository import get_file_detail
+from chatchat.server.file_rag.retrievers.hybrid import reciprocal_rank_fusion
 from chatchat.server.knowledge_base.kb_service.base import (
     KBServiceFactory,
     get_kb_file_details,
 )
+from chatchat.server.knowledge_base.kb_pipeline import IngestPipeline
 from chatchat.server.knowledge_base.model.kb_document_model import DocumentWithVSId
 from chatchat.server.knowledge_base.utils import (
     KnowledgeFile,
-    files2docs_in_thread,
     get_file_path,
     list_files_from_folder,
     validate_kb_name,
 )
 from chatchat.server.knowledge_base.kb_cache.faiss_cache import memo_faiss_pool
+from chatchat.server.knowledge_base.kb_cache.search_cache import get_search_cache
 from chatchat.server.utils import (
     BaseResponse,
     ListResponse,
@@ -41,12 +44,17 @@ def search_temp_docs(knowledge_id: str = Body(..., description="知识库 ID", e
                      top_k: int = Body(..., description="返回的文档数量", examples=[5]),
                      score_threshold: float = Body(..., description="分数阈值", examples=[0.8])) -> List[Dict]:
     '''从临时 FAISS 知识库中检索文档，用于文件对话'''
-    with memo_faiss_pool.acquire(knowledge_id) as vs:
-        docs = vs.similarity_search_with_score(
-            query, k=top_k, score_threshold=score_threshold
-        )
-        docs = [x[0].dict() for x in docs]
-        return docs
+    def search() -> List[Dict]:
+        with memo_faiss_pool.acquire(knowledge_id, shared=True) as vs:
+            docs = vs.similarity_search_with_score(
+                query, k=top_k, score_threshold=score_threshold
+            )
+            return [x[0].dict() for x in docs]
+
+    if (cache := get_search_cache()) is None:
+        return search()
+    params = {"top_k": top_k, "score_threshold": score_threshold}
+    return cache.get_or_search(f"temp:{knowledge_id}", query, params, search)
 
 
 def search_docs(
@@ -72,7 +80,7 @@ def search_docs(
         if query:
             docs = kb.search_docs(query, top_k, score_threshold)
             # data = [DocumentWithVSId(**x[0].dict(), score=x[1], id=x[0].metadata.get("id")) for x in docs]
-            data = [DocumentWithVSId(**{"id": x.metadata.get("id"), **x.dict()}) for x in docs]
+            data = [DocumentWithVSId(**{**x.dict(), "id": x.metadata.get("id")}) for x in docs]
         elif file_name or metadata:
             data = kb.list_docs(file_name=file_name, metadata=metadata)
             for d in data:
@@ -81,6 +89,85 @@ def search_docs(
     return [x.dict() for x in data]
 
 
+def merge_search_results(
+    results: Dict[str, List[Union[Document, Tuple[Document, float]]]],
+    top_k: int,
+) -> List[DocumentWithVSId]:
+    """
+    合并多个知识库的检索结果。各向量库的得分尺度与方向不同（融合得分、相关度、L2 距离、IP 相似度等），不能直接比较，
+    因此只使用各知识库结果中的排名（已按相关度从高到低排列），按倒数排名融合（RRF）统一排序；
+    内容相同的文本块只保留一个，其排名得分累加。
+    返回的文档 score 为融合后的得分，metadata["kb_name"] 为所属知识库。
+    """
+    ranked = []
+    for kb_name, docs in results.items():
+        ranked.append([
+            (DocumentWithVSId(**{
+                **doc.dict(),
+                "id": doc.metadata.get("id"),
+                "metadata": {**doc.metadata, "kb_name": kb_name},
+            }), 0.0)
+            # 部分向量库（如 relyt）返回的是 (doc, 距离)
+            for doc in (x[0] if isinstance(x, tuple) else x for x in docs)
+        ])
+    fused = reciprocal_rank_fusion(ranked, [1.0] * len(ranked))
+    return [DocumentWithVSId(**{**doc.dict(), "score": score}) for doc, score in fused[:top_k]]
+
+
+def federated_search_docs(
+        query: str = Body(..., description="用户输入", examples=["你好"]),
+        knowledge_base_names: List[str] = Body(
+            ..., description="知识库名称列表，可以使用不同的向量库类型", examples=[["samples"]]
+        ),
+        top_k: int = Body(Settings.kb_settings.VECTOR_SEARCH_TOP_K, description="合并后返回的文档数量"),
+        score_threshold: float = Body(
+            Settings.kb_settings.SCORE_THRESHOLD,
+            description="各知识库检索时使用的相关度阈值，含义与 search_docs 相同",
+            ge=0.0,
+            le=2.0,
+        ),
+        timeout: float = Body(Settings.kb_settings.KB_SEARCH_TIMEOUT, description="单个知识库的检索超时（秒）"),
+) -> List[Dict]:
+    """
+    同时检索多个知识库，合并为一个排序后的结果列表。
+    各知识库并发检索，总耗时取决于最慢的知识库；超时或出错的知识库会被跳过。
+    """
+    kbs = {}
+    for kb_name in dict.fromkeys(knowledge_base_names):
+        kb = KBServiceFactory.get_service_by_name(kb_name)
+        if kb is None:
+            logger.warning(f"未找到知识库 {kb_name}，跳过")
+            continue
+        kbs[kb_name] = kb
+    if not kbs:
+        return []
+
+    # 线程池按本次请求的知识库数量创建，并受 KB_SEARCH_WORKERS 限制；超时后不等待未完成的检索
+    pool = ThreadPoolExecutor(
+        max_workers=min(len(kbs), max(Settings.kb_settings.KB_SEARCH_WORKERS, 1)),
+        thread_name_prefix="kb_search",
+    )
+    try:
+        futures = {
+            kb_name: pool.submit(kb.search_docs, query, top_k, score_threshold)
+            for kb_name, kb in kbs.items()
+        }
+        wait(futures.values(), timeout=timeout)
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+    results = {}
+    for kb_name, future in futures.items():
+        if not future.done():
+            future.cancel()
+            logger.warning(f"检索知识库 {kb_name} 超过 {timeout} 秒，跳过")
+            continue
+        try:
+            results[kb_name] = future.result()
+        except Exception as e:
+            logger.error(f"{e.__class__.__name__}: 检索知识库 {kb_name} 时出错：{e}")
+    return [x.dict() for x in merge_search_results(results, top_k)]
+
+
 def list_files(knowledge_base_name: str) -> ListResponse:
     if not validate_kb_name(knowledge_base_name):
         return ListResponse(code=403, msg="Don't attack me", data=[])
@@ -230,22 +317,20 @@ def delete_docs(
         return BaseResponse(code=404, msg=f"未找到知识库 {knowledge_base_name}")
 
     failed_files = {}
-    for file_name in file_names:
-        if not kb.exist_doc(file_name):
-            failed_files[file_name] = f"未找到文件 {file_name}"
-
-        try:
-            kb_file = KnowledgeFile(
-                filename=file_name, knowledge_base_name=knowledge_base_name
-            )
-            kb.delete_doc(kb_file, delete_content, not_refresh_vs_cache=True)
-        except Exception as e:
-            msg = f"{file_name} 文件删除失败，错误信息：{e}"
-            logger.error(f"{e.__class__.__name__}: {msg}")
-            failed_files[file_name] = msg
+    with kb.write_batch(save=not not_refresh_vs_cache) as kb:
+        for file_name in file_names:
+            if not kb.exist_doc(file_name):
+                failed_files[file_name] = f"未找到文件 {file_name}"
 
-    if not not_refresh_vs_cache:
-        kb.save_vector_store()
+            try:
+                kb_file = KnowledgeFile(
+                    filename=file_name, knowledge_base_name=knowledge_base_name
+                )
+                kb.delete_doc(kb_file, delete_content, not_refresh_vs_cache=True)
+            except Exception as e:
+                msg = f"{file_name} 文件删除失败，错误信息：{e}"
+                logger.error(f"{e.__class__.__name__}: {msg}")
+                failed_files[file_name] = msg
 
     return BaseResponse(
         code=200, msg=f"文件删除完成", data={"failed_files": failed_files}
@@ -282,6 +367,7 @@ def update_docs(
         override_custom_docs: bool = Body(False, description="是否覆盖之前自定义的docs"),
         docs: str = Body("", description="自定义的docs，需要转为json字符串"),
         not_refresh_vs_cache: bool = Body(False, description="暂不保存向量库（用于FAISS）"),
+        only_changed: bool = Body(False, description="只更新修改过的文件，修改时间、大小或内容哈希与数据库记录一致的文件将被跳过"),
 ) -> BaseResponse:
     """
     更新知识库文档
@@ -294,6 +380,7 @@ def update_docs(
         return BaseResponse(code=404, msg=f"未找到知识库 {knowledge_base_name}")
 
     failed_files = {}
+    skipped_files = []
     kb_files = []
     docs = json.loads(docs) if docs else {}
 
@@ -305,34 +392,30 @@ def update_docs(
             continue
         if file_name not in docs:
             try:
-                kb_files.append(
-                    KnowledgeFile(
-                        filename=file_name, knowledge_base_name=knowledge_base_name
-                    )
+                kb_file = KnowledgeFile(
+                    filename=file_name, knowledge_base_name=knowledge_base_name
                 )
+                if only_changed and file_detail and not kb.is_file_changed(kb_file, file_detail):
+                    skipped_files.append(file_name)
+                    continue
+                kb_files.append(kb_file)
             except Exception as e:
                 msg = f"加载文档 {file_name} 时出错：{e}"
                 logger.error(f"{e.__class__.__name__}: {msg}")
                 failed_files[file_name] = msg
 
-    # 从文件生成docs，并进行向量化。
-    # 这里利用了KnowledgeFile的缓存功能，在多线程中加载Document，然后传给KnowledgeFile
-    for status, result in files2docs_in_thread(
-            kb_files,
-            chunk_size=chunk_size,
-            chunk_overlap=chunk_overlap,
-            zh_title_enhance=zh_title_enhance,
-    ):
-        if status:
-            kb_name, file_name, new_docs = result
-            kb_file = KnowledgeFile(
-                filename=file_name, knowledge_base_name=knowledge_base_name
-            )
-            kb_file.splited_docs = new_docs
-            kb.update_doc(kb_file, not_refresh_vs_cache=True)
-        else:
-            kb_name, file_name, error = result
-            failed_files[file_name] = error
+    # 从文件生成docs，并进行向量化。加载切分、向量化与写入向量库在流水线中并发进行，修改按批次分段提交
+    pipeline = IngestPipeline(
+        kb,
+        kb_files,
+        mode="update",
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        zh_title_enhance=zh_title_enhance,
+    )
+    for event in pipeline.run():
+        if event["code"] != 200:
+            failed_files[event["doc"]] = event["msg"]
 
     # 将自定义的docs进行向量化
     for file_name, v in docs.items():
@@ -351,7 +434,7 @@ def update_docs(
         kb.save_vector_store()
 
     return BaseResponse(
-        code=200, msg=f"更新文档完成", data={"failed_files": failed_files}
+        code=200, msg=f"更新文档完成", data={"failed_files": failed_files, "skipped_files": skipped_files}
     )
 
 
@@ -406,12 +489,14 @@ def recreate_vector_store(
         chunk_overlap: int = Body(Settings.kb_settings.OVERLAP_SIZE, description="知识库中相邻文本重合长度"),
         zh_title_enhance: bool = Body(Settings.kb_settings.ZH_TITLE_ENHANCE, description="是否开启中文标题加强"),
         not_refresh_vs_cache: bool = Body(False, description="暂不保存向量库（用于FAISS）"),
+        incremental: bool = Body(False, description="增量同步：只处理新增或内容有变化的文件，并删除本地已不存在的文件"),
 ):
     """
     recreate vector store from the content.
     this is usefull when user can copy files to content folder directly instead of upload through network.
     by default, get_service_by_name only return knowledge base in the info.db and having document files in it.
     set allow_empty_kb to True make it applied on empty knowledge base which it not in the info.db or having no documents.
+    set incremental to True to only process new or changed files and remove vectors of files deleted from the folder.
     """
 
     def output():
@@ -426,48 +511,54 @@ def recreate_vector_store(
                 if not ok:
                     yield {"code": 404, "msg": msg}
                 else:
-                    if kb.exists():
-                        kb.clear_vs()
-                    kb.create_kb()
-                    files = list_files_from_folder(knowledge_base_name)
-                    kb_files = [(file, knowledge_base_name) for file in files]
-                    i = 0
-                    for status, result in files2docs_in_thread(
-                            kb_files,
-                            chunk_size=chunk_size,
-                            chunk_overlap=chunk_overlap,
-                            zh_title_enhance=zh_title_enhance,
-                    ):
-                        if status:
-                            kb_name, file_name, docs = result
+                    if incremental and kb.exists():
+                        diff = kb.diff_files()
+                        files = diff["added"] + diff["changed"]
+                    else:
+                        diff = None
+                        if kb.exists():
+                            kb.clear_vs()
+                        kb.create_kb()
+                        files = list_files_from_folder(knowledge_base_name)
+                    for file_name in diff["deleted"] if diff is not None else []:
+                        try:
                             kb_file = KnowledgeFile(
-                                filename=file_name, knowledge_base_name=kb_name
+                                filename=file_name, knowledge_base_name=knowledge_base_name
                             )
-                            kb_file.splited_docs = docs
-                            yield json.dumps(
-                                {
-                                    "code": 200,
-                                    "msg": f"({i + 1} / {len(files)}): {file_name}",
-                                    "total": len(files),
-                                    "finished": i + 1,
-                                    "doc": file_name,
-                                },
-                                ensure_ascii=False,
-                            )
-                            kb.add_doc(kb_file, not_refresh_vs_cache=True)
-                        else:
-                            kb_name, file_name, error = result
-                            msg = f"添加文件‘{file_name}’到知识库‘{knowledge_base_name}’时出错：{error}。已跳过。"
-                            logger.error(msg)
-                            yield json.dumps(
-                                {
-                                    "code": 500,
-                                    "msg": msg,
-                                }
-                            )
-                        i += 1
+                            kb.delete_doc(kb_file, not_refresh_vs_cache=True)
+                        except Exception as e:
+                            logger.error(f"{e.__class__.__name__}: 删除文件 {file_name} 的向量时出错：{e}")
+                    # 流水线按批次分段提交修改，已提交的文件即可被检索
+                    pipeline = IngestPipeline(
+                        kb,
+                        files,
+                        mode="update" if diff is not None else "add",
+                        chunk_size=chunk_size,
+                        chunk_overlap=chunk_overlap,
+                        zh_title_enhance=zh_title_enhance,
+                    )
+                    for event in pipeline.run():
+                        if event["code"] != 200:
+                            event["msg"] += "。已跳过。"
+                        yield json.dumps(event, ensure_ascii=False)
                     if not not_refresh_vs_cache:
                         kb.save_vector_store()
+                    if diff is not None:
+                        summary = {k: len(v) for k, v in diff.items()}
+                        yield json.dumps(
+                            {
+                                "code": 200,
+                                "msg": (
+                                    f"增量同步完成：新增 {summary['added']}，更新 {summary['changed']}，"
+                                    f"跳过 {summary['unchanged']}，删除 {summary['deleted']}"
+                                ),
+                                "total": len(files) or 1,
+                                "finished": len(files) or 1,
+                                "summary": summary,
+                                "throughput": pipeline.stats.throughput(),
+                            },
+                            ensure_ascii=False,
+                        )
         except asyncio.exceptions.CancelledError:
             logger.warning("streaming progress has been interrupted by user.")
             return
@@ -0,0 +1,285 @@
+"""
+知识库文件入库流水线：加载切分 → 向量化 → 写入向量库。
+各阶段在独立线程中并发运行，通过有界队列连接，下游处理不过来时上游会阻塞等待（背压），
+因此同时驻留在内存中的文件数量有上限，与文件总数无关。
+写入阶段每写入 commit_size 个文本块提交一次向量库修改，暂存的修改同样有上限。
+"""
+import contextlib
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Generator, List, Literal, Optional, Union
+
+from langchain.docstore.document import Document
+
+from chatchat.settings import Settings
+from chatchat.server.knowledge_base.kb_cache.embedding_cache import get_embedding_cache
+from chatchat.server.knowledge_base.kb_service.base import KBService
+from chatchat.server.knowledge_base.utils import KnowledgeFile
+from chatchat.server.utils import get_Embeddings
+from chatchat.utils import build_logger
+
+
+logger = build_logger()
+
+_END = object()  # 上游阶段结束的标记
+
+
+@dataclass
+class IngestItem:
+    file_name: str
+    kb_file: KnowledgeFile = None
+    docs: List[Document] = field(default_factory=list)
+    embeddings: Optional[List[List[float]]] = None
+    remaining: int = 0  # 尚未向量化的文本块数量
+    error: str = None
+
+
+class IngestStats:
+    """各阶段的处理数量与吞吐量"""
+
+    def __init__(self):
+        self.start = time.time()
+        self._lock = threading.Lock()
+        self.loaded_files = 0
+        self.loaded_chunks = 0
+        self.embedded_chunks = 0
+        self.written_files = 0
+        self.written_chunks = 0
+        self.failed_files = 0
+
+    def incr(self, **counts: int):
+        with self._lock:
+            for k, v in counts.items():
+                setattr(self, k, getattr(self, k) + v)
+
+    def throughput(self) -> Dict:
+        elapsed = max(time.time() - self.start, 1e-6)
+        return {
+            "load": {
+                "files/s": round(self.loaded_files / elapsed, 2),
+                "chunks/s": round(self.loaded_chunks / elapsed, 2),
+            },
+            "embed": {"embeddings/s": round(self.embedded_chunks / elapsed, 2)},
+            "write": {
+                "files/s": round(self.written_files / elapsed, 2),
+                "chunks/s": round(self.written_chunks / elapsed, 2),
+            },
+            "elapsed": round(elapsed, 2),
+        }
+
+
+class IngestPipeline:
+    """
+    mode="add"：将文件作为新文件添加（调用 KBService.add_doc）
+    mode="update"：更新文件（调用 KBService.update_doc，已入库的文件按文本块增量更新）
+
+    向量化阶段会把多个文件的文本块合并为 batch_size 大小的批次。只有向量库支持直接写入向量
+    （KBService.accepts_embeddings），或启用了文本向量缓存时才使用单独的向量化阶段，
+    否则由写入阶段调用向量库自身的嵌入函数。
+
+    写入阶段在向量库写入批次（KBService.write_batch）中进行，每写入 commit_size 个文本块提交一次，
+    提交后这些文件即可被检索；单个文件的删除与写入总是在同一次提交中。
+    """
+
+    def __init__(
+        self,
+        kb: KBService,
+        files: List[Union[str, KnowledgeFile]],
+        mode: Literal["add", "update"] = "add",
+        chunk_size: int = Settings.kb_settings.CHUNK_SIZE,
+        chunk_overlap: int = Settings.kb_settings.OVERLAP_SIZE,
+        zh_title_enhance: bool = Settings.kb_settings.ZH_TITLE_ENHANCE,
+        batch_size: int = None,
+        load_workers: int = None,
+        queue_size: int = None,
+        commit_size: int = None,
+    ):
+        self.kb = kb
+        self.files = files
+        self.mode = mode
+        self.split_kwargs = dict(
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            zh_title_enhance=zh_title_enhance,
+        )
+        self.batch_size = max(batch_size or Settings.kb_settings.EMBEDDING_BATCH_SIZE, 1)
+        self.load_workers = max(load_workers or Settings.kb_settings.INGEST_LOAD_WORKERS, 1)
+        self.queue_size = max(queue_size or Settings.kb_settings.INGEST_QUEUE_SIZE, 1)
+        self.commit_size = max(commit_size or Settings.kb_settings.INGEST_COMMIT_SIZE, 1)
+        self.precompute = kb.accepts_embeddings or get_embedding_cache() is not None
+        self.stats = IngestStats()
+        self._stop = threading.Event()
+
+    def _put(self, q: queue.Queue, item) -> bool:
+        # 队列已满时阻塞等待，流水线被中止时放弃
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _load_worker(self, file_q: queue.Queue, load_q: queue.Queue):
+        try:
+            while not self._stop.is_set():
+                try:
+                    file = file_q.get_nowait()
+                except queue.Empty:
+                    break
+                item = IngestItem(file_name=getattr(file, "filename", file))
+                try:
+                    if isinstance(file, KnowledgeFile):
+                        item.kb_file = file
+                    else:
+                        item.kb_file = KnowledgeFile(filename=file, knowledge_base_name=self.kb.kb_name)
+                    item.docs = item.kb_file.file2text(**self.split_kwargs)
+                    item.kb_file.docs = None  # 切分后不再需要原始文档，及早释放
+                    if self.precompute and (self.mode == "add" or not self.kb.exist_doc(item.file_name)):
+                        item.embeddings = [None] * len(item.docs)
+                        item.remaining = len(item.docs)
+                    self.stats.incr(loaded_files=1, loaded_chunks=len(item.docs))
+                except Exception as e:
+                    item.error = f"从文件 {self.kb.kb_name}/{item.file_name} 加载文档时出错：{e}"
+                    logger.error(f"{e.__class__.__name__}: {item.error}")
+                if not self._put(load_q, item):
+                    break
+        finally:
+            self._put(load_q, _END)
+
+    def _embed_worker(self, load_q: queue.Queue, write_q: queue.Queue):
+        embeddings = get_Embeddings(self.kb.embed_model) if self.precompute else None
+        pending: List[IngestItem] = []  # 等待向量化完成的文件，保持原有顺序
+        batch = []  # [(item, index), ...]
+
+        def embed_batch():
+            if not batch:
+                return
+            texts = [item.docs[i].page_content for item, i in batch]
+            try:
+                vectors = embeddings.embed_documents(texts)
+                self.stats.incr(embedded_chunks=len(texts))
+            except Exception as e:
+                vectors = [None] * len(texts)
+                for item, _ in batch:
+                    item.error = item.error or f"文件 {item.file_name} 向量化时出错：{e}"
+                logger.error(f"{e.__class__.__name__}: 向量化时出错：{e}")
+            for (item, i), vector in zip(batch, vectors):
+                item.embeddings[i] = vector
+                item.remaining -= 1
+            batch.clear()
+
+        def emit() -> bool:
+            while pending and pending[0].remaining == 0:
+                if not self._put(write_q, pending.pop(0)):
+                    return False
+            return True
+
+        finished_loaders = 0
+        try:
+            while finished_loaders < self.load_workers and not self._stop.is_set():
+                try:
+                    item = load_q.get(timeout=0.5)
+                except queue.Empty:
+                    # 上游暂时没有新文件时先处理已积累的文本块，避免等待
+                    embed_batch()
+                    if not emit():
+                        return
+                    continue
+                if item is _END:
+                    finished_loaders += 1
+                    continue
+                pending.append(item)
+                if item.error is None and item.embeddings is not None:
+                    for i in range(len(item.docs)):
+                        batch.append((item, i))
+                        if len(batch) >= self.batch_size:
+                            embed_batch()
+                            if not emit():
+                                return
+                if not emit():
+                    return
+            embed_batch()
+            emit()
+        except Exception as e:
+            logger.exception(f"error in embedding stage: {e}")
+            batch.clear()
+            for item in pending:
+                item.error = item.error or f"文件 {item.file_name} 向量化时出错：{e}"
+                item.remaining = 0
+            emit()
+        finally:
+            self._put(write_q, _END)
+
+    def _write(self, item: IngestItem, kb: KBService) -> Dict:
+        if item.error is None:
+            try:
+                kb_file = item.kb_file
+                kb_file.splited_docs = item.docs
+                kwargs = {"not_refresh_vs_cache": True}
+                if item.embeddings is not None:
+                    kwargs["embeddings"] = item.embeddings
+                if self.mode == "update":
+                    kb.update_doc(kb_file, **kwargs)
+                else:
+                    kb.add_doc(kb_file, **kwargs)
+                kb_file.splited_docs = None
+                self.stats.incr(written_files=1, written_chunks=len(item.docs))
+            except Exception as e:
+                item.error = f"添加文件‘{item.file_name}’到知识库‘{self.kb.kb_name}’时出错：{e}"
+                logger.error(f"{e.__class__.__name__}: {item.error}")
+        if item.error is not None:
+            self.stats.incr(failed_files=1)
+
+        finished = self.stats.written_files + self.stats.failed_files
+        event = {
+            "code": 200 if item.error is None else 500,
+            "msg": item.error or f"({finished} / {len(self.files)}): {item.file_name}",
+            "total": len(self.files),
+            "finished": finished,
+            "doc": item.file_name,
+            "docs_count": len(item.docs),
+            "throughput": self.stats.throughput(),
+        }
+        item.docs = item.embeddings = None
+        return event
+
+    def run(self) -> Generator[Dict, None, None]:
+        """
+        运行流水线，每写入（或失败）一个文件产生一个进度事件。
+        生成器被提前关闭时（如客户端断开连接）各阶段线程会随之退出。
+        """
+        file_q = queue.Queue()
+        for file in self.files:
+            file_q.put(file)
+        load_q = queue.Queue(maxsize=self.queue_size)
+        write_q = queue.Queue(maxsize=self.queue_size)
+        threads = [
+            threading.Thread(target=self._load_worker, args=(file_q, load_q), daemon=True)
+            for _ in range(self.load_workers)
+        ]
+        threads.append(
+            threading.Thread(target=self._embed_worker, args=(load_q, write_q), daemon=True)
+        )
+        for t in threads:
+            t.start()
+        batch = contextlib.ExitStack()
+        pending = 0  # 当前写入批次中尚未提交的文本块数量
+        try:
+            while True:
+                item = write_q.get()
+                if item is _END:
+                    break
+                if pending == 0:
+                    kb = batch.enter_context(self.kb.write_batch(save=False))
+                pending += len(item.docs) or 1
+                event = self._write(item, kb)
+                if pending >= self.commit_size:
+                    batch.close()
+                    pending = 0
+                yield event
+        finally:
+            self._stop.set()
+            batch.close()
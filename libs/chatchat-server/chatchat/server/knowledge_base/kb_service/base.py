@@ -1,14 +1,22 @@
 import operator
 import os
+import threading
 from abc import ABC, abstractmethod
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple, Union
+from typing import Dict, Generator, List, Optional, Tuple, Union
 
 from langchain.docstore.document import Document
 
 from chatchat.settings import Settings
 from chatchat.utils import build_logger
 from chatchat.server.db.models.knowledge_base_model import KnowledgeBaseSchema
+from chatchat.server.file_rag.retrievers.bm25 import BM25Index
+from chatchat.server.file_rag.utils import get_Retriever
+from chatchat.server.knowledge_base.kb_cache.search_cache import (
+    bump_search_version,
+    get_search_cache,
+)
 from chatchat.server.db.repository.knowledge_base_repository import (
     add_kb_to_db,
     delete_kb_from_db,
@@ -21,15 +29,22 @@ from chatchat.server.db.repository.knowledge_file_repository import (
     add_file_to_db,
     count_files_from_db,
     delete_file_from_db,
+    delete_docs_from_db_by_ids,
     delete_files_from_db,
     file_exists_in_db,
     get_file_detail,
+    get_kb_files_signature,
+    list_doc_hashes_from_db,
     list_docs_from_db,
+    list_file_details_from_db,
     list_files_from_db,
+    update_docs_in_db,
+    update_file_stat_in_db,
 )
 from chatchat.server.knowledge_base.model.kb_document_model import DocumentWithVSId
 from chatchat.server.knowledge_base.utils import (
     KnowledgeFile,
+    get_chunk_hash,
     get_doc_path,
     get_kb_path,
     list_files_from_folder,
@@ -38,6 +53,7 @@ from chatchat.server.knowledge_base.utils import (
 from chatchat.server.utils import (
     check_embed_model as _check_embed_model,
     get_default_embedding,
+    mark_kb_tool_outdated,
 )
 
 
@@ -56,6 +72,15 @@ class SupportedVSType:
 
 
 class KBService(ABC):
+    # do_add_doc 是否支持通过 kwargs["embeddings"] 传入预先计算好的向量（与 docs 一一对应）
+    accepts_embeddings: bool = False
+    # 是否自带关键词索引（重写了 do_sparse_search），SEARCH_MODE 为 auto 时这类向量库默认使用混合检索
+    native_sparse_search: bool = False
+    # 供混合检索使用的内存 BM25 索引，首次关键词检索时构建（见 do_sparse_search）
+    _sparse_index: Optional[BM25Index] = None
+    # 构建内存 BM25 索引时知识库文件列表的摘要，其它进程修改知识库后摘要变化，索引随之重建
+    _sparse_signature: Optional[Tuple] = None
+
     def __init__(
         self,
         knowledge_base_name: str,
@@ -69,6 +94,7 @@ class KBService(ABC):
         self.embed_model = embed_model
         self.kb_path = get_kb_path(self.kb_name)
         self.doc_path = get_doc_path(self.kb_name)
+        self._sparse_lock = threading.Lock()
         self.do_init()
 
     def __repr__(self) -> str:
@@ -80,6 +106,19 @@ class KBService(ABC):
         """
         pass
 
+    @contextmanager
+    def write_batch(self, save: bool = True) -> Generator["KBService", None, None]:
+        """
+        批量写入，返回用于写入的 KBService：
+            with kb.write_batch(save=...) as kb:
+                kb.add_doc(...)
+        FAISS 返回绑定到独立写入批次的副本，期间的修改对检索不可见，退出时一次性提交；
+        其它向量库直接写入。save=True 时退出后调用 save_vector_store。
+        """
+        yield self
+        if save:
+            self.save_vector_store()
+
     def check_embed_model(self) -> Tuple[bool, str]:
         return _check_embed_model(self.embed_model)
 
@@ -96,6 +135,9 @@ class KBService(ABC):
 
         if status:
             self.do_create_kb()
+        KBServiceFactory.invalidate(self.kb_name)
+        mark_kb_tool_outdated()
+        self._content_changed()
         return status
 
     def clear_vs(self):
@@ -103,7 +145,9 @@ class KBService(ABC):
         删除向量库中所有内容
         """
         self.do_clear_vs()
+        self._sparse_update(reset=True)
         status = delete_files_from_db(self.kb_name)
+        self._content_changed()
         return status
 
     def drop_kb(self):
@@ -111,7 +155,11 @@ class KBService(ABC):
         删除知识库
         """
         self.do_drop_kb()
+        self._sparse_update(reset=True)
         status = delete_kb_from_db(self.kb_name)
+        KBServiceFactory.invalidate(self.kb_name)
+        mark_kb_tool_outdated()
+        self._content_changed()
         return status
 
     def add_doc(self, kb_file: KnowledgeFile, docs: List[Document] = [], **kwargs):
@@ -129,30 +177,50 @@ class KBService(ABC):
             custom_docs = False
 
         if docs:
-            # 将 metadata["source"] 改为相对路径
-            for doc in docs:
-                try:
-                    doc.metadata.setdefault("source", kb_file.filename)
-                    source = doc.metadata.get("source", "")
-                    if os.path.isabs(source):
-                        rel_path = Path(source).relative_to(self.doc_path)
-                        doc.metadata["source"] = str(rel_path.as_posix().strip("/"))
-                except Exception as e:
-                    print(
-                        f"cannot convert absolute path ({source}) to relative path. error is : {e}"
-                    )
-            self.delete_doc(kb_file)
-            doc_infos = self.do_add_doc(docs, **kwargs)
+            self._set_relative_source(kb_file, docs)
+            hashes = [get_chunk_hash(doc) for doc in docs]
+            # 删除旧文本块与写入新文本块在同一个写入批次中提交，检索不会看到文件内容缺失的中间状态
+            with self.write_batch(save=False) as kb:
+                kb.delete_doc(kb_file, **{**kwargs, "not_refresh_vs_cache": True})
+                doc_infos = kb.do_add_doc(docs, **{**kwargs, "not_refresh_vs_cache": True})
+            if not kwargs.get("not_refresh_vs_cache"):
+                self.save_vector_store()
+            self._sparse_update(added=zip(doc_infos or [], docs))
             status = add_file_to_db(
                 kb_file,
                 custom_docs=custom_docs,
                 docs_count=len(docs),
-                doc_infos=doc_infos,
+                doc_infos=self._with_chunk_hash(doc_infos, hashes),
             )
+            self._content_changed()
         else:
             status = False
         return status
 
+    def _set_relative_source(self, kb_file: KnowledgeFile, docs: List[Document]):
+        """将 metadata["source"] 改为相对路径"""
+        for doc in docs:
+            try:
+                doc.metadata.setdefault("source", kb_file.filename)
+                source = doc.metadata.get("source", "")
+                if os.path.isabs(source):
+                    rel_path = Path(source).relative_to(self.doc_path)
+                    doc.metadata["source"] = str(rel_path.as_posix().strip("/"))
+            except Exception as e:
+                print(
+                    f"cannot convert absolute path ({source}) to relative path. error is : {e}"
+                )
+
+    @staticmethod
+    def _with_chunk_hash(doc_infos: List[Dict], hashes: List[str]) -> List[Dict]:
+        """文本块哈希只记录在数据库中，不写入向量库"""
+        if doc_infos is None:
+            return None
+        return [
+            {"id": info["id"], "metadata": {**info["metadata"], "chunk_hash": h}}
+            for info, h in zip(doc_infos, hashes)
+        ]
+
     def delete_doc(
         self, kb_file: KnowledgeFile, delete_content: bool = False, **kwargs
     ):
@@ -160,7 +228,12 @@ class KBService(ABC):
         从知识库删除文件
         """
         self.do_delete_doc(kb_file, **kwargs)
+        if self._sparse_index is not None:
+            self._sparse_update(deleted=[
+                x["id"] for x in list_docs_from_db(kb_name=self.kb_name, file_name=kb_file.filename)
+            ])
         status = delete_file_from_db(kb_file)
+        self._content_changed()
         if delete_content and os.path.exists(kb_file.filepath):
             os.remove(kb_file.filepath)
         return status
@@ -173,6 +246,8 @@ class KBService(ABC):
         status = add_kb_to_db(
             self.kb_name, self.kb_info, self.vs_type(), self.embed_model
         )
+        KBServiceFactory.invalidate(self.kb_name)
+        mark_kb_tool_outdated()
         return status
 
     def update_doc(self, kb_file: KnowledgeFile, docs: List[Document] = [], **kwargs):
@@ -184,9 +259,72 @@ class KBService(ABC):
             return False
 
         if os.path.exists(kb_file.filepath):
-            self.delete_doc(kb_file, **kwargs)
+            if not docs:
+                status = self._update_doc_chunks(kb_file, **kwargs)
+                if status is not None:
+                    return status
+            # add_doc 会先删除文件已有的文本块
             return self.add_doc(kb_file, docs=docs, **kwargs)
 
+    def _update_doc_chunks(self, kb_file: KnowledgeFile, **kwargs) -> Optional[bool]:
+        """
+        按文本块增量更新文件：与数据库中记录的文本块哈希比较，只删除已消失的文本块，只向量化新增的文本块。
+        旧数据没有文本块哈希，或向量库不支持按 id 删除时返回 None，由调用方删除后整体重建。
+        """
+        kwargs.pop("embeddings", None)  # 预先计算的向量与全部文本块对应，这里只向量化新增的文本块
+        old_hashes = list_doc_hashes_from_db(kb_name=self.kb_name, file_name=kb_file.filename)
+        if not old_hashes or not all(old_hashes.values()):
+            return None
+        docs = kb_file.file2text()
+        if not docs:
+            return None
+        self._set_relative_source(kb_file, docs)
+
+        existing: Dict[str, List[str]] = {}  # chunk_hash -> [doc_id, ...]
+        for doc_id, h in old_hashes.items():
+            existing.setdefault(h, []).append(doc_id)
+        new_docs, new_hashes = [], []
+        for doc in docs:
+            h = get_chunk_hash(doc)
+            if existing.get(h):
+                existing[h].pop()
+            else:
+                new_docs.append(doc)
+                new_hashes.append(h)
+        removed_ids = [doc_id for ids in existing.values() for doc_id in ids]
+
+        # 删除与新增在同一个写入批次中提交，检索不会看到文本块缺失的中间状态
+        with self.write_batch(save=False) as kb:
+            if removed_ids:
+                try:
+                    kb.del_doc_by_ids(removed_ids)
+                    self._sparse_update(deleted=removed_ids)
+                except Exception as e:
+                    logger.warning(f"无法按 id 删除文本块，将整体重建文件 {kb_file.filename}：{e}")
+                    return None
+            doc_infos = []
+            if new_docs:
+                doc_infos = kb.do_add_doc(new_docs, **{**kwargs, "not_refresh_vs_cache": True})
+                self._sparse_update(added=zip(doc_infos or [], new_docs))
+        if (removed_ids or new_docs) and not kwargs.get("not_refresh_vs_cache"):
+            self.save_vector_store()
+
+        logger.info(
+            f"增量更新文件 {self.kb_name}/{kb_file.filename}：保留 {len(docs) - len(new_docs)} 个文本块，"
+            f"删除 {len(removed_ids)} 个，新增 {len(new_docs)} 个"
+        )
+        delete_docs_from_db_by_ids(
+            kb_name=self.kb_name, file_name=kb_file.filename, ids=removed_ids
+        )
+        status = add_file_to_db(
+            kb_file,
+            custom_docs=False,
+            docs_count=len(docs),
+            doc_infos=self._with_chunk_hash(doc_infos, new_hashes),
+        )
+        self._content_changed()
+        return status
+
     def exist_doc(self, file_name: str):
         return file_exists_in_db(
             KnowledgeFile(knowledge_base_name=self.kb_name, filename=file_name)
@@ -198,6 +336,47 @@ class KBService(ABC):
     def count_files(self):
         return count_files_from_db(self.kb_name)
 
+    def is_file_changed(self, kb_file: KnowledgeFile, detail: Dict) -> bool:
+        """
+        根据数据库中记录的文件信息（list_file_details_from_db 或 get_file_detail 的返回值）判断文件是否需要重新处理。
+        修改时间与大小均未变化的文件视为未修改；否则再比较内容哈希，内容未变化时只更新数据库中的修改时间。
+        """
+        if kb_file.get_mtime() == detail["file_mtime"] and kb_file.get_size() == detail["file_size"]:
+            return False
+        if detail.get("file_hash") and kb_file.get_hash() == detail["file_hash"]:
+            update_file_stat_in_db(kb_file)
+            return False
+        return True
+
+    def diff_files(self) -> Dict[str, List[str]]:
+        """
+        对比本地目录与数据库中的文件，用于增量同步，文件是否修改由 is_file_changed 判断。
+        使用自定义 docs 的文件不会被重新处理。
+        返回形式：{"added": [...], "changed": [...], "unchanged": [...], "deleted": [...]}
+        """
+        result = {"added": [], "changed": [], "unchanged": [], "deleted": []}
+        db_files = list_file_details_from_db(self.kb_name)
+        folder_files = list_files_from_folder(self.kb_name)
+        for file_name in folder_files:
+            detail = db_files.get(file_name)
+            if detail is None:
+                result["added"].append(file_name)
+                continue
+            if detail["custom_docs"]:
+                result["unchanged"].append(file_name)
+                continue
+            try:
+                kb_file = KnowledgeFile(filename=file_name, knowledge_base_name=self.kb_name)
+                if self.is_file_changed(kb_file, detail):
+                    result["changed"].append(file_name)
+                else:
+                    result["unchanged"].append(file_name)
+            except Exception as e:
+                logger.error(f"{e.__class__.__name__}: 检查文件 {self.kb_name}/{file_name} 时出错：{e}")
+                result["changed"].append(file_name)
+        result["deleted"] = sorted(set(db_files) - set(folder_files))
+        return result
+
     def search_docs(
         self,
         query: str,
@@ -207,8 +386,130 @@ class KBService(ABC):
         if not self.check_embed_model()[0]:
             return []
 
-        docs = self.do_search(query, top_k, score_threshold)
-        return docs
+        if (cache := get_search_cache()) is None:
+            return self.do_search(query, top_k, score_threshold)
+        kb_settings = Settings.kb_settings
+        params = {
+            "vs_type": self.vs_type(),
+            "embed_model": self.embed_model,
+            "top_k": top_k,
+            "score_threshold": score_threshold,
+            "search_mode": "hybrid" if self.use_hybrid_search() else "dense",
+            "hybrid": [kb_settings.HYBRID_CANDIDATE_K, kb_settings.HYBRID_FUSION, kb_settings.HYBRID_WEIGHTS],
+        }
+        docs = cache.get_or_search(
+            self.kb_name.lower(),
+            query,
+            params,
+            lambda: [
+                {"doc": x[0].dict(), "distance": x[1]} if isinstance(x, tuple) else x.dict()
+                for x in self.do_search(query, top_k, score_threshold)
+            ],
+        )
+        # 部分向量库（如 relyt）返回的是 (doc, 距离)
+        return [
+            (Document(**x["doc"]), x["distance"]) if "distance" in x else DocumentWithVSId(**x)
+            for x in docs
+        ]
+
+    def _content_changed(self):
+        """知识库内容变化后调用，使缓存的检索结果失效"""
+        bump_search_version(self.kb_name.lower())
+
+    def _retrieve(
+        self,
+        vectorstore,
+        query: str,
+        top_k: int,
+        score_threshold: float,
+        dense_search=None,
+        sparse_search=None,
+        sparse_thresholded: bool = False,
+    ) -> List[DocumentWithVSId]:
+        """
+        供各向量库的 do_search 使用：use_hybrid_search() 为真时融合向量检索与关键词检索（默认为 do_sparse_search），
+        否则只使用向量检索（默认为 similarity_search_with_relevance_scores）。
+        score_threshold 只能作用于向量检索，关键词检索的结果只保留向量检索中也通过了阈值的文本块，
+        sparse_search 自行按向量得分应用了阈值时（如 milvus）可设 sparse_thresholded=True 跳过该限制。
+        返回的文档带有 score，越大越相关；不同向量库、不同检索方式的 score 尺度不同。
+        """
+        retriever = get_Retriever("hybrid").from_vectorstore(
+            vectorstore,
+            top_k=top_k,
+            score_threshold=score_threshold,
+            sparse_search=(sparse_search or self.do_sparse_search)
+            if self.use_hybrid_search()
+            else None,
+            dense_search=dense_search,
+            sparse_within_dense=not sparse_thresholded,
+        )
+        return [
+            DocumentWithVSId(**{**doc.dict(), "score": score})
+            for doc, score in retriever.get_relevant_documents_with_scores(query)
+        ]
+
+    def use_hybrid_search(self) -> bool:
+        """
+        是否使用混合检索。SEARCH_MODE 为 auto 时只有自带关键词索引的向量库与 HYBRID_SEARCH_KBS 中的知识库使用，
+        避免为所有知识库在内存中构建 BM25 索引
+        """
+        kb_settings = Settings.kb_settings
+        if kb_settings.SEARCH_MODE == "auto":
+            return self.native_sparse_search or self.kb_name in kb_settings.HYBRID_SEARCH_KBS
+        return kb_settings.SEARCH_MODE == "hybrid"
+
+    def do_sparse_search(self, query: str, top_k: int) -> List[Tuple[Document, float]]:
+        """
+        关键词（BM25）检索，返回 [(doc, score), ...]。
+        默认在内存中维护知识库的 BM25 索引：首次检索时从向量库读取全部文本块构建，之后随文件增删同步更新；
+        其它进程修改知识库后（数据库中文件列表的摘要变化）重新构建。
+        自带全文检索或持久化关键词索引的向量库可以重写此方法，并将 native_sparse_search 设为 True。
+        """
+        signature = get_kb_files_signature(self.kb_name)
+        with self._sparse_lock:
+            if self._sparse_index is None or self._sparse_signature != signature:
+                self._sparse_index = self._build_sparse_index()
+                self._sparse_signature = signature
+            hits = self._sparse_index.search(query, k=top_k)
+        if not hits:
+            return []
+        docs = self.get_doc_by_ids([doc_id for doc_id, _ in hits])
+        return [(doc, score) for doc, (_, score) in zip(docs, hits) if doc is not None]
+
+    def _build_sparse_index(self, batch_size: int = 256) -> BM25Index:
+        index = BM25Index()
+        ids = [x["id"] for x in list_docs_from_db(kb_name=self.kb_name)]
+        for i in range(0, len(ids), batch_size):
+            batch = ids[i: i + batch_size]
+            pairs = [
+                (doc_id, doc.page_content)
+                for doc_id, doc in zip(batch, self.get_doc_by_ids(batch))
+                if doc is not None
+            ]
+            index.add([x[0] for x in pairs], [x[1] for x in pairs])
+        logger.info(f"已为知识库 {self.kb_name} 构建关键词索引，共 {len(index)} 个文本块")
+        return index
+
+    def _sparse_update(self, added=None, deleted: List[str] = None, reset: bool = False):
+        """
+        内存 BM25 索引已构建时同步文本块的增删，未构建时什么也不做。
+        added 为 [(doc_info, doc), ...]，doc_info 为 do_add_doc 的返回值
+        """
+        if self._sparse_index is None:
+            return
+        with self._sparse_lock:
+            if self._sparse_index is None:
+                return
+            if reset:
+                self._sparse_index = None
+                return
+            if deleted:
+                self._sparse_index.delete(deleted)
+            if added is not None:
+                added = list(added)
+                self._sparse_index.add(
+                    [info["id"] for info, _ in added], [doc.page_content for _, doc in added]
+                )
 
     def get_doc_by_ids(self, ids: List[str]) -> List[Document]:
         return []
@@ -220,11 +521,11 @@ class KBService(ABC):
         """
         传入参数为： {doc_id: Document, ...}
         如果对应 doc_id 的值为 None，或其 page_content 为空，则删除该文档
+        数据库中的文本块记录（包括文本块哈希）同步更新，之后按文件更新时以文件内容为准
         """
         if not self.check_embed_model()[0]:
             return False
 
-        self.del_doc_by_ids(list(docs.keys()))
         pending_docs = []
         ids = []
         for _id, doc in docs.items():
@@ -232,7 +533,18 @@ class KBService(ABC):
                 continue
             ids.append(_id)
             pending_docs.append(doc)
-        self.do_add_doc(docs=pending_docs, ids=ids)
+        with self.write_batch(save=False) as kb:
+            kb.del_doc_by_ids(list(docs.keys()))
+            self._sparse_update(deleted=list(docs.keys()))
+            doc_infos = kb.do_add_doc(docs=pending_docs, ids=ids)
+            self._sparse_update(added=zip([{"id": _id} for _id in ids], pending_docs))
+        doc_infos = doc_infos or [{"id": _id, "metadata": doc.metadata} for _id, doc in zip(ids, pending_docs)]
+        update_docs_in_db(
+            kb_name=self.kb_name,
+            doc_infos=self._with_chunk_hash(doc_infos, [get_chunk_hash(doc) for doc in pending_docs]),
+            deleted_ids=[_id for _id in docs if _id not in ids],
+        )
+        self._content_changed()
         return True
 
     def list_docs(
@@ -346,15 +658,31 @@ class KBService(ABC):
 
 
 class KBServiceFactory:
+    """
+    按 (kb_name, vs_type, embed_model) 缓存已初始化的 KBService 实例，整个进程共用，
+    避免每次请求都重新查询数据库、建立向量库连接。
+    知识库创建、删除或修改介绍时（KBService.create_kb/drop_kb/update_info）会自动失效。
+    在其它进程中修改了知识库时，可调用 KBServiceFactory.clear() 清空缓存。
+    """
+
+    _services: Dict[Tuple[str, str, str], KBService] = {}
+    _names: Dict[str, Tuple[str, str, str]] = {}  # kb_name -> 缓存键，省去数据库查询
+    _init_locks: Dict[Tuple[str, str, str], threading.Lock] = {}
+    _lock = threading.Lock()
+
     @staticmethod
-    def get_service(
+    def _normalize_vs_type(vector_store_type: Union[str, SupportedVSType]) -> str:
+        if isinstance(vector_store_type, str):
+            vector_store_type = getattr(SupportedVSType, vector_store_type.upper())
+        return vector_store_type
+
+    @staticmethod
+    def _create_service(
         kb_name: str,
-        vector_store_type: Union[str, SupportedVSType],
-        embed_model: str = get_default_embedding(),
+        vector_store_type: str,
+        embed_model: str,
         kb_info: str = None,
     ) -> KBService:
-        if isinstance(vector_store_type, str):
-            vector_store_type = getattr(SupportedVSType, vector_store_type.upper())
         params = {
             "knowledge_base_name": kb_name,
             "embed_model": embed_model,
@@ -419,16 +747,67 @@ class KBServiceFactory:
 
             return DefaultKBService(kb_name)
 
-    @staticmethod
-    def get_service_by_name(kb_name: str) -> KBService:
-        _, vs_type, embed_model = load_kb_from_db(kb_name)
-        if _ is None:  # kb not in db, just return None
-            return None
-        return KBServiceFactory.get_service(kb_name, vs_type, embed_model)
+    @classmethod
+    def get_service(
+        cls,
+        kb_name: str,
+        vector_store_type: Union[str, SupportedVSType],
+        embed_model: str = get_default_embedding(),
+        kb_info: str = None,
+    ) -> KBService:
+        vector_store_type = cls._normalize_vs_type(vector_store_type)
+        key = (kb_name, vector_store_type, embed_model)
+        service = cls._services.get(key)
+        if service is None:
+            with cls._lock:
+                init_lock = cls._init_locks.setdefault(key, threading.Lock())
+            # 每个知识库单独加锁初始化，不会阻塞其它知识库的查询
+            with init_lock:
+                service = cls._services.get(key)
+                if service is None:
+                    service = cls._create_service(
+                        kb_name, vector_store_type, embed_model, kb_info
+                    )
+                    if service is not None:
+                        with cls._lock:
+                            cls._services[key] = service
+        if service is not None and kb_info is not None:
+            service.kb_info = kb_info
+        return service
 
-    @staticmethod
-    def get_default():
-        return KBServiceFactory.get_service("default", SupportedVSType.DEFAULT)
+    @classmethod
+    def get_service_by_name(cls, kb_name: str) -> KBService:
+        key = cls._names.get(kb_name)
+        if key is None:
+            _, vs_type, embed_model = load_kb_from_db(kb_name)
+            if _ is None:  # kb not in db, just return None
+                return None
+            key = (kb_name, cls._normalize_vs_type(vs_type), embed_model)
+        service = cls.get_service(*key)
+        if service is not None:
+            with cls._lock:
+                cls._names[kb_name] = key
+        return service
+
+    @classmethod
+    def invalidate(cls, kb_name: str):
+        """移除知识库对应的缓存实例（忽略大小写，与数据库查询一致）"""
+        kb_name = kb_name.lower()
+        with cls._lock:
+            for key in [k for k in cls._services if k[0].lower() == kb_name]:
+                cls._services.pop(key, None)
+            for name in [n for n in cls._names if n.lower() == kb_name]:
+                cls._names.pop(name, None)
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            cls._services.clear()
+            cls._names.clear()
+
+    @classmethod
+    def get_default(cls):
+        return cls.get_service("default", SupportedVSType.DEFAULT)
 
 
 def get_kb_details() -> List[Dict]:
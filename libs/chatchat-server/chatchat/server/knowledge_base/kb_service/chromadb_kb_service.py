@@ -7,7 +7,6 @@ from langchain.docstore.document import Document
 from langchain_chroma import Chroma
 
 from chatchat.settings import Settings
-from chatchat.server.file_rag.utils import get_Retriever
 from chatchat.server.knowledge_base.kb_service.base import KBService, SupportedVSType
 from chatchat.server.knowledge_base.utils import KnowledgeFile, get_kb_path, get_vs_path
 from chatchat.server.utils import get_Embeddings
@@ -51,6 +50,7 @@ class ChromaKBService(KBService):
     vs_path: str
     kb_path: str
     chroma: Chroma
+    accepts_embeddings = True
 
     client = None
 
@@ -91,20 +91,20 @@ class ChromaKBService(KBService):
     def do_search(
         self, query: str, top_k: int, score_threshold: float = Settings.kb_settings.SCORE_THRESHOLD
     ) -> List[Tuple[Document, float]]:
-        retriever = get_Retriever("vectorstore").from_vectorstore(
+        return self._retrieve(
             self.chroma,
+            query,
             top_k=top_k,
             score_threshold=score_threshold,
         )
-        docs = retriever.get_relevant_documents(query)
-        return docs
 
     def do_add_doc(self, docs: List[Document], **kwargs) -> List[Dict]:
         doc_infos = []
-        embed_func = get_Embeddings(self.embed_model)
         texts = [doc.page_content for doc in docs]
         metadatas = [doc.metadata for doc in docs]
-        embeddings = embed_func.embed_documents(texts=texts)
+        embeddings = kwargs.get("embeddings") or get_Embeddings(
+            self.embed_model
+        ).embed_documents(texts=texts)
         ids = [str(uuid.uuid1()) for _ in range(len(texts))]
         for _id, text, embedding, metadata in zip(ids, texts, embeddings, metadatas):
             self.chroma._collection.add(
@@ -115,7 +115,9 @@ class ChromaKBService(KBService):
 
     def get_doc_by_ids(self, ids: List[str]) -> List[Document]:
         get_result: GetResult = self.chroma._collection.get(ids=ids)
-        return _get_result_to_documents(get_result)
+        # 按传入的 ids 顺序返回，不存在的为 None
+        docs = dict(zip(get_result["ids"], _get_result_to_documents(get_result)))
+        return [docs.get(id) for id in ids]
 
     def del_doc_by_ids(self, ids: List[str]) -> bool:
         self.chroma._collection.delete(ids=ids)
@@ -1,7 +1,8 @@
 import logging
 import os
 import shutil
-from typing import List
+import threading
+from typing import Dict, List, Tuple
 
 from elasticsearch import BadRequestError, Elasticsearch
 from langchain.schema import Document
@@ -11,7 +12,6 @@ from langchain_community.vectorstores.elasticsearch import (
 )
 
 from chatchat.settings import Settings
-from chatchat.server.file_rag.utils import get_Retriever
 from chatchat.server.knowledge_base.kb_service.base import KBService, SupportedVSType
 from chatchat.server.knowledge_base.utils import KnowledgeFile
 from chatchat.server.utils import get_Embeddings
@@ -20,8 +20,24 @@ from chatchat.utils import build_logger
 
 logger = build_logger()
 
+_es_clients: Dict[str, Elasticsearch] = {}
+_es_clients_lock = threading.Lock()
+
+
+def _get_es_client(**connection_info) -> Elasticsearch:
+    """连接参数相同的知识库共用一个 Elasticsearch 客户端（及其连接池）"""
+    key = repr(sorted(connection_info.items()))
+    with _es_clients_lock:
+        client = _es_clients.get(key)
+        if client is None:
+            client = _es_clients[key] = Elasticsearch(**connection_info)
+        return client
+
 
 class ESKBService(KBService):
+    # 关键词检索使用 ES 自带的 BM25 全文检索
+    native_sparse_search = True
+
     def do_init(self):
         self.kb_path = self.get_kb_path(self.kb_name)
         self.index_name = os.path.split(self.kb_path)[-1]
@@ -53,7 +69,7 @@ class ESKBService(KBService):
                     connection_info.update(client_key=self.client_key)
                     connection_info.update(client_cert=self.client_cert)
             # ES python客户端连接（仅连接）
-            self.es_client_python = Elasticsearch(**connection_info)
+            self.es_client_python = _get_es_client(**connection_info)
         except ConnectionError:
             logger.error("连接到 Elasticsearch 失败！")
             raise ConnectionError
@@ -135,13 +151,30 @@ class ESKBService(KBService):
 
     def do_search(self, query: str, top_k: int, score_threshold: float):
         # 文本相似性检索
-        retriever = get_Retriever("vectorstore").from_vectorstore(
+        return self._retrieve(
             self.db,
+            query,
             top_k=top_k,
             score_threshold=score_threshold,
         )
-        docs = retriever.get_relevant_documents(query)
-        return docs
+
+    def do_sparse_search(self, query: str, top_k: int) -> List[Tuple[Document, float]]:
+        # 直接使用 ES 自带的 BM25 全文检索，不需要在内存中另建索引
+        response = self.es_client_python.search(
+            index=self.index_name,
+            query={"match": {"context": query}},
+            size=top_k,
+        )
+        return [
+            (
+                Document(
+                    page_content=hit["_source"].get("context", ""),
+                    metadata=hit["_source"].get("metadata", {}),
+                ),
+                hit["_score"],
+            )
+            for hit in response["hits"]["hits"]
+        ]
 
     def get_doc_by_ids(self, ids: List[str]) -> List[Document]:
         results = []
@@ -205,28 +238,11 @@ class ESKBService(KBService):
         )
         print("*" * 100)
 
-        self.db.add_documents(documents=docs)
-        # 获取 id 和 source , 格式：[{"id": str, "metadata": dict}, ...]
+        ids = self.db.add_documents(documents=docs)
         print("写入数据成功.")
         print("*" * 100)
-
-        if self.es_client_python.indices.exists(index=self.index_name):
-            file_path = docs[0].metadata.get("source")
-            query = {
-                "query": {
-                    "term": {"metadata.source.keyword": file_path},
-                    "term": {"_index": self.index_name},
-                }
-            }
-            # 注意设置size，默认返回10个。
-            search_results = self.es_client_python.search(body=query, size=50)
-            if len(search_results["hits"]["hits"]) == 0:
-                raise ValueError("召回元素个数为0")
-            info_docs = [
-                {"id": hit["_id"], "metadata": hit["_source"]["metadata"]}
-                for hit in search_results["hits"]["hits"]
-            ]
-            return info_docs
+        # 格式：[{"id": str, "metadata": dict}, ...]，与 docs 顺序一致
+        return [{"id": id, "metadata": doc.metadata} for id, doc in zip(ids, docs)]
 
     def do_clear_vs(self):
         """从知识库删除全部向量"""
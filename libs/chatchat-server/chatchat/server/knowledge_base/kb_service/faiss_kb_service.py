@@ -1,23 +1,43 @@
+import copy
 import os
 import shutil
-from typing import Dict, List, Tuple
+from contextlib import contextmanager
+from typing import Dict, Generator, List, Tuple
 
 from langchain.docstore.document import Document
 
 from chatchat.settings import Settings
-from chatchat.server.file_rag.utils import get_Retriever
 from chatchat.server.knowledge_base.kb_cache.faiss_cache import (
+    FaissWriteBatch,
     ThreadSafeFaiss,
     kb_faiss_pool,
 )
 from chatchat.server.knowledge_base.kb_service.base import KBService, SupportedVSType
+from chatchat.server.knowledge_base.model.kb_document_model import DocumentWithVSId
 from chatchat.server.knowledge_base.utils import KnowledgeFile, get_kb_path, get_vs_path
 
 
+def _bm25_search(vs, bm25_index, query: str, top_k: int) -> List[Tuple[Document, float]]:
+    """使用随向量库保存的 BM25 索引检索，文档内容从 docstore 中读取"""
+    if bm25_index is None:
+        return []
+    docs = vs.docstore._dict
+    return [
+        (docs[doc_id], score)
+        for doc_id, score in bm25_index.search(query, k=top_k)
+        if doc_id in docs
+    ]
+
+
 class FaissKBService(KBService):
     vs_path: str
     kb_path: str
     vector_name: str = None
+    accepts_embeddings = True
+    # 关键词检索使用随向量库持久化的 BM25 索引
+    native_sparse_search = True
+    # write_batch() 返回的副本绑定的写入批次
+    _vs_batch: FaissWriteBatch = None
 
     def vs_type(self) -> str:
         return SupportedVSType.FAISS
@@ -38,13 +58,65 @@ class FaissKBService(KBService):
     def save_vector_store(self):
         self.load_vector_store().save(self.vs_path)
 
+    @contextmanager
+    def write_batch(self, save: bool = True) -> Generator["FaissKBService", None, None]:
+        faiss = self.load_vector_store()
+        if self._vs_batch is not None and self._vs_batch.faiss is faiss:
+            yield self
+            return
+        kb = copy.copy(self)
+        try:
+            with faiss.batch() as kb._vs_batch:
+                yield kb
+        finally:
+            # add_doc 等在暂存时已使检索缓存失效，提交前的检索可能又以新版本缓存了旧结果，提交后需再次失效
+            self._content_changed()
+        if save:
+            faiss.save(self.vs_path)
+
+    @contextmanager
+    def _staged(self, save: bool) -> Generator[FaissWriteBatch, None, None]:
+        """
+        暂存修改的批次：在 write_batch() 中时使用该批次，由 write_batch 统一提交；
+        否则为本次操作单独创建批次并立即提交，save=True 时再保存到磁盘
+        """
+        if self._vs_batch is not None:
+            yield self._vs_batch
+            return
+        faiss = self.load_vector_store()
+        try:
+            with faiss.batch() as batch:
+                yield batch
+        finally:
+            self._content_changed()
+        if save:
+            faiss.save(self.vs_path)
+
     def get_doc_by_ids(self, ids: List[str]) -> List[Document]:
-        with self.load_vector_store().acquire() as vs:
-            return [vs.docstore._dict.get(id) for id in ids]
+        faiss = self.load_vector_store()
+        with faiss.acquire(shared=True) as vs:
+            docs = vs.docstore._dict
+            return [docs.get(id) for id in ids]
 
     def del_doc_by_ids(self, ids: List[str]) -> bool:
-        with self.load_vector_store().acquire() as vs:
-            vs.delete(ids)
+        with self._staged(save=False) as batch:
+            batch.delete(ids)
+        return True
+
+    def list_docs(
+        self, file_name: str = None, metadata: Dict = {}
+    ) -> List[DocumentWithVSId]:
+        # 按文件列出时直接使用来源索引，不需要逐个查询数据库中的 doc id
+        if file_name is None or metadata:
+            return super().list_docs(file_name=file_name, metadata=metadata)
+        faiss = self.load_vector_store()
+        with faiss.acquire(shared=True) as vs:
+            docs = vs.docstore._dict
+            return [
+                DocumentWithVSId(**{**docs[id].dict(), "id": id})
+                for id in faiss.sources.get(file_name)
+                if id in docs
+            ]
 
     def do_init(self):
         self.vector_name = self.vector_name or self.embed_model.replace(":", "_")
@@ -69,15 +141,23 @@ class FaissKBService(KBService):
         top_k: int,
         score_threshold: float = Settings.kb_settings.SCORE_THRESHOLD,
     ) -> List[Tuple[Document, float]]:
-        with self.load_vector_store().acquire() as vs:
-            retriever = get_Retriever("ensemble").from_vectorstore(
+        faiss = self.load_vector_store()
+        with faiss.acquire(shared=True) as vs:
+            # 读锁只与提交修改互斥，检索只会看到完整提交的写入批次
+            docs = self._retrieve(
                 vs,
+                query,
                 top_k=top_k,
                 score_threshold=score_threshold,
+                sparse_search=lambda q, k: _bm25_search(vs, faiss.bm25, q, k),
             )
-            docs = retriever.get_relevant_documents(query)
         return docs
 
+    def do_sparse_search(self, query: str, top_k: int) -> List[Tuple[Document, float]]:
+        faiss = self.load_vector_store()
+        with faiss.acquire(shared=True) as vs:
+            return _bm25_search(vs, faiss.bm25, query, top_k)
+
     def do_add_doc(
         self,
         docs: List[Document],
@@ -85,27 +165,18 @@ class FaissKBService(KBService):
     ) -> List[Dict]:
         texts = [x.page_content for x in docs]
         metadatas = [x.metadata for x in docs]
-        with self.load_vector_store().acquire() as vs:
-            embeddings = vs.embeddings.embed_documents(texts)
-            ids = vs.add_embeddings(
-                text_embeddings=zip(texts, embeddings), metadatas=metadatas
-            )
-            if not kwargs.get("not_refresh_vs_cache"):
-                vs.save_local(self.vs_path)
+        # 向量化在暂存前完成，不占用任何锁
+        embeddings = kwargs.get("embeddings") or self.load_vector_store().obj.embeddings.embed_documents(texts)
+        with self._staged(save=not kwargs.get("not_refresh_vs_cache")) as batch:
+            ids = batch.add_embeddings(texts, embeddings, metadatas, ids=kwargs.get("ids"))
         doc_infos = [{"id": id, "metadata": doc.metadata} for id, doc in zip(ids, docs)]
         return doc_infos
 
     def do_delete_doc(self, kb_file: KnowledgeFile, **kwargs):
-        with self.load_vector_store().acquire() as vs:
-            ids = [
-                k
-                for k, v in vs.docstore._dict.items()
-                if v.metadata.get("source").lower() == kb_file.filename.lower()
-            ]
+        with self._staged(save=not kwargs.get("not_refresh_vs_cache")) as batch:
+            ids = batch.source_ids(kb_file.filename)
             if len(ids) > 0:
-                vs.delete(ids)
-            if not kwargs.get("not_refresh_vs_cache"):
-                vs.save_local(self.vs_path)
+                batch.delete(ids)
         return ids
 
     def do_clear_vs(self):
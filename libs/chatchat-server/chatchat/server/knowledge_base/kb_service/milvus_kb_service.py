@@ -1,5 +1,5 @@
 import os
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
 from langchain.schema import Document
 from langchain.vectorstores.milvus import Milvus
@@ -7,7 +7,6 @@ from langchain.vectorstores.milvus import Milvus
 from chatchat.settings import Settings
 from chatchat.server.db.repository import list_file_num_docs_id_by_kb_name_and_file_name
 from chatchat.server.utils import get_Embeddings
-from chatchat.server.file_rag.utils import get_Retriever
 from chatchat.server.knowledge_base.kb_service.base import (
     KBService,
     SupportedVSType,
@@ -26,7 +25,7 @@ class MilvusKBService(KBService):
         return Collection(milvus_name)
 
     def get_doc_by_ids(self, ids: List[str]) -> List[Document]:
-        result = []
+        result = {}
         if self.milvus.col:
             # ids = [int(id) for id in ids]  # for milvus if needed #pr 2725
             data_list = self.milvus.col.query(
@@ -34,8 +33,9 @@ class MilvusKBService(KBService):
             )
             for data in data_list:
                 text = data.pop("text")
-                result.append(Document(page_content=text, metadata=data))
-        return result
+                result[str(data.get("pk"))] = Document(page_content=text, metadata=data)
+        # 按传入的 ids 顺序返回，不存在的为 None
+        return [result.get(str(id)) for id in ids]
 
     def del_doc_by_ids(self, ids: List[str]) -> bool:
         self.milvus.col.delete(expr=f"pk in {ids}")
@@ -77,16 +77,53 @@ class MilvusKBService(KBService):
 
     def do_search(self, query: str, top_k: int, score_threshold: float):
         self._load_milvus()
-        # embed_func = get_Embeddings(self.embed_model)
-        # embeddings = embed_func.embed_query(query)
-        # docs = self.milvus.similarity_search_with_score_by_vector(embeddings, top_k)
-        retriever = get_Retriever("milvusvectorstore").from_vectorstore(
+        embedding = self.milvus.embedding_func.embed_query(query)
+        return self._retrieve(
             self.milvus,
+            query,
             top_k=top_k,
             score_threshold=score_threshold,
+            dense_search=lambda q, k: self._dense_search(embedding, k, score_threshold),
+            sparse_search=lambda q, k: self._sparse_search(embedding, q, k, score_threshold),
+            sparse_thresholded=True,
         )
-        docs = retriever.get_relevant_documents(query)
-        return docs
+
+    def _dense_search(
+        self, embedding: List[float], top_k: int, score_threshold: float, expr: str = None
+    ) -> List[Tuple[Document, float]]:
+        docs = self.milvus.similarity_search_with_score_by_vector(embedding, k=top_k, expr=expr)
+        return self._apply_score_threshold(docs, score_threshold)[:top_k]
+
+    def _sparse_search(
+        self, embedding: List[float], query: str, top_k: int, score_threshold: float
+    ) -> List[Tuple[Document, float]]:
+        """关键词检索的结果同样按向量得分应用 score_threshold，只命中关键词的无关文本块不会绕过阈值"""
+        hits = self.do_sparse_search(query, top_k)
+        pks = [int(doc.metadata["pk"]) for doc, _ in hits if doc.metadata.get("pk") is not None]
+        if not pks:
+            return []
+        passed = {
+            str(doc.metadata.get("pk"))
+            for doc, _ in self._dense_search(embedding, len(pks), score_threshold, expr=f"pk in {pks}")
+        }
+        return [(doc, score) for doc, score in hits if str(doc.metadata.get("pk")) in passed]
+
+    @staticmethod
+    def _apply_score_threshold(
+        docs: List[Tuple[Document, float]], score_threshold: Optional[float]
+    ) -> List[Tuple[Document, float]]:
+        """
+        按集合的度量方式应用 score_threshold（0~2，越小越相关），返回越大越相关的得分，便于与关键词检索融合。
+        L2 为距离，取负数；IP、COSINE 为相似度，对应的距离为 1 - 相似度
+        """
+        metric_type = Settings.kb_settings.kbs_config.get("milvus_kwargs")["search_params"].get("metric_type", "L2")
+        if metric_type == "L2":
+            return [(doc, -distance) for doc, distance in score_threshold_process(score_threshold, len(docs), docs)]
+        return [
+            (doc, similarity)
+            for doc, similarity in docs
+            if score_threshold is None or 1 - similarity <= score_threshold
+        ]
 
     def do_add_doc(self, docs: List[Document], **kwargs) -> List[Dict]:
         for doc in docs:
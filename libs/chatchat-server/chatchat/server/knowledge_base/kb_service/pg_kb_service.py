@@ -10,7 +10,6 @@ from sqlalchemy.engine.base import Engine
 from sqlalchemy.orm import Session
 
 from chatchat.settings import Settings
-from chatchat.server.file_rag.utils import get_Retriever
 from chatchat.server.knowledge_base.kb_service.base import (
     KBService,
     SupportedVSType,
@@ -37,16 +36,18 @@ class PGKBService(KBService):
     def get_doc_by_ids(self, ids: List[str]) -> List[Document]:
         with Session(PGKBService.engine) as session:
             stmt = text(
-                "SELECT document, cmetadata FROM langchain_pg_embedding WHERE custom_id = ANY(:ids)"
+                "SELECT custom_id, document, cmetadata FROM langchain_pg_embedding WHERE custom_id = ANY(:ids)"
             )
-            results = [
-                Document(page_content=row[0], metadata=row[1])
+            # 按传入的 ids 顺序返回，不存在的为 None
+            results = {
+                row[0]: Document(page_content=row[1], metadata=row[2])
                 for row in session.execute(stmt, {"ids": ids}).fetchall()
-            ]
-            return results
+            }
+            return [results.get(id) for id in ids]
 
     def del_doc_by_ids(self, ids: List[str]) -> bool:
-        return super().del_doc_by_ids(ids)
+        self.pg_vector.delete(ids=ids)
+        return True
 
     def do_init(self):
         self._load_pg_vector()
@@ -76,13 +77,12 @@ class PGKBService(KBService):
             shutil.rmtree(self.kb_path)
 
     def do_search(self, query: str, top_k: int, score_threshold: float):
-        retriever = get_Retriever("vectorstore").from_vectorstore(
+        return self._retrieve(
             self.pg_vector,
+            query,
             top_k=top_k,
             score_threshold=score_threshold,
         )
-        docs = retriever.get_relevant_documents(query)
-        return docs
 
     def do_add_doc(self, docs: List[Document], **kwargs) -> List[Dict]:
         ids = self.pg_vector.add_documents(docs)
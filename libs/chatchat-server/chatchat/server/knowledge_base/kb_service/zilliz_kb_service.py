@@ -4,7 +4,6 @@ from langchain.schema import Document
 from langchain.vectorstores import Zilliz
 
 from chatchat.settings import Settings
-from chatchat.server.file_rag.utils import get_Retriever
 from chatchat.server.knowledge_base.kb_service.base import (
     KBService,
     SupportedVSType,
@@ -24,14 +23,15 @@ class ZillizKBService(KBService):
         return Collection(zilliz_name)
 
     def get_doc_by_ids(self, ids: List[str]) -> List[Document]:
-        result = []
+        result = {}
         if self.zilliz.col:
             # ids = [int(id) for id in ids]  # for zilliz if needed #pr 2725
             data_list = self.zilliz.col.query(expr=f"pk in {ids}", output_fields=["*"])
             for data in data_list:
                 text = data.pop("text")
-                result.append(Document(page_content=text, metadata=data))
-        return result
+                result[str(data.get("pk"))] = Document(page_content=text, metadata=data)
+        # 按传入的 ids 顺序返回，不存在的为 None
+        return [result.get(str(id)) for id in ids]
 
     def del_doc_by_ids(self, ids: List[str]) -> bool:
         self.zilliz.col.delete(expr=f"pk in {ids}")
@@ -71,13 +71,12 @@ class ZillizKBService(KBService):
 
     def do_search(self, query: str, top_k: int, score_threshold: float):
         self._load_zilliz()
-        retriever = get_Retriever("vectorstore").from_vectorstore(
+        return self._retrieve(
             self.zilliz,
+            query,
             top_k=top_k,
             score_threshold=score_threshold,
         )
-        docs = retriever.get_relevant_documents(query)
-        return docs
 
     def do_add_doc(self, docs: List[Document], **kwargs) -> List[Dict]:
         for doc in docs:
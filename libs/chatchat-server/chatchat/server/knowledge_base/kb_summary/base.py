@@ -50,9 +50,10 @@ class KBSummaryService(ABC):
         )
 
     def add_kb_summary(self, summary_combine_docs: List[Document]):
-        with self.load_vector_store().acquire() as vs:
-            ids = vs.add_documents(documents=summary_combine_docs)
-            vs.save_local(self.vs_path)
+        faiss = self.load_vector_store()
+        with faiss.batch() as batch:
+            ids = batch.add_documents(summary_combine_docs)
+        faiss.save(self.vs_path)
 
         summary_infos = [
             {
@@ -41,6 +41,26 @@ logger = build_logger()
 
 def create_tables():
     Base.metadata.create_all(bind=engine)
+    add_missing_columns()
+
+
+def add_missing_columns():
+    """
+    create_all 不会修改已存在的表，为旧版本数据库补充新增的列（如 knowledge_file.file_hash）
+    """
+    from sqlalchemy import inspect, text
+
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            columns = {c["name"] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in columns:
+                    col_type = column.type.compile(dialect=engine.dialect)
+                    conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {col_type}"))
+                    logger.info(f"已为数据表 {table.name} 添加字段 {column.name}")
 
 
 def reset_tables():
@@ -106,7 +126,7 @@ def file_to_kbfile(kb_name: str, files: List[str]) -> List[KnowledgeFile]:
 
 def folder2db(
     kb_names: List[str],
-    mode: Literal["recreate_vs", "update_in_db", "increment"],
+    mode: Literal["recreate_vs", "update_in_db", "increment", "sync"],
     vs_type: Literal["faiss", "milvus", "pg", "chromadb"] = Settings.kb_settings.DEFAULT_VS_TYPE,
     embed_model: str = get_default_embedding(),
     chunk_size: int = Settings.kb_settings.CHUNK_SIZE,
@@ -120,6 +140,7 @@ def folder2db(
         fill_info_only(disabled): do not create vector store, fill info to db using existed files only
         update_in_db: update vector store and database info using local files that existed in database only
         increment: create vector store and database info for local files that not existed in database only
+        sync: update vector store for new or changed local files only, and delete docs of files removed from local folder
     """
 
     def files2vs(kb_name: str, kb_files: List[KnowledgeFile]) -> List:
@@ -179,6 +200,18 @@ def folder2db(
             kb_files = file_to_kbfile(kb_name, files)
             result = files2vs(kb_name, kb_files)
             kb.save_vector_store()
+        # 对比文件修改时间、大小与内容哈希，只处理新增或修改过的文件，并删除本地已不存在的文件
+        elif mode == "sync":
+            diff = kb.diff_files()
+            for kb_file in file_to_kbfile(kb_name, diff["deleted"]):
+                kb.delete_doc(kb_file, not_refresh_vs_cache=True)
+            kb_files = file_to_kbfile(kb_name, diff["added"] + diff["changed"])
+            result = files2vs(kb_name, kb_files)
+            kb.save_vector_store()
+            print(
+                f"新增 {len(diff['added'])}，更新 {len(diff['changed'])}，"
+                f"跳过 {len(diff['unchanged'])}，删除 {len(diff['deleted'])}"
+            )
         else:
             print(f"unsupported migrate mode: {mode}")
         end = datetime.now()
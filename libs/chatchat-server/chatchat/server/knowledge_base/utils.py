@@ -1,3 +1,4 @@
+import hashlib
 import importlib
 import json
 import os
@@ -309,6 +310,13 @@ def make_text_splitter(splitter_name, chunk_size, chunk_overlap):
     return text_splitter
 
 
+def get_chunk_hash(doc: Document) -> str:
+    """文本块内容与元数据的哈希，用于文件更新时比较哪些文本块发生了变化"""
+    metadata = {k: v for k, v in doc.metadata.items() if k != "id"}
+    data = json.dumps([doc.page_content, metadata], ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
 class KnowledgeFile:
     def __init__(
         self,
@@ -408,6 +416,23 @@ class KnowledgeFile:
     def get_size(self):
         return os.path.getsize(self.filepath)
 
+    def get_hash(self) -> str:
+        """文件内容的 sha256，用于判断文件内容是否变化"""
+        stat = os.stat(self.filepath)
+        return _file_hash(self.filepath, stat.st_mtime, stat.st_size)
+
+
+@lru_cache(4096)
+def _file_hash(filepath: str, mtime: float, size: int) -> str:
+    """
+    按路径、修改时间与大小缓存文件哈希，diff_files 中计算过的哈希在随后 add_file_to_db 时直接复用
+    """
+    h = hashlib.sha256()
+    with open(filepath, "rb") as fp:
+        for chunk in iter(lambda: fp.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
 
 def files2docs_in_thread_file2docs(
     *, file: KnowledgeFile, **kwargs
@@ -471,7 +496,8 @@ def format_reference(kb_name: str, docs: List[Dict], api_base_url: str="") -> Li
         filename = doc.get("metadata", {}).get("source")
         parameters = urlencode(
             {
-                "knowledge_base_name": kb_name,
+                # 多知识库检索的结果带有所属知识库
+                "knowledge_base_name": doc.get("metadata", {}).get("kb_name", kb_name),
                 "file_name": filename,
             }
         )
@@ -1,7 +1,11 @@
 from __future__ import annotations
 
+import asyncio
 import logging
+import threading
 import warnings
+import weakref
+from concurrent.futures import ThreadPoolExecutor
 from typing import (
     Any,
     Callable,
@@ -28,11 +32,32 @@ from tenacity import (
     wait_exponential,
 )
 
-from chatchat.server.utils import run_in_thread_pool
-
 logger = logging.getLogger(__name__)
 
 
+# 同一平台（api_base_url）的所有 LocalAIEmbeddings 实例共享并发限制
+_semaphores: Dict[str, threading.BoundedSemaphore] = {}
+_async_semaphores: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()  # {loop: {api_base_url: Semaphore}}
+_semaphores_lock = threading.Lock()
+
+
+def _get_semaphore(key: str, limit: int) -> threading.BoundedSemaphore:
+    with _semaphores_lock:
+        if key not in _semaphores:
+            _semaphores[key] = threading.BoundedSemaphore(limit)
+        return _semaphores[key]
+
+
+def _get_async_semaphore(key: str, limit: int) -> asyncio.Semaphore:
+    # asyncio.Semaphore 与事件循环绑定，每个事件循环单独创建
+    loop = asyncio.get_running_loop()
+    with _semaphores_lock:
+        semaphores = _async_semaphores.setdefault(loop, {})
+        if key not in semaphores:
+            semaphores[key] = asyncio.Semaphore(limit)
+        return semaphores[key]
+
+
 def _create_retry_decorator(embeddings: LocalAIEmbeddings) -> Callable[[Any], Any]:
     import openai
 
@@ -156,6 +181,8 @@ class LocalAIEmbeddings(BaseModel, Embeddings):
     disallowed_special: Union[Literal["all"], Set[str], Sequence[str]] = "all"
     chunk_size: int = 1000
     """Maximum number of texts to embed in each batch"""
+    max_concurrency: int = 5
+    """Maximum number of concurrent requests to the same api base url."""
     max_retries: int = 3
     """Maximum number of retries to make when generating."""
     request_timeout: Union[float, Tuple[float, float], Any, None] = Field(
@@ -235,19 +262,26 @@ class LocalAIEmbeddings(BaseModel, Embeddings):
             import openai
 
             if is_openai_v1():
+                from chatchat.server.client_pool import get_client_pool
+
+                # 同一平台的实例复用 openai 客户端及其连接池
                 client_params = {
                     "api_key": values["openai_api_key"],
                     "organization": values["openai_organization"],
                     "base_url": values["openai_api_base"],
+                    "proxy": values["openai_proxy"] or None,
                     "timeout": values["request_timeout"],
                     "max_retries": values["max_retries"],
                 }
+                pool = get_client_pool()
 
                 if not values.get("client"):
-                    values["client"] = openai.OpenAI(**client_params).embeddings
+                    values["client"] = pool.get_openai_client(
+                        is_async=False, **client_params
+                    ).embeddings
                 if not values.get("async_client"):
-                    values["async_client"] = openai.AsyncOpenAI(
-                        **client_params
+                    values["async_client"] = pool.get_openai_client(
+                        is_async=True, **client_params
                     ).embeddings
             elif not values.get("client"):
                 values["client"] = openai.Embedding
@@ -277,47 +311,79 @@ class LocalAIEmbeddings(BaseModel, Embeddings):
             }  # type: ignore[assignment]  # noqa: E501
         return openai_args
 
-    def _embedding_func(self, text: str, *, engine: str) -> List[float]:
-        """Call out to LocalAI's embedding endpoint."""
-        # handle large input text
+    def _prepare_text(self, text: str) -> str:
         if self.model.endswith("001"):
             # See: https://github.com/openai/openai-python/issues/418#issuecomment-1525939500
             # replace newlines, which can negatively affect performance.
             text = text.replace("\n", " ")
-        return (
-            embed_with_retry(
+        return text
+
+    def _split_batches(
+        self, texts: List[str], chunk_size: Optional[int] = 0
+    ) -> List[Tuple[int, List[str]]]:
+        """Split texts into batches of at most `chunk_size` texts and about
+        `embedding_ctx_length` tokens. Returns [(start index, texts), ...].
+
+        The tokenizer of a local model is unknown, so the number of characters is
+        used as a (conservative) estimate of the number of tokens.
+        """
+        chunk_size = chunk_size or self.chunk_size
+        batches = []
+        start, batch, tokens = 0, [], 0
+        for i, text in enumerate(texts):
+            if batch and (
+                len(batch) >= chunk_size or tokens + len(text) > self.embedding_ctx_length
+            ):
+                batches.append((start, batch))
+                start, batch, tokens = i, [], 0
+            batch.append(self._prepare_text(text))
+            tokens += len(text)
+        if batch:
+            batches.append((start, batch))
+        return batches
+
+    @staticmethod
+    def _parse_response(response: Any) -> List[List[float]]:
+        data = sorted(
+            enumerate(response.data), key=lambda x: getattr(x[1], "index", x[0])
+        )
+        return [d.embedding for _, d in data]
+
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Call out to LocalAI's embedding endpoint with a batch of texts."""
+        with _get_semaphore(self.openai_api_base, self.max_concurrency):
+            response = embed_with_retry(
                 self,
-                input=[text],
+                input=texts,
                 **self._invocation_params,
             )
-            .data[0]
-            .embedding
-        )
+        return self._parse_response(response)
+
+    async def _aembed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Call out to LocalAI's embedding endpoint async with a batch of texts."""
+        async with _get_async_semaphore(self.openai_api_base, self.max_concurrency):
+            response = await async_embed_with_retry(
+                self,
+                input=texts,
+                **self._invocation_params,
+            )
+        return self._parse_response(response)
+
+    def _embedding_func(self, text: str, *, engine: str) -> List[float]:
+        """Call out to LocalAI's embedding endpoint."""
+        return self._embed_batch([self._prepare_text(text)])[0]
 
     async def _aembedding_func(self, text: str, *, engine: str) -> List[float]:
         """Call out to LocalAI's embedding endpoint."""
-        # handle large input text
-        if self.model.endswith("001"):
-            # See: https://github.com/openai/openai-python/issues/418#issuecomment-1525939500
-            # replace newlines, which can negatively affect performance.
-            text = text.replace("\n", " ")
-        return (
-            (
-                await async_embed_with_retry(
-                    self,
-                    input=[text],
-                    **self._invocation_params,
-                )
-            )
-            .data[0]
-            .embedding
-        )
+        return (await self._aembed_batch([self._prepare_text(text)]))[0]
 
     def embed_documents(
         self, texts: List[str], chunk_size: Optional[int] = 0
     ) -> List[List[float]]:
         """Call out to LocalAI's embedding endpoint for embedding search docs.
 
+        Texts are sent in batches, at most `max_concurrency` requests at a time.
+
         Args:
             texts: The list of texts to embed.
             chunk_size: The chunk size of embeddings. If None, will use the chunk size
@@ -326,21 +392,27 @@ class LocalAIEmbeddings(BaseModel, Embeddings):
         Returns:
             List of embeddings, one for each text.
         """
-
-        # call _embedding_func for each text with multithreads
-        def task(seq, text):
-            return (seq, self._embedding_func(text, engine=self.deployment))
-
-        params = [{"seq": i, "text": text} for i, text in enumerate(texts)]
-        result = list(run_in_thread_pool(func=task, params=params))
-        result = sorted(result, key=lambda x: x[0])
-        return [x[1] for x in result]
+        batches = self._split_batches(texts, chunk_size)
+        if not batches:
+            return []
+        if len(batches) == 1:
+            return self._embed_batch(batches[0][1])
+        embeddings: List[List[float]] = [None] * len(texts)
+        workers = min(len(batches), max(self.max_concurrency, 1))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [(start, pool.submit(self._embed_batch, batch)) for start, batch in batches]
+            for start, future in futures:
+                result = future.result()
+                embeddings[start : start + len(result)] = result
+        return embeddings
 
     async def aembed_documents(
         self, texts: List[str], chunk_size: Optional[int] = 0
     ) -> List[List[float]]:
         """Call out to LocalAI's embedding endpoint async for embedding search docs.
 
+        Texts are sent in batches, at most `max_concurrency` requests at a time.
+
         Args:
             texts: The list of texts to embed.
             chunk_size: The chunk size of embeddings. If None, will use the chunk size
@@ -349,11 +421,11 @@ class LocalAIEmbeddings(BaseModel, Embeddings):
         Returns:
             List of embeddings, one for each text.
         """
-        embeddings = []
-        for text in texts:
-            response = await self._aembedding_func(text, engine=self.deployment)
-            embeddings.append(response)
-        return embeddings
+        batches = self._split_batches(texts, chunk_size)
+        results = await asyncio.gather(
+            *[self._aembed_batch(batch) for _, batch in batches]
+        )
+        return [embedding for result in results for embedding in result]
 
     def embed_query(self, text: str) -> List[float]:
         """Call out to LocalAI's embedding endpoint for embedding query text.
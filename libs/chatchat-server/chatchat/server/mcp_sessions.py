@@ -0,0 +1,273 @@
+"""
+进程级的 MCP 会话管理：每个启用的 MCP 连接保持一个会话，在多次对话之间共用，
+避免每次对话都启动全部 stdio MCP 服务器进程并重新初始化、获取工具列表。
+
+MCP 客户端（anyio）要求在同一个任务中建立和关闭连接，因此每个会话由一个后台任务持有，
+直到会话被关闭或断开。连接配置变更时（见 mcp_routes）调用 invalidate 重新加载。
+"""
+import asyncio
+import json
+import os
+import time
+from typing import Callable, Dict, List, Optional
+
+from langchain_core.tools import BaseTool
+
+from chatchat.settings import Settings
+from chatchat.utils import build_logger
+from langchain_chatchat.agent_toolkits.mcp_kit.client import MultiServerMCPClient
+
+
+logger = build_logger()
+
+
+def to_mcp_connection(conn: Dict) -> Optional[Dict]:
+    """将数据库中的 MCP 连接配置转换为 StdioConnection 或 SSEConnection，不支持的类型返回 None"""
+    config = conn.get("config") or {}
+    args = conn.get("args") or []
+    if conn["transport"] == "stdio":
+        return {
+            "transport": "stdio",
+            "command": config.get("command", args[0] if args else ""),
+            "args": args[1:] if len(args) > 1 else [],
+            "env": conn.get("env"),
+            "encoding": "utf-8",
+            "encoding_error_handler": "strict",
+        }
+    elif conn["transport"] == "sse":
+        return {
+            "transport": "sse",
+            "url": config.get("url", ""),
+            "headers": config.get("headers", {}),
+            "timeout": conn.get("timeout", 30.0),
+            "sse_read_timeout": conn.get("sse_read_timeout", 60.0),
+        }
+    return None
+
+
+def load_enabled_connections() -> Dict[str, Dict]:
+    """从数据库读取所有启用的 MCP 连接：{server_name: connection}"""
+    from chatchat.server.db.repository.mcp_connection_repository import get_enabled_mcp_connections
+
+    connections = {}
+    for conn in get_enabled_mcp_connections():
+        if (connection := to_mcp_connection(conn)) is not None:
+            connections[conn["server_name"]] = connection
+    return connections
+
+
+class MCPServerSession:
+    """一个 MCP 服务器的会话，由后台任务持有连接"""
+
+    def __init__(
+        self,
+        server_name: str,
+        connection: Dict,
+        client_factory: Callable = MultiServerMCPClient,
+        ping_interval: float = 30,
+    ):
+        self.server_name = server_name
+        self.connection = connection
+        self.signature = json.dumps(connection, sort_keys=True, default=str)
+        self.tools: List[BaseTool] = []
+        self.error: Optional[BaseException] = None
+        self.started_at = 0.0
+        self.ping_interval = ping_interval
+        self._client_factory = client_factory
+        self._task: Optional[asyncio.Task] = None
+        self._ready: Optional[asyncio.Event] = None
+        self._stop: Optional[asyncio.Event] = None
+        self._connected = False
+
+    @property
+    def connected(self) -> bool:
+        return self._connected and self._task is not None and not self._task.done()
+
+    @property
+    def running(self) -> bool:
+        """正在连接或已连接"""
+        return self._task is not None and not self._task.done()
+
+    def _build_connection(self) -> Dict:
+        connection = dict(self.connection)
+        if connection.get("transport") == "stdio":
+            connection["env"] = {
+                **os.environ,
+                **(connection.get("env") or {}),
+                "PYTHONHASHSEED": "0",
+            }
+        return connection
+
+    async def _run(self):
+        try:
+            async with self._client_factory({self.server_name: self._build_connection()}) as client:
+                self.tools = client.get_tools()
+                self._connected = True
+                self._ready.set()
+                logger.info(f"已连接 MCP 服务器 {self.server_name}，共 {len(self.tools)} 个工具")
+                session = getattr(client, "sessions", {}).get(self.server_name)
+                while not self._stop.is_set():
+                    try:
+                        await asyncio.wait_for(self._stop.wait(), self.ping_interval)
+                    except asyncio.TimeoutError:
+                        # 检查连接是否仍然可用，如 stdio 服务器进程已退出
+                        if session is not None:
+                            await asyncio.wait_for(session.send_ping(), self.ping_interval)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.error = e
+            logger.error(f"MCP 服务器 {self.server_name} 连接失败或已断开：{e}")
+        finally:
+            self._connected = False
+            self.tools = []
+            self._ready.set()
+
+    async def start(self, timeout: float) -> bool:
+        """在后台任务中建立连接，等待连接完成或超时（超时则放弃本次连接）"""
+        self.started_at = time.time()
+        self.error = None
+        self._ready = asyncio.Event()
+        self._stop = asyncio.Event()
+        self._task = asyncio.ensure_future(self._run())
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            self.error = TimeoutError(f"连接 MCP 服务器 {self.server_name} 超时（{timeout} 秒）")
+            logger.error(str(self.error))
+            await self.stop()
+        return self.connected
+
+    async def stop(self):
+        if self._task is None or self._task.done():
+            return
+        if self._connected:
+            self._stop.set()
+        else:
+            self._task.cancel()
+        try:
+            await self._task
+        except BaseException:
+            pass
+
+    def stats(self) -> Dict:
+        return {
+            "server_name": self.server_name,
+            "transport": self.connection.get("transport"),
+            "connected": self.connected,
+            "tools": [t.name for t in self.tools],
+            "error": str(self.error) if self.error else None,
+            "started_at": self.started_at,
+        }
+
+
+class MCPSessionManager:
+    """
+    管理所有启用的 MCP 连接的会话：
+    - 新增或变更的连接在获取工具时并发建立，已删除或禁用的连接关闭；
+    - 断开或连接失败的会话至少间隔 reconnect_interval 秒后在后台重连，不阻塞对话。
+    """
+
+    def __init__(
+        self,
+        connect_timeout: float = 30,
+        reconnect_interval: float = 10,
+        connections_func: Callable[[], Dict[str, Dict]] = load_enabled_connections,
+        client_factory: Callable = MultiServerMCPClient,
+    ):
+        self.connect_timeout = connect_timeout
+        self.reconnect_interval = reconnect_interval
+        self._connections_func = connections_func
+        self._client_factory = client_factory
+        self._connections: Optional[Dict[str, Dict]] = None  # None 表示需要重新加载
+        self._sessions: Dict[str, MCPServerSession] = {}
+        self._lock: Optional[asyncio.Lock] = None
+        self._background: set = set()
+
+    def invalidate(self):
+        """连接配置变更后调用：重新加载配置，并在后台建立或关闭相应的会话"""
+        self._connections = None
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._spawn(loop, self.sync())
+
+    def _spawn(self, loop: asyncio.AbstractEventLoop, coro):
+        task = loop.create_task(coro)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def _reconnect(self, session: MCPServerSession):
+        await session.stop()
+        await session.start(self.connect_timeout)
+
+    async def sync(self):
+        """使会话与启用的连接一致"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if self._connections is None:
+                self._connections = self._connections_func()
+            connections = self._connections
+
+            to_stop = [s for name, s in self._sessions.items() if name not in connections]
+            to_start = []
+            now = time.time()
+            for name, connection in connections.items():
+                session = self._sessions.get(name)
+                signature = json.dumps(connection, sort_keys=True, default=str)
+                if session is None or session.signature != signature:
+                    if session is not None:
+                        to_stop.append(session)
+                    session = self._sessions[name] = MCPServerSession(
+                        name, connection, client_factory=self._client_factory
+                    )
+                    to_start.append(session)
+                elif not session.running and now - session.started_at >= self.reconnect_interval:
+                    logger.info(f"重新连接 MCP 服务器 {name}")
+                    session.started_at = now
+                    self._spawn(asyncio.get_running_loop(), self._reconnect(session))
+            for session in to_stop:
+                if self._sessions.get(session.server_name) is session:
+                    self._sessions.pop(session.server_name)
+
+            await asyncio.gather(
+                *[s.stop() for s in to_stop],
+                *[s.start(self.connect_timeout) for s in to_start],
+            )
+
+    async def get_tools(self) -> List[BaseTool]:
+        """所有已连接的 MCP 服务器的工具"""
+        await self.sync()
+        tools = []
+        for session in self._sessions.values():
+            if session.connected:
+                tools.extend(session.tools)
+        return tools
+
+    def stats(self) -> List[Dict]:
+        return [s.stats() for s in self._sessions.values()]
+
+    async def close(self):
+        """关闭所有会话，在 API 服务器退出时调用"""
+        for task in list(self._background):
+            task.cancel()
+        sessions = list(self._sessions.values())
+        self._sessions.clear()
+        self._connections = None
+        await asyncio.gather(*[s.stop() for s in sessions])
+
+
+_manager: Optional[MCPSessionManager] = None
+
+
+def get_mcp_session_manager() -> MCPSessionManager:
+    global _manager
+    if _manager is None:
+        basic_settings = Settings.basic_settings
+        _manager = MCPSessionManager(
+            connect_timeout=basic_settings.MCP_CONNECT_TIMEOUT,
+            reconnect_interval=basic_settings.MCP_RECONNECT_INTERVAL,
+        )
+    return _manager
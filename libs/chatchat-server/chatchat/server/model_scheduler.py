@@ -0,0 +1,242 @@
+"""
+/v1 接口的模型调度：同一模型部署在多个平台时，按负载选择平台，限制每个平台的并发数，
+暂停调度连续失败的平台，并在请求失败时换用其它平台重试。
+"""
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Sequence, TypeVar
+
+import httpx
+import openai
+
+from chatchat.settings import Settings
+from chatchat.utils import build_logger
+
+
+logger = build_logger()
+
+T = TypeVar("T")
+
+# 换用其它平台可能成功的错误
+RETRYABLE_ERRORS = (
+    openai.APIConnectionError,  # 包括超时
+    openai.InternalServerError,
+    openai.RateLimitError,
+    httpx.TransportError,
+)
+
+
+class Replica:
+    """部署在某个平台上的模型"""
+
+    def __init__(self, model_name: str, platform_name: str, limit: int):
+        self.model_name = model_name
+        self.platform_name = platform_name
+        self.limit = max(limit, 1)
+        self.in_flight = 0
+        self.requests = 0
+        self.errors = 0
+        self.consecutive_failures = 0
+        self.ejected_until = 0.0
+        self.ewma_latency: Optional[float] = None  # 秒
+
+    def score(self, policy: str) -> float:
+        if policy == "ewma":
+            # 没有耗时数据的平台优先，以便收集数据
+            return (self.ewma_latency or 0.0) * (self.in_flight + 1)
+        return self.in_flight / self.limit
+
+    def stats(self, now: float) -> Dict:
+        return {
+            "platform_name": self.platform_name,
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "requests": self.requests,
+            "errors": self.errors,
+            "consecutive_failures": self.consecutive_failures,
+            "ejected": self.ejected_until > now,
+            "ewma_latency": self.ewma_latency,
+        }
+
+
+class ModelScheduler:
+    def __init__(
+        self,
+        policy: str = "least_requests",
+        eject_failures: int = 3,
+        eject_seconds: float = 30,
+        max_retries: int = 1,
+        alpha: float = 0.3,
+        replicas_func: Callable[[str], List[Dict]] = None,
+    ):
+        if replicas_func is None:
+            from chatchat.server.utils import get_model_replicas
+
+            replicas_func = get_model_replicas
+        self.policy = policy
+        self.eject_failures = eject_failures
+        self.eject_seconds = eject_seconds
+        self.max_retries = max_retries
+        self.alpha = alpha
+        self._replicas_func = replicas_func
+        self._replicas: Dict[str, Dict[str, Replica]] = {}  # {model_name: {platform_name: Replica}}
+        self._waiting: Dict[str, int] = {}  # 等待空闲名额的请求数
+        self._cond: Optional[asyncio.Condition] = None
+
+    def _get_replicas(self, model_name: str) -> List[Replica]:
+        """与当前配置同步：新增的平台加入调度，移除的平台不再调度"""
+        configs = self._replicas_func(model_name)
+        assert configs, f"specified model '{model_name}' cannot be found in MODEL_PLATFORMS."
+        known = self._replicas.setdefault(model_name, {})
+        replicas = []
+        for c in configs:
+            limit = c.get("api_concurrencies") or 5
+            replica = known.get(c["platform_name"])
+            if replica is None:
+                replica = known[c["platform_name"]] = Replica(model_name, c["platform_name"], limit)
+            replica.limit = max(limit, 1)
+            replicas.append(replica)
+        return replicas
+
+    def _select(self, replicas: List[Replica], exclude: Sequence[str]) -> Optional[Replica]:
+        now = time.time()
+        candidates = [r for r in replicas if r.platform_name not in exclude] or replicas
+        healthy = [r for r in candidates if r.ejected_until <= now]
+        candidates = healthy or candidates  # 全部被暂停时仍然尝试，而不是直接失败
+        idle = [r for r in candidates if r.in_flight < r.limit]
+        if not idle:
+            return None
+        return min(idle, key=lambda r: (r.score(self.policy), r.in_flight))
+
+    async def acquire(self, model_name: str, exclude: Sequence[str] = ()) -> Replica:
+        """选择一个平台并占用其一个并发名额，所有平台都满时等待"""
+        if self._cond is None:
+            self._cond = asyncio.Condition()
+        async with self._cond:
+            replica = self._select(self._get_replicas(model_name), exclude)
+            if replica is None:
+                self._waiting[model_name] = self._waiting.get(model_name, 0) + 1
+                try:
+                    while replica is None:
+                        await self._cond.wait()
+                        replica = self._select(self._get_replicas(model_name), exclude)
+                finally:
+                    self._waiting[model_name] -= 1
+            replica.in_flight += 1
+            replica.requests += 1
+            return replica
+
+    def release(self, replica: Replica, latency: Optional[float] = None, error: BaseException = None):
+        """释放名额并记录结果。只有 RETRYABLE_ERRORS 计为平台故障，参数错误等不影响调度"""
+        replica.in_flight -= 1
+        if isinstance(error, RETRYABLE_ERRORS):
+            replica.errors += 1
+            replica.consecutive_failures += 1
+            if replica.consecutive_failures >= self.eject_failures:
+                replica.ejected_until = time.time() + self.eject_seconds
+                logger.warning(
+                    f"平台 {replica.platform_name} 的模型 {replica.model_name} 连续失败 "
+                    f"{replica.consecutive_failures} 次，{self.eject_seconds} 秒内暂停调度"
+                )
+        elif error is None:
+            replica.consecutive_failures = 0
+            replica.ejected_until = 0.0
+            if latency is not None:
+                if replica.ewma_latency is None:
+                    replica.ewma_latency = latency
+                else:
+                    replica.ewma_latency += self.alpha * (latency - replica.ewma_latency)
+        if self._cond is not None:
+            asyncio.ensure_future(self._notify())
+
+    async def _notify(self):
+        async with self._cond:
+            self._cond.notify_all()
+
+    @asynccontextmanager
+    async def lease(self, model_name: str, exclude: Sequence[str] = ()) -> AsyncIterator[Replica]:
+        replica = await self.acquire(model_name, exclude)
+        start = time.perf_counter()
+        try:
+            yield replica
+        except BaseException as e:
+            self.release(replica, error=e)
+            raise
+        else:
+            self.release(replica, latency=time.perf_counter() - start)
+
+    async def run(self, model_name: str, func: Callable[[Replica], Awaitable[T]]) -> T:
+        """调用 func(replica)，失败时换用其它平台重试至多 max_retries 次"""
+        tried: List[str] = []
+        while True:
+            try:
+                async with self.lease(model_name, exclude=tried) as replica:
+                    tried.append(replica.platform_name)
+                    return await func(replica)
+            except RETRYABLE_ERRORS as e:
+                if len(tried) > self.max_retries:
+                    raise
+                logger.warning(f"请求平台 {tried[-1]} 的模型 {model_name} 失败，换用其它平台重试：{e}")
+
+    async def run_stream(
+        self, model_name: str, func: Callable[[Replica], Awaitable[AsyncIterator[T]]]
+    ) -> AsyncIterator[T]:
+        """
+        用于流式输出：func(replica) 返回异步迭代器。开始输出之前的失败会换用其它平台重试，
+        名额在输出结束（或被中断）后才释放；耗时按首个输出块到达的时间计算，不受输出长度影响。
+        """
+        tried: List[str] = []
+        while True:
+            replica = await self.acquire(model_name, exclude=tried)
+            tried.append(replica.platform_name)
+            start_time = time.perf_counter()
+            try:
+                stream = await func(replica)
+                break
+            except BaseException as e:
+                self.release(replica, error=e)
+                if not isinstance(e, RETRYABLE_ERRORS) or len(tried) > self.max_retries:
+                    raise
+                logger.warning(f"请求平台 {replica.platform_name} 的模型 {model_name} 失败，换用其它平台重试：{e}")
+
+        async def iterate():
+            latency = None
+            try:
+                async for chunk in stream:
+                    if latency is None:
+                        latency = time.perf_counter() - start_time
+                    yield chunk
+            except BaseException as e:
+                self.release(replica, error=e)
+                raise
+            else:
+                self.release(replica, latency=latency)
+
+        return iterate()
+
+    def stats(self) -> Dict:
+        now = time.time()
+        return {
+            model_name: {
+                "waiting": self._waiting.get(model_name, 0),
+                "replicas": [r.stats(now) for r in replicas.values()],
+            }
+            for model_name, replicas in self._replicas.items()
+        }
+
+
+_scheduler: Optional[ModelScheduler] = None
+
+
+def get_model_scheduler() -> ModelScheduler:
+    global _scheduler
+    if _scheduler is None:
+        model_settings = Settings.model_settings
+        _scheduler = ModelScheduler(
+            policy=model_settings.MODEL_SCHEDULE_POLICY,
+            eject_failures=model_settings.MODEL_EJECT_FAILURES,
+            eject_seconds=model_settings.MODEL_EJECT_SECONDS,
+            max_retries=model_settings.MODEL_MAX_RETRIES,
+        )
+    return _scheduler
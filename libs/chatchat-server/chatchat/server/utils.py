@@ -3,6 +3,8 @@ import multiprocessing as mp
 import os
 import socket
 import sys
+import threading
+import time
 from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from pathlib import Path
 from urllib.parse import urlparse
@@ -21,6 +23,7 @@ from typing import (
 
 import httpx
 import openai
+import pydantic_core
 from fastapi import FastAPI
 from langchain.tools import BaseTool
 from langchain_core.embeddings import Embeddings
@@ -29,6 +32,7 @@ from langchain_openai.llms import OpenAI
 from memoization import cached, CachingAlgorithmFlag
 
 from chatchat.settings import Settings, XF_MODELS_TYPES
+from chatchat.server.client_pool import get_client_pool
 from chatchat.server.pydantic_v2 import BaseModel, Field
 from chatchat.utils import build_logger
 import requests
@@ -60,8 +64,7 @@ def get_config_platforms() -> Dict[str, Dict]:
     """
     获取配置的模型平台，会将 pydantic model 转换为字典。
     """
-    platforms = [m.model_dump() for m in Settings.model_settings.MODEL_PLATFORMS]
-    return {m["platform_name"]: m for m in platforms}
+    return {name: dict(m) for name, m in get_model_routing_table().platforms.items()}
 
 
 @cached(max_size=10, ttl=60, algorithm=CachingAlgorithmFlag.LRU)
@@ -128,48 +131,78 @@ def get_config_models(
         "api_base_url": xx,
         "api_key": xx,
         "api_proxy": xx,
+        "api_concurrencies": xx,
     }}
     """
     result = {}
-    if model_type is None:
-        model_types = [
-            "llm_models",
-            "embed_models",
-            "text2image_models",
-            "image2image_models",
-            "image2text_models",
-            "rerank_models",
-            "speech2text_models",
-            "text2speech_models",
-        ]
-    else:
-        model_types = [f"{model_type}_models"]
-
-    for m in list(get_config_platforms().values()):
-        if platform_name is not None and platform_name != m.get("platform_name"):
-            continue
-
-        if m.get("auto_detect_model"):
-            if not m.get("platform_type") == "xinference":  # TODO：当前仅支持 xf 自动检测模型
-                logger.warning(f"auto_detect_model not supported for {m.get('platform_type')} yet")
-                continue
-            xf_url = get_base_url(m.get("api_base_url"))
-            xf_models = detect_xf_models(xf_url)
-            for m_type in model_types:
-                # if m.get(m_type) != "auto":
-                #     continue
-                m[m_type] = xf_models.get(m_type, [])
-
-        for m_type in model_types:
-            models = m.get(m_type, [])
-            if models == "auto":
-                logger.warning("you should not set `auto` without auto_detect_model=True")
-                continue
-            elif not models:
-                continue
-            for m_name in models:
-                if model_name is None or model_name == m_name:
-                    result[m_name] = {
+    for info in get_model_routing_table().query(model_name, model_type, platform_name):
+        result[info["model_name"]] = dict(info)
+    return result
+
+
+def get_model_replicas(model_name: str) -> List[Dict]:
+    """
+    返回部署了该模型的所有平台的模型信息（与 get_config_models 的值相同），按配置顺序排列。
+    get_config_models 按模型名称返回，重名模型只保留一个
+    """
+    replicas = {}
+    for info in get_model_routing_table().query(model_name=model_name):
+        replicas.setdefault(info["platform_name"], dict(info))
+    return list(replicas.values())
+
+
+MODEL_TYPES = [
+    "llm_models",
+    "embed_models",
+    "text2image_models",
+    "image2image_models",
+    "image2text_models",
+    "rerank_models",
+    "speech2text_models",
+    "text2speech_models",
+]
+
+
+class ModelRoutingTable:
+    """
+    根据 MODEL_PLATFORMS 预先建立的模型索引，按模型名称、类型、平台查询时不再遍历所有平台，也不访问网络。
+    配置文件变化（Settings.model_settings 被替换）后重新建立；
+    开启 auto_detect_model 的平台由后台线程每隔 MODEL_DETECT_INTERVAL 秒重新检测并建立新的索引。
+    """
+
+    def __init__(self, model_settings, detect: Callable[[str], Dict[str, List[str]]] = None):
+        self.model_settings = model_settings
+        self.platforms: Dict[str, Dict] = {}
+        self.entries: List[Dict] = []
+        self.by_name: Dict[str, List[Dict]] = {}
+        self.by_type: Dict[str, List[Dict]] = {}
+        self.by_platform: Dict[str, List[Dict]] = {}
+        self.type_names: Dict[str, Dict[str, None]] = {}  # 各类型的模型名称（有序、去重）
+        self.has_auto_detect = False
+
+        detect = detect or detect_xf_models
+        for m in (p.model_dump() for p in model_settings.MODEL_PLATFORMS):
+            self.platforms[m["platform_name"]] = m
+        for m in self.platforms.values():
+            m = dict(m)
+            if m.get("auto_detect_model"):
+                if not m.get("platform_type") == "xinference":  # TODO：当前仅支持 xf 自动检测模型
+                    logger.warning(f"auto_detect_model not supported for {m.get('platform_type')} yet")
+                    continue
+                self.has_auto_detect = True
+                xf_models = detect(get_base_url(m.get("api_base_url")))
+                for m_type in MODEL_TYPES:
+                    m[m_type] = xf_models.get(m_type, [])
+
+            for m_type in MODEL_TYPES:
+                models = m.get(m_type, [])
+                if models == "auto":
+                    logger.warning("you should not set `auto` without auto_detect_model=True")
+                    continue
+                elif not models:
+                    continue
+                for m_name in models:
+                    self._add({
                         "platform_name": m.get("platform_name"),
                         "platform_type": m.get("platform_type"),
                         "model_type": m_type.split("_")[0],
@@ -177,8 +210,90 @@ def get_config_models(
                         "api_base_url": m.get("api_base_url"),
                         "api_key": m.get("api_key"),
                         "api_proxy": m.get("api_proxy"),
-                    }
-    return result
+                        "api_concurrencies": m.get("api_concurrencies", 5),
+                    })
+
+    def _add(self, info: Dict):
+        self.entries.append(info)
+        self.by_name.setdefault(info["model_name"], []).append(info)
+        self.by_type.setdefault(info["model_type"], []).append(info)
+        self.by_platform.setdefault(info["platform_name"], []).append(info)
+        self.type_names.setdefault(info["model_type"], {})[info["model_name"]] = None
+
+    def query(
+            self, model_name: str = None, model_type: str = None, platform_name: str = None,
+    ) -> List[Dict]:
+        """按配置顺序返回符合条件的模型信息，调用方不要修改返回的字典"""
+        if model_name is not None:
+            entries = self.by_name.get(model_name, [])
+        elif model_type is not None:
+            entries = self.by_type.get(model_type, [])
+        elif platform_name is not None:
+            entries = self.by_platform.get(platform_name, [])
+        else:
+            entries = self.entries
+        return [
+            e for e in entries
+            if (model_type is None or e["model_type"] == model_type)
+            and (platform_name is None or e["platform_name"] == platform_name)
+        ]
+
+
+_routing_table: Optional[ModelRoutingTable] = None
+_routing_lock = threading.Lock()
+_model_detector: Optional[threading.Thread] = None
+
+
+def _reset_model_detector():
+    global _routing_lock, _model_detector
+    _routing_lock = threading.Lock()
+    _model_detector = None
+
+
+if hasattr(os, "register_at_fork"):
+    # 子进程中没有父进程的线程，重新建立路由表时再启动
+    os.register_at_fork(after_in_child=_reset_model_detector)
+
+
+def get_model_routing_table() -> ModelRoutingTable:
+    global _routing_table
+    model_settings = Settings.model_settings
+    table = _routing_table
+    if table is None or table.model_settings is not model_settings:
+        with _routing_lock:
+            table = _routing_table
+            if table is None or table.model_settings is not model_settings:
+                table = _routing_table = ModelRoutingTable(model_settings)
+                if table.has_auto_detect:
+                    _start_model_detector()
+    return table
+
+
+def refresh_model_routing_table() -> ModelRoutingTable:
+    """重新检测自动检测平台的模型（不使用 detect_xf_models 的缓存）并替换路由表"""
+    global _routing_table
+    detect = getattr(detect_xf_models, "__wrapped__", detect_xf_models)
+    table = ModelRoutingTable(Settings.model_settings, detect=detect)
+    with _routing_lock:
+        _routing_table = table
+    return table
+
+
+def _start_model_detector():
+    global _model_detector
+
+    def run():
+        while True:
+            time.sleep(Settings.model_settings.MODEL_DETECT_INTERVAL)
+            try:
+                if get_model_routing_table().has_auto_detect:
+                    refresh_model_routing_table()
+            except Exception as e:
+                logger.warning(f"error when detecting models: {e}")
+
+    if _model_detector is None:
+        _model_detector = threading.Thread(target=run, name="model-detector", daemon=True)
+        _model_detector.start()
 
 
 def get_model_info(
@@ -199,20 +314,22 @@ def get_model_info(
 
 
 def get_default_llm():
-    available_llms = list(get_config_models(model_type="llm").keys())
+    available_llms = get_model_routing_table().type_names.get("llm", {})
     if Settings.model_settings.DEFAULT_LLM_MODEL in available_llms:
         return Settings.model_settings.DEFAULT_LLM_MODEL
     else:
+        available_llms = list(available_llms)
         logger.warning(f"default llm model {Settings.model_settings.DEFAULT_LLM_MODEL} is not found in available llms, "
                        f"using {available_llms[0]} instead")
         return available_llms[0]
 
 
 def get_default_embedding():
-    available_embeddings = list(get_config_models(model_type="embed").keys())
+    available_embeddings = get_model_routing_table().type_names.get("embed", {})
     if Settings.model_settings.DEFAULT_EMBEDDING_MODEL in available_embeddings:
         return Settings.model_settings.DEFAULT_EMBEDDING_MODEL
     else:
+        available_embeddings = list(available_embeddings)
         logger.warning(f"default embedding model {Settings.model_settings.DEFAULT_EMBEDDING_MODEL} is not found in "
                        f"available embeddings, using {available_embeddings[0]} instead")
         return available_embeddings[0]
@@ -260,6 +377,19 @@ def get_ChatOpenAI(
                 openai_api_key=model_info.get("api_key"),
                 openai_proxy=model_info.get("api_proxy"),
             )
+        # 复用同一平台的客户端及连接
+        client_params = dict(
+            base_url=params["openai_api_base"],
+            api_key=params["openai_api_key"],
+            proxy=params.get("openai_proxy"),
+            timeout=params.get("request_timeout"),
+            max_retries=params.get("max_retries"),
+        )
+        pool = get_client_pool()
+        params.update(
+            client=pool.get_openai_client(is_async=False, **client_params).chat.completions,
+            async_client=pool.get_openai_client(is_async=True, **client_params).chat.completions,
+        )
         model = ChatOpenAI(**params)
     except Exception as e:
         logger.exception(f"failed to create ChatOpenAI for model: {model_name}.")
@@ -301,6 +431,19 @@ def get_ChatPlatformAIParams(
             api_key=model_info.get("api_key"),
             proxy=model_info.get("api_proxy"),
         )
+        # 复用同一平台的客户端及连接，异步调用（astream）不再占用线程
+        client_params = dict(
+            base_url=params["api_base"],
+            api_key=params["api_key"],
+            proxy=params.get("proxy"),
+            timeout=params.get("timeout"),
+            max_retries=params.get("max_retries", 1),
+        )
+        pool = get_client_pool()
+        params.update(
+            client=pool.get_openai_client(is_async=False, **client_params).chat.completions,
+            async_client=pool.get_openai_client(is_async=True, **client_params).chat.completions,
+        )
         return params
     except Exception as e:
         logger.exception(f"failed to create for model: {model_name}.")
@@ -352,10 +495,22 @@ def get_OpenAI(
 def get_Embeddings(
         embed_model: str = None,
         local_wrap: bool = False,  # use local wrapped api
+        use_cache: bool = True,  # 使用文本向量缓存（EMBEDDING_CACHE_SIZE > 0 时）及查询向量缓存
+        report_health: bool = True,  # 调用失败时通知嵌入模型健康检查
 ) -> Embeddings:
     from langchain_community.embeddings import OllamaEmbeddings
     from langchain_openai import OpenAIEmbeddings
 
+    from chatchat.server.embed_health import HealthReportingEmbeddings
+
+    from chatchat.server.knowledge_base.kb_cache.embedding_cache import (
+        CachedEmbeddings,
+        get_embedding_cache,
+    )
+    from chatchat.server.knowledge_base.kb_cache.query_embedding import (
+        QueryEmbeddings,
+        get_query_batcher,
+    )
     from chatchat.server.localai_embeddings import (
         LocalAIEmbeddings,
     )
@@ -376,39 +531,64 @@ def get_Embeddings(
                 openai_proxy=model_info.get("api_proxy"),
             )
         if model_info.get("platform_type") == "openai":
-            return OpenAIEmbeddings(**params)
+            client_params = dict(
+                base_url=params["openai_api_base"],
+                api_key=params["openai_api_key"],
+                proxy=params.get("openai_proxy"),
+            )
+            pool = get_client_pool()
+            embeddings = OpenAIEmbeddings(
+                **params,
+                client=pool.get_openai_client(is_async=False, **client_params).embeddings,
+                async_client=pool.get_openai_client(is_async=True, **client_params).embeddings,
+            )
         elif model_info.get("platform_type") == "ollama":
-            return OllamaEmbeddings(
+            embeddings = OllamaEmbeddings(
                 base_url=model_info.get("api_base_url").replace("/v1", ""),
                 model=embed_model,
             )
         elif model_info.get("platform_type") == "zhipuai":
-            return ZhipuAIEmbeddings(
+            embeddings = ZhipuAIEmbeddings(
                 base_url=model_info.get("api_base_url"),
                 api_key=model_info.get("api_key"),
                 zhipuai_proxy=model_info.get("api_proxy"),
                 model=embed_model,
             )
         else:
-            return LocalAIEmbeddings(**params)
+            embeddings = LocalAIEmbeddings(
+                **params, max_concurrency=model_info.get("api_concurrencies", 5)
+            )
     except Exception as e:
         logger.exception(f"failed to create Embeddings for model: {embed_model}.")
         raise e
+    raw_embeddings = embeddings
+    if use_cache and (cache := get_embedding_cache()) is not None:
+        embeddings = CachedEmbeddings(embeddings, model=embed_model, cache=cache)
+    kb_settings = Settings.kb_settings
+    if use_cache and (
+        kb_settings.QUERY_EMBEDDING_CACHE_SIZE > 0 or kb_settings.QUERY_EMBEDDING_BATCH_WINDOW > 0
+    ):
+        # ollama、zhipuai 的查询与文档向量化方式不同，不能用 embed_documents 合并查询
+        batcher = get_query_batcher(
+            embed_model,
+            raw_embeddings,
+            batch=model_info.get("platform_type") not in ["ollama", "zhipuai"],
+        )
+        embeddings = QueryEmbeddings(embeddings, batcher=batcher)
+    if report_health:
+        embeddings = HealthReportingEmbeddings(embeddings, model=embed_model)
+    return embeddings
 
 
 def check_embed_model(embed_model: str = None) -> Tuple[bool, str]:
     '''
     check weather embed_model accessable, use default embed model if None
+    返回后台健康检查缓存的结果，不会每次都请求嵌入模型
     '''
+    from chatchat.server.embed_health import get_embed_health_monitor
+
     embed_model = embed_model or get_default_embedding()
-    embeddings = get_Embeddings(embed_model=embed_model)
-    try:
-        embeddings.embed_query("this is a test")
-        return True, ""
-    except Exception as e:
-        msg = f"failed to access embed model '{embed_model}': {e}"
-        logger.error(msg)
-        return False, msg
+    return get_embed_health_monitor().check(embed_model)
 
 
 def get_OpenAIClient(
@@ -418,6 +598,7 @@ def get_OpenAIClient(
 ) -> Union[openai.Client, openai.AsyncClient]:
     """
     construct an openai Client for specified platform or model
+    同一平台的客户端会被复用（见 client_pool），调用方不要关闭
     """
     if platform_name is None:
         platform_info = get_model_info(
@@ -430,25 +611,12 @@ def get_OpenAIClient(
         platform_name = platform_info.get("platform_name")
     platform_info = get_config_platforms().get(platform_name)
     assert platform_info, f"cannot find configured platform: {platform_name}"
-    params = {
-        "base_url": platform_info.get("api_base_url"),
-        "api_key": platform_info.get("api_key"),
-    }
-    httpx_params = {}
-    if api_proxy := platform_info.get("api_proxy"):
-        httpx_params = {
-            "proxies": api_proxy,
-            "transport": httpx.HTTPTransport(local_address="0.0.0.0"),
-        }
-
-    if is_async:
-        if httpx_params:
-            params["http_client"] = httpx.AsyncClient(**httpx_params)
-        return openai.AsyncClient(**params)
-    else:
-        if httpx_params:
-            params["http_client"] = httpx.Client(**httpx_params)
-        return openai.Client(**params)
+    return get_client_pool().get_openai_client(
+        base_url=platform_info.get("api_base_url"),
+        api_key=platform_info.get("api_key"),
+        proxy=platform_info.get("api_proxy"),
+        is_async=is_async,
+    )
 
 
 class MsgType:
@@ -531,6 +699,13 @@ def run_async(cor):
     return loop.run_until_complete(cor)
 
 
+def dump_json(obj: Any) -> str:
+    """
+    将流式输出的消息序列化为 JSON（不转义非 ASCII 字符），使用 pydantic_core 的编码器，比 json.dumps 快.
+    """
+    return pydantic_core.to_json(obj, fallback=str).decode()
+
+
 def iter_over_async(ait, loop=None):
     """
     将异步生成器封装成同步生成器.
@@ -940,7 +1115,7 @@ def update_search_local_knowledgebase_tool():
     from chatchat.server.db.repository.knowledge_base_repository import list_kbs_from_db
 
     kbs = list_kbs_from_db()
-    template = "Use local knowledgebase from one or more of these:\n{KB_info}\n to get information，Only local data on this knowledge use this tool. The 'database' should be one of the above [{key}]."
+    template = "Use local knowledgebase from one or more of these:\n{KB_info}\n to get information，Only local data on this knowledge use this tool. The 'database' should be one of the above [{key}]. To search several of them at once, join their names with commas."
     KB_info_str = "\n".join([f"{kb.kb_name}: {kb.kb_info}" for kb in kbs])
     KB_name_info_str = "\n".join([f"{kb.kb_name}" for kb in kbs])
     template_knowledge = template.format(KB_info=KB_info_str, key=KB_name_info_str)
@@ -957,20 +1132,76 @@ def update_search_local_knowledgebase_tool():
         ]
 
 
-def get_tool(name: str = None) -> Union[BaseTool, Dict[str, BaseTool]]:
+# 工具只在首次使用（或显式热更新）时导入；知识库工具的描述在本进程修改知识库列表后立即更新，
+# 其它进程的修改则通过定期（KB_TOOL_REFRESH_INTERVAL）重新读取数据库生效
+_tools: Optional[Dict[str, BaseTool]] = None
+_kb_tool_outdated = True
+_kb_tool_refreshed = 0.0
+_tools_lock = threading.RLock()
+
+
+def mark_kb_tool_outdated():
+    """知识库新增、删除或修改介绍后调用，下次获取工具时更新知识库工具的描述"""
+    global _kb_tool_outdated
+    _kb_tool_outdated = True
+
+
+def _kb_tool_expired() -> bool:
+    return _kb_tool_outdated or (
+        time.monotonic() - _kb_tool_refreshed >= Settings.kb_settings.KB_TOOL_REFRESH_INTERVAL
+    )
+
+
+def reload_tools() -> Dict[str, BaseTool]:
+    """
+    重新导入 tools_factory 中的全部工具模块，用于修改工具代码或配置后热更新。
+    导入完成后才替换正在使用的工具，导入失败时保留原有工具。
+    """
     import importlib
 
     from chatchat.server.agent import tools_factory
+    from chatchat.server.agent.tools_factory import tools_registry
 
-    importlib.reload(tools_factory)
+    global _tools, _kb_tool_outdated
+    with _tools_lock:
+        old_registry = tools_registry._TOOLS_REGISTRY
+        tools_registry._TOOLS_REGISTRY = {}
+        try:
+            prefix = tools_factory.__name__ + "."
+            for name, module in list(sys.modules.items()):
+                if name.startswith(prefix) and module not in (None, tools_registry):
+                    importlib.reload(module)
+            importlib.reload(tools_factory)
+        except Exception:
+            tools_registry._TOOLS_REGISTRY = old_registry
+            raise
+        _kb_tool_outdated = True
+        _tools = tools_registry._TOOLS_REGISTRY
+        return get_tool()
 
-    from chatchat.server.agent.tools_factory import tools_registry
 
-    update_search_local_knowledgebase_tool()
+def get_tool(name: str = None) -> Union[BaseTool, Dict[str, BaseTool]]:
+    global _tools, _kb_tool_outdated, _kb_tool_refreshed
+
+    if _tools is None or _kb_tool_expired():
+        with _tools_lock:
+            if _tools is None:
+                from chatchat.server.agent import tools_factory  # noqa: F401 导入时注册全部工具
+                from chatchat.server.agent.tools_factory import tools_registry
+
+                _tools = tools_registry._TOOLS_REGISTRY
+            if _kb_tool_expired():
+                _kb_tool_outdated = False
+                _kb_tool_refreshed = time.monotonic()
+                try:
+                    update_search_local_knowledgebase_tool()
+                except Exception:
+                    _kb_tool_outdated = True
+                    raise
     if name is None:
-        return tools_registry._TOOLS_REGISTRY
+        return _tools
     else:
-        return tools_registry._TOOLS_REGISTRY.get(name)
+        return _tools.get(name)
 
 
 def get_tool_config(name: str = None) -> Dict:
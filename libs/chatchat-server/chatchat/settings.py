@@ -40,6 +40,27 @@ class BasicSettings(BaseFileSettings):
     HTTPX_DEFAULT_TIMEOUT: float = 300
     """httpx 请求默认超时时间（秒）。如果加载模型或对话较慢，出现超时错误，可以适当加大该值。"""
 
+    HTTPX_MAX_CONNECTIONS: int = 100
+    """请求模型平台时，每个平台（相同代理设置）共用的 httpx 连接池的最大连接数"""
+
+    HTTPX_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    """连接池中保持空闲的最大连接数"""
+
+    HTTPX_KEEPALIVE_EXPIRY: float = 30
+    """空闲连接保持的时长（秒）"""
+
+    HTTPX_HTTP2: bool = True
+    """请求模型平台时是否启用 HTTP/2（需要安装 h2，服务端不支持时自动使用 HTTP/1.1）"""
+
+    MCP_CONNECT_TIMEOUT: float = 30
+    """连接 MCP 服务器（启动进程、初始化并获取工具列表）的超时时间（秒）"""
+
+    MCP_RECONNECT_INTERVAL: float = 10
+    """MCP 服务器连接失败或断开后，至少间隔多少秒才重新连接"""
+
+    AGENT_TOKEN_WINDOW: float = 0.02
+    """Agent 对话流式输出时，同一次 LLM 调用在该时间（秒）内生成的 token 合并为一个 SSE 消息发送。设为 0 则只合并已积压的 token"""
+
     # @computed_field
     @cached_property
     def PACKAGE_ROOT(self) -> Path:
@@ -144,6 +165,45 @@ class KBSettings(BaseFileSettings):
     CACHED_MEMO_VS_NUM: int = 10
     """缓存临时向量库数量（针对FAISS），用于文件对话"""
 
+    CACHED_VS_MEMORY_LIMIT: int = 0
+    """缓存向量库最大内存占用（MB，针对FAISS），超出时按最近最少使用的顺序释放，0 表示不限制"""
+
+    CACHED_VS_IDLE_TTL: int = 0
+    """缓存向量库空闲超过该时长（秒）后释放（针对FAISS），0 表示不释放"""
+
+    EMBEDDING_CACHE_SIZE: int = 1024
+    """文本向量化结果的磁盘缓存大小（MB），所有向量库共用，相同文本重复入库时不再调用嵌入模型。0 表示不使用缓存"""
+
+    QUERY_EMBEDDING_CACHE_SIZE: int = 1000
+    """缓存最近多少条查询文本的向量（每个嵌入模型分别计算），相同的查询不再调用嵌入模型。0 表示不缓存"""
+
+    QUERY_EMBEDDING_BATCH_WINDOW: float = 5
+    """
+    并发查询的合并窗口（毫秒）：未命中缓存的查询等待该时长，期间到达的其它查询合并为一次嵌入请求。
+    0 表示不合并。不适用于查询与文档向量化方式不同的模型（ollama、zhipuai）
+    """
+
+    QUERY_EMBEDDING_BATCH_SIZE: int = 32
+    """每次合并请求最多包含的查询数量，达到后立即发送"""
+
+    EMBED_HEALTH_CHECK_INTERVAL: float = 60
+    """嵌入模型可用性的检查间隔（秒）。检索、入库前只读取缓存的检查结果，过期后在后台重新检查"""
+
+    EMBED_HEALTH_FAILURE_THRESHOLD: int = 3
+    """嵌入模型连续检查失败多少次后暂停检查一个间隔，避免频繁请求不可用的服务"""
+
+    EMBEDDING_BATCH_SIZE: int = 64
+    """文件入库时每次向量化的文本块数量，不同文件的文本块会合并成批"""
+
+    INGEST_LOAD_WORKERS: int = 4
+    """文件入库时并发加载、切分文件的线程数"""
+
+    INGEST_QUEUE_SIZE: int = 4
+    """文件入库流水线各阶段之间的队列长度（文件数），用于限制入库时的内存占用"""
+
+    INGEST_COMMIT_SIZE: int = 1024
+    """文件入库时每写入多少个文本块提交一次向量库修改（FAISS），限制暂存修改的内存占用，已提交的文本块即可被检索"""
+
     CHUNK_SIZE: int = 750
     """知识库中单段文本长度(不适用MarkdownHeaderTextSplitter)"""
 
@@ -156,6 +216,44 @@ class KBSettings(BaseFileSettings):
     SCORE_THRESHOLD: float = 2.0
     """知识库匹配相关度阈值，取值范围在0-2之间，SCORE越小，相关度越高，取到2相当于不筛选，建议设置在0.5左右"""
 
+    SEARCH_MODE: t.Literal["auto", "hybrid", "dense"] = "auto"
+    """知识库检索方式：hybrid 为向量与 BM25 关键词混合检索，dense 为仅向量检索。
+    auto 时只有自带关键词索引的向量库（faiss、es）以及 HYBRID_SEARCH_KBS 中的知识库使用混合检索，其它使用向量检索。
+    其它向量库使用混合检索时，每个进程需要在内存中为整个知识库构建 BM25 索引"""
+
+    HYBRID_SEARCH_KBS: t.List[str] = []
+    """SEARCH_MODE 为 auto 时额外开启混合检索的知识库名称"""
+
+    HYBRID_CANDIDATE_K: int = 20
+    """混合检索时向量检索、关键词检索各自召回的候选数量，融合后再取前 top_k 个"""
+
+    HYBRID_FUSION: t.Literal["rrf", "score"] = "rrf"
+    """混合检索结果的融合方式：rrf 按排名融合，score 按归一化得分融合"""
+
+    HYBRID_WEIGHTS: t.List[float] = [0.5, 0.5]
+    """混合检索中向量检索、关键词检索的权重"""
+
+    KB_SEARCH_TIMEOUT: float = 10
+    """同时检索多个知识库时，单个知识库的检索超时（秒），超时的知识库结果会被忽略"""
+
+    KB_SEARCH_WORKERS: int = 8
+    """同时检索多个知识库时，单个请求最多并发检索的知识库数量"""
+
+    KB_TOOL_REFRESH_INTERVAL: float = 10
+    """知识库工具描述（知识库列表与介绍）的刷新间隔（秒）。多进程部署时，其它进程新增、删除知识库或修改介绍后最多经过该时间生效"""
+
+    SEARCH_CACHE_SIZE: int = 1000
+    """知识库检索结果缓存的最大条目数，知识库内容未变化时相同的查询与参数直接返回缓存的结果。0 表示不使用缓存"""
+
+    SEARCH_CACHE_TTL: float = 600
+    """检索结果缓存的有效期（秒）"""
+
+    SEARCH_CACHE_SHARED: bool = False
+    """
+    是否将检索结果缓存及知识库版本号保存在 DATA_PATH 下的 SQLite 文件中，供多个 worker 进程共享。
+    多 worker 部署时应开启，否则一个进程修改知识库后，其它进程在有效期内仍可能返回旧的结果
+    """
+
     DEFAULT_SEARCH_ENGINE: t.Literal["bing", "duckduckgo", "metaphor", "searx"] = "duckduckgo"
     """默认搜索引擎"""
 
@@ -463,6 +561,25 @@ class ApiModelSettings(BaseFileSettings):
         ]
     """模型平台配置"""
 
+    MODEL_SCHEDULE_POLICY: t.Literal["least_requests", "ewma"] = "least_requests"
+    """
+    同一模型部署在多个平台时 /v1 接口的调度策略：
+    least_requests 选择当前请求数占并发上限（api_concurrencies）比例最小的平台；
+    ewma 选择 平均耗时（指数加权）×（当前请求数 + 1）最小的平台
+    """
+
+    MODEL_EJECT_FAILURES: int = 3
+    """平台连续请求失败（连接错误、5xx、限流）多少次后暂停向其调度"""
+
+    MODEL_EJECT_SECONDS: float = 30
+    """平台被暂停调度的时长（秒），之后重新参与调度"""
+
+    MODEL_MAX_RETRIES: int = 1
+    """请求失败时换用其它平台重试的次数（不包括流式输出开始之后的失败）"""
+
+    MODEL_DETECT_INTERVAL: float = 60
+    """开启 auto_detect_model 的平台，在后台重新检测模型列表的间隔（秒）"""
+
 
 class ToolSettings(BaseFileSettings):
     """Agent 工具配置项"""
@@ -970,6 +1087,10 @@ class SettingsContainer:
         self.tool_settings.auto_reload = flag
         self.prompt_settings.auto_reload = flag
 
+    def reload(self):
+        """立即重新加载已修改的配置文件（否则由后台线程在文件修改后约 1 秒内加载）"""
+        get_settings_watcher().check(force=True)
+
 
 Settings = SettingsContainer()
 nltk.data.path.append(str(Settings.basic_settings.NLTK_DATA_PATH))
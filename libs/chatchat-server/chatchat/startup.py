@@ -30,9 +30,26 @@ logger = build_logger()
 def _set_app_event(app: FastAPI, started_event: mp.Event = None):
     @asynccontextmanager
     async def lifespan(app: FastAPI):
+        from starlette.concurrency import run_in_threadpool
+
+        from chatchat.server.client_pool import get_client_pool
+        from chatchat.server.embed_health import get_embed_health_monitor
+        from chatchat.server.mcp_sessions import get_mcp_session_manager
+        from chatchat.server.utils import get_tool
+
+        get_client_pool().bind_loop(asyncio.get_running_loop())
+        get_embed_health_monitor().start()
+        try:
+            # 启动时导入全部工具，避免首个对话请求等待
+            await run_in_threadpool(get_tool)
+        except Exception as e:
+            logger.warning(f"导入工具失败：{e}")
         if started_event is not None:
             started_event.set()
         yield
+        get_embed_health_monitor().stop()
+        await get_mcp_session_manager().close()
+        await get_client_pool().aclose()
 
     app.router.lifespan_context = lifespan
 
@@ -580,6 +580,7 @@ class ApiRequest:
         zh_title_enhance=Settings.kb_settings.ZH_TITLE_ENHANCE,
         docs: Dict = {},
         not_refresh_vs_cache: bool = False,
+        only_changed: bool = False,
     ):
         """
         对应api.py/knowledge_base/update_docs接口
@@ -593,6 +594,7 @@ class ApiRequest:
             "zh_title_enhance": zh_title_enhance,
             "docs": docs,
             "not_refresh_vs_cache": not_refresh_vs_cache,
+            "only_changed": only_changed,
         }
 
         if isinstance(data["docs"], dict):
@@ -613,6 +615,7 @@ class ApiRequest:
         chunk_size=Settings.kb_settings.CHUNK_SIZE,
         chunk_overlap=Settings.kb_settings.OVERLAP_SIZE,
         zh_title_enhance=Settings.kb_settings.ZH_TITLE_ENHANCE,
+        incremental: bool = False,
     ):
         """
         对应api.py/knowledge_base/recreate_vector_store接口
@@ -625,6 +628,7 @@ class ApiRequest:
             "chunk_size": chunk_size,
             "chunk_overlap": chunk_overlap,
             "zh_title_enhance": zh_title_enhance,
+            "incremental": incremental,
         }
 
         response = self.post(
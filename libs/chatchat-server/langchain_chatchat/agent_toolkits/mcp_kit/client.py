@@ -1,6 +1,7 @@
 """
 source  https://github.com/langchain-ai/langchain-mcp-adapters
 """
+import asyncio
 import os
 from contextlib import AsyncExitStack
 from types import TracebackType
@@ -66,13 +67,19 @@ class SSEConnection(TypedDict):
 class MultiServerMCPClient:
     """Client for connecting to multiple MCP servers and loading LangChain-compatible tools from them."""
 
-    def __init__(self, connections: dict[str, StdioConnection | SSEConnection] = None) -> None:
+    def __init__(
+            self,
+            connections: dict[str, StdioConnection | SSEConnection] = None,
+            connect_timeout: float | None = None,
+    ) -> None:
         """Initialize a MultiServerMCPClient with MCP servers connections.
 
         Args:
             connections: A dictionary mapping server names to connection configurations.
                 Each configuration can be either a StdioConnection or SSEConnection.
                 If None, no initial connections are established.
+            connect_timeout: Seconds allowed for each server to connect and list its tools
+                when entering the context. Servers connect concurrently. None means no limit.
 
         Example:
 
@@ -97,9 +104,14 @@ class MultiServerMCPClient:
             ```
         """
         self.connections = connections
+        self.connect_timeout = connect_timeout
         self.exit_stack = AsyncExitStack()
         self.sessions: dict[str, ClientSession] = {}
         self.server_name_to_tools: dict[str, list[BaseTool]] = {}
+        self.tools_by_name: dict[tuple[str, str], BaseTool] = {}
+        # servers connected by __aenter__: (task holding the session open, ready future)
+        self._server_tasks: dict[str, tuple[asyncio.Task, asyncio.Future]] = {}
+        self._closing = asyncio.Event()
 
     async def _initialize_session_and_load_tools(
             self, server_name: str, session: ClientSession
@@ -117,6 +129,8 @@ class MultiServerMCPClient:
         # Load tools from this server
         server_tools = await load_mcp_tools(server_name, session)
         self.server_name_to_tools[server_name] = server_tools
+        for tool in server_tools:
+            self.tools_by_name[(server_name, tool.name)] = tool
 
     async def connect_to_server(
             self,
@@ -189,6 +203,28 @@ class MultiServerMCPClient:
             encoding: Character encoding
             encoding_error_handler: How to handle encoding errors
         """
+        session = await self._open_stdio_session(
+            self.exit_stack,
+            command=command,
+            args=args,
+            env=env,
+            encoding=encoding,
+            encoding_error_handler=encoding_error_handler,
+        )
+        await self._initialize_session_and_load_tools(server_name, session)
+
+    async def _open_stdio_session(
+            self,
+            exit_stack: AsyncExitStack,
+            *,
+            command: str,
+            args: list[str],
+            env: dict[str, str] | None = None,
+            encoding: str = DEFAULT_ENCODING,
+            encoding_error_handler: Literal[
+                "strict", "ignore", "replace"
+            ] = DEFAULT_ENCODING_ERROR_HANDLER,
+    ) -> ClientSession:
         # NOTE: execution commands (e.g., `uvx` / `npx`) require PATH envvar to be set.
         # To address this, we automatically inject existing PATH envvar into the `env` value,
         # if it's not already set.
@@ -205,15 +241,13 @@ class MultiServerMCPClient:
         )
 
         # Create and store the connection
-        stdio_transport = await self.exit_stack.enter_async_context(stdio_client(server_params))
+        stdio_transport = await exit_stack.enter_async_context(stdio_client(server_params))
         read, write = stdio_transport
-        session = cast(
+        return cast(
             ClientSession,
-            await self.exit_stack.enter_async_context(ClientSession(read, write)),
+            await exit_stack.enter_async_context(ClientSession(read, write)),
         )
 
-        await self._initialize_session_and_load_tools(server_name, session)
-
     async def connect_to_server_via_sse(
             self,
             server_name: str,
@@ -232,18 +266,34 @@ class MultiServerMCPClient:
             timeout: HTTP timeout
             sse_read_timeout: SSE read timeout
         """
+        session = await self._open_sse_session(
+            self.exit_stack,
+            url=url,
+            headers=headers,
+            timeout=timeout,
+            sse_read_timeout=sse_read_timeout,
+        )
+        await self._initialize_session_and_load_tools(server_name, session)
+
+    async def _open_sse_session(
+            self,
+            exit_stack: AsyncExitStack,
+            *,
+            url: str,
+            headers: dict[str, Any] | None = None,
+            timeout: float = DEFAULT_HTTP_TIMEOUT,
+            sse_read_timeout: float = DEFAULT_SSE_READ_TIMEOUT,
+    ) -> ClientSession:
         # Create and store the connection
-        sse_transport = await self.exit_stack.enter_async_context(
+        sse_transport = await exit_stack.enter_async_context(
             sse_client(url, headers, timeout, sse_read_timeout)
         )
         read, write = sse_transport
-        session = cast(
+        return cast(
             ClientSession,
-            await self.exit_stack.enter_async_context(ClientSession(read, write)),
+            await exit_stack.enter_async_context(ClientSession(read, write)),
         )
 
-        await self._initialize_session_and_load_tools(server_name, session)
-
     async def session(
             self, server_name: str) -> ClientSession:
         """Get the session for a given MCP server."""
@@ -267,11 +317,7 @@ class MultiServerMCPClient:
             self, server_name: str, tool_name: str
     ) -> BaseTool | None:
         """Get a specific tool from a given MCP server."""
-        tools = self.server_name_to_tools.get(server_name, [])
-        for tool in tools:
-            if tool.name == tool_name:
-                return tool
-        return None
+        return self.tools_by_name.get((server_name, tool_name))
 
     async def list_prompts(
             self, server_name: str
@@ -288,22 +334,76 @@ class MultiServerMCPClient:
         session = self.sessions[server_name]
         return await load_mcp_prompt(session, prompt_name, arguments)
 
-    async def __aenter__(self) -> "MultiServerMCPClient":
+    async def _serve_server(
+            self, server_name: str, connection: dict[str, Any], ready: asyncio.Future
+    ) -> None:
+        """Connect to one server and keep its session open until the client closes.
+
+        The transport and session contexts are entered and exited in this task,
+        so servers can connect concurrently.
+        """
+        connection_dict = connection.copy()
+        transport = connection_dict.pop("transport")
         try:
-            connections = self.connections or {}
-            for server_name, connection in connections.items():
-                connection_dict = connection.copy()
-                transport = connection_dict.pop("transport")
+            async with AsyncExitStack() as exit_stack:
                 if transport == "stdio":
-                    await self.connect_to_server_via_stdio(server_name, **connection_dict)
-                elif transport == "sse":
-                    await self.connect_to_server_via_sse(server_name, **connection_dict)
+                    session = await self._open_stdio_session(exit_stack, **connection_dict)
                 else:
-                    raise ValueError(
-                        f"Unsupported transport: {transport}. Must be 'stdio' or 'sse'"
-                    )
+                    session = await self._open_sse_session(exit_stack, **connection_dict)
+                await self._initialize_session_and_load_tools(server_name, session)
+                if not ready.done():
+                    ready.set_result(None)
+                await self._closing.wait()
+        except BaseException as e:
+            if not ready.done():
+                ready.set_exception(e)
+            if not isinstance(e, Exception):
+                raise
+        finally:
+            self.sessions.pop(server_name, None)
+
+    async def _wait_server_ready(self, server_name: str, ready: asyncio.Future) -> None:
+        try:
+            await asyncio.wait_for(ready, self.connect_timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError(
+                f"Timed out connecting to MCP server '{server_name}' after {self.connect_timeout}s"
+            ) from None
+
+    async def _close_servers(self) -> None:
+        self._closing.set()
+        server_tasks = list(self._server_tasks.values())
+        self._server_tasks.clear()
+        for task, ready in server_tasks:
+            # servers still connecting are cancelled, connected ones exit on _closing
+            if not ready.done() or ready.cancelled():
+                task.cancel()
+        await asyncio.gather(*[task for task, _ in server_tasks], return_exceptions=True)
+
+    async def __aenter__(self) -> "MultiServerMCPClient":
+        connections = self.connections or {}
+        for server_name, connection in connections.items():
+            transport = connection["transport"]
+            if transport not in ("stdio", "sse"):
+                raise ValueError(
+                    f"Unsupported transport: {transport}. Must be 'stdio' or 'sse'"
+                )
+
+        self._closing.clear()
+        loop = asyncio.get_running_loop()
+        waiters = []
+        for server_name, connection in connections.items():
+            # keep get_tools() in configuration order whichever server connects first
+            self.server_name_to_tools.setdefault(server_name, [])
+            ready = loop.create_future()
+            task = asyncio.create_task(self._serve_server(server_name, connection, ready))
+            self._server_tasks[server_name] = (task, ready)
+            waiters.append(self._wait_server_ready(server_name, ready))
+        try:
+            await asyncio.gather(*waiters)
             return self
-        except Exception:
+        except BaseException:
+            await self._close_servers()
             await self.exit_stack.aclose()
             raise
 
@@ -313,4 +413,5 @@ class MultiServerMCPClient:
             exc_val: BaseException | None,
             exc_tb: TracebackType | None,
     ) -> None:
+        await self._close_servers()
         await self.exit_stack.aclose()
\ No newline at end of file
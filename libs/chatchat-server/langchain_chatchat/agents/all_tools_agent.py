@@ -6,6 +6,7 @@ import logging
 import time
 from typing import (
     Any,
+    AsyncIterator,
     Dict,
     List,
     Optional,
@@ -13,7 +14,7 @@ from typing import (
     Sequence
 )
 
-from langchain.agents.agent import AgentExecutor
+from langchain.agents.agent import AgentExecutor, ExceptionTool
 from langchain.agents.tools import InvalidTool
 from langchain.utilities.asyncio import asyncio_timeout
 from langchain_core.agents import AgentAction, AgentFinish, AgentStep
@@ -21,6 +22,7 @@ from langchain_core.callbacks import (
     AsyncCallbackManagerForChainRun,
     CallbackManagerForChainRun,
 )
+from langchain_core.exceptions import OutputParserException
 from langchain_core.runnables.base import RunnableSequence
 from langchain.agents.agent import BaseMultiActionAgent
 from langchain_core.tools import BaseTool
@@ -42,8 +44,25 @@ logger = logging.getLogger(__name__)
 NextStepOutput = List[Union[AgentFinish, MCPToolAction, AgentAction, AgentStep]]
 
 
+def is_concurrent_tool(tool: Optional[BaseTool]) -> bool:
+    """Whether a tool may run at the same time as the other tool calls of an agent step.
+
+    Tools with side effects opt out with ``metadata={"concurrent": False}``.
+    """
+    return tool is None or (tool.metadata or {}).get("concurrent", True)
+
+
 class PlatformToolsAgentExecutor(AgentExecutor):
     mcp_tools: Sequence[MCPStructuredTool] = []
+    mcp_tool_map: Dict[Tuple[str, str], MCPStructuredTool] = {}
+    """MCP tools indexed by (server_name, tool_name), built from mcp_tools."""
+
+    @root_validator()
+    def build_mcp_tool_map(cls, values: Dict) -> Dict:
+        values["mcp_tool_map"] = {
+            (tool.server_name, tool.name): tool for tool in values.get("mcp_tools") or []
+        }
+        return values
 
     @root_validator()
     def validate_return_direct_tool(cls, values: Dict) -> Dict:
@@ -229,6 +248,13 @@ class PlatformToolsAgentExecutor(AgentExecutor):
                 output, intermediate_steps, run_manager=run_manager
             )
 
+    def _lookup_tool(
+        self, name_to_tool_map: Dict[str, BaseTool], agent_action: AgentAction
+    ) -> Optional[BaseTool]:
+        if isinstance(agent_action, MCPToolAction):
+            return self.mcp_tool_map.get((agent_action.server_name, agent_action.tool))
+        return name_to_tool_map.get(agent_action.tool)
+
     def _perform_agent_action(
         self,
         name_to_tool_map: Dict[str, BaseTool],
@@ -241,13 +267,8 @@ class PlatformToolsAgentExecutor(AgentExecutor):
         
         if isinstance(agent_action, MCPToolAction): 
             tool_run_kwargs = self.agent.tool_run_logging_kwargs()
-            # Find the MCP tool by name and server_name from self.mcp_tools
-            mcp_tool = None
-            for tool in self.mcp_tools:
-                if tool.name == agent_action.tool and tool.server_name == agent_action.server_name:
-                    mcp_tool = tool
-                    break
-            
+            mcp_tool = self.mcp_tool_map.get((agent_action.server_name, agent_action.tool))
+
             if mcp_tool:
                 observation = mcp_tool.run(
                     agent_action.tool_input,
@@ -325,13 +346,8 @@ class PlatformToolsAgentExecutor(AgentExecutor):
             )
         if isinstance(agent_action, MCPToolAction): 
             tool_run_kwargs = self.agent.tool_run_logging_kwargs()
-            # Find the MCP tool by name and server_name from self.mcp_tools
-            mcp_tool = None
-            for tool in self.mcp_tools:
-                if tool.name == agent_action.tool and tool.server_name == agent_action.server_name:
-                    mcp_tool = tool
-                    break
-            
+            mcp_tool = self.mcp_tool_map.get((agent_action.server_name, agent_action.tool))
+
             if mcp_tool:
                 observation = await mcp_tool.arun(
                     agent_action.tool_input,
@@ -386,3 +402,116 @@ class PlatformToolsAgentExecutor(AgentExecutor):
                 **tool_run_kwargs,
             )
         return AgentStep(action=agent_action, observation=observation)
+
+    async def _aperform_agent_actions(
+        self,
+        name_to_tool_map: Dict[str, BaseTool],
+        color_mapping: Dict[str, str],
+        actions: List[AgentAction],
+        run_manager: Optional[AsyncCallbackManagerForChainRun] = None,
+    ) -> List[AgentStep]:
+        """Run the tool calls of one agent step, keeping the order of the results.
+
+        Calls run concurrently, so the step takes as long as the slowest tool.
+        A tool that opted out (see is_concurrent_tool) waits for the calls before
+        it, and the calls after it wait for it.
+        """
+        steps: List[Optional[AgentStep]] = [None] * len(actions)
+        batch: List[int] = []
+
+        async def run_batch():
+            results = await asyncio.gather(
+                *[
+                    self._aperform_agent_action(
+                        name_to_tool_map, color_mapping, actions[i], run_manager
+                    )
+                    for i in batch
+                ]
+            )
+            for i, step in zip(batch, results):
+                steps[i] = step
+            batch.clear()
+
+        for i, action in enumerate(actions):
+            if is_concurrent_tool(self._lookup_tool(name_to_tool_map, action)):
+                batch.append(i)
+            else:
+                await run_batch()
+                batch.append(i)
+                await run_batch()
+        await run_batch()
+        return steps
+
+    async def _aiter_next_step(
+        self,
+        name_to_tool_map: Dict[str, BaseTool],
+        color_mapping: Dict[str, str],
+        inputs: Dict[str, str],
+        intermediate_steps: List[Tuple[AgentAction, str]],
+        run_manager: Optional[AsyncCallbackManagerForChainRun] = None,
+    ) -> AsyncIterator[Union[AgentFinish, AgentAction, AgentStep]]:
+        """Same as AgentExecutor._aiter_next_step, but runs the actions with
+        _aperform_agent_actions so tools can opt out of running concurrently."""
+        try:
+            intermediate_steps = self._prepare_intermediate_steps(intermediate_steps)
+
+            # Call the LLM to see what to do.
+            output = await self.agent.aplan(
+                intermediate_steps,
+                callbacks=run_manager.get_child() if run_manager else None,
+                **inputs,
+            )
+        except OutputParserException as e:
+            if isinstance(self.handle_parsing_errors, bool):
+                raise_error = not self.handle_parsing_errors
+            else:
+                raise_error = False
+            if raise_error:
+                raise ValueError(
+                    "An output parsing error occurred. "
+                    "In order to pass this error back to the agent and have it try "
+                    "again, pass `handle_parsing_errors=True` to the AgentExecutor. "
+                    f"This is the error: {str(e)}"
+                )
+            text = str(e)
+            if isinstance(self.handle_parsing_errors, bool):
+                if e.send_to_llm:
+                    observation = str(e.observation)
+                    text = str(e.llm_output)
+                else:
+                    observation = "Invalid or incomplete response"
+            elif isinstance(self.handle_parsing_errors, str):
+                observation = self.handle_parsing_errors
+            elif callable(self.handle_parsing_errors):
+                observation = self.handle_parsing_errors(e)
+            else:
+                raise ValueError("Got unexpected type of `handle_parsing_errors`")
+            output = AgentAction("_Exception", observation, text)
+            tool_run_kwargs = self.agent.tool_run_logging_kwargs()
+            observation = await ExceptionTool().arun(
+                output.tool_input,
+                verbose=self.verbose,
+                color=None,
+                callbacks=run_manager.get_child() if run_manager else None,
+                **tool_run_kwargs,
+            )
+            yield AgentStep(action=output, observation=observation)
+            return
+
+        # If the tool chosen is the finishing tool, then we end and return.
+        if isinstance(output, AgentFinish):
+            yield output
+            return
+
+        actions: List[AgentAction]
+        if isinstance(output, AgentAction):
+            actions = [output]
+        else:
+            actions = output
+        for agent_action in actions:
+            yield agent_action
+
+        for step in await self._aperform_agent_actions(
+            name_to_tool_map, color_mapping, actions, run_manager
+        ):
+            yield step
@@ -55,6 +55,7 @@ from langchain_chatchat.agents.platform_tools.schema import (
     PlatformToolsLLMStatus, PlatformToolsApprove,
 )
 from langchain_chatchat.callbacks.agent_callback_handler import (
+    AgentEvent,
     AgentExecutorAsyncIteratorCallbackHandler,
     AgentStatus,
 )
@@ -111,6 +112,63 @@ OutputType = Union[
 ]
 
 
+def _event_to_output(event: AgentEvent) -> Optional[OutputType]:
+    """Build the output object for an event from the callback handler."""
+    status = event.status
+    if status in (AgentStatus.llm_start, AgentStatus.llm_new_token, AgentStatus.llm_end):
+        return PlatformToolsLLMStatus(run_id=event.run_id, status=status, text=event.text)
+    elif status == AgentStatus.agent_action:
+        return PlatformToolsAction(
+            run_id=event.run_id,
+            status=status,
+            tool=event.tool,
+            tool_input=event.tool_input,
+            log=event.log,
+        )
+    elif status == AgentStatus.tool_start:
+        return PlatformToolsActionToolStart(
+            run_id=event.run_id,
+            status=status,
+            tool_input=event.tool_input,
+            tool=event.tool,
+        )
+    elif status == AgentStatus.tool_require_approval:
+        return PlatformToolsApprove(
+            run_id=event.run_id,
+            status=status,
+            tool_input=event.tool_input,
+            tool=event.tool,
+            log=event.log,
+        )
+    elif status == AgentStatus.tool_end:
+        return PlatformToolsActionToolEnd(
+            run_id=event.run_id,
+            status=status,
+            tool=event.tool,
+            tool_output=str(event.tool_output),
+        )
+    elif status == AgentStatus.agent_finish:
+        return PlatformToolsFinish(
+            run_id=event.run_id,
+            status=status,
+            return_values=event.return_values,
+            log=event.log,
+        )
+    elif status == AgentStatus.error:
+        return PlatformToolsLLMStatus(
+            run_id=event.run_id or "abc",
+            status=status,
+            text=json.dumps(event.to_dict(), ensure_ascii=False),
+        )
+    elif status == AgentStatus.chain_start:
+        return PlatformToolsLLMStatus(run_id=event.run_id, status=status, text="")
+    elif status == AgentStatus.chain_end:
+        return PlatformToolsLLMStatus(
+            run_id=event.run_id, status=status, text=event.outputs["output"]
+        )
+    return None
+
+
 class PlatformToolsRunnable(RunnableSerializable[Dict, OutputType]):
     agent_executor: AgentExecutor
     """Platform AgentExecutor."""
@@ -185,14 +243,16 @@ class PlatformToolsRunnable(RunnableSerializable[Dict, OutputType]):
                 Union[Dict[str, Any], Type[BaseModel], Callable, BaseTool]
             ] = None,
             mcp_connections: dict[str, StdioConnection | SSEConnection] = None,
+            mcp_tools: List[BaseTool] = None,
             callbacks: List[BaseCallbackHandler] = None,
+            token_window: float = 0.0,
             **kwargs: Any,
     ) -> "PlatformToolsRunnable":
         """Create an ZhipuAI Assistant and instantiate the Runnable."""
         if not isinstance(llm, ChatPlatformAI):
             raise ValueError
 
-        callback = AgentExecutorAsyncIteratorCallbackHandler()
+        callback = AgentExecutorAsyncIteratorCallbackHandler(token_window=token_window)
         final_callbacks = [callback] + llm.callbacks
         if callbacks:
             final_callbacks.extend(callbacks)
@@ -222,26 +282,29 @@ class PlatformToolsRunnable(RunnableSerializable[Dict, OutputType]):
             temp_tools.extend(assistants_builtin_tools)
 
 
-        import nest_asyncio
-        nest_asyncio.apply()
-        if sys.version_info < (3, 10):
-            loop = asyncio.get_event_loop()
-        else:
-            try:
-                loop = asyncio.get_running_loop()
-            except RuntimeError:
-                loop = asyncio.new_event_loop()
-
-            asyncio.set_event_loop(loop)
-        client = loop.run_until_complete(cls.create_mcp_client(mcp_connections))
-        # Get tools
-        mcp_tools = client.get_tools()
+        # Prefer tools from MCP sessions kept alive by the caller (mcp_tools),
+        # otherwise connect to mcp_connections for this agent
+        if mcp_tools is None and mcp_connections:
+            import nest_asyncio
+            nest_asyncio.apply()
+            if sys.version_info < (3, 10):
+                loop = asyncio.get_event_loop()
+            else:
+                try:
+                    loop = asyncio.get_running_loop()
+                except RuntimeError:
+                    loop = asyncio.new_event_loop()
+
+                asyncio.set_event_loop(loop)
+            client = loop.run_until_complete(cls.create_mcp_client(mcp_connections))
+            # Get tools
+            mcp_tools = client.get_tools()
         agent_executor = agents_registry(
             agent_type=agent_type,
             llm=llm,
             callbacks=final_callbacks,
             tools=temp_tools,
-            mcp_tools=mcp_tools,
+            mcp_tools=mcp_tools or [],
             llm_with_platform_tools=llm_with_all_tools,
             verbose=True,
             **kwargs,
@@ -281,90 +344,8 @@ class PlatformToolsRunnable(RunnableSerializable[Dict, OutputType]):
                 )
             )
 
-            async for chunk in self.callback.aiter():
-                data = json.loads(chunk)
-                class_status = None
-                if data["status"] == AgentStatus.llm_start:
-                    class_status = PlatformToolsLLMStatus(
-                        run_id=data["run_id"],
-                        status=data["status"],
-                        text=data["text"],
-                    )
-
-                elif data["status"] == AgentStatus.llm_new_token:
-                    class_status = PlatformToolsLLMStatus(
-                        run_id=data["run_id"],
-                        status=data["status"],
-                        text=data["text"],
-                    )
-                elif data["status"] == AgentStatus.llm_end:
-                    class_status = PlatformToolsLLMStatus(
-                        run_id=data["run_id"],
-                        status=data["status"],
-                        text=data["text"],
-                    )
-                elif data["status"] == AgentStatus.agent_action:
-                    class_status = PlatformToolsAction(
-                        run_id=data["run_id"], status=data["status"], **data["action"]
-                    )
-
-                elif data["status"] == AgentStatus.tool_start:
-                    class_status = PlatformToolsActionToolStart(
-                        run_id=data["run_id"],
-                        status=data["status"],
-                        tool_input=data["tool_input"],
-                        tool=data["tool"],
-                    )
-
-                elif data["status"] == AgentStatus.tool_require_approval:
-                    class_status = PlatformToolsApprove(
-                        run_id=data["run_id"],
-                        status=data["status"],
-                        tool_input=data["tool_input"],
-                        tool=data["tool"],
-                    )
-
-                elif data["status"] in [AgentStatus.tool_end]:
-                    class_status = PlatformToolsActionToolEnd(
-                        run_id=data["run_id"],
-                        status=data["status"],
-                        tool=data["tool"],
-                        tool_output=str(data["tool_output"]),
-                    )
-                elif data["status"] == AgentStatus.agent_finish:
-                    class_status = PlatformToolsFinish(
-                        run_id=data["run_id"],
-                        status=data["status"],
-                        **data["finish"],
-                    )
-
-                elif data["status"] == AgentStatus.agent_finish:
-                    class_status = PlatformToolsLLMStatus(
-                        run_id=data["run_id"],
-                        status=data["status"],
-                        text=data["outputs"]["output"],
-                    )
-
-                elif data["status"] == AgentStatus.error:
-                    class_status = PlatformToolsLLMStatus(
-                        run_id=data.get("run_id", "abc"),
-                        status=data["status"],
-                        text=json.dumps(data, ensure_ascii=False),
-                    )
-                elif data["status"] == AgentStatus.chain_start:
-                    class_status = PlatformToolsLLMStatus(
-                        run_id=data["run_id"],
-                        status=data["status"],
-                        text="",
-                    )
-                elif data["status"] == AgentStatus.chain_end:
-                    class_status = PlatformToolsLLMStatus(
-                        run_id=data["run_id"],
-                        status=data["status"],
-                        text=data["outputs"]["output"],
-                    )
-
-                yield class_status
+            async for event in self.callback.aiter():
+                yield _event_to_output(event)
 
             await task
 
@@ -8,9 +8,11 @@
     BaseCallbackHandler --> <name>CallbackHandler  # Example: AimCallbackHandler
 """
 from langchain_chatchat.callbacks.agent_callback_handler import (
+    AgentEvent,
     AgentExecutorAsyncIteratorCallbackHandler,
 )
 
 __all__ = [
+    "AgentEvent",
     "AgentExecutorAsyncIteratorCallbackHandler",
 ]
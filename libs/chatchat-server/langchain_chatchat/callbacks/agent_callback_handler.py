@@ -3,11 +3,10 @@ from __future__ import annotations
 from typing import Generic, Iterable, TypeVar
 
 import asyncio
-import json
-from typing import List, Tuple, Any, Awaitable, Callable, Dict, Optional
+from dataclasses import asdict, dataclass
+from typing import List, Tuple, Any, AsyncIterator, Awaitable, Callable, Dict, Optional
 from uuid import UUID
 from enum import Enum
-from langchain_core.load import dumpd, dumps, load, loads
 
 from langchain.callbacks import AsyncIteratorCallbackHandler
 from langchain.schema import AgentAction, AgentFinish
@@ -43,6 +42,35 @@ class AgentStatus:
     chain_end: int = -999
 
 
+@dataclass
+class AgentEvent:
+    """An agent event passed in-process from the callback handler to its consumer.
+
+    Events are queued as objects, so nothing is serialized until the HTTP layer
+    encodes the final frame. Only the fields relevant to ``status`` are set.
+    """
+
+    status: int  # AgentStatus
+    run_id: str = ""
+    text: str = ""
+    tool: str = ""
+    tool_input: Any = None
+    tool_output: Any = None
+    log: str = ""
+    return_values: Optional[Dict[str, Any]] = None
+    inputs: Optional[Dict[str, Any]] = None
+    outputs: Optional[Dict[str, Any]] = None
+    error: str = ""
+    is_error: bool = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The fields that are set, in the shape of the former JSON payload."""
+        return {
+            k: v for k, v in asdict(self).items()
+            if k == "status" or v not in (None, "", False)
+        }
+
+
 class AgentExecutorAsyncIteratorCallbackHandler(AsyncIteratorCallbackHandler):
     approval_method: ApprovalMethod | None = None
     backend: AgentBackend | None = None
@@ -60,40 +88,45 @@ class AgentExecutorAsyncIteratorCallbackHandler(AsyncIteratorCallbackHandler):
         self.outputs: Dict[str, Any] = {}
         self.approval_method = kwargs.get("approval_method", ApprovalMethod.CLI)
         self.backend = kwargs.get("backend", None)
+        # Tokens of the same run arriving within this many seconds are merged
+        # into one event; 0 only merges tokens that are already queued.
+        self.token_window: float = kwargs.get("token_window", 0.0)
+        self._pending: Optional[AgentEvent] = None
 
     async def on_llm_start(
             self, serialized: Dict[str, Any], prompts: List[str], **kwargs: Any
     ) -> None:
-        data = {
-            "status": AgentStatus.llm_start,
-            "text": "",
-        }
+        event = AgentEvent(
+            status=AgentStatus.llm_start,
+            run_id=str(kwargs.get("run_id", "")),
+        )
         self.out = False
         self.done.clear()
-        self.queue.put_nowait(dumps(data, pretty=True))
+        self.queue.put_nowait(event)
 
     async def on_llm_new_token(self, token: str, **kwargs: Any) -> None:
         special_tokens = ["\nAction:", "\nObservation:", "<|observation|>"]
         for stoken in special_tokens:
             if stoken in token:
                 before_action = token.split(stoken)[0]
-                data = {
-                    "status": AgentStatus.llm_new_token,
-                    "text": before_action + "\n",
-                }
+                event = AgentEvent(
+                    status=AgentStatus.llm_new_token,
+                    run_id=str(kwargs.get("run_id", "")),
+                    text=before_action + "\n",
+                )
                 self.done.clear()
-                self.queue.put_nowait(dumps(data, pretty=True))
+                self.queue.put_nowait(event)
 
                 break
 
         if token is not None and token != "":
-            data = {
-                "run_id": str(kwargs["run_id"]),
-                "status": AgentStatus.llm_new_token,
-                "text": token,
-            }
+            event = AgentEvent(
+                status=AgentStatus.llm_new_token,
+                run_id=str(kwargs["run_id"]),
+                text=token,
+            )
             self.done.clear()
-            self.queue.put_nowait(dumps(data, pretty=True))
+            self.queue.put_nowait(event)
 
     async def on_chat_model_start(
             self,
@@ -106,31 +139,27 @@ class AgentExecutorAsyncIteratorCallbackHandler(AsyncIteratorCallbackHandler):
             metadata: Optional[Dict[str, Any]] = None,
             **kwargs: Any,
     ) -> None:
-        data = {
-            "run_id": str(run_id),
-            "status": AgentStatus.llm_start,
-            "text": "",
-        }
+        event = AgentEvent(status=AgentStatus.llm_start, run_id=str(run_id))
         self.done.clear()
-        self.queue.put_nowait(dumps(data, pretty=True))
+        self.queue.put_nowait(event)
 
     async def on_llm_end(self, response: LLMResult, **kwargs: Any) -> None:
-        data = {
-            "run_id": str(kwargs["run_id"]),
-            "status": AgentStatus.llm_end,
-            "text": response.generations[0][0].message.content,
-        }
-
-        self.queue.put_nowait(dumps(data, pretty=True))
+        event = AgentEvent(
+            status=AgentStatus.llm_end,
+            run_id=str(kwargs["run_id"]),
+            text=response.generations[0][0].message.content,
+        )
+        self.queue.put_nowait(event)
 
     async def on_llm_error(
             self, error: Exception | KeyboardInterrupt, **kwargs: Any
     ) -> None:
-        data = {
-            "status": AgentStatus.error,
-            "text": str(error),
-        }
-        self.queue.put_nowait(dumps(data, pretty=True))
+        event = AgentEvent(
+            status=AgentStatus.error,
+            run_id=str(kwargs.get("run_id", "")),
+            text=str(error),
+        )
+        self.queue.put_nowait(event)
 
     async def on_tool_start(
             self,
@@ -143,17 +172,17 @@ class AgentExecutorAsyncIteratorCallbackHandler(AsyncIteratorCallbackHandler):
             metadata: Optional[Dict[str, Any]] = None,
             **kwargs: Any,
     ) -> None:
-        data = {
-            "run_id": str(run_id),
-            "status": AgentStatus.tool_start,
-            "tool": serialized["name"],
-            "tool_input": input_str,
-        }
+        event = AgentEvent(
+            status=AgentStatus.tool_start,
+            run_id=str(run_id),
+            tool=serialized["name"],
+            tool_input=input_str,
+        )
 
         if self.approval_method is ApprovalMethod.CLI:
 
             # self.done.clear()
-            # self.queue.put_nowait(dumps(data, pretty=True))
+            # self.queue.put_nowait(event)
             # if not await _adefault_approve(input_str):
             #     raise HumanRejectedException(
             #         f"Inputs {input_str} to tool {serialized} were rejected."
@@ -165,7 +194,7 @@ class AgentExecutorAsyncIteratorCallbackHandler(AsyncIteratorCallbackHandler):
             raise ValueError("Approval method not recognized.")
 
         self.done.clear()
-        self.queue.put_nowait(dumps(data, pretty=True))
+        self.queue.put_nowait(event)
 
     async def on_tool_end(
             self,
@@ -177,13 +206,13 @@ class AgentExecutorAsyncIteratorCallbackHandler(AsyncIteratorCallbackHandler):
             **kwargs: Any,
     ) -> None:
         """Run when tool ends running."""
-        data = {
-            "run_id": str(run_id),
-            "status": AgentStatus.tool_end,
-            "tool": kwargs["name"],
-            "tool_output": str(output),
-        }
-        self.queue.put_nowait(dumps(data, pretty=True))
+        event = AgentEvent(
+            status=AgentStatus.tool_end,
+            run_id=str(run_id),
+            tool=kwargs["name"],
+            tool_output=str(output),
+        )
+        self.queue.put_nowait(event)
 
     async def on_tool_error(
             self,
@@ -195,14 +224,13 @@ class AgentExecutorAsyncIteratorCallbackHandler(AsyncIteratorCallbackHandler):
             **kwargs: Any,
     ) -> None:
         """Run when tool errors."""
-        data = {
-            "run_id": str(run_id),
-            "status": AgentStatus.error,
-            "tool_output": str(error),
-            "is_error": True,
-        }
-
-        self.queue.put_nowait(dumps(data, pretty=True))
+        event = AgentEvent(
+            status=AgentStatus.error,
+            run_id=str(run_id),
+            tool_output=str(error),
+            is_error=True,
+        )
+        self.queue.put_nowait(event)
 
     async def on_agent_action(
             self,
@@ -213,16 +241,14 @@ class AgentExecutorAsyncIteratorCallbackHandler(AsyncIteratorCallbackHandler):
             tags: Optional[List[str]] = None,
             **kwargs: Any,
     ) -> None:
-        data = {
-            "run_id": str(run_id),
-            "status": AgentStatus.agent_action,
-            "action": {
-                "tool": action.tool,
-                "tool_input": action.tool_input,
-                "log": action.log,
-            },
-        }
-        self.queue.put_nowait(dumps(data, pretty=True))
+        event = AgentEvent(
+            status=AgentStatus.agent_action,
+            run_id=str(run_id),
+            tool=action.tool,
+            tool_input=action.tool_input,
+            log=action.log,
+        )
+        self.queue.put_nowait(event)
 
     async def on_agent_finish(
             self,
@@ -241,16 +267,13 @@ class AgentExecutorAsyncIteratorCallbackHandler(AsyncIteratorCallbackHandler):
 
         finish.return_values["output"] = str(finish.return_values["output"])
 
-        data = {
-            "run_id": str(run_id),
-            "status": AgentStatus.agent_finish,
-            "finish": {
-                "return_values": finish.return_values,
-                "log": finish.log,
-            },
-        }
-
-        self.queue.put_nowait(dumps(data, pretty=True))
+        event = AgentEvent(
+            status=AgentStatus.agent_finish,
+            run_id=str(run_id),
+            return_values=finish.return_values,
+            log=finish.log,
+        )
+        self.queue.put_nowait(event)
 
     async def on_chain_start(
             self,
@@ -271,18 +294,14 @@ class AgentExecutorAsyncIteratorCallbackHandler(AsyncIteratorCallbackHandler):
                 History.from_message(message).to_msg_tuple()
                 for message in inputs["chat_history"]
             ]
-        data = {
-            "run_id": str(run_id),
-            "status": AgentStatus.chain_start,
-            "inputs": inputs,
-            "parent_run_id": parent_run_id,
-            "tags": tags,
-            "metadata": metadata,
-        }
-
+        event = AgentEvent(
+            status=AgentStatus.chain_start,
+            run_id=str(run_id),
+            inputs=inputs,
+        )
         self.done.clear()
         self.out = False
-        self.queue.put_nowait(dumps(data, pretty=True))
+        self.queue.put_nowait(event)
 
     async def on_chain_error(
             self,
@@ -294,12 +313,12 @@ class AgentExecutorAsyncIteratorCallbackHandler(AsyncIteratorCallbackHandler):
             **kwargs: Any,
     ) -> None:
         """Run when chain errors."""
-        data = {
-            "run_id": str(run_id),
-            "status": AgentStatus.error,
-            "error": str(error),
-        }
-        self.queue.put_nowait(dumps(data, pretty=True))
+        event = AgentEvent(
+            status=AgentStatus.error,
+            run_id=str(run_id),
+            error=str(error),
+        )
+        self.queue.put_nowait(event)
 
     async def on_chain_end(
             self,
@@ -318,14 +337,76 @@ class AgentExecutorAsyncIteratorCallbackHandler(AsyncIteratorCallbackHandler):
 
         outputs["output"] = str(outputs["output"])
 
-        data = {
-            "run_id": str(run_id),
-            "status": AgentStatus.chain_end,
-            "outputs": outputs,
-            "parent_run_id": parent_run_id,
-            "tags": tags,
-        }
-        self.queue.put_nowait(dumps(data, pretty=True))
+        event = AgentEvent(
+            status=AgentStatus.chain_end,
+            run_id=str(run_id),
+            outputs=outputs,
+        )
+        self.queue.put_nowait(event)
         self.out = True
         # self.done.set()
 
+    async def aiter(self) -> AsyncIterator[AgentEvent]:  # type: ignore[override]
+        """Yield queued events until the agent is done.
+
+        Consecutive tokens of one LLM run are merged into a single event, so a
+        burst of tokens becomes one frame for the consumer instead of many.
+        """
+        while True:
+            if self._pending is not None:
+                event, self._pending = self._pending, None
+            elif not self.queue.empty():
+                event = self.queue.get_nowait()
+            elif self.done.is_set():
+                break
+            else:
+                event = await self._wait_event()
+                if event is None:
+                    continue
+            if event.status == AgentStatus.llm_new_token:
+                event = await self._coalesce_tokens(event)
+            yield event
+
+    async def _wait_event(self, timeout: Optional[float] = None) -> Optional[AgentEvent]:
+        """Wait for the next event; None if done is set or the timeout expires first."""
+        getter = asyncio.ensure_future(self.queue.get())
+        waiter = asyncio.ensure_future(self.done.wait())
+        try:
+            await asyncio.wait(
+                [getter, waiter], timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+            )
+        except asyncio.CancelledError:
+            getter.cancel()
+            raise
+        finally:
+            waiter.cancel()
+        if getter.done():
+            return getter.result()
+        # a cancelled queue.get leaves the item in the queue
+        getter.cancel()
+        return None
+
+    async def _coalesce_tokens(self, event: AgentEvent) -> AgentEvent:
+        texts = [event.text]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.token_window
+        while True:
+            if not self.queue.empty():
+                nxt = self.queue.get_nowait()
+            else:
+                remaining = deadline - loop.time()
+                if remaining <= 0 or self.done.is_set():
+                    break
+                nxt = await self._wait_event(remaining)
+                if nxt is None:
+                    break
+            if nxt.status == AgentStatus.llm_new_token and nxt.run_id == event.run_id:
+                texts.append(nxt.text)
+            else:
+                # keep it for the next iteration so ordering is preserved
+                self._pending = nxt
+                break
+        if len(texts) > 1:
+            event.text = "".join(texts)
+        return event
+
@@ -57,6 +57,7 @@ from langchain_core.messages import (
     ToolMessage,
     ToolMessageChunk,
 )
+from langchain_core.messages.tool import ToolCallChunk
 from langchain_core.outputs import (
     ChatGeneration,
     ChatGenerationChunk,
@@ -75,6 +76,7 @@ from langchain_core.utils.function_calling import (
     convert_to_openai_function,
     convert_to_openai_tool,
 )
+from langchain_core.utils._merge import merge_dicts, merge_lists
 from langchain_core.utils.json import parse_partial_json
 from langchain_core.utils.utils import build_extra_kwargs
 from openai import BaseModel
@@ -347,6 +349,7 @@ class ChatPlatformAI(BaseChatModel):
         return True
 
     client: Any = Field(default=None, exclude=True)  #: :meta private:
+    async_client: Any = Field(default=None, exclude=True)  #: :meta private:
     model_name: str = Field(default="glm-4", alias="model")
     """Model name to use."""
     temperature: float = 0.7
@@ -373,6 +376,8 @@ class ChatPlatformAI(BaseChatModel):
     """Maximum number of tokens to generate."""
     http_client: Union[Any, None] = None
     """Optional httpx.Client."""
+    http_async_client: Union[Any, None] = None
+    """Optional httpx.AsyncClient. Only used for async invocations."""
 
     if PYDANTIC_V2:
         model_config: ClassVar[ConfigDict] = ConfigDict(populate_by_name=True)
@@ -423,6 +428,9 @@ class ChatPlatformAI(BaseChatModel):
 
         if not values.get("client"):
             values["client"] = openai.OpenAI(**client_params).chat.completions
+        if not values.get("async_client"):
+            async_params = {**client_params, "http_client": values["http_async_client"]}
+            values["async_client"] = openai.AsyncOpenAI(**async_params).chat.completions
 
         return values
 
@@ -497,6 +505,7 @@ class ChatPlatformAI(BaseChatModel):
                 batch_size=1,
             )
             generation: Optional[ChatGenerationChunk] = None
+            accumulator = _ChunkAccumulator()
             try:
                 for chunk in self._stream(messages, stop=stop, **kwargs):
                     if chunk.message.id is None:
@@ -527,12 +536,11 @@ class ChatPlatformAI(BaseChatModel):
                             cast(str, chunk.message.content), chunk=chunk
                         )
                     yield chunk.message
-                    if generation is None:
-                        generation = chunk
-                    else:
-                        generation += chunk
+                    accumulator.add(chunk)
+                generation = accumulator.result()
                 assert generation is not None
             except BaseException as e:
+                generation = accumulator.result()
                 run_manager.on_llm_error(
                     e,
                     response=LLMResult(
@@ -586,6 +594,7 @@ class ChatPlatformAI(BaseChatModel):
         )
 
         generation: Optional[ChatGenerationChunk] = None
+        accumulator = _ChunkAccumulator()
         try:
             async for chunk in self._astream(
                     messages,
@@ -626,12 +635,11 @@ class ChatPlatformAI(BaseChatModel):
                         cast(str, chunk.message.content), chunk=chunk
                     )
                 yield chunk.message
-                if generation is None:
-                    generation = chunk
-                else:
-                    generation += chunk
+                accumulator.add(chunk)
+            generation = accumulator.result()
             assert generation is not None
         except BaseException as e:
+            generation = accumulator.result()
             await run_manager.on_llm_error(
                 e,
                 response=LLMResult(generations=[[generation]] if generation else []),
@@ -655,29 +663,37 @@ class ChatPlatformAI(BaseChatModel):
         # platform_tools chunk load action exec parse tool
         default_chunk_class = PlatformToolsMessageChunk
         for chunk in self.client.create(messages=message_dicts, **params):
-            if not isinstance(chunk, dict):
-                chunk = chunk.dict()
-            if len(chunk["choices"]) == 0:
+            chunk = _convert_chunk_to_generation_chunk(chunk, default_chunk_class)
+            if chunk is None:
                 continue
-            choice = chunk["choices"][0]
-
-            chunk = _convert_delta_to_message_chunk(
-                choice["delta"], default_chunk_class
-            )
-            generation_info = {}
-            if finish_reason := choice.get("finish_reason"):
-                generation_info["finish_reason"] = finish_reason
-            logprobs = choice.get("logprobs")
-            if logprobs:
-                generation_info["logprobs"] = logprobs
-            default_chunk_class = chunk.__class__
-            chunk = ChatGenerationChunk(
-                message=chunk, generation_info=generation_info or None
-            )
+            default_chunk_class = chunk.message.__class__
             if run_manager:
+                logprobs = (chunk.generation_info or {}).get("logprobs")
                 run_manager.on_llm_new_token(chunk.text, chunk=chunk, logprobs=logprobs)
             yield chunk
 
+    async def _astream(
+            self,
+            messages: List[BaseMessage],
+            stop: Optional[List[str]] = None,
+            run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+            **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        message_dicts, params = self._create_message_dicts(messages, stop)
+        params = {**params, **kwargs, "stream": True}
+
+        default_chunk_class = PlatformToolsMessageChunk
+        response = await self.async_client.create(messages=message_dicts, **params)
+        async for chunk in response:
+            chunk = _convert_chunk_to_generation_chunk(chunk, default_chunk_class)
+            if chunk is None:
+                continue
+            default_chunk_class = chunk.message.__class__
+            if run_manager:
+                logprobs = (chunk.generation_info or {}).get("logprobs")
+                await run_manager.on_llm_new_token(chunk.text, chunk=chunk, logprobs=logprobs)
+            yield chunk
+
     def _generate(
             self,
             messages: List[BaseMessage],
@@ -701,6 +717,29 @@ class ChatPlatformAI(BaseChatModel):
         response = self.client.create(messages=message_dicts, **params)
         return self._create_chat_result(response)
 
+    async def _agenerate(
+            self,
+            messages: List[BaseMessage],
+            stop: Optional[List[str]] = None,
+            run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+            stream: Optional[bool] = None,
+            **kwargs: Any,
+    ) -> ChatResult:
+        should_stream = stream if stream is not None else self.streaming
+        if should_stream:
+            stream_iter = self._astream(
+                messages, stop=stop, run_manager=run_manager, **kwargs
+            )
+            return await agenerate_from_stream(stream_iter)
+        message_dicts, params = self._create_message_dicts(messages, stop)
+        params = {
+            **params,
+            **({"stream": stream} if stream is not None else {}),
+            **kwargs,
+        }
+        response = await self.async_client.create(messages=message_dicts, **params)
+        return self._create_chat_result(response)
+
     def _create_message_dicts(
             self, messages: List[BaseMessage], stop: Optional[List[str]]
     ) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
@@ -864,3 +903,109 @@ def _gen_info_and_msg_metadata(
         **(generation.generation_info or {}),
         **generation.message.response_metadata,
     }
+
+
+def _convert_chunk_to_generation_chunk(
+        chunk: Union[dict, BaseModel], default_chunk_class: Type[BaseMessageChunk]
+) -> Optional[ChatGenerationChunk]:
+    if not isinstance(chunk, dict):
+        chunk = chunk.dict()
+    if len(chunk["choices"]) == 0:
+        return None
+    choice = chunk["choices"][0]
+
+    message_chunk = _convert_delta_to_message_chunk(
+        choice["delta"], default_chunk_class
+    )
+    generation_info = {}
+    if finish_reason := choice.get("finish_reason"):
+        generation_info["finish_reason"] = finish_reason
+    logprobs = choice.get("logprobs")
+    if logprobs:
+        generation_info["logprobs"] = logprobs
+    return ChatGenerationChunk(
+        message=message_chunk, generation_info=generation_info or None
+    )
+
+
+class _ChunkAccumulator:
+    """Accumulate streamed chunks into one generation in O(1) per chunk.
+
+    ``generation += chunk`` builds a new message on every chunk, copying the text
+    received so far and re-parsing the tool calls, which is quadratic in the output
+    length. For PlatformToolsMessageChunk the text is collected in a list and the
+    other fields are merged as plain dicts; the message is built once in ``result``.
+    Other chunk types fall back to ``+=``.
+    """
+
+    def __init__(self) -> None:
+        self._first: Optional[ChatGenerationChunk] = None
+        self._fallback: Optional[ChatGenerationChunk] = None
+        self._texts: List[str] = []
+        self._additional_kwargs: Dict[str, Any] = {}
+        self._response_metadata: Dict[str, Any] = {}
+        self._tool_call_chunks: List[Dict[str, Any]] = []
+        self._generation_info: Dict[str, Any] = {}
+
+    def add(self, chunk: ChatGenerationChunk) -> None:
+        if self._fallback is not None:
+            self._fallback += chunk
+            return
+        message = chunk.message
+        if (
+                not isinstance(message, PlatformToolsMessageChunk)
+                or not isinstance(message.content, str)
+                or (
+                    self._first is not None
+                    and message.example != self._first.message.example
+                )
+        ):
+            previous = self.result()
+            self._fallback = chunk if previous is None else previous + chunk
+            return
+
+        if self._first is None:
+            self._first = chunk
+        self._texts.append(message.content)
+        if message.additional_kwargs:
+            self._additional_kwargs = merge_dicts(
+                self._additional_kwargs, message.additional_kwargs
+            )
+        if message.response_metadata:
+            self._response_metadata = merge_dicts(
+                self._response_metadata, message.response_metadata
+            )
+        if message.tool_call_chunks:
+            self._tool_call_chunks = merge_lists(
+                self._tool_call_chunks, [dict(tc) for tc in message.tool_call_chunks]
+            ) or []
+        if chunk.generation_info:
+            self._generation_info = merge_dicts(
+                self._generation_info, chunk.generation_info
+            )
+
+    def result(self) -> Optional[ChatGenerationChunk]:
+        if self._fallback is not None:
+            return self._fallback
+        if self._first is None:
+            return None
+        first = self._first.message
+        message = PlatformToolsMessageChunk(
+            example=first.example,
+            content="".join(self._texts),
+            additional_kwargs=self._additional_kwargs,
+            tool_call_chunks=[
+                ToolCallChunk(
+                    name=rtc.get("name"),
+                    args=rtc.get("args"),
+                    index=rtc.get("index"),
+                    id=rtc.get("id"),
+                )
+                for rtc in self._tool_call_chunks
+            ],
+            response_metadata=self._response_metadata,
+            id=first.id,
+        )
+        return ChatGenerationChunk(
+            message=message, generation_info=self._generation_info or None
+        )
@@ -0,0 +1,112 @@
+"""
+对比 Agent 对话流式输出 token 的开销：原先每个 token 在回调中用 langchain dumps 序列化，
+PlatformToolsRunnable 中 json.loads 后构建 PlatformToolsLLMStatus，chat() 中再构建 OpenAIChatOutput 并序列化；
+现在回调直接传递 AgentEvent，合并积压的 token，只在发送时序列化一次。
+
+用法：python tests/benchmarks/bench_agent_event_stream.py --tokens 20000 --burst 4
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+
+from langchain.callbacks import AsyncIteratorCallbackHandler
+from langchain_core.load import dumps
+
+from chatchat.server.api_server.api_schemas import OpenAIChatOutput
+from chatchat.server.utils import dump_json
+from langchain_chatchat.agents.platform_tools.base import _event_to_output
+from langchain_chatchat.agents.platform_tools.schema import PlatformToolsLLMStatus
+from langchain_chatchat.callbacks.agent_callback_handler import (
+    AgentExecutorAsyncIteratorCallbackHandler,
+    AgentStatus,
+)
+
+
+class LegacyHandler(AsyncIteratorCallbackHandler):
+    """原先的实现：每个 token 序列化为 JSON 字符串放入队列"""
+
+    async def on_llm_new_token(self, token: str, **kwargs) -> None:
+        data = {
+            "run_id": str(kwargs["run_id"]),
+            "status": AgentStatus.llm_new_token,
+            "text": token,
+        }
+        self.done.clear()
+        self.queue.put_nowait(dumps(data, pretty=True))
+
+
+def legacy_frame(chunk: str) -> str:
+    data = json.loads(chunk)
+    item = PlatformToolsLLMStatus(run_id=data["run_id"], status=data["status"], text=data["text"])
+    return OpenAIChatOutput(
+        id=f"chat{uuid.uuid4()}",
+        object="chat.completion.chunk",
+        content=item.text,
+        role="assistant",
+        tool_calls=[],
+        model="glm-4",
+        status=item.status,
+        message_type=item.message_type,
+        message_id="msg",
+        class_name=item.class_name(),
+    ).model_dump_json()
+
+
+def event_frame(event) -> str:
+    item = _event_to_output(event)
+    return dump_json({
+        "id": f"chat{uuid.uuid4()}",
+        "object": "chat.completion.chunk",
+        "model": "glm-4",
+        "created": int(time.time()),
+        "status": item.status,
+        "message_type": item.message_type,
+        "message_id": "msg",
+        "is_ref": False,
+        "class_name": item.class_name(),
+        "choices": [{"delta": {"content": item.text, "tool_calls": []}, "role": "assistant"}],
+    })
+
+
+async def run(name: str, handler, to_frame, tokens: int, burst: int):
+    run_id = uuid.uuid4()
+
+    async def produce():
+        for i in range(tokens):
+            await handler.on_llm_new_token(f"t{i} ", run_id=run_id)
+            if i % burst == burst - 1:
+                await asyncio.sleep(0)
+        handler.done.set()
+
+    start, cpu_start = time.perf_counter(), time.process_time()
+    task = asyncio.create_task(produce())
+    frames = 0
+    text = []
+    async for item in handler.aiter():
+        frame = to_frame(item)
+        text.append(json.loads(frame)["choices"][0]["delta"]["content"])
+        frames += 1
+    await task
+    elapsed, cpu = time.perf_counter() - start, time.process_time() - cpu_start
+    assert "".join(text) == "".join(f"t{i} " for i in range(tokens))
+    print(f"{name:<10} {tokens / elapsed:12.0f} {cpu / tokens * 1e6:14.2f} {frames:8d}")
+    return cpu / tokens
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tokens", type=int, default=20000)
+    parser.add_argument("--burst", type=int, default=4, help="模型每次返回的 token 数")
+    args = parser.parse_args()
+
+    print(f"tokens: {args.tokens}, burst: {args.burst}")
+    print(f"{'':<10} {'tokens/s':>12} {'cpu/token (us)':>14} {'frames':>8}")
+    legacy = await run("legacy", LegacyHandler(), legacy_frame, args.tokens, args.burst)
+    event = await run("event", AgentExecutorAsyncIteratorCallbackHandler(), event_frame, args.tokens, args.burst)
+    print(f"cpu per token: {legacy / event:.1f}x less")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,125 @@
+"""
+ChatPlatformAI 并发流式输出的压力测试：在本地启动一个模拟的 OpenAI 流式接口，
+同时发起大量 astream 对话，对比原生异步实现与原先在线程池中运行同步流（_stream）的耗时和线程数。
+
+用法：python tests/benchmarks/bench_chat_platform_stream.py --conversations 2000 --tokens 100
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import threading
+import time
+
+import httpx
+import openai
+from langchain_core.language_models.chat_models import BaseChatModel
+
+from langchain_chatchat import ChatPlatformAI
+
+
+async def serve_chunks(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, tokens: int, interval: float):
+    """模拟 /v1/chat/completions 的流式响应，每 interval 秒输出一个 token"""
+    try:
+        headers = await reader.readuntil(b"\r\n\r\n")
+        length = 0
+        for line in headers.decode().split("\r\n"):
+            if line.lower().startswith("content-length:"):
+                length = int(line.split(":", 1)[1])
+        await reader.readexactly(length)
+        writer.write(
+            b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nConnection: close\r\n\r\n"
+        )
+        for i in range(tokens + 1):
+            choice = {"index": 0, "delta": {"role": "assistant", "content": f"t{i} "}, "finish_reason": None}
+            if i == tokens:
+                choice.update(delta={}, finish_reason="stop")
+            data = {"id": "chatcmpl-bench", "object": "chat.completion.chunk", "created": 0,
+                    "model": "mock", "choices": [choice]}
+            writer.write(f"data: {json.dumps(data)}\n\n".encode())
+            await writer.drain()
+            await asyncio.sleep(interval)
+        writer.write(b"data: [DONE]\n\n")
+        await writer.drain()
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+class ThreadedChatPlatformAI(ChatPlatformAI):
+    """原先的行为：没有 _astream，astream 在线程池中运行同步的 _stream"""
+
+    _astream = BaseChatModel._astream
+
+
+async def run(name: str, llm: ChatPlatformAI, conversations: int, tokens: int):
+    peak_threads = threading.active_count()
+    latencies = []
+
+    async def conversation():
+        start = time.perf_counter()
+        count = 0
+        async for _ in llm.astream("hello"):
+            count += 1
+        latencies.append(time.perf_counter() - start)
+        return count
+
+    async def sample_threads():
+        nonlocal peak_threads
+        while True:
+            peak_threads = max(peak_threads, threading.active_count())
+            await asyncio.sleep(0.05)
+
+    sampler = asyncio.ensure_future(sample_threads())
+    start = time.perf_counter()
+    results = await asyncio.gather(*[conversation() for _ in range(conversations)], return_exceptions=True)
+    elapsed = time.perf_counter() - start
+    sampler.cancel()
+
+    errors = [r for r in results if isinstance(r, BaseException)]
+    latencies.sort()
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] if latencies else 0
+    print(
+        f"{name:<10} {elapsed:9.2f} {conversations / elapsed:9.1f} {statistics.mean(latencies or [0]):9.2f}"
+        f" {p95:9.2f} {peak_threads:8d} {len(errors):7d}"
+    )
+    if errors:
+        print(f"  first error: {errors[0]!r}")
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--conversations", type=int, default=2000)
+    parser.add_argument("--tokens", type=int, default=100)
+    parser.add_argument("--interval", type=float, default=0.01, help="模拟服务器输出每个 token 的间隔（秒）")
+    parser.add_argument("--skip-threaded", action="store_true")
+    args = parser.parse_args()
+
+    server = await asyncio.start_server(
+        lambda r, w: serve_chunks(r, w, args.tokens, args.interval), "127.0.0.1", 0, backlog=4096
+    )
+    port = server.sockets[0].getsockname()[1]
+    base_url = f"http://127.0.0.1:{port}/v1"
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    timeout = httpx.Timeout(600)
+    params = dict(model="mock", api_key="EMPTY", api_base=base_url, streaming=True)
+
+    print(f"conversations: {args.conversations}, tokens: {args.tokens}, interval: {args.interval}s")
+    print(f"{'':<10} {'total (s)':>9} {'conv/s':>9} {'avg (s)':>9} {'p95 (s)':>9} {'threads':>8} {'errors':>7}")
+    async_client = openai.AsyncOpenAI(
+        base_url=base_url, api_key="EMPTY", http_client=httpx.AsyncClient(limits=limits, timeout=timeout)
+    )
+    await run("async", ChatPlatformAI(async_client=async_client.chat.completions, **params),
+              args.conversations, args.tokens)
+    if not args.skip_threaded:
+        client = openai.OpenAI(
+            base_url=base_url, api_key="EMPTY", http_client=httpx.Client(limits=limits, timeout=timeout)
+        )
+        await run("threaded", ThreadedChatPlatformAI(client=client.chat.completions, **params),
+                  args.conversations, args.tokens)
+    server.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
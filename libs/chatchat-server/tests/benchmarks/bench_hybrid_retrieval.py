@@ -0,0 +1,154 @@
+"""
+对比仅向量检索与混合检索（向量 + BM25）的延迟与 recall@k。
+
+使用合成语料，不依赖嵌入模型或向量库服务：
+每个文档属于一个主题，并带有一个唯一的编号（如产品型号）。模拟的向量检索能区分主题，但难以区分同一主题下
+只有编号不同的文档。查询分为两类：
+- keyword：目标文档中的几个主题词加上它的编号，只有目标文档相关
+- semantic：目标文档中几个主题词的同义词，同一主题的文档都相关，关键词检索无法匹配
+
+用法：python tests/benchmarks/bench_hybrid_retrieval.py --docs 5000 --queries 200
+"""
+import argparse
+import hashlib
+import math
+import random
+import statistics
+import time
+from typing import Dict, List, Tuple
+
+from langchain.docstore.document import Document
+
+from chatchat.server.file_rag.retrievers.bm25 import BM25Index
+from chatchat.server.file_rag.retrievers.hybrid import HybridRetrieverService
+
+
+DIM = 64
+
+
+def token_vector(token: str) -> List[float]:
+    if token.startswith("s") and not token.startswith("sku"):
+        token = "t" + token[1:]  # 同义词与原词的向量相同
+    digest = hashlib.md5(token.encode()).digest()
+    return [(digest[i % len(digest)] / 255.0 - 0.5) * (1 if i % 3 else -1) for i in range(DIM)]
+
+
+def embed(tokens: List[str], rare_weight: float = 0.05) -> List[float]:
+    """主题词决定向量的方向，编号等罕见词只有很小的权重"""
+    vec = [0.0] * DIM
+    for token in tokens:
+        weight = rare_weight if token.startswith("sku") else 1.0
+        for i, v in enumerate(token_vector(token)):
+            vec[i] += weight * v
+    norm = math.sqrt(sum(v * v for v in vec)) or 1.0
+    return [v / norm for v in vec]
+
+
+def build_corpus(n_docs: int, n_topics: int, seed: int):
+    rng = random.Random(seed)
+    topics = [[f"t{t}w{i}" for i in range(20)] for t in range(n_topics)]
+    common = [f"c{i}" for i in range(200)]
+    docs: Dict[str, Document] = {}
+    doc_tokens: Dict[str, List[str]] = {}
+    for n in range(n_docs):
+        topic = n % n_topics
+        tokens = rng.choices(topics[topic], k=30) + rng.choices(common, k=5) + [f"sku{n:06d}"]
+        rng.shuffle(tokens)
+        doc_id = str(n)
+        doc_tokens[doc_id] = tokens
+        docs[doc_id] = Document(
+            page_content=" ".join(tokens),
+            metadata={"source": f"doc{n}.txt", "topic": topic},
+        )
+    return docs, doc_tokens
+
+
+def build_queries(
+    docs: Dict[str, Document], doc_tokens: Dict[str, List[str]], n_queries: int, seed: int
+) -> List[Tuple[str, str, set]]:
+    """返回 [(类型, 查询, 相关文档 id 集合), ...]"""
+    rng = random.Random(seed + 1)
+    by_topic: Dict[int, set] = {}
+    for doc_id, doc in docs.items():
+        by_topic.setdefault(doc.metadata["topic"], set()).add(doc_id)
+    queries = []
+    for n, doc_id in enumerate(rng.sample(list(doc_tokens), n_queries)):
+        words = rng.sample([t for t in doc_tokens[doc_id] if t.startswith("t")], 5)
+        if n % 2 == 0:
+            query = " ".join(words + [f"sku{int(doc_id):06d}"])
+            queries.append(("keyword", query, {doc_id}))
+        else:
+            query = " ".join("s" + w[1:] for w in words)
+            queries.append(("semantic", query, by_topic[docs[doc_id].metadata["topic"]]))
+    return queries
+
+
+class BruteForceDense:
+    """暴力计算余弦相似度的向量检索"""
+
+    def __init__(self, docs: Dict[str, Document], doc_tokens: Dict[str, List[str]]):
+        self.docs = docs
+        self.vectors = {doc_id: embed(tokens) for doc_id, tokens in doc_tokens.items()}
+
+    def search(self, query: str, k: int) -> List[Tuple[Document, float]]:
+        q = embed(query.split())
+        scores = [
+            (doc_id, sum(a * b for a, b in zip(q, vec)))
+            for doc_id, vec in self.vectors.items()
+        ]
+        scores.sort(key=lambda x: -x[1])
+        return [(self.docs[doc_id], (s + 1) / 2) for doc_id, s in scores[:k]]
+
+
+def run(name: str, retriever: HybridRetrieverService, queries, top_k: int):
+    latencies = []
+    hits = {"keyword": [], "semantic": []}
+    for kind, query, relevant in queries:
+        start = time.perf_counter()
+        result = retriever.get_relevant_documents(query)
+        latencies.append((time.perf_counter() - start) * 1000)
+        sources = {f"doc{doc_id}.txt" for doc_id in relevant}
+        hits[kind].append(any(doc.metadata["source"] in sources for doc in result[:top_k]))
+    latencies.sort()
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    recall = {kind: sum(v) / max(len(v), 1) for kind, v in hits.items()}
+    total = sum(sum(v) for v in hits.values()) / len(queries)
+    print(
+        f"{name:<16} {total:8.3f} {recall['keyword']:8.3f} {recall['semantic']:9.3f}"
+        f" {statistics.mean(latencies):10.2f} {p95:9.2f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=5000)
+    parser.add_argument("--topics", type=int, default=50)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--candidate-k", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    docs, doc_tokens = build_corpus(args.docs, args.topics, args.seed)
+    queries = build_queries(docs, doc_tokens, args.queries, args.seed)
+    dense = BruteForceDense(docs, doc_tokens)
+    bm25 = BM25Index(preprocess_func=str.split)
+    bm25.add(docs.keys(), [doc.page_content for doc in docs.values()])
+
+    def sparse_search(query: str, k: int):
+        return [(docs[doc_id], score) for doc_id, score in bm25.search(query, k=k)]
+
+    print(f"docs: {args.docs}, topics: {args.topics}, queries: {args.queries}, candidate_k: {args.candidate_k}")
+    print(f"{'':<16} {'recall@' + str(args.top_k):>8} {'keyword':>8} {'semantic':>9} {'avg (ms)':>10} {'p95 (ms)':>9}")
+    common = dict(top_k=args.top_k, candidate_k=args.candidate_k, weights=[0.5, 0.5])
+    run("dense", HybridRetrieverService(dense_search=dense.search, **common), queries, args.top_k)
+    run("sparse", HybridRetrieverService(dense_search=sparse_search, **common), queries, args.top_k)
+    for fusion in ["rrf", "score"]:
+        retriever = HybridRetrieverService(
+            dense_search=dense.search, sparse_search=sparse_search, fusion=fusion, **common
+        )
+        run(f"hybrid ({fusion})", retriever, queries, args.top_k)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+对比一次 kb_chat 请求中读取配置的耗时：原先每次读取都检查配置文件的修改时间，且各配置类共用一个大小为 1 的缓存，
+交替读取不同的配置类时会重新解析配置文件；现在读取内存中的配置实例，由后台线程检查文件变化。
+
+用法：python tests/benchmarks/bench_settings_access.py --requests 100
+"""
+import argparse
+import statistics
+import time
+
+from memoization import cached, CachingAlgorithmFlag
+
+from chatchat.pydantic_settings_file import _lazy_load_key
+from chatchat.settings import (
+    ApiModelSettings,
+    BasicSettings,
+    KBSettings,
+    PromptSettings,
+    Settings,
+    ToolSettings,
+)
+
+
+# kb_chat 请求过程中依次读取的配置（大致按 kb_chat、get_ChatOpenAI、search_docs 的顺序）
+KB_CHAT_ACCESSES = [
+    ("model_settings", "DEFAULT_LLM_MODEL"),
+    ("kb_settings", "VECTOR_SEARCH_TOP_K"),
+    ("kb_settings", "SCORE_THRESHOLD"),
+    ("model_settings", "MODEL_PLATFORMS"),
+    ("model_settings", "DEFAULT_EMBEDDING_MODEL"),
+    ("model_settings", "MODEL_PLATFORMS"),
+    ("basic_settings", "HTTPX_DEFAULT_TIMEOUT"),
+    ("model_settings", "LLM_MODEL_CONFIG"),
+    ("kb_settings", "DEFAULT_VS_TYPE"),
+    ("kb_settings", "SEARCH_CACHE_SIZE"),
+    ("kb_settings", "SEARCH_MODE"),
+    ("basic_settings", "KB_ROOT_PATH"),
+    ("model_settings", "MODEL_PLATFORMS"),
+    ("kb_settings", "CHUNK_SIZE"),
+    ("prompt_settings", "rag"),
+    ("basic_settings", "log_verbose"),
+    ("model_settings", "HISTORY_LEN"),
+    ("kb_settings", "VECTOR_SEARCH_TOP_K"),
+    ("prompt_settings", "rag"),
+    ("basic_settings", "log_verbose"),
+]
+
+
+class LegacySettingsContainer:
+    """原先的实现：每次读取都检查文件，缓存大小为 1"""
+
+    def __init__(self):
+        @cached(max_size=1, algorithm=CachingAlgorithmFlag.LRU, thread_safe=True, custom_key_maker=_lazy_load_key)
+        def _cached_settings(settings):
+            if settings.auto_reload:
+                settings.__init__()
+            return settings
+
+        self._get = _cached_settings
+        self._settings = {
+            "basic_settings": BasicSettings(),
+            "kb_settings": KBSettings(),
+            "model_settings": ApiModelSettings(),
+            "tool_settings": ToolSettings(),
+            "prompt_settings": PromptSettings(),
+        }
+
+    def __getattr__(self, name):
+        return self._get(self._settings[name])
+
+
+def run(name: str, container, n: int):
+    latencies = []
+    for _ in range(n):
+        start = time.perf_counter()
+        for group, attr in KB_CHAT_ACCESSES:
+            getattr(getattr(container, group), attr, None)
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    print(f"{name:<10} {statistics.mean(latencies):12.4f} {p95:9.4f}")
+    return statistics.mean(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=100)
+    args = parser.parse_args()
+
+    print(f"{len(KB_CHAT_ACCESSES)} settings reads per request, {args.requests} requests")
+    print(f"{'':<10} {'avg (ms)':>12} {'p95 (ms)':>9}")
+    legacy = run("legacy", LegacySettingsContainer(), args.requests)
+    snapshot = run("snapshot", Settings, args.requests)
+    print(f"saved per request: {legacy - snapshot:.4f} ms ({legacy / max(snapshot, 1e-9):.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+对比每次请求获取工具的耗时：原先每次都重新加载 tools_factory 并查询知识库列表，现在只在首次使用时导入，
+知识库工具的描述只在知识库列表变化后更新。
+
+需要已初始化的数据库（chatchat init）。
+用法：python tests/benchmarks/bench_tool_registry.py --requests 200
+"""
+import argparse
+import importlib
+import statistics
+import time
+
+from chatchat.server.utils import get_tool, mark_kb_tool_outdated, update_search_local_knowledgebase_tool
+
+
+def legacy_get_tool():
+    from chatchat.server.agent import tools_factory
+
+    importlib.reload(tools_factory)
+
+    from chatchat.server.agent.tools_factory import tools_registry
+
+    update_search_local_knowledgebase_tool()
+    return tools_registry._TOOLS_REGISTRY
+
+
+def run(name: str, func, n: int):
+    latencies = []
+    for _ in range(n):
+        start = time.perf_counter()
+        func()
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    print(f"{name:<24} {statistics.mean(latencies):10.3f} {p95:9.3f}")
+    return statistics.mean(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    get_tool()
+    print(f"first import: {(time.perf_counter() - start) * 1000:.1f} ms, tools: {len(get_tool())}")
+    print(f"{'':<24} {'avg (ms)':>10} {'p95 (ms)':>9}")
+    legacy = run("reload per request", legacy_get_tool, args.requests)
+    cached = run("cached", get_tool, args.requests)
+
+    def kb_changed():
+        mark_kb_tool_outdated()
+        get_tool()
+
+    run("cached, kb list changed", kb_changed, args.requests)
+    print(f"saved per request: {legacy - cached:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
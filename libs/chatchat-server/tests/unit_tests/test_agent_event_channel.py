@@ -0,0 +1,71 @@
+import asyncio
+import uuid
+
+from langchain_chatchat.callbacks.agent_callback_handler import (
+    AgentEvent,
+    AgentExecutorAsyncIteratorCallbackHandler,
+    AgentStatus,
+)
+
+
+async def collect(handler):
+    return [event async for event in handler.aiter()]
+
+
+def test_queued_tokens_are_merged_in_order():
+    async def main():
+        handler = AgentExecutorAsyncIteratorCallbackHandler()
+        run_id = uuid.uuid4()
+        await handler.on_chat_model_start({}, [], run_id=run_id)
+        for token in ["Hel", "lo", ", ", "world"]:
+            await handler.on_llm_new_token(token, run_id=run_id)
+        handler.queue.put_nowait(AgentEvent(status=AgentStatus.tool_start, run_id="t", tool="calc"))
+        await handler.on_llm_new_token("!", run_id=run_id)
+        handler.done.set()
+        return await collect(handler)
+
+    events = asyncio.run(main())
+    assert [e.status for e in events] == [
+        AgentStatus.llm_start, AgentStatus.llm_new_token, AgentStatus.tool_start, AgentStatus.llm_new_token,
+    ]
+    assert events[1].text == "Hello, world"
+    assert events[3].text == "!"
+
+
+def test_tokens_within_window_share_a_frame():
+    async def main():
+        handler = AgentExecutorAsyncIteratorCallbackHandler(token_window=0.2)
+        run_id = uuid.uuid4()
+
+        async def produce():
+            for token in ["a", "b", "c"]:
+                await handler.on_llm_new_token(token, run_id=run_id)
+                await asyncio.sleep(0.01)
+            await asyncio.sleep(0.4)
+            await handler.on_llm_new_token("d", run_id=run_id)
+            handler.done.set()
+
+        task = asyncio.create_task(produce())
+        events = await collect(handler)
+        await task
+        return events
+
+    events = asyncio.run(main())
+    assert [e.text for e in events] == ["abc", "d"]
+
+
+def test_aiter_stops_when_done():
+    async def main():
+        handler = AgentExecutorAsyncIteratorCallbackHandler()
+
+        async def finish():
+            await asyncio.sleep(0.01)
+            await handler.on_llm_new_token("x", run_id=uuid.uuid4())
+            handler.done.set()
+
+        task = asyncio.create_task(finish())
+        events = await asyncio.wait_for(collect(handler), timeout=1)
+        await task
+        return events
+
+    assert [e.text for e in asyncio.run(main())] == ["x"]
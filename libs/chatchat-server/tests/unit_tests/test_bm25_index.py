@@ -0,0 +1,34 @@
+from chatchat.server.file_rag.retrievers.bm25 import BM25Index
+
+
+def _split(text: str):
+    return text.split()
+
+
+def test_bm25_index_search():
+    index = BM25Index(preprocess_func=_split)
+    index.add(["a", "b", "c"], ["apple banana", "banana cherry", "cherry durian durian"])
+    result = index.search("durian", k=2)
+    assert [doc_id for doc_id, _ in result] == ["c"]
+    result = index.search("banana cherry", k=3)
+    assert result[0][0] == "b"
+
+
+def test_bm25_index_incremental_delete():
+    index = BM25Index(preprocess_func=_split)
+    index.add(["a", "b"], ["apple banana", "banana cherry"])
+    index.delete(["a"])
+    assert len(index) == 1
+    assert "apple" not in index.postings
+    assert index.total_len == 2
+    assert index.search("apple") == []
+
+
+def test_bm25_index_save_and_load(tmp_path):
+    index = BM25Index(preprocess_func=_split)
+    index.add(["a"], ["apple banana"])
+    index.save(str(tmp_path))
+    loaded = BM25Index.load(str(tmp_path))
+    assert loaded.postings == index.postings
+    assert loaded.doc_len == index.doc_len
+    assert BM25Index.load(str(tmp_path / "not_exist")) is None
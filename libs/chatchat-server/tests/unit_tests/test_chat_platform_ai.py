@@ -0,0 +1,96 @@
+import asyncio
+import threading
+
+from langchain_core.outputs import ChatGenerationChunk
+
+from langchain_chatchat import ChatPlatformAI
+from langchain_chatchat.chat_models.base import _ChunkAccumulator
+from langchain_chatchat.chat_models.platform_tools_message import PlatformToolsMessageChunk
+
+
+def make_chunk(content="", finish_reason=None):
+    return {
+        "id": "chatcmpl-1",
+        "choices": [
+            {"index": 0, "delta": {"role": "assistant", "content": content}, "finish_reason": finish_reason}
+        ],
+    }
+
+
+class FakeAsyncStream:
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    def __aiter__(self):
+        return self._iter()
+
+    async def _iter(self):
+        for chunk in self.chunks:
+            await asyncio.sleep(0)
+            yield chunk
+
+
+class FakeAsyncCompletions:
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.threads = set()
+
+    async def create(self, messages, stream=False, **kwargs):
+        self.threads.add(threading.get_ident())
+        return FakeAsyncStream(self.chunks)
+
+
+class FailingSyncCompletions:
+    def create(self, **kwargs):
+        raise AssertionError("sync client should not be used by astream")
+
+
+def test_astream_uses_async_client():
+    words = [f"w{i} " for i in range(50)]
+    async_client = FakeAsyncCompletions([make_chunk(w) for w in words] + [make_chunk(finish_reason="stop")])
+    llm = ChatPlatformAI(
+        model="glm-4", api_key="key", api_base="http://localhost/v1",
+        client=FailingSyncCompletions(), async_client=async_client,
+    )
+
+    async def main():
+        return [chunk async for chunk in llm.astream("hi")]
+
+    chunks = asyncio.run(main())
+    assert "".join(c.content for c in chunks) == "".join(words)
+    assert chunks[-1].response_metadata["finish_reason"] == "stop"
+    assert async_client.threads == {threading.get_ident()}  # 没有在线程池中执行
+
+
+def test_accumulator_matches_add():
+    tool_call = {"index": 0, "id": "call_1", "type": "function", "function": {"name": "calc", "arguments": ""}}
+    chunks = [
+        PlatformToolsMessageChunk(content="Hello", id="run-1"),
+        PlatformToolsMessageChunk(content=", world", response_metadata={"model": "glm"}),
+        PlatformToolsMessageChunk(
+            content="", additional_kwargs={"tool_calls": [tool_call]},
+            tool_call_chunks=[{"name": "calc", "args": '{"a": ', "id": "call_1", "index": 0}],
+        ),
+        PlatformToolsMessageChunk(
+            content="", tool_call_chunks=[{"name": None, "args": "1}", "id": None, "index": 0}],
+        ),
+    ]
+    generations = [
+        ChatGenerationChunk(message=m, generation_info={"finish_reason": "stop"} if i == 3 else None)
+        for i, m in enumerate(chunks)
+    ]
+    expected = generations[0]
+    for g in generations[1:]:
+        expected += g
+
+    accumulator = _ChunkAccumulator()
+    for g in generations:
+        accumulator.add(g)
+    result = accumulator.result()
+    assert result.text == expected.text == "Hello, world"
+    assert result.message.id == expected.message.id
+    assert result.message.tool_call_chunks == expected.message.tool_call_chunks
+    assert result.message.tool_calls == expected.message.tool_calls
+    assert result.message.additional_kwargs == expected.message.additional_kwargs
+    assert result.message.response_metadata == expected.message.response_metadata
+    assert result.generation_info == expected.generation_info
@@ -0,0 +1,62 @@
+import asyncio
+import threading
+
+from chatchat.server.client_pool import ClientPool
+
+
+def test_sync_clients_reused():
+    pool = ClientPool()
+    a = pool.get_openai_client("http://a/v1", "key", is_async=False)
+    assert pool.get_openai_client("http://a/v1", "key", is_async=False) is a
+    assert pool.get_openai_client("http://b/v1", "key", is_async=False) is not a
+    assert pool.get_openai_client("http://a/v1", "key", is_async=False, max_retries=5) is not a
+    # 不同平台共用同一个连接池
+    assert pool.get_httpx_client(is_async=False) is pool.get_httpx_client(is_async=False)
+    assert pool.get_httpx_client(proxy="http://proxy:8080") is not pool.get_httpx_client()
+
+
+def test_async_clients_per_loop():
+    pool = ClientPool()
+
+    async def get():
+        return pool.get_openai_client("http://a/v1", "key", is_async=True)
+
+    loop = asyncio.new_event_loop()
+    try:
+        pool.bind_loop(loop)
+        client = loop.run_until_complete(get())
+        assert loop.run_until_complete(get()) is client
+        # 在其它线程中（没有运行事件循环）获取的是主事件循环的客户端
+        assert pool.get_openai_client("http://a/v1", "key", is_async=True) is client
+        # 其它事件循环使用各自的客户端
+        assert asyncio.run(get()) is not client
+        loop.run_until_complete(pool.aclose())
+        assert loop.run_until_complete(get()) is not client
+    finally:
+        loop.close()
+
+
+def test_aclose_closes_clients_of_other_loops():
+    pool = ClientPool()
+
+    async def get():
+        return pool.get_httpx_client(is_async=True)
+
+    other = asyncio.new_event_loop()
+    thread = threading.Thread(target=other.run_forever, daemon=True)
+    thread.start()
+    try:
+        other_client = asyncio.run_coroutine_threadsafe(get(), other).result()
+
+        async def close():
+            client = await get()
+            await pool.aclose()
+            return client
+
+        main_client = asyncio.run(close())
+        # 其它事件循环的客户端在其所属的循环中关闭
+        assert main_client.is_closed and other_client.is_closed
+    finally:
+        other.call_soon_threadsafe(other.stop)
+        thread.join()
+        other.close()
@@ -0,0 +1,14 @@
+from chatchat.server.knowledge_base.kb_cache.faiss_cache import DocSourceIndex
+
+
+def test_doc_source_index():
+    index = DocSourceIndex()
+    index.add(["1", "2", "3"], [{"source": "a.txt"}, {"source": "A.TXT"}, {"source": "b.txt"}])
+    assert index.get("a.txt") == ["1", "2"]
+    assert len(index) == 3
+
+    copied = index.copy()
+    index.delete(["1", "2"], [{"source": "a.txt"}, {"source": "a.txt"}])
+    assert index.get("a.txt") == []
+    assert "a.txt" not in index._ids
+    assert copied.get("A.txt") == ["1", "2"]
@@ -0,0 +1,142 @@
+import time
+from typing import List
+
+import pytest
+from langchain_core.embeddings import Embeddings
+
+from chatchat.server import embed_health
+from chatchat.server.embed_health import EmbedHealthMonitor, HealthReportingEmbeddings
+from chatchat.server.knowledge_base.kb_service.base import KBService
+
+
+class FakeProbe:
+    def __init__(self):
+        self.calls = 0
+        self.error = None
+
+    def __call__(self, embed_model: str):
+        self.calls += 1
+        if self.error:
+            raise self.error
+
+
+def wait_probes(monitor: EmbedHealthMonitor, timeout: float = 2):
+    end = time.time() + timeout
+    while any(h.probing for h in monitor._health.values()) and time.time() < end:
+        time.sleep(0.01)
+
+
+def test_check_uses_cached_status():
+    probe = FakeProbe()
+    monitor = EmbedHealthMonitor(interval=60, failure_threshold=2, probe_func=probe)
+    assert monitor.check("bge") == (True, "")
+    for _ in range(10):
+        assert monitor.check("bge") == (True, "")
+    assert probe.calls == 1
+
+
+def test_expired_status_reprobed_in_background():
+    probe = FakeProbe()
+    monitor = EmbedHealthMonitor(interval=0.05, failure_threshold=2, probe_func=probe)
+    monitor.check("bge")
+    probe.error = RuntimeError("down")
+    time.sleep(0.1)
+    assert monitor.check("bge")[0]  # 先返回缓存的结果
+    wait_probes(monitor)
+    ok, msg = monitor.check("bge")
+    assert not ok and "down" in msg
+    assert probe.calls == 2
+
+
+def test_report_failure_and_circuit_breaker():
+    probe = FakeProbe()
+    monitor = EmbedHealthMonitor(interval=60, failure_threshold=2, probe_func=probe)
+    monitor.check("bge")
+    probe.error = RuntimeError("down")
+
+    monitor.report_failure("bge")
+    wait_probes(monitor)
+    assert probe.calls == 2
+    assert not monitor.check("bge")[0]
+
+    monitor.report_failure("bge")
+    wait_probes(monitor)
+    assert probe.calls == 3
+    assert monitor.stats()["bge"]["circuit_open"]
+
+    # 熔断期间不再探测
+    monitor.report_failure("bge")
+    wait_probes(monitor)
+    assert probe.calls == 3
+    assert not monitor.check("bge")[0]
+
+
+
+class FakeEmbeddings(Embeddings):
+    def __init__(self, error: Exception = None):
+        self.error = error
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if self.error:
+            raise self.error
+        return [[1.0] for _ in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+class FakeKBService(KBService):
+    """检索时先向量化查询，再访问向量库，向量库总是出错"""
+
+    def __init__(self, embeddings: Embeddings):
+        self.kb_name = "test"
+        self.embed_model = "bge"
+        self.embeddings = embeddings
+
+    def vs_type(self) -> str:
+        return "fake"
+
+    def check_embed_model(self):
+        return True, ""
+
+    def do_init(self):
+        pass
+
+    def do_create_kb(self):
+        pass
+
+    def do_drop_kb(self):
+        pass
+
+    def do_search(self, query, top_k, score_threshold):
+        self.embeddings.embed_query(query)
+        raise RuntimeError("vector store unavailable")
+
+    def do_add_doc(self, docs, **kwargs):
+        pass
+
+    def do_delete_doc(self, kb_file, **kwargs):
+        pass
+
+    def do_clear_vs(self):
+        pass
+
+
+def test_only_embedding_failures_reported(monkeypatch):
+    reported = []
+    monitor = EmbedHealthMonitor(interval=60, failure_threshold=2, probe_func=FakeProbe())
+    monkeypatch.setattr(monitor, "report_failure", lambda model, error=None: reported.append(model))
+    monkeypatch.setattr(embed_health, "get_embed_health_monitor", lambda: monitor)
+
+    # 向量库自身的异常不是嵌入模型故障
+    kb = FakeKBService(HealthReportingEmbeddings(FakeEmbeddings(), "bge"))
+    with pytest.raises(RuntimeError):
+        kb.search_docs("query", top_k=3, score_threshold=1.0)
+    assert reported == []
+
+    kb = FakeKBService(HealthReportingEmbeddings(FakeEmbeddings(ConnectionError("down")), "bge"))
+    with pytest.raises(ConnectionError):
+        kb.search_docs("query", top_k=3, score_threshold=1.0)
+    with pytest.raises(ConnectionError):
+        kb.embeddings.embed_documents(["doc"])
+    assert reported == ["bge", "bge"]
@@ -0,0 +1,53 @@
+from typing import List
+
+from langchain_core.embeddings import Embeddings
+
+from chatchat.server.knowledge_base.kb_cache.embedding_cache import (
+    CachedEmbeddings,
+    EmbeddingCache,
+)
+
+
+class CountingEmbeddings(Embeddings):
+    def __init__(self):
+        self.embedded: List[str] = []
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.embedded.extend(texts)
+        return [[float(len(text)), 1.0] for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return [float(len(text)), 1.0]
+
+
+def test_cached_embeddings(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "cache.db"), max_size=1024 * 1024)
+    base = CountingEmbeddings()
+    embeddings = CachedEmbeddings(base, model="m1", cache=cache)
+
+    assert embeddings.embed_documents(["a", "bb", "a"]) == [[1.0, 1.0], [2.0, 1.0], [1.0, 1.0]]
+    assert base.embedded == ["a", "bb"]
+    assert embeddings.embed_documents(["bb", "ccc"]) == [[2.0, 1.0], [3.0, 1.0]]
+    assert base.embedded == ["a", "bb", "ccc"]
+    assert cache.stats()["hits"] == 1
+
+    # 不同模型的向量互不影响
+    other = CachedEmbeddings(base, model="m2", cache=cache)
+    other.embed_documents(["a"])
+    assert base.embedded[-1] == "a"
+
+    # 重新打开后缓存仍然有效
+    reopened = CachedEmbeddings(base, model="m1", cache=EmbeddingCache(cache.path, 1024 * 1024))
+    reopened.embed_documents(["a", "bb", "ccc"])
+    assert len(base.embedded) == 4
+
+
+def test_embedding_cache_eviction(tmp_path):
+    row_size = EmbeddingCache.ROW_OVERHEAD + 8
+    cache = EmbeddingCache(str(tmp_path / "cache.db"), max_size=row_size * 3)
+    cache.set_many(["a", "b", "c"], [[1.0, 1.0]] * 3)
+    cache.get_many(["a"])
+    cache.set_many(["d"], [[1.0, 1.0]])
+    assert cache.get_many(["a", "b", "c", "d"])[0] is not None
+    assert cache.stats()["entries"] <= 3
+    assert cache.get_many(["b"]) == [None]
@@ -0,0 +1,276 @@
+import os
+import threading
+from typing import List
+
+import pytest
+from langchain_core.embeddings import Embeddings
+
+from chatchat.server.file_rag.retrievers.bm25 import BM25Index
+from chatchat.server.knowledge_base.kb_cache.faiss_cache import (
+    DocSourceIndex,
+    IncrementalFAISS,
+    ThreadSafeFaiss,
+    get_current_vs_version_path,
+    list_vs_deltas,
+)
+
+
+class FakeEmbeddings(Embeddings):
+    """"doc{i}"（i 为十六进制）映射到第 i 维上的向量，其它文本映射到第 0 维"""
+
+    dim = 16
+
+    def _embed(self, text: str) -> List[float]:
+        i = int(text[3:], 16) if text.startswith("doc") else 0
+        vector = [0.01] * self.dim
+        vector[i] = 1.0
+        return vector
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(t) for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+
+def make_faiss(vs_path: str) -> ThreadSafeFaiss:
+    vector_store = IncrementalFAISS.from_texts(["init"], FakeEmbeddings(), normalize_L2=True)
+    vector_store.delete(list(vector_store.docstore._dict))
+    faiss = ThreadSafeFaiss("kb", obj=vector_store)
+    faiss.bm25 = BM25Index(preprocess_func=str.split)
+    faiss.sources = DocSourceIndex()
+    faiss.vs_path = vs_path
+    faiss.finish_loading()
+    return faiss
+
+
+def add(batch, *names, source="a.txt"):
+    return batch.add_embeddings(
+        list(names), FakeEmbeddings().embed_documents(list(names)), [{"source": source} for _ in names]
+    )
+
+
+def search(faiss: ThreadSafeFaiss, query: str, k: int = 3) -> List[str]:
+    with faiss.acquire(shared=True) as vs:
+        return [doc.page_content for doc, _ in vs.similarity_search_with_score(query, k=k)]
+
+
+def load(vs_path: str) -> ThreadSafeFaiss:
+    version_path = get_current_vs_version_path(vs_path)
+    faiss = ThreadSafeFaiss("kb")
+    faiss.obj = IncrementalFAISS.load_local(
+        version_path, FakeEmbeddings(), normalize_L2=True, allow_dangerous_deserialization=True
+    )
+    faiss.bm25 = BM25Index.load(version_path)
+    faiss.sources = DocSourceIndex.from_docstore(faiss.obj.docstore._dict)
+    faiss.vs_path = vs_path
+    faiss.replay_deltas(version_path)
+    return faiss
+
+
+def test_batches_are_isolated(tmp_path):
+    faiss = make_faiss(str(tmp_path))
+    with faiss.batch() as first:
+        add(first, "doc1")
+        with faiss.batch() as second:
+            add(second, "doc2")
+        # 第二个批次提交时不会带上第一个批次未完成的修改
+        assert search(faiss, "doc1") == ["doc2"]
+        assert faiss.docs_count() == 1
+    assert sorted(search(faiss, "doc1")) == ["doc1", "doc2"]
+
+
+def test_update_is_visible_only_after_commit(tmp_path):
+    faiss = make_faiss(str(tmp_path))
+    with faiss.batch() as batch:
+        ids = add(batch, "doc1", "doc2", "doc3")
+    with faiss.batch() as batch:
+        batch.delete(ids[:1])
+        assert batch.source_ids("A.txt") == ids[1:]
+        new_ids = add(batch, "doc4")
+        assert batch.source_ids("a.txt") == ids[1:] + new_ids
+        assert "doc1" in search(faiss, "doc1")
+    assert sorted(search(faiss, "doc1", k=10)) == ["doc2", "doc3", "doc4"]
+    assert faiss.sources.get("a.txt") == ids[1:] + new_ids
+    assert faiss.bm25.search("doc1") == []
+
+
+def test_delete_missing_id_raises_before_commit(tmp_path):
+    faiss = make_faiss(str(tmp_path))
+    with faiss.batch() as batch:
+        ids = add(batch, "doc1")
+        batch.delete(ids)
+        with pytest.raises(ValueError):
+            batch.delete(ids)
+    assert faiss.docs_count() == 0
+
+
+def test_tombstones_are_skipped_and_compacted(tmp_path):
+    faiss = make_faiss(str(tmp_path))
+    with faiss.batch() as batch:
+        ids = add(batch, *[f"doc{i:x}" for i in range(16)])
+    with faiss.batch() as batch:
+        batch.delete(ids[1:3])
+    vs = faiss.obj
+    assert vs.tombstones and vs.index.ntotal == 16
+    results = search(faiss, "doc1", k=3)
+    assert len(results) == 3 and "doc1" not in results and "doc2" not in results
+
+    vs.compact()
+    assert not vs.tombstones and vs.index.ntotal == 14
+    assert search(faiss, "doc3", k=1) == ["doc3"]
+    assert sorted(vs.index_to_docstore_id.values()) == sorted(ids[:1] + ids[3:])
+
+
+def test_save_appends_deltas_and_reload_replays_them(tmp_path):
+    vs_path = str(tmp_path)
+    faiss = make_faiss(vs_path)
+    with faiss.batch() as batch:
+        ids = add(batch, *[f"doc{i:x}" for i in range(12)])
+    faiss.save(vs_path)
+    version_path = get_current_vs_version_path(vs_path)
+    assert list_vs_deltas(version_path) == []
+
+    with faiss.batch() as batch:
+        batch.delete(ids[:1])
+        add(batch, "docf", source="b.txt")
+    faiss.save(vs_path)
+    # 修改量小时只追加增量文件，不写入新的完整版本
+    assert get_current_vs_version_path(vs_path) == version_path
+    assert [os.path.basename(f) for f in list_vs_deltas(version_path)] == ["delta-000001.pkl"]
+    assert not faiss.dirty
+
+    loaded = load(vs_path)
+    assert loaded.docs_count() == faiss.docs_count() == 12
+    assert loaded.sources.get("b.txt") == faiss.sources.get("b.txt")
+    assert search(loaded, "doc0", k=12) == search(faiss, "doc0", k=12)
+
+    # 修改量超过比例时保存为新的完整版本，并整理索引
+    with faiss.batch() as batch:
+        batch.delete(ids[1:6])
+    faiss.save(vs_path)
+    new_version_path = get_current_vs_version_path(vs_path)
+    assert new_version_path != version_path and not os.path.isdir(version_path)
+    assert list_vs_deltas(new_version_path) == []
+    assert not faiss.obj.tombstones
+    assert load(vs_path).docs_count() == 7
+
+
+def test_readers_are_not_blocked_while_staging(tmp_path):
+    faiss = make_faiss(str(tmp_path))
+    staged = threading.Event()
+    done = threading.Event()
+
+    def writer():
+        with faiss.batch() as batch:
+            add(batch, "doc1")
+            staged.set()
+            done.wait(5)
+
+    t = threading.Thread(target=writer)
+    t.start()
+    staged.wait(5)
+    assert search(faiss, "doc1") == []  # 检索不等待未提交的批次
+    done.set()
+    t.join()
+    assert search(faiss, "doc1") == ["doc1"]
+
+
+def test_update_doc_chunks_commits_once(monkeypatch, tmp_path):
+    from langchain.docstore.document import Document
+
+    from chatchat.server.knowledge_base.kb_service import base
+    from chatchat.server.knowledge_base.kb_service.faiss_kb_service import FaissKBService
+    from chatchat.server.knowledge_base.utils import get_chunk_hash
+
+    class FakeFaissKBService(FaissKBService):
+        def __init__(self, faiss: ThreadSafeFaiss):
+            self.kb_name = "test"
+            self.doc_path = "/not_exist"
+            self.vs_path = faiss.vs_path
+            self._faiss = faiss
+            self._sparse_lock = threading.Lock()
+
+        def load_vector_store(self) -> ThreadSafeFaiss:
+            return self._faiss
+
+    class FakeKnowledgeFile:
+        filename = "a.txt"
+
+        def file2text(self):
+            return [Document(page_content=t, metadata={"source": "a.txt"}) for t in ["doc1", "doc3", "doc4"]]
+
+    faiss = make_faiss(str(tmp_path))
+    with faiss.batch() as batch:
+        ids = add(batch, "doc1", "doc2", "doc3")
+    hashes = {
+        id_: get_chunk_hash(Document(page_content=t, metadata={"source": "a.txt"}))
+        for id_, t in zip(ids, ["doc1", "doc2", "doc3"])
+    }
+    monkeypatch.setattr(base, "list_doc_hashes_from_db", lambda kb_name, file_name: hashes)
+    monkeypatch.setattr(base, "delete_docs_from_db_by_ids", lambda kb_name, file_name, ids: None)
+    monkeypatch.setattr(base, "add_file_to_db", lambda kb_file, custom_docs, docs_count, doc_infos: True)
+
+    commits = []
+    commit = faiss.commit
+    monkeypatch.setattr(faiss, "commit", lambda batch: commits.append(len(batch)) or commit(batch))
+    kb = FakeFaissKBService(faiss)
+    assert kb._update_doc_chunks(FakeKnowledgeFile(), not_refresh_vs_cache=True)
+    # 删除 doc2 与新增 doc4 在同一次提交中完成，检索不会看到只删除未新增的状态
+    assert commits == [2]
+    assert sorted(d.page_content for d in kb.list_docs("a.txt")) == ["doc1", "doc3", "doc4"]
+
+
+def test_search_cache_invalidated_after_commit(monkeypatch, tmp_path):
+    from chatchat.server.knowledge_base.kb_service import base
+    from chatchat.server.knowledge_base.kb_service.faiss_kb_service import FaissKBService
+
+    class FakeFaissKBService(FaissKBService):
+        def __init__(self, faiss: ThreadSafeFaiss):
+            self.kb_name = "test"
+            self.vs_path = faiss.vs_path
+            self._faiss = faiss
+
+        def load_vector_store(self) -> ThreadSafeFaiss:
+            return self._faiss
+
+    faiss = make_faiss(str(tmp_path))
+    events = []
+    monkeypatch.setattr(base, "bump_search_version", lambda namespace: events.append(("bump", faiss.docs_count())))
+    kb = FakeFaissKBService(faiss)
+    with kb.write_batch(save=False) as batch_kb:
+        add(batch_kb._vs_batch, "doc1")
+        events.append(("staged", faiss.docs_count()))
+    # 提交前缓存的检索结果可能来自旧数据，提交后必须再次使其失效
+    assert events[-1] == ("bump", 1)
+    with kb._staged(save=False) as batch:
+        batch.delete(batch.source_ids("a.txt"))
+    assert events[-1] == ("bump", 0)
+
+
+def test_keyword_hits_respect_threshold(monkeypatch, tmp_path):
+    from chatchat.server.knowledge_base.kb_service import faiss_kb_service
+    from chatchat.server.knowledge_base.kb_service.faiss_kb_service import FaissKBService
+
+    class FakeFaissKBService(FaissKBService):
+        def __init__(self, faiss: ThreadSafeFaiss):
+            self.kb_name = "test"
+            self._faiss = faiss
+
+        def load_vector_store(self) -> ThreadSafeFaiss:
+            return self._faiss
+
+    faiss = make_faiss(str(tmp_path))
+    with faiss.batch() as batch:
+        add(batch, "doc1", "doc2")
+    monkeypatch.setattr(faiss_kb_service.Settings.kb_settings, "SEARCH_MODE", "auto")
+    kb = FakeFaissKBService(faiss)
+    # doc2 只命中关键词，向量相关度低于阈值
+    docs = kb.do_search("doc1", top_k=3, score_threshold=0.5)
+    assert kb.use_hybrid_search()
+    assert [d.page_content for d in docs] == ["doc1"]
+    monkeypatch.setattr(
+        faiss_kb_service, "_bm25_search",
+        lambda vs, bm25, query, k: [(d, 1.0) for d in vs.docstore._dict.values() if d.page_content == "doc2"],
+    )
+    assert [d.page_content for d in kb.do_search("doc1", top_k=3, score_threshold=0.5)] == ["doc1"]
@@ -0,0 +1,105 @@
+import time
+
+from langchain.docstore.document import Document
+
+from chatchat.server.knowledge_base import kb_doc_api
+from chatchat.server.knowledge_base.kb_doc_api import federated_search_docs, merge_search_results
+from chatchat.server.knowledge_base.model.kb_document_model import DocumentWithVSId
+
+
+def scored(text: str, score: float, source: str = "a.txt") -> DocumentWithVSId:
+    return DocumentWithVSId(page_content=text, metadata={"source": source}, score=score)
+
+
+def test_merge_search_results():
+    results = {
+        # 融合得分，尺度很小
+        "kb1": [scored("a", 0.03), scored("b", 0.02), scored("c", 0.01)],
+        # (doc, L2 距离)
+        "kb2": [(Document(page_content="d", metadata={"source": "d.txt"}), 0.2),
+                (Document(page_content="e", metadata={"source": "e.txt"}), 0.9)],
+        # IP 相似度，越大越相关
+        "kb3": [scored("a", 0.8), scored("f", 0.3, source="f.txt")],
+    }
+    docs = merge_search_results(results, top_k=10)
+    assert [d.page_content for d in docs] == ["a", "d", "b", "e", "f", "c"]
+    assert docs[0].metadata["kb_name"] == "kb1"  # 重复的文本块只保留一个，排名得分累加
+    assert docs[1].metadata["kb_name"] == "kb2"
+    assert docs[0].score == 2 / 61 and docs[1].score == 1 / 61 and docs[-1].score == 1 / 63
+    assert [d.page_content for d in merge_search_results(results, top_k=2)] == ["a", "d"]
+
+
+def test_merge_does_not_promote_weak_kb():
+    # 各知识库的第一名得分相同，不会因为按知识库归一化而压过其它知识库中排名靠前的结果
+    results = {
+        "kb1": [scored("a", 0.9), scored("b", 0.8)],
+        "kb2": [scored("b", 0.85), scored("c", 0.1)],
+    }
+    docs = merge_search_results(results, top_k=3)
+    assert [d.page_content for d in docs] == ["b", "a", "c"]
+
+
+class FakeKB:
+    def __init__(self, docs, delay=0.0, error=None):
+        self.docs = docs
+        self.delay = delay
+        self.error = error
+
+    def search_docs(self, query, top_k, score_threshold):
+        time.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return self.docs
+
+
+def test_federated_search_docs(monkeypatch):
+    kbs = {
+        "fast": FakeKB([scored("a", 0.9), scored("b", 0.1)], delay=0.2),
+        "slow": FakeKB([scored("c", 0.9)], delay=2),
+        "other": FakeKB([scored("d", 0.5), scored("e", 0.4)], delay=0.2),
+        "broken": FakeKB([], error=RuntimeError("boom")),
+    }
+    monkeypatch.setattr(
+        kb_doc_api.KBServiceFactory, "get_service_by_name", staticmethod(lambda name: kbs.get(name))
+    )
+    start = time.time()
+    docs = federated_search_docs(
+        query="q",
+        knowledge_base_names=["fast", "slow", "other", "broken", "missing"],
+        top_k=3,
+        score_threshold=2.0,
+        timeout=0.5,
+    )
+    elapsed = time.time() - start
+    assert elapsed < 1  # 并发检索，且不等待超时的知识库
+    assert [d["page_content"] for d in docs] == ["a", "d", "b"]
+    assert [d["metadata"]["kb_name"] for d in docs] == ["fast", "other", "fast"]
+
+
+def test_federated_search_workers_are_bounded(monkeypatch):
+    import threading
+
+    lock = threading.Lock()
+    running = [0, 0]  # 当前、最大并发数
+
+    class CountingKB(FakeKB):
+        def search_docs(self, query, top_k, score_threshold):
+            with lock:
+                running[0] += 1
+                running[1] = max(running)
+            try:
+                return super().search_docs(query, top_k, score_threshold)
+            finally:
+                with lock:
+                    running[0] -= 1
+
+    kbs = {f"kb{i}": CountingKB([scored(f"d{i}", 0.5)], delay=0.1) for i in range(4)}
+    monkeypatch.setattr(
+        kb_doc_api.KBServiceFactory, "get_service_by_name", staticmethod(lambda name: kbs.get(name))
+    )
+    monkeypatch.setattr(kb_doc_api.Settings.kb_settings, "KB_SEARCH_WORKERS", 2)
+    docs = federated_search_docs(
+        query="q", knowledge_base_names=list(kbs), top_k=4, score_threshold=2.0, timeout=5
+    )
+    assert len(docs) == 4
+    assert running[1] == 2
@@ -0,0 +1,175 @@
+import functools
+import threading
+from typing import Dict, List
+
+import pytest
+from langchain.docstore.document import Document
+
+from chatchat.server.file_rag.retrievers.bm25 import BM25Index
+from chatchat.server.file_rag.retrievers.hybrid import (
+    HybridRetrieverService,
+    reciprocal_rank_fusion,
+    score_fusion,
+)
+from chatchat.server.knowledge_base.kb_service import base
+
+
+def make_doc(text: str) -> Document:
+    return Document(page_content=text, metadata={"source": "test.txt"})
+
+
+def test_reciprocal_rank_fusion():
+    a, b, c = make_doc("a"), make_doc("b"), make_doc("c")
+    dense = [(a, 0.9), (b, 0.8)]
+    sparse = [(make_doc("b"), 12.0), (c, 3.0)]
+    fused = reciprocal_rank_fusion([dense, sparse], [0.5, 0.5])
+    assert [d.page_content for d, _ in fused] == ["b", "a", "c"]
+
+    fused = reciprocal_rank_fusion([dense, sparse], [1.0, 0.0])
+    assert [d.page_content for d, _ in fused][:2] == ["a", "b"]
+
+
+def test_score_fusion():
+    a, b, c = make_doc("a"), make_doc("b"), make_doc("c")
+    dense = [(a, 0.9), (b, 0.5), (c, 0.1)]
+    sparse = [(c, 20.0), (b, 15.0), (a, 10.0)]
+    fused = score_fusion([dense, sparse], [0.5, 0.5])
+    # 归一化后 a: 1 + 0, b: 0.5 + 0.5, c: 0 + 1
+    assert {d.page_content: round(s, 6) for d, s in fused} == {"a": 0.5, "b": 0.5, "c": 0.5}
+
+    fused = score_fusion([dense, sparse], [0.3, 0.7])
+    assert fused[0][0].page_content == "c"
+
+
+def test_hybrid_retriever():
+    calls = []
+
+    def dense(query, k):
+        calls.append(("dense", k))
+        return [(make_doc("a"), 0.9), (make_doc("b"), 0.8)]
+
+    def sparse(query, k):
+        calls.append(("sparse", k))
+        return [(make_doc("c"), 5.0), (make_doc("a"), 2.0)]
+
+    retriever = HybridRetrieverService(
+        dense_search=dense, sparse_search=sparse, top_k=2, candidate_k=10, fusion="rrf", weights=[0.5, 0.5]
+    )
+    docs = retriever.get_relevant_documents("q")
+    assert [d.page_content for d in docs] == ["a", "c"]
+    assert calls == [("dense", 10), ("sparse", 10)]
+
+    retriever = HybridRetrieverService(dense_search=dense, top_k=1, candidate_k=10, fusion="rrf", weights=[1, 1])
+    assert [d.page_content for d in retriever.get_relevant_documents("q")] == ["a"]
+
+    # 稀疏检索只保留通过了稠密检索阈值的文本块
+    retriever = HybridRetrieverService(
+        dense_search=dense, sparse_search=sparse, top_k=3, candidate_k=10, sparse_within_dense=True
+    )
+    assert [d.page_content for d in retriever.get_relevant_documents("q")] == ["a", "b"]
+
+
+class FakeKBService(base.KBService):
+    def __init__(self, docs: Dict[str, Document]):
+        self.kb_name = "test"
+        self.docs = docs
+        self._sparse_lock = threading.Lock()
+
+    def vs_type(self) -> str:
+        return "fake"
+
+    def do_init(self):
+        pass
+
+    def do_create_kb(self):
+        pass
+
+    def do_drop_kb(self):
+        pass
+
+    def do_search(self, query, top_k, score_threshold):
+        return []
+
+    def do_add_doc(self, docs: List[Document], **kwargs) -> List[Dict]:
+        return []
+
+    def do_delete_doc(self, kb_file, **kwargs):
+        pass
+
+    def do_clear_vs(self):
+        pass
+
+    def get_doc_by_ids(self, ids: List[str]) -> List[Document]:
+        return [self.docs.get(id) for id in ids]
+
+
+def test_default_sparse_search(monkeypatch):
+    docs = {
+        "1": make_doc("apple banana"),
+        "2": make_doc("banana cherry"),
+        "3": make_doc("durian"),
+    }
+    monkeypatch.setattr(
+        base, "list_docs_from_db", lambda kb_name, **kw: [{"id": id, "metadata": {}} for id in docs]
+    )
+    monkeypatch.setattr(base, "BM25Index", functools.partial(BM25Index, preprocess_func=str.split))
+    signature = [(3, 3)]
+    monkeypatch.setattr(base, "get_kb_files_signature", lambda kb_name: signature[0])
+    kb = FakeKBService(docs)
+
+    hits = kb.do_sparse_search("cherry", 2)
+    assert [d.page_content for d, _ in hits] == ["banana cherry"]
+
+    # 索引构建后随文本块增删同步更新
+    docs["4"] = make_doc("cherry pie")
+    kb._sparse_update(added=[({"id": "4"}, docs["4"])], deleted=["2"])
+    hits = kb.do_sparse_search("cherry", 2)
+    assert [d.page_content for d, _ in hits] == ["cherry pie"]
+
+    kb._sparse_update(reset=True)
+    assert kb._sparse_index is None
+
+    # 其它进程修改知识库后，数据库中文件列表的摘要变化，索引重新构建
+    kb.do_sparse_search("cherry", 2)
+    docs["5"] = make_doc("cherry tart")
+    assert [d.page_content for d, _ in kb.do_sparse_search("tart", 2)] == []
+    signature[0] = (4, 4)
+    assert [d.page_content for d, _ in kb.do_sparse_search("tart", 2)] == ["cherry tart"]
+
+
+def test_use_hybrid_search(monkeypatch):
+    kb_settings = base.Settings.kb_settings
+    kb = FakeKBService({})
+    monkeypatch.setattr(kb_settings, "SEARCH_MODE", "auto")
+    monkeypatch.setattr(kb_settings, "HYBRID_SEARCH_KBS", [])
+    assert not kb.use_hybrid_search()
+    monkeypatch.setattr(kb, "native_sparse_search", True)
+    assert kb.use_hybrid_search()
+    monkeypatch.setattr(kb, "native_sparse_search", False)
+    monkeypatch.setattr(kb_settings, "HYBRID_SEARCH_KBS", ["test"])
+    assert kb.use_hybrid_search()
+    monkeypatch.setattr(kb_settings, "SEARCH_MODE", "dense")
+    assert not kb.use_hybrid_search()
+    monkeypatch.setattr(kb_settings, "SEARCH_MODE", "hybrid")
+    monkeypatch.setattr(kb_settings, "HYBRID_SEARCH_KBS", [])
+    assert kb.use_hybrid_search()
+
+
+def test_es_keyword_hits_respect_threshold(monkeypatch):
+    pytest.importorskip("elasticsearch")
+    from chatchat.server.knowledge_base.kb_service.es_kb_service import ESKBService
+
+    class FakeStore:
+        def similarity_search_with_relevance_scores(self, query, k, score_threshold):
+            docs = [(make_doc("a"), 0.9), (make_doc("b"), 0.3)]
+            return [(doc, score) for doc, score in docs if score >= score_threshold][:k]
+
+    monkeypatch.setattr(base.Settings.kb_settings, "SEARCH_MODE", "auto")
+    kb = ESKBService.__new__(ESKBService)
+    kb.kb_name = "test"
+    kb.db = FakeStore()
+    monkeypatch.setattr(kb, "do_sparse_search", lambda query, top_k: [(make_doc("b"), 9.0), (make_doc("c"), 8.0)])
+    assert kb.use_hybrid_search()
+    # c 只命中关键词，b 的向量相关度低于阈值，都不会绕过 score_threshold
+    assert [d.page_content for d in kb.do_search("q", top_k=3, score_threshold=0.5)] == ["a"]
+    assert [d.page_content for d in kb.do_search("q", top_k=3, score_threshold=0.1)] == ["b", "a"]
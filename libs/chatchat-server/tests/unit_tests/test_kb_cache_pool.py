@@ -0,0 +1,161 @@
+import time
+
+from chatchat.server.knowledge_base.kb_cache.base import CachePool, ThreadSafeObject
+
+
+class SizedObject(ThreadSafeObject):
+    def __init__(self, key, size: int, pool: CachePool = None):
+        super().__init__(key, obj=key, pool=pool)
+        self._size = size
+        self.flushed = False
+        self.finish_loading()
+
+    def size(self) -> int:
+        return self._size
+
+    def flush(self):
+        self.flushed = True
+        super().flush()
+
+
+def test_evict_by_memory_limit():
+    pool = CachePool(memory_limit=100)
+    pool.set("a", SizedObject("a", 60, pool))
+    pool.set("b", SizedObject("b", 30, pool))
+    assert pool.keys() == ["a", "b"]
+    pool.set("c", SizedObject("c", 30, pool))
+    assert pool.keys() == ["b", "c"]
+    assert pool.evictions == 1
+
+
+def test_in_use_object_not_evicted():
+    pool = CachePool(cache_num=1)
+    a = pool.set("a", SizedObject("a", 1, pool))
+    with a.acquire():
+        pool.set("b", SizedObject("b", 1, pool))
+        assert "a" in pool.keys()
+    pool.set("c", SizedObject("c", 1, pool))
+    assert pool.keys() == ["c"]
+
+
+def test_dirty_object_flushed_before_eviction():
+    pool = CachePool(idle_ttl=0.01)
+    a = pool.set("a", SizedObject("a", 1, pool))
+    a.dirty = True
+    time.sleep(0.02)
+    pool.set("b", SizedObject("b", 1, pool))
+    assert a.flushed
+    assert pool.keys() == ["b"]
+    assert pool.stats()["evictions"] == 1
+
+
+def test_shared_acquire_runs_concurrently():
+    import threading
+
+    obj = SizedObject("a", 1)
+    barrier = threading.Barrier(2, timeout=5)
+
+    def reader():
+        with obj.acquire(shared=True):
+            barrier.wait()  # 两个读线程必须同时持有读锁才能通过
+
+    threads = [threading.Thread(target=reader) for _ in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not barrier.broken
+
+
+def test_writer_is_exclusive_and_reentrant():
+    import threading
+
+    obj = SizedObject("a", 1)
+    events = []
+
+    def reader():
+        with obj.acquire(shared=True):
+            events.append("read")
+
+    with obj.acquire():
+        with obj.acquire(shared=True):  # 写锁持有者可以再次获取读锁
+            pass
+        t = threading.Thread(target=reader)
+        t.start()
+        t.join(0.1)
+        assert events == []
+    t.join(1)
+    assert events == ["read"]
+
+
+def test_flush_runs_outside_pool_lock():
+    import threading
+
+    pool = CachePool(cache_num=1)
+    locked_by_other = []
+
+    def try_lock():
+        if pool.atomic.acquire(timeout=1):
+            pool.atomic.release()
+            locked_by_other.append(True)
+
+    class SlowFlush(SizedObject):
+        def flush(self):
+            # 保存期间其它线程可以使用缓存池
+            t = threading.Thread(target=try_lock)
+            t.start()
+            t.join()
+            assert pool.get("a") is self  # 保存期间再次请求时取回该对象
+            super().flush()
+
+    a = pool.set("a", SlowFlush("a", 1, pool))
+    a.dirty = True
+    pool.set("b", SizedObject("b", 1, pool))
+    assert a.flushed and locked_by_other == [True]
+    assert "a" in pool.keys()
+    assert pool._evicting == {}
+
+
+def test_expire_idle():
+    pool = CachePool(cache_num=10, idle_ttl=0.01)
+    pool.set("a", SizedObject("a", 1, pool))
+    time.sleep(0.02)
+    pool.expire_idle()
+    assert pool.keys() == []
+    assert pool.stats()["evictions"] == 1
+
+
+def test_load_vector_store_flushes_outside_pool_lock(monkeypatch, tmp_path):
+    from langchain_community.embeddings import FakeEmbeddings
+
+    from chatchat.server.knowledge_base.kb_cache import faiss_cache
+    from chatchat.server.knowledge_base.kb_cache.faiss_cache import (
+        IncrementalFAISS,
+        KBFaissPool,
+        MemoFaissPool,
+    )
+
+    def new_vector_store(*args, **kwargs):
+        vector_store = IncrementalFAISS.from_texts(["init"], FakeEmbeddings(size=4))
+        vector_store.delete(list(vector_store.docstore._dict))
+        return vector_store
+
+    monkeypatch.setattr(faiss_cache, "get_vs_path", lambda kb_name, vector_name: str(tmp_path / kb_name))
+    for pool, load in [
+        (KBFaissPool(cache_num=1), lambda pool, name: pool.load_vector_store(name, embed_model="fake")),
+        (MemoFaissPool(cache_num=1), lambda pool, name: pool.load_vector_store(name, embed_model="fake")),
+    ]:
+        monkeypatch.setattr(pool, "new_vector_store", new_vector_store)
+        monkeypatch.setattr(pool, "new_temp_vector_store", new_vector_store)
+        flushed_with_lock = []
+
+        class DirtyObject(SizedObject):
+            def flush(self):
+                flushed_with_lock.append(pool.atomic._is_owned())
+                super().flush()
+
+        a = pool.set("a", DirtyObject("a", 1, pool))
+        a.dirty = True
+        load(pool, "b")
+        assert a.flushed and flushed_with_lock == [False]
+        assert "a" not in pool.keys()
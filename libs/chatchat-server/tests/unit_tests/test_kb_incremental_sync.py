@@ -0,0 +1,214 @@
+import asyncio
+import json
+import os
+from typing import Dict, List
+
+import pytest
+from langchain.docstore.document import Document
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from chatchat.server.db import session as db_session
+from chatchat.server.db.base import Base
+from chatchat.server.db.repository.knowledge_base_repository import add_kb_to_db
+from chatchat.server.db.repository.knowledge_file_repository import (
+    get_file_detail,
+    list_doc_hashes_from_db,
+    list_file_details_from_db,
+    update_file_stat_in_db,
+)
+from chatchat.server.knowledge_base import kb_doc_api, kb_pipeline, migrate
+from chatchat.server.knowledge_base import utils as kb_utils
+from chatchat.server.knowledge_base.kb_service.base import KBService
+from chatchat.server.knowledge_base.utils import KnowledgeFile, get_chunk_hash
+from chatchat.settings import Settings
+
+KB_NAME = "sync_test"
+
+
+class FakeKBService(KBService):
+    """只记录写入与删除的文件，文件信息写入测试用的数据库"""
+
+    def __init__(self):
+        super().__init__(KB_NAME, embed_model="fake")
+        self.added: List[str] = []
+        self.deleted: List[str] = []
+
+    def vs_type(self) -> str:
+        return "fake"
+
+    def check_embed_model(self):
+        return True, ""
+
+    def do_init(self):
+        pass
+
+    def do_create_kb(self):
+        pass
+
+    def do_drop_kb(self):
+        pass
+
+    def do_search(self, query, top_k, score_threshold):
+        return []
+
+    def do_add_doc(self, docs: List[Document], **kwargs) -> List[Dict]:
+        self.added.extend(doc.metadata["source"] for doc in docs)
+        ids = kwargs.get("ids") or [f"{doc.metadata['source']}-{i}" for i, doc in enumerate(docs)]
+        return [{"id": id, "metadata": doc.metadata} for id, doc in zip(ids, docs)]
+
+    def do_delete_doc(self, kb_file, **kwargs):
+        self.deleted.append(kb_file.filename)
+
+    def do_clear_vs(self):
+        pass
+
+    def del_doc_by_ids(self, ids: List[str]) -> bool:
+        return True
+
+
+def file2text(self, **kwargs):
+    with open(self.filepath, encoding="utf-8") as fp:
+        return [Document(page_content=fp.read(), metadata={"source": self.filename})]
+
+
+@pytest.fixture
+def kb(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'info.db'}")
+    Base.metadata.create_all(bind=engine)
+    monkeypatch.setattr(db_session, "SessionLocal", sessionmaker(bind=engine))
+    monkeypatch.setattr(Settings.basic_settings, "KB_ROOT_PATH", str(tmp_path / "kb"))
+    monkeypatch.setattr(KnowledgeFile, "file2text", file2text)
+    monkeypatch.setattr(kb_pipeline, "get_embedding_cache", lambda: None)
+
+    kb = FakeKBService()
+    kb.create_kb()
+    add_kb_to_db(KB_NAME, "", kb.vs_type(), kb.embed_model)
+    return kb
+
+
+def write(kb: KBService, name: str, content: str, mtime: float = None):
+    path = os.path.join(kb.doc_path, name)
+    with open(path, "w", encoding="utf-8") as fp:
+        fp.write(content)
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+
+
+def populate(kb: KBService):
+    """a 未修改；b 只有修改时间变化；c 内容变化但大小不变；d 大小变化；e 新增；f 已被删除"""
+    for name in "abcdf":
+        write(kb, f"{name}.txt", f"content {name}", mtime=1_000_000)
+        kb.add_doc(KnowledgeFile(f"{name}.txt", KB_NAME))
+    write(kb, "b.txt", "content b", mtime=2_000_000)
+    write(kb, "c.txt", "CONTENT c", mtime=1_000_000)
+    os.utime(os.path.join(kb.doc_path, "c.txt"), (2_000_000, 2_000_000))
+    write(kb, "d.txt", "content d, longer")
+    write(kb, "e.txt", "content e")
+    os.remove(os.path.join(kb.doc_path, "f.txt"))
+    kb.added.clear()
+    kb.deleted.clear()
+
+
+def test_diff_files(kb):
+    populate(kb)
+    diff = {k: sorted(v) for k, v in kb.diff_files().items()}
+    assert diff == {
+        "added": ["e.txt"],
+        "changed": ["c.txt", "d.txt"],
+        "unchanged": ["a.txt", "b.txt"],
+        "deleted": ["f.txt"],
+    }
+    # 内容未变化的文件只更新修改时间，下次对比时不再计算哈希
+    assert list_file_details_from_db(KB_NAME)["b.txt"]["file_mtime"] == 2_000_000
+    assert {k: sorted(v) for k, v in kb.diff_files().items()} == diff
+
+
+def test_update_file_stat_in_db(kb):
+    write(kb, "a.txt", "content a", mtime=1_000_000)
+    kb_file = KnowledgeFile("a.txt", KB_NAME)
+    assert not update_file_stat_in_db(kb_file)
+
+    kb.add_doc(kb_file)
+    detail = list_file_details_from_db(KB_NAME)["a.txt"]
+    write(kb, "a.txt", "content a, longer", mtime=2_000_000)
+    assert update_file_stat_in_db(kb_file)
+    new_detail = list_file_details_from_db(KB_NAME)["a.txt"]
+    assert new_detail["file_mtime"] == 2_000_000
+    assert new_detail["file_size"] == len("content a, longer")
+    assert new_detail["file_hash"] == detail["file_hash"]  # 哈希只在重新入库时更新
+
+
+def test_add_file_reuses_hash_from_diff(kb):
+    populate(kb)
+    kb_utils._file_hash.cache_clear()
+    kb.diff_files()
+    computed = kb_utils._file_hash.cache_info().misses
+    kb.add_doc(KnowledgeFile("c.txt", KB_NAME))
+    assert kb_utils._file_hash.cache_info().misses == computed
+
+
+def test_folder2db_sync(kb, monkeypatch):
+    populate(kb)
+
+    def files2docs_in_thread(kb_files, **kwargs):
+        for kb_file in kb_files:
+            yield True, (KB_NAME, kb_file.filename, kb_file.file2text())
+
+    monkeypatch.setattr(migrate, "files2docs_in_thread", files2docs_in_thread)
+    monkeypatch.setattr(migrate.KBServiceFactory, "get_service", lambda *args: kb)
+    migrate.folder2db([KB_NAME], "sync")
+
+    assert sorted(kb.added) == ["c.txt", "d.txt", "e.txt"]
+    assert "f.txt" in kb.deleted and "a.txt" not in kb.deleted
+    assert sorted(list_file_details_from_db(KB_NAME)) == ["a.txt", "b.txt", "c.txt", "d.txt", "e.txt"]
+    assert sorted(kb.diff_files()["unchanged"]) == ["a.txt", "b.txt", "c.txt", "d.txt", "e.txt"]
+
+
+def test_recreate_vector_store_incremental(kb, monkeypatch):
+    populate(kb)
+    monkeypatch.setattr(kb_doc_api.KBServiceFactory, "get_service_by_name", lambda name: kb)
+    response = kb_doc_api.recreate_vector_store(KB_NAME, incremental=True, not_refresh_vs_cache=True)
+
+    async def consume():
+        return [json.loads(x) async for x in response.body_iterator]
+
+    events = asyncio.run(consume())
+    assert events[-1]["summary"] == {"added": 1, "changed": 2, "unchanged": 2, "deleted": 1}
+    assert sorted(e["doc"] for e in events[:-1]) == ["c.txt", "d.txt", "e.txt"]
+    assert sorted(kb.added) == ["c.txt", "d.txt", "e.txt"]
+    assert sorted(list_file_details_from_db(KB_NAME)) == ["a.txt", "b.txt", "c.txt", "d.txt", "e.txt"]
+
+
+def test_update_docs_only_changed(kb, monkeypatch):
+    populate(kb)
+    monkeypatch.setattr(kb_doc_api.KBServiceFactory, "get_service_by_name", lambda name: kb)
+    response = kb_doc_api.update_docs(
+        KB_NAME, ["a.txt", "b.txt", "c.txt"], only_changed=True, not_refresh_vs_cache=True,
+        chunk_size=250, chunk_overlap=50, zh_title_enhance=False, override_custom_docs=False, docs="",
+    )
+    assert sorted(response.data["skipped_files"]) == ["a.txt", "b.txt"]
+    assert kb.added == ["c.txt"]
+
+
+def test_update_doc_after_update_by_ids(kb):
+    write(kb, "a.txt", "content a")
+    kb_file = KnowledgeFile("a.txt", KB_NAME)
+    kb.add_doc(kb_file)
+
+    # 按 id 修改文本块后，数据库中的文本块哈希随之更新，按文件更新时恢复为文件内容
+    kb.update_doc_by_ids({"a.txt-0": Document(page_content="edited", metadata={"source": "a.txt"})})
+    hashes = list_doc_hashes_from_db(kb_name=KB_NAME, file_name="a.txt")
+    assert list(hashes) == ["a.txt-0"] and hashes["a.txt-0"] != get_chunk_hash(kb_file.file2text()[0])
+    kb.added.clear()
+    kb.update_doc(kb_file)
+    assert kb.added == ["a.txt"]
+
+    # 按 id 删除文本块后，数据库中的记录一并删除，按文件更新时重新写入
+    kb.update_doc_by_ids({"a.txt-0": None})
+    assert list_doc_hashes_from_db(kb_name=KB_NAME, file_name="a.txt") == {}
+    assert get_file_detail(kb_name=KB_NAME, filename="a.txt")["docs_count"] == 0
+    kb.added.clear()
+    kb.update_doc(kb_file)
+    assert kb.added == ["a.txt"]
+    assert get_file_detail(kb_name=KB_NAME, filename="a.txt")["docs_count"] == 1
@@ -0,0 +1,95 @@
+from contextlib import contextmanager
+from typing import List
+
+from langchain.docstore.document import Document
+
+from chatchat.server.knowledge_base import kb_pipeline
+from chatchat.server.knowledge_base.kb_pipeline import IngestPipeline
+from chatchat.server.knowledge_base.utils import KnowledgeFile
+
+
+class FakeFile(KnowledgeFile):
+    def __init__(self, filename: str, chunks: int, fail: bool = False):
+        self.filename = filename
+        self.chunks = chunks
+        self.fail = fail
+        self.docs = None
+        self.splited_docs = None
+
+    def file2text(self, **kwargs):
+        if self.fail:
+            raise ValueError("broken file")
+        return [Document(page_content=f"{self.filename}-{i}") for i in range(self.chunks)]
+
+
+class FakeEmbeddings:
+    def __init__(self):
+        self.batches: List[int] = []
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.batches.append(len(texts))
+        return [[float(len(text))] for text in texts]
+
+
+class FakeKB:
+    kb_name = "test"
+    embed_model = "fake"
+    accepts_embeddings = True
+
+    def __init__(self):
+        self.added = {}
+        self.commits: List[List[str]] = []  # 每次提交的写入批次中包含的文件
+        self._batch = None
+
+    @contextmanager
+    def write_batch(self, save: bool = True):
+        assert self._batch is None
+        self._batch = []
+        try:
+            yield self
+        finally:
+            self.commits.append(self._batch)
+            self._batch = None
+
+    def add_doc(self, kb_file, **kwargs):
+        assert len(kwargs["embeddings"]) == len(kb_file.splited_docs)
+        assert self._batch is not None
+        self.added[kb_file.filename] = kwargs["embeddings"]
+        self._batch.append(kb_file.filename)
+
+
+def test_ingest_pipeline(monkeypatch):
+    embeddings = FakeEmbeddings()
+    monkeypatch.setattr(kb_pipeline, "get_Embeddings", lambda embed_model: embeddings)
+    monkeypatch.setattr(kb_pipeline, "get_embedding_cache", lambda: None)
+
+    kb = FakeKB()
+    files = [FakeFile("a", 3), FakeFile("b", 5), FakeFile("c", 0, fail=True), FakeFile("d", 2)]
+    pipeline = IngestPipeline(kb, files, batch_size=4, load_workers=2, queue_size=1)
+    events = list(pipeline.run())
+
+    assert len(events) == 4
+    assert [e["doc"] for e in events if e["code"] != 200] == ["c"]
+    assert sorted(kb.added) == ["a", "b", "d"]
+    assert kb.added["b"] == [[3.0]] * 5
+    assert sum(embeddings.batches) == 10
+    assert max(embeddings.batches) <= 4
+    assert events[-1]["finished"] == 4
+    assert "embeddings/s" in events[-1]["throughput"]["embed"]
+
+
+def test_ingest_pipeline_commits_in_slices(monkeypatch):
+    monkeypatch.setattr(kb_pipeline, "get_Embeddings", lambda embed_model: FakeEmbeddings())
+    monkeypatch.setattr(kb_pipeline, "get_embedding_cache", lambda: None)
+
+    kb = FakeKB()
+    files = [FakeFile("a", 3), FakeFile("b", 5), FakeFile("c", 2), FakeFile("d", 4), FakeFile("e", 1)]
+    pipeline = IngestPipeline(kb, files, load_workers=1, commit_size=6)
+    committed = {}
+    for event in pipeline.run():
+        committed[event["doc"]] = [name for names in kb.commits for name in names]
+
+    # 写入的文本块达到 commit_size 即提交，产生进度事件时文件已可被检索
+    assert kb.commits == [["a", "b"], ["c", "d"], ["e"]]
+    assert committed["b"] == ["a", "b"]
+    assert committed["d"] == ["a", "b", "c", "d"]
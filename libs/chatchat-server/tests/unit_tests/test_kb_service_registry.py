@@ -0,0 +1,81 @@
+import threading
+import time
+
+import pytest
+
+from chatchat.server.knowledge_base.kb_service import base
+from chatchat.server.knowledge_base.kb_service.base import KBServiceFactory
+
+
+class FakeService:
+    def __init__(self, kb_name, vs_type, embed_model, kb_info=None):
+        self.kb_name = kb_name
+        self.vs_type = vs_type
+        self.embed_model = embed_model
+        self.kb_info = kb_info
+
+
+@pytest.fixture
+def factory(monkeypatch):
+    created = []
+    db_calls = []
+
+    def create_service(kb_name, vs_type, embed_model, kb_info=None):
+        time.sleep(0.01)  # 放大并发初始化的时间窗口
+        service = FakeService(kb_name, vs_type, embed_model, kb_info)
+        created.append(service)
+        return service
+
+    def load_kb_from_db(kb_name):
+        db_calls.append(kb_name)
+        if kb_name == "missing":
+            return None, None, None
+        return kb_name, "faiss", "bge"
+
+    monkeypatch.setattr(KBServiceFactory, "_create_service", staticmethod(create_service))
+    monkeypatch.setattr(base, "load_kb_from_db", load_kb_from_db)
+    KBServiceFactory.clear()
+    yield created, db_calls
+    KBServiceFactory.clear()
+
+
+def test_get_service_by_name_is_cached(factory):
+    created, db_calls = factory
+    kb1 = KBServiceFactory.get_service_by_name("samples")
+    kb2 = KBServiceFactory.get_service_by_name("samples")
+    assert kb1 is kb2
+    assert (kb1.vs_type, kb1.embed_model) == ("faiss", "bge")
+    assert len(created) == 1
+    assert db_calls == ["samples"]
+    assert KBServiceFactory.get_service("samples", "FAISS", "bge") is kb1
+
+    assert KBServiceFactory.get_service_by_name("missing") is None
+    assert KBServiceFactory.get_service_by_name("missing") is None
+    assert db_calls == ["samples", "missing", "missing"]
+
+
+def test_invalidate(factory):
+    created, db_calls = factory
+    kb1 = KBServiceFactory.get_service_by_name("samples")
+    other = KBServiceFactory.get_service_by_name("other")
+    KBServiceFactory.invalidate("SAMPLES")
+    kb2 = KBServiceFactory.get_service_by_name("samples")
+    assert kb2 is not kb1
+    assert KBServiceFactory.get_service_by_name("other") is other
+    assert db_calls == ["samples", "other", "samples"]
+
+
+def test_concurrent_init_once(factory):
+    created, _ = factory
+    results = []
+
+    def get():
+        results.append(KBServiceFactory.get_service("samples", "faiss", "bge"))
+
+    threads = [threading.Thread(target=get) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(created) == 1
+    assert all(r is created[0] for r in results)
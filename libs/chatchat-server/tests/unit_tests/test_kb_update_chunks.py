@@ -0,0 +1,88 @@
+from typing import Dict, List
+
+from langchain.docstore.document import Document
+
+from chatchat.server.knowledge_base.kb_service import base
+from chatchat.server.knowledge_base.utils import get_chunk_hash
+
+
+class FakeKBService(base.KBService):
+    def __init__(self):
+        self.kb_name = "test"
+        self.doc_path = "/not_exist"
+        self.added: List[Document] = []
+        self.deleted: List[str] = []
+
+    def vs_type(self) -> str:
+        return "fake"
+
+    def do_init(self):
+        pass
+
+    def do_create_kb(self):
+        pass
+
+    def do_drop_kb(self):
+        pass
+
+    def do_search(self, query, top_k, score_threshold):
+        return []
+
+    def do_add_doc(self, docs: List[Document], **kwargs) -> List[Dict]:
+        start = len(self.added)
+        self.added.extend(docs)
+        return [{"id": f"new{start + i}", "metadata": doc.metadata} for i, doc in enumerate(docs)]
+
+    def do_delete_doc(self, kb_file, **kwargs):
+        pass
+
+    def do_clear_vs(self):
+        pass
+
+    def del_doc_by_ids(self, ids: List[str]) -> bool:
+        self.deleted.extend(ids)
+        return True
+
+
+class FakeKnowledgeFile:
+    filename = "a.txt"
+
+    def __init__(self, docs: List[Document]):
+        self.docs = docs
+
+    def file2text(self):
+        return self.docs
+
+
+def _doc(text: str) -> Document:
+    return Document(page_content=text, metadata={"source": "a.txt"})
+
+
+def test_update_doc_chunks(monkeypatch):
+    old_docs = {"1": _doc("a"), "2": _doc("b"), "3": _doc("c")}
+    db = {}
+    monkeypatch.setattr(
+        base,
+        "list_doc_hashes_from_db",
+        lambda kb_name, file_name: {k: get_chunk_hash(v) for k, v in old_docs.items()},
+    )
+    monkeypatch.setattr(
+        base, "delete_docs_from_db_by_ids", lambda kb_name, file_name, ids: db.update(deleted=ids)
+    )
+    monkeypatch.setattr(
+        base, "add_file_to_db", lambda kb_file, custom_docs, docs_count, doc_infos: db.update(added=doc_infos) or True
+    )
+
+    kb = FakeKBService()
+    assert kb._update_doc_chunks(FakeKnowledgeFile([_doc("a"), _doc("c"), _doc("d")]), not_refresh_vs_cache=True)
+    assert kb.deleted == ["2"]
+    assert [doc.page_content for doc in kb.added] == ["d"]
+    assert db["deleted"] == ["2"]
+    assert db["added"][0]["metadata"]["chunk_hash"] == get_chunk_hash(_doc("d"))
+
+
+def test_update_doc_chunks_without_hash(monkeypatch):
+    monkeypatch.setattr(base, "list_doc_hashes_from_db", lambda kb_name, file_name: {"1": ""})
+    kb = FakeKBService()
+    assert kb._update_doc_chunks(FakeKnowledgeFile([_doc("a")])) is None
+    assert kb.added == []
@@ -0,0 +1,53 @@
+import asyncio
+from types import SimpleNamespace
+from typing import List
+
+from chatchat.server.localai_embeddings import LocalAIEmbeddings
+
+
+class FakeClient:
+    def __init__(self):
+        self.calls: List[List[str]] = []
+
+    def _response(self, input: List[str]):
+        self.calls.append(input)
+        # 打乱返回顺序，检查按 index 重新排序
+        data = [SimpleNamespace(index=i, embedding=[float(len(t)), 0.0]) for i, t in enumerate(input)]
+        return SimpleNamespace(data=list(reversed(data)))
+
+    def create(self, input: List[str], **kwargs):
+        return self._response(input)
+
+
+class FakeAsyncClient(FakeClient):
+    async def create(self, input: List[str], **kwargs):
+        await asyncio.sleep(0)
+        return self._response(input)
+
+
+def _embeddings(**kwargs) -> LocalAIEmbeddings:
+    return LocalAIEmbeddings(
+        model="fake",
+        openai_api_key="EMPTY",
+        openai_api_base="http://fake-embeddings/v1",
+        client=FakeClient(),
+        async_client=FakeAsyncClient(),
+        **kwargs,
+    )
+
+
+def test_embed_documents_in_batches():
+    embeddings = _embeddings(chunk_size=2, embedding_ctx_length=10)
+    texts = ["a", "bb", "ccc", "dddddddd", "e"]
+    result = embeddings.embed_documents(texts)
+    assert result == [[float(len(t)), 0.0] for t in texts]
+    # 每批最多 2 条文本，且字符数不超过 embedding_ctx_length
+    assert sorted(embeddings.client.calls) == sorted([["a", "bb"], ["ccc"], ["dddddddd", "e"]])
+
+
+def test_aembed_documents_in_batches():
+    embeddings = _embeddings(chunk_size=3)
+    texts = [str(i) * (i + 1) for i in range(7)]
+    result = asyncio.run(embeddings.aembed_documents(texts))
+    assert result == [[float(len(t)), 0.0] for t in texts]
+    assert len(embeddings.async_client.calls) == 3
@@ -0,0 +1,78 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from langchain_chatchat.agent_toolkits.mcp_kit import client as mcp_client
+from langchain_chatchat.agent_toolkits.mcp_kit.client import MultiServerMCPClient
+
+
+class FakeSession:
+    def __init__(self, name):
+        self.name = name
+        self.closed = False
+
+    async def initialize(self):
+        pass
+
+
+class SlowClient(MultiServerMCPClient):
+    """每个服务器连接耗时 connection["delay"] 秒"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.opened = []
+
+    async def _open_stdio_session(self, exit_stack, *, command, args, env=None, **kwargs):
+        await asyncio.sleep(float(args[0]))
+        session = FakeSession(command)
+        self.opened.append(session)
+        exit_stack.callback(lambda: setattr(session, "closed", True))
+        return session
+
+
+def stdio(name, delay):
+    return {"transport": "stdio", "command": name, "args": [str(delay)], "env": None}
+
+
+@pytest.fixture(autouse=True)
+def fake_tools(monkeypatch):
+    async def load_mcp_tools(server_name, session):
+        return [SimpleNamespace(name=f"{server_name}_tool", server_name=server_name)]
+
+    monkeypatch.setattr(mcp_client, "load_mcp_tools", load_mcp_tools)
+
+
+def test_servers_connect_concurrently():
+    client = SlowClient({"a": stdio("a", 0.3), "b": stdio("b", 0.1), "c": stdio("c", 0.2)})
+
+    async def main():
+        start = time.perf_counter()
+        async with client:
+            elapsed = time.perf_counter() - start
+            tools = [t.name for t in client.get_tools()]
+            tool = await client.get_tool("b", "b_tool")
+        return elapsed, tools, tool
+
+    elapsed, tools, tool = asyncio.run(main())
+    assert elapsed < 0.5
+    assert tools == ["a_tool", "b_tool", "c_tool"]
+    assert tool.server_name == "b"
+    assert all(s.closed for s in client.opened)
+    assert client.sessions == {}
+
+
+def test_connect_timeout_is_per_server():
+    client = SlowClient({"fast": stdio("fast", 0.01), "slow": stdio("slow", 5)}, connect_timeout=0.2)
+
+    async def main():
+        start = time.perf_counter()
+        with pytest.raises(TimeoutError, match="slow"):
+            await client.__aenter__()
+        return time.perf_counter() - start
+
+    assert asyncio.run(main()) < 1
+    # 已连接的服务器也被关闭
+    assert [s.name for s in client.opened] == ["fast"]
+    assert client.opened[0].closed
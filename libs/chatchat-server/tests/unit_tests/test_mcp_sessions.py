@@ -0,0 +1,94 @@
+import asyncio
+from types import SimpleNamespace
+
+from chatchat.server.mcp_sessions import MCPSessionManager
+
+
+class FakeClient:
+    """记录连接的建立和关闭；delay 为连接耗时，fail 为连接失败的服务器"""
+
+    opened = []
+    closed = []
+    delay = 0.05
+    fail = set()
+
+    def __init__(self, connections):
+        (self.server_name,) = connections
+        self.sessions = {}
+
+    async def __aenter__(self):
+        await asyncio.sleep(self.delay)
+        if self.server_name in self.fail:
+            raise ConnectionError(self.server_name)
+        self.opened.append(self.server_name)
+        return self
+
+    async def __aexit__(self, *args):
+        self.closed.append(self.server_name)
+
+    def get_tools(self):
+        return [SimpleNamespace(name=f"{self.server_name}_tool")]
+
+
+def make_manager(connections, **kwargs):
+    FakeClient.opened, FakeClient.closed, FakeClient.fail = [], [], set()
+    return MCPSessionManager(
+        connections_func=lambda: dict(connections), client_factory=FakeClient, **kwargs
+    )
+
+
+def test_sessions_shared_and_concurrent():
+    async def main():
+        connections = {name: {"transport": "sse", "url": f"http://{name}"} for name in "abc"}
+        manager = make_manager(connections)
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        tools = await manager.get_tools()
+        # 各服务器并发连接
+        assert loop.time() - start < FakeClient.delay * 2
+        assert sorted(t.name for t in tools) == ["a_tool", "b_tool", "c_tool"]
+
+        # 之后的请求复用已有会话
+        await asyncio.gather(*[manager.get_tools() for _ in range(5)])
+        assert sorted(FakeClient.opened) == ["a", "b", "c"]
+
+        await manager.close()
+        assert sorted(FakeClient.closed) == ["a", "b", "c"]
+
+    asyncio.run(main())
+
+
+def test_invalidate_and_reconnect():
+    async def main():
+        connections = {"a": {"transport": "sse", "url": "http://a"}}
+        manager = make_manager(connections, reconnect_interval=0)
+        FakeClient.fail = {"b"}
+        connections["b"] = {"transport": "sse", "url": "http://b"}
+        assert [t.name for t in await manager.get_tools()] == ["a_tool"]
+        assert [s["error"] for s in manager.stats()] == [None, "b"]
+
+        # 变更连接配置后重新加载：a 重新连接，b 在后台重连
+        FakeClient.fail = set()
+        connections["a"] = {"transport": "sse", "url": "http://a2"}
+        manager.invalidate()
+        await asyncio.sleep(FakeClient.delay * 3)
+        assert FakeClient.closed == ["a"] and sorted(FakeClient.opened) == ["a", "a", "b"]
+        assert sorted(t.name for t in await manager.get_tools()) == ["a_tool", "b_tool"]
+
+        del connections["a"]
+        manager.invalidate()
+        await asyncio.sleep(FakeClient.delay)
+        assert [t.name for t in await manager.get_tools()] == ["b_tool"]
+        await manager.close()
+
+    asyncio.run(main())
+
+
+def test_connect_timeout():
+    async def main():
+        manager = make_manager({"a": {"transport": "stdio", "command": "x"}}, connect_timeout=0.01)
+        assert await manager.get_tools() == []
+        assert "超时" in manager.stats()[0]["error"]
+        assert FakeClient.opened == []
+
+    asyncio.run(main())
@@ -0,0 +1,56 @@
+import re
+from typing import Dict, List
+
+import pytest
+from langchain.docstore.document import Document
+
+from chatchat.server.knowledge_base.kb_service.milvus_kb_service import MilvusKBService
+from chatchat.settings import Settings
+
+
+class FakeMilvus:
+    """按 pk 返回预设得分，expr 为 "pk in [...]" 时只返回这些文本块"""
+
+    def __init__(self, scores: Dict[int, float]):
+        self.scores = scores
+
+    def similarity_search_with_score_by_vector(self, embedding, k=4, expr=None, **kwargs):
+        pks = [int(x) for x in re.findall(r"\d+", expr)] if expr else list(self.scores)
+        docs = [(Document(page_content=f"doc{pk}", metadata={"pk": pk}), self.scores[pk]) for pk in pks]
+        return docs[:k]
+
+
+def make_kb(scores: Dict[int, float], metric_type: str, monkeypatch) -> MilvusKBService:
+    milvus_kwargs = {**Settings.kb_settings.kbs_config["milvus_kwargs"], "search_params": {"metric_type": metric_type}}
+    monkeypatch.setitem(Settings.kb_settings.kbs_config, "milvus_kwargs", milvus_kwargs)
+    kb = MilvusKBService.__new__(MilvusKBService)
+    kb.milvus = FakeMilvus(scores)
+    return kb
+
+
+def contents(docs) -> List[str]:
+    return [doc.page_content for doc, _ in docs]
+
+
+def test_l2_threshold_and_top_k(monkeypatch):
+    kb = make_kb({1: 0.2, 2: 0.6, 3: 1.5}, "L2", monkeypatch)
+    docs = kb._dense_search([0.0], 3, score_threshold=1.0)
+    assert docs == [(docs[0][0], -0.2), (docs[1][0], -0.6)]
+    assert contents(kb._dense_search([0.0], 1, score_threshold=2.0)) == ["doc1"]
+
+
+@pytest.mark.parametrize("metric_type", ["IP", "COSINE"])
+def test_similarity_threshold_and_top_k(metric_type, monkeypatch):
+    kb = make_kb({1: 0.9, 2: 0.6, 3: 0.1}, metric_type, monkeypatch)
+    # 相似度越大越相关，score_threshold=0.5 对应相似度不低于 0.5
+    docs = kb._dense_search([0.0], 3, score_threshold=0.5)
+    assert docs == [(docs[0][0], 0.9), (docs[1][0], 0.6)]
+    assert contents(kb._dense_search([0.0], 1, score_threshold=2.0)) == ["doc1"]
+
+
+def test_sparse_hits_respect_threshold(monkeypatch):
+    kb = make_kb({1: 0.9, 2: 0.6, 3: 0.1}, "IP", monkeypatch)
+    hits = [(Document(page_content=f"doc{pk}", metadata={"pk": str(pk)}), 10.0 - pk) for pk in (3, 2)]
+    monkeypatch.setattr(kb, "do_sparse_search", lambda query, top_k: hits)
+    assert contents(kb._sparse_search([0.0], "q", 5, score_threshold=0.5)) == ["doc2"]
+    assert contents(kb._sparse_search([0.0], "q", 5, score_threshold=2.0)) == ["doc3", "doc2"]
@@ -0,0 +1,81 @@
+from types import SimpleNamespace
+
+from chatchat.server import utils
+from chatchat.server.utils import ModelRoutingTable
+
+
+def platform(name, **kwargs):
+    config = {
+        "platform_name": name,
+        "platform_type": "openai",
+        "api_base_url": f"http://{name}/v1",
+        "api_key": "key",
+        "api_proxy": "",
+        "api_concurrencies": 5,
+        "auto_detect_model": False,
+        **kwargs,
+    }
+    return SimpleNamespace(model_dump=lambda: dict(config))
+
+
+def make_settings(*platforms, **kwargs):
+    return SimpleNamespace(
+        MODEL_PLATFORMS=list(platforms),
+        DEFAULT_LLM_MODEL=kwargs.get("llm", "qwen"),
+        DEFAULT_EMBEDDING_MODEL=kwargs.get("embed", "bge"),
+        MODEL_DETECT_INTERVAL=60,
+    )
+
+
+def test_query():
+    table = ModelRoutingTable(make_settings(
+        platform("a", llm_models=["qwen", "glm"], embed_models=["bge"]),
+        platform("b", llm_models=["qwen"]),
+    ))
+    assert [e["platform_name"] for e in table.query(model_name="qwen")] == ["a", "b"]
+    assert [e["model_name"] for e in table.query(model_type="llm", platform_name="a")] == ["qwen", "glm"]
+    assert table.query(model_name="bge", model_type="llm") == []
+    assert list(table.type_names["llm"]) == ["qwen", "glm"]
+    assert table.query(model_name="glm")[0]["api_base_url"] == "http://a/v1"
+
+
+def test_auto_detect():
+    calls = []
+
+    def detect(url):
+        calls.append(url)
+        return {"llm_models": ["xf-llm"], "embed_models": ["xf-embed"]}
+
+    table = ModelRoutingTable(
+        make_settings(platform("xf", platform_type="xinference", auto_detect_model=True)), detect=detect
+    )
+    assert table.has_auto_detect and calls == ["http://xf"]
+    assert [e["model_type"] for e in table.query(platform_name="xf")] == ["llm", "embed"]
+    # 平台配置本身不包含检测到的模型
+    assert "llm_models" not in table.platforms["xf"]
+
+
+def test_helpers_use_table(monkeypatch):
+    settings = SimpleNamespace(model_settings=make_settings(
+        platform("a", llm_models=["glm"], embed_models=["bge"]),
+        platform("b", llm_models=["qwen"]),
+    ))
+    monkeypatch.setattr(utils, "Settings", settings)
+    monkeypatch.setattr(utils, "_routing_table", None)
+    assert utils.get_default_llm() == "qwen"
+    assert utils.get_default_embedding() == "bge"
+    table = utils.get_model_routing_table()
+    assert utils.get_model_info("qwen")["platform_name"] == "b"
+    assert [r["platform_name"] for r in utils.get_model_replicas("glm")] == ["a"]
+    assert list(utils.get_config_platforms()) == ["a", "b"]
+    assert utils.get_model_routing_table() is table
+
+    # 修改返回的字典不影响路由表
+    utils.get_model_info("qwen")["api_key"] = "changed"
+    assert utils.get_model_info("qwen")["api_key"] == "key"
+
+    # 配置变化后重新建立
+    settings.model_settings = make_settings(platform("c", llm_models=["qwen"]))
+    assert utils.get_model_info("qwen")["platform_name"] == "c"
+    assert utils.get_default_llm() == "qwen"
+    assert utils.get_model_routing_table() is not table
@@ -0,0 +1,93 @@
+import asyncio
+
+import httpx
+import pytest
+
+from chatchat.server.model_scheduler import ModelScheduler
+
+
+def make_scheduler(limits, **kwargs) -> ModelScheduler:
+    replicas = [
+        {"platform_name": name, "api_concurrencies": limit} for name, limit in limits.items()
+    ]
+    return ModelScheduler(replicas_func=lambda model_name: replicas, **kwargs)
+
+
+def test_least_requests():
+    async def main():
+        scheduler = make_scheduler({"a": 2, "b": 4})
+        chosen = [(await scheduler.acquire("m")).platform_name for _ in range(6)]
+        # 按当前请求数占并发上限的比例分配
+        assert sorted(chosen) == ["a", "a", "b", "b", "b", "b"]
+
+        # 全部占满时等待其它请求释放
+        waiter = asyncio.ensure_future(scheduler.acquire("m"))
+        await asyncio.sleep(0.01)
+        assert not waiter.done() and scheduler.stats()["m"]["waiting"] == 1
+        scheduler.release(scheduler._replicas["m"]["b"], latency=0.1)
+        assert (await asyncio.wait_for(waiter, 1)).platform_name == "b"
+
+    asyncio.run(main())
+
+
+def test_ewma():
+    async def main():
+        scheduler = make_scheduler({"a": 5, "b": 5}, policy="ewma")
+        slow, fast = scheduler._get_replicas("m")
+        slow.ewma_latency, fast.ewma_latency = 2.0, 0.5
+        assert (await scheduler.acquire("m")).platform_name == "b"
+        assert (await scheduler.acquire("m")).platform_name == "b"  # 0.5 * 2 < 2.0
+        assert (await scheduler.acquire("m")).platform_name == "b"  # 0.5 * 3 < 2.0
+        assert (await scheduler.acquire("m")).platform_name == "a"
+
+    asyncio.run(main())
+
+
+def test_retry_and_eject():
+    async def main():
+        scheduler = make_scheduler({"a": 5, "b": 5}, eject_failures=1, eject_seconds=60)
+        calls = []
+
+        async def call(replica):
+            calls.append(replica.platform_name)
+            if replica.platform_name == "a":
+                raise httpx.ConnectError("down")
+            return replica.platform_name
+
+        assert await scheduler.run("m", call) == "b"
+        assert calls == ["a", "b"]
+        # a 已被暂停调度
+        assert await scheduler.run("m", call) == "b"
+        assert calls == ["a", "b", "b"]
+        stats = {r["platform_name"]: r for r in scheduler.stats()["m"]["replicas"]}
+        assert stats["a"]["ejected"] and stats["a"]["in_flight"] == 0
+
+        # 参数错误等不会重试
+        async def bad(replica):
+            raise ValueError("bad request")
+
+        with pytest.raises(ValueError):
+            await scheduler.run("m", bad)
+        assert stats["b"]["in_flight"] == 0
+
+    asyncio.run(main())
+
+
+def test_stream_holds_slot():
+    async def main():
+        scheduler = make_scheduler({"a": 1})
+
+        async def stream(replica):
+            async def gen():
+                for i in range(3):
+                    yield i
+
+            return gen()
+
+        chunks = await scheduler.run_stream("m", stream)
+        replica = scheduler._replicas["m"]["a"]
+        assert replica.in_flight == 1
+        assert [x async for x in chunks] == [0, 1, 2]
+        assert replica.in_flight == 0 and replica.ewma_latency is not None
+
+    asyncio.run(main())
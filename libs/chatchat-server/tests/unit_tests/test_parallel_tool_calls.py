@@ -0,0 +1,69 @@
+import asyncio
+import time
+
+from langchain_core.agents import AgentAction, AgentStep
+from langchain_core.tools import tool
+
+from langchain_chatchat.agents.all_tools_agent import PlatformToolsAgentExecutor, is_concurrent_tool
+
+
+def make_tool(name, concurrent=True):
+    @tool(name)
+    def _tool(query: str) -> str:
+        """test tool"""
+        return query
+
+    if not concurrent:
+        _tool.metadata = {"concurrent": False}
+    return _tool
+
+
+class FakeExecutor:
+    """只保留 _aperform_agent_actions 依赖的方法，每个工具调用耗时 0.2 秒"""
+
+    _lookup_tool = PlatformToolsAgentExecutor._lookup_tool
+    _aperform_agent_actions = PlatformToolsAgentExecutor._aperform_agent_actions
+    mcp_tool_map = {}
+
+    def __init__(self):
+        self.running = 0
+        self.log = []
+
+    async def _aperform_agent_action(self, name_to_tool_map, color_mapping, agent_action, run_manager=None):
+        self.running += 1
+        self.log.append((agent_action.tool_input, self.running))
+        await asyncio.sleep(0.2)
+        self.running -= 1
+        return AgentStep(action=agent_action, observation=agent_action.tool_input)
+
+
+def run_actions(tools, names):
+    executor = FakeExecutor()
+    name_to_tool_map = {t.name: t for t in tools}
+    actions = [AgentAction(tool=name, tool_input=f"{name}-{i}", log="") for i, name in enumerate(names)]
+
+    async def main():
+        start = time.perf_counter()
+        steps = await executor._aperform_agent_actions(name_to_tool_map, {}, actions)
+        return steps, time.perf_counter() - start
+
+    steps, elapsed = asyncio.run(main())
+    assert [s.observation for s in steps] == [a.tool_input for a in actions]
+    return executor, elapsed
+
+
+def test_search_tools_run_concurrently():
+    tools = [make_tool("search_internet"), make_tool("arxiv"), make_tool("wikipedia_search")]
+    executor, elapsed = run_actions(tools, ["search_internet", "arxiv", "wikipedia_search"])
+    assert elapsed < 0.4  # max(0.2)，而不是 0.6
+    assert max(n for _, n in executor.log) == 3
+
+
+def test_side_effect_tool_runs_alone():
+    tools = [make_tool("search_internet"), make_tool("shell", concurrent=False)]
+    assert not is_concurrent_tool(tools[1]) and is_concurrent_tool(tools[0])
+    executor, elapsed = run_actions(tools, ["search_internet", "search_internet", "shell", "search_internet"])
+    # shell 等待前两个调用完成，之后的调用等待 shell
+    assert dict(executor.log)["shell-2"] == 1
+    assert [x for x, _ in executor.log].index("search_internet-3") == 3
+    assert 0.6 <= elapsed < 0.8
@@ -0,0 +1,84 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+import pytest
+
+from chatchat.server.knowledge_base.kb_cache.query_embedding import QueryEmbeddingBatcher
+
+
+class FakeEmbeddings:
+    def __init__(self, delay: float = 0.01):
+        self.delay = delay
+        self.calls: List[List[str]] = []
+        self.error = None
+        self._lock = threading.Lock()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        with self._lock:
+            self.calls.append(list(texts))
+        time.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return [[float(len(t)), 1.0] for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return self.embed_query(text)
+
+
+def test_concurrent_queries_batched():
+    embeddings = FakeEmbeddings()
+    batcher = QueryEmbeddingBatcher(embeddings, "bge", batch_size=64, window=0.05)
+    texts = [f"q{'x' * i}" for i in range(10)] * 2  # 每条文本并发请求两次
+    with ThreadPoolExecutor(20) as pool:
+        vectors = list(pool.map(batcher.embed_query, texts))
+    assert vectors == [[float(len(t)), 1.0] for t in texts]
+    assert len(embeddings.calls) == 1 and sorted(embeddings.calls[0]) == sorted(set(texts))
+
+    # 之后相同的查询直接命中缓存
+    assert batcher.embed_query("q") == [1.0, 1.0]
+    assert len(embeddings.calls) == 1
+    assert batcher.stats()["requests"] == 1
+
+
+def test_batch_size_and_lru():
+    embeddings = FakeEmbeddings(delay=0)
+    batcher = QueryEmbeddingBatcher(embeddings, "bge", cache_size=2, batch_size=2, window=10)
+    with ThreadPoolExecutor(2) as pool:
+        list(pool.map(batcher.embed_query, ["a", "bb"]))  # 凑满批次后不等待窗口结束
+    batcher.window = 0.01
+    batcher.embed_query("ccc")
+    assert len(embeddings.calls) == 2
+    batcher.embed_query("a")  # 已被淘汰
+    assert len(embeddings.calls) == 3
+
+
+def test_async_and_error():
+    embeddings = FakeEmbeddings()
+    batcher = QueryEmbeddingBatcher(embeddings, "bge", window=0.02)
+
+    async def main():
+        return await asyncio.gather(*[batcher.aembed_query(t) for t in ["a", "bb", "a"]])
+
+    assert asyncio.run(main()) == [[1.0, 1.0], [2.0, 1.0], [1.0, 1.0]]
+    assert len(embeddings.calls) == 1
+
+    embeddings.error = RuntimeError("down")
+    with pytest.raises(RuntimeError):
+        batcher.embed_query("zzz")
+    assert not batcher._inflight
+
+
+def test_without_batching():
+    embeddings = FakeEmbeddings(delay=0)
+    batcher = QueryEmbeddingBatcher(embeddings, "bge", batch=False)
+    with ThreadPoolExecutor(2) as pool:
+        list(pool.map(batcher.embed_query, ["a", "bb"]))
+    assert sorted(embeddings.calls) == [["a"], ["bb"]]
+    batcher.embed_query("a")
+    assert len(embeddings.calls) == 2
@@ -0,0 +1,115 @@
+import time
+from typing import Dict, List
+
+from langchain.docstore.document import Document
+
+from chatchat.server.knowledge_base.kb_cache.search_cache import (
+    SearchResultCache,
+    SharedSearchResultCache,
+)
+from chatchat.server.knowledge_base.kb_service import base
+
+
+class FakeSearch:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self) -> List[Dict]:
+        self.calls += 1
+        return [{"page_content": f"result {self.calls}", "metadata": {}}]
+
+
+def test_hit_and_version():
+    cache = SearchResultCache(max_size=10, ttl=60)
+    search = FakeSearch()
+    params = {"top_k": 3}
+    first = cache.get_or_search("kb", "hello  world", params, search)
+    # 规范化后相同的查询命中缓存，返回的是新对象
+    second = cache.get_or_search("kb", " hello world ", params, search)
+    assert search.calls == 1 and first == second and first is not second
+    cache.get_or_search("kb", "hello world", {"top_k": 5}, search)
+    assert search.calls == 2
+
+    cache.bump("kb")
+    assert cache.get_or_search("kb", "hello world", params, search)[0]["page_content"] == "result 3"
+    stats = cache.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 3
+
+
+def test_lru_and_ttl():
+    cache = SearchResultCache(max_size=2, ttl=0.05)
+    search = FakeSearch()
+    for query in ["a", "b", "a", "c"]:
+        cache.get_or_search("kb", query, {}, search)
+    assert search.calls == 3 and len(cache) == 2
+    cache.get_or_search("kb", "b", {}, search)  # b 最久未使用，已被淘汰
+    assert search.calls == 4
+
+    time.sleep(0.1)
+    cache.get_or_search("kb", "c", {}, search)
+    assert search.calls == 5
+
+
+def test_shared_cache(tmp_path):
+    path = str(tmp_path / "search_cache.db")
+    worker1 = SharedSearchResultCache(path, max_size=10, ttl=60)
+    worker2 = SharedSearchResultCache(path, max_size=10, ttl=60)
+    search = FakeSearch()
+    worker1.get_or_search("kb", "q", {}, search)
+    worker2.get_or_search("kb", "q", {}, search)
+    assert search.calls == 1
+
+    worker2.bump("kb")  # 另一个进程修改了知识库
+    worker1.get_or_search("kb", "q", {}, search)
+    assert search.calls == 2
+
+
+class FakeKBService(base.KBService):
+    def __init__(self):
+        self.kb_name = "Test"
+        self.embed_model = "bge"
+        self.searches = 0
+
+    def vs_type(self) -> str:
+        return "fake"
+
+    def check_embed_model(self):
+        return True, ""
+
+    def do_init(self):
+        pass
+
+    def do_create_kb(self):
+        pass
+
+    def do_drop_kb(self):
+        pass
+
+    def do_search(self, query, top_k, score_threshold):
+        self.searches += 1
+        return [base.DocumentWithVSId(page_content=query, metadata={}, id="1", score=0.5)]
+
+    def do_add_doc(self, docs: List[Document], **kwargs) -> List[Dict]:
+        return []
+
+    def do_delete_doc(self, kb_file, **kwargs):
+        pass
+
+    def do_clear_vs(self):
+        pass
+
+
+def test_kb_search_docs(monkeypatch):
+    cache = SearchResultCache(max_size=10, ttl=60)
+    monkeypatch.setattr(base, "get_search_cache", lambda: cache)
+    monkeypatch.setattr(base, "bump_search_version", cache.bump)
+    monkeypatch.setattr(base, "delete_files_from_db", lambda kb_name: True)
+    kb = FakeKBService()
+
+    docs = kb.search_docs("q", 3, 1.0)
+    assert kb.search_docs("q", 3, 1.0)[0].page_content == docs[0].page_content == "q"
+    assert kb.searches == 1
+
+    kb.clear_vs()
+    kb.search_docs("q", 3, 1.0)
+    assert kb.searches == 2
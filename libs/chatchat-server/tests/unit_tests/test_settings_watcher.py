@@ -0,0 +1,66 @@
+import time
+
+from chatchat.pydantic_settings_file import SettingsWatcher, settings_property
+
+
+def make_settings_class(path):
+    class FakeSettings:
+        """按 yaml_file 中的内容初始化，记录解析次数"""
+
+        model_config = {"yaml_file": str(path)}
+        loads = 0
+
+        def __init__(self):
+            FakeSettings.loads += 1
+            self.value = path.read_text()
+            self.auto_reload = True
+
+    return FakeSettings
+
+
+def test_reload_after_file_changed(tmp_path):
+    path = tmp_path / "settings.yaml"
+    path.write_text("a")
+    cls = make_settings_class(path)
+    watcher = SettingsWatcher(debounce=0.05)
+    snapshot = watcher.register(cls())
+    old = snapshot.settings
+    assert watcher.check() == [] and cls.loads == 1
+
+    path.write_text("bb")
+    assert watcher.check() == []  # 等待文件稳定
+    time.sleep(0.06)
+    assert watcher.check() == [snapshot]
+    assert snapshot.settings.value == "bb" and cls.loads == 2
+    assert old.value == "a"  # 已取得的旧实例不变
+
+    # auto_reload 为 False 时不加载，恢复后再加载
+    snapshot.settings.auto_reload = False
+    path.write_text("ccc")
+    assert watcher.check(force=True) == []
+    snapshot.settings.auto_reload = True
+    assert watcher.check(force=True) == [snapshot]
+    assert snapshot.settings.value == "ccc"
+
+
+def test_property_reads_snapshot(tmp_path, monkeypatch):
+    path = tmp_path / "settings.yaml"
+    path.write_text("a")
+    cls = make_settings_class(path)
+
+    class Container:
+        settings = settings_property(cls())
+
+    container = Container()
+    assert container.settings.value == "a"
+    for _ in range(100):
+        container.settings.value
+    assert cls.loads == 1
+
+    # 读取配置不访问文件系统
+    def fail(*args):
+        raise AssertionError("unexpected stat")
+
+    monkeypatch.setattr("os.stat", fail)
+    monkeypatch.setattr("os.path.getmtime", fail)
+    assert container.settings.value == "a"
@@ -0,0 +1,74 @@
+import sys
+import types
+
+import pytest
+
+from chatchat.server import utils
+
+
+@pytest.fixture
+def fake_tools_factory(monkeypatch):
+    """用假的 tools_factory 代替真实的工具模块，记录导入次数"""
+    registry = types.ModuleType("chatchat.server.agent.tools_factory.tools_registry")
+    registry._TOOLS_REGISTRY = {}
+    package = types.ModuleType("chatchat.server.agent.tools_factory")
+    package.__path__ = []
+    package.tools_registry = registry
+    tool_module = types.ModuleType("chatchat.server.agent.tools_factory.calculate")
+    imports = []
+
+    def load_tool(module):
+        imports.append(module.__name__)
+        registry._TOOLS_REGISTRY["calculate"] = object()
+
+    load_tool(tool_module)
+    monkeypatch.setattr(sys.modules["importlib"], "reload", load_tool)
+    monkeypatch.setitem(sys.modules, package.__name__, package)
+    monkeypatch.setitem(sys.modules, registry.__name__, registry)
+    monkeypatch.setitem(sys.modules, tool_module.__name__, tool_module)
+    if "chatchat.server.agent" in sys.modules:
+        monkeypatch.setattr(sys.modules["chatchat.server.agent"], "tools_factory", package, raising=False)
+
+    updates = []
+    monkeypatch.setattr(utils, "update_search_local_knowledgebase_tool", lambda: updates.append(1))
+    monkeypatch.setattr(utils, "_tools", None)
+    monkeypatch.setattr(utils, "_kb_tool_outdated", True)
+    monkeypatch.setattr(utils, "_kb_tool_refreshed", 0.0)
+    monkeypatch.setattr(utils.Settings.kb_settings, "KB_TOOL_REFRESH_INTERVAL", 60)
+    return registry, imports, updates
+
+
+def test_tools_cached(fake_tools_factory):
+    registry, imports, updates = fake_tools_factory
+    tools = utils.get_tool()
+    assert list(tools) == ["calculate"]
+    for _ in range(3):
+        assert utils.get_tool() is tools
+        assert utils.get_tool("calculate") is tools["calculate"]
+    assert len(imports) == 1 and len(updates) == 1
+
+    # 知识库列表变化后只更新知识库工具的描述
+    utils.mark_kb_tool_outdated()
+    assert utils.get_tool() is tools
+    assert len(imports) == 1 and len(updates) == 2
+
+
+def test_kb_tool_refreshed_periodically(fake_tools_factory, monkeypatch):
+    registry, imports, updates = fake_tools_factory
+    tools = utils.get_tool()
+    assert len(updates) == 1
+    # 其它进程修改知识库列表时本进程不会收到通知，超过刷新间隔后重新读取
+    monkeypatch.setattr(utils, "_kb_tool_refreshed", utils._kb_tool_refreshed - 61)
+    assert utils.get_tool() is tools
+    assert len(updates) == 2
+    assert utils.get_tool() is tools
+    assert len(imports) == 1 and len(updates) == 2
+
+
+def test_reload_tools(fake_tools_factory):
+    registry, imports, updates = fake_tools_factory
+    old = utils.get_tool()
+    new = utils.reload_tools()
+    assert new is not old and list(new) == ["calculate"]
+    assert new["calculate"] is not old["calculate"]
+    assert utils.get_tool() is new and len(updates) == 2
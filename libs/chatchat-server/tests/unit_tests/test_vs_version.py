@@ -0,0 +1,49 @@
+import os
+
+from chatchat.server.knowledge_base.kb_cache.faiss_cache import (
+    get_current_vs_version_path,
+    publish_vs_version,
+)
+
+
+def _save(content: str):
+    def save_func(path: str):
+        with open(os.path.join(path, "index.faiss"), "w") as fp:
+            fp.write(content)
+    return save_func
+
+
+def test_publish_vs_version(tmp_path):
+    vs_path = str(tmp_path)
+    assert get_current_vs_version_path(vs_path) is None
+
+    # 旧版本目录结构
+    _save("legacy")(vs_path)
+    assert get_current_vs_version_path(vs_path) == vs_path
+
+    v1 = publish_vs_version(vs_path, _save("v1"))
+    assert get_current_vs_version_path(vs_path) == v1
+    assert not os.path.isfile(os.path.join(vs_path, "index.faiss"))
+
+    v2 = publish_vs_version(vs_path, _save("v2"))
+    assert get_current_vs_version_path(vs_path) == v2
+    assert not os.path.isdir(v1)
+    with open(os.path.join(v2, "index.faiss")) as fp:
+        assert fp.read() == "v2"
+
+
+def test_failed_publish_keeps_current(tmp_path):
+    vs_path = str(tmp_path)
+    v1 = publish_vs_version(vs_path, _save("v1"))
+
+    def broken(path: str):
+        raise IOError("disk full")
+
+    try:
+        publish_vs_version(vs_path, broken)
+    except IOError:
+        pass
+    assert get_current_vs_version_path(vs_path) == v1
+    # 下一次发布不受残留目录影响
+    v3 = publish_vs_version(vs_path, _save("v3"))
+    assert get_current_vs_version_path(vs_path) == v3